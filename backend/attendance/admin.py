@@ -2,7 +2,14 @@
 Admin configuration for attendance models.
 """
 from django.contrib import admin
-from attendance.models import Employee, AttendanceEvent
+from attendance.models import (
+    Employee,
+    EmployeePurgeJob,
+    EmployeeReference,
+    EmployeeTombstone,
+    AttendanceEvent,
+    ShadowComparison,
+)
 
 
 @admin.register(Employee)
@@ -13,10 +20,39 @@ class EmployeeAdmin(admin.ModelAdmin):
     readonly_fields = ['created_at', 'updated_at']
 
 
+@admin.register(EmployeeReference)
+class EmployeeReferenceAdmin(admin.ModelAdmin):
+    list_display = ['employee', 'label', 'created_at']
+    search_fields = ['employee__employee_code', 'label']
+    readonly_fields = ['created_at']
+
+
+@admin.register(EmployeeTombstone)
+class EmployeeTombstoneAdmin(admin.ModelAdmin):
+    list_display = ['employee_code', 'employee_id', 'deleted_at']
+    search_fields = ['employee_code']
+    readonly_fields = ['deleted_at']
+
+
+@admin.register(EmployeePurgeJob)
+class EmployeePurgeJobAdmin(admin.ModelAdmin):
+    list_display = ['employee_code', 'mode', 'status', 'processed_events', 'total_events', 'created_at', 'finished_at']
+    list_filter = ['status', 'mode']
+    search_fields = ['employee_code']
+    readonly_fields = ['created_at', 'started_at', 'finished_at', 'owner', 'heartbeat_at']
+
+
 @admin.register(AttendanceEvent)
 class AttendanceEventAdmin(admin.ModelAdmin):
     list_display = ['employee', 'timestamp', 'score', 'decision', 'provider_name']
-    list_filter = ['decision', 'provider_name', 'timestamp']
+    list_filter = ['decision', 'provider_name', 'site', 'timestamp']
     search_fields = ['employee__employee_code', 'employee__full_name']
-    readonly_fields = ['created_at']
     date_hierarchy = 'timestamp'
+
+
+@admin.register(ShadowComparison)
+class ShadowComparisonAdmin(admin.ModelAdmin):
+    list_display = ['attendance_event', 'primary_provider', 'primary_score', 'shadow_provider', 'shadow_score', 'created_at']
+    list_filter = ['shadow_provider', 'primary_decision', 'shadow_decision']
+    readonly_fields = ['created_at']
+    date_hierarchy = 'created_at'
@@ -0,0 +1,215 @@
+"""
+Admission control for the check-in endpoint.
+
+Two layers shed load before it piles up inside the worker:
+
+- ``CheckInThrottle``: per-kiosk and global token buckets, checked by DRF
+  before the request body is parsed. Over the limit the request gets a 429
+  with ``Retry-After``.
+- ``limit_concurrency``: caps the number of check-ins processed at once.
+  Extra requests wait in a bounded queue for at most a configured time and
+  are then rejected with a 503 with ``Retry-After``.
+
+State is per process: with N workers the effective limits are N times the
+configured ones.
+"""
+import functools
+import math
+import threading
+import time
+from collections import OrderedDict
+from django.conf import settings
+from rest_framework import status
+from rest_framework.exceptions import APIException
+from rest_framework.throttling import BaseThrottle
+from attendance.metrics import ADMISSION_IN_FLIGHT, ADMISSION_QUEUE_WAIT_SECONDS, ADMISSION_SHED
+
+KIOSK_HEADER = 'X-Kiosk-Id'
+
+
+class TokenBucket:
+    """Token bucket thread-safe: `rate` tokens por segundo, hasta `burst` acumulados."""
+    
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+    
+    def try_acquire(self) -> float:
+        """
+        Intentar consumir un token.
+        
+        Returns:
+            0.0 si se consumió; si no, segundos hasta que haya un token
+        """
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens >= 1.0:
+                self.tokens -= 1.0
+                return 0.0
+            return (1.0 - self.tokens) / self.rate
+
+
+class TokenBucketMap:
+    """
+    Buckets por clave (kiosco) con un máximo de claves.
+    
+    Al superar `max_keys` se descarta el bucket usado hace más tiempo, así
+    que un cliente que rota identificadores no hace crecer la memoria.
+    """
+    
+    def __init__(self, rate: float, burst: int, max_keys: int = 10000):
+        self.rate = rate
+        self.burst = burst
+        self.max_keys = max_keys
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def try_acquire(self, key: str) -> float:
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = self._buckets[key] = TokenBucket(self.rate, self.burst)
+                if len(self._buckets) > self.max_keys:
+                    self._buckets.popitem(last=False)
+            else:
+                self._buckets.move_to_end(key)
+        return bucket.try_acquire()
+
+
+class ConcurrencyLimiter:
+    """
+    Limita los requests concurrentes con una cola de espera acotada.
+    
+    Un request espera un lugar como máximo `max_wait` segundos; si ya hay
+    `max_queue` requests esperando, se rechaza sin esperar.
+    """
+    
+    def __init__(self, max_concurrency: int, max_queue: int, max_wait: float):
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.max_wait = max_wait
+        self._semaphore = threading.BoundedSemaphore(max_concurrency)
+        self._waiting = 0
+        self._lock = threading.Lock()
+    
+    def acquire(self) -> bool:
+        """Ocupar un lugar; retorna False si el request debe descartarse."""
+        if self._semaphore.acquire(blocking=False):
+            ADMISSION_QUEUE_WAIT_SECONDS.observe(0.0)
+            return True
+        with self._lock:
+            if self._waiting >= self.max_queue:
+                return False
+            self._waiting += 1
+        start = time.perf_counter()
+        try:
+            acquired = self._semaphore.acquire(timeout=self.max_wait)
+        finally:
+            with self._lock:
+                self._waiting -= 1
+        ADMISSION_QUEUE_WAIT_SECONDS.observe(time.perf_counter() - start)
+        return acquired
+    
+    def release(self) -> None:
+        self._semaphore.release()
+
+
+class ServiceOverloaded(APIException):
+    """Límite de concurrencia alcanzado (503 con Retry-After)."""
+    
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = 'Servicio saturado, reintentar más tarde.'
+    default_code = 'overloaded'
+    
+    def __init__(self, wait: float):
+        self.wait = max(1, math.ceil(wait))
+        super().__init__()
+
+
+# Estado compartido por proceso, indexado por configuración para que un
+# cambio de settings (p.ej. override_settings en tests) use instancias nuevas
+_instances = {}
+_instances_lock = threading.Lock()
+
+
+def _shared(kind: str, factory, *config):
+    key = (kind, *config)
+    with _instances_lock:
+        instance = _instances.get(key)
+        if instance is None:
+            instance = _instances[key] = factory(*config)
+    return instance
+
+
+class CheckInThrottle(BaseThrottle):
+    """
+    Throttle de DRF con token bucket por kiosco y global.
+    
+    El kiosco se identifica por el header `X-Kiosk-Id` o, si no viene, por
+    la IP del cliente. Primero se consulta el bucket del kiosco: un kiosco
+    que excede su límite no consume tokens del global.
+    """
+    
+    def allow_request(self, request, view):
+        self._wait = None
+        kiosk_rate = getattr(settings, 'CHECKIN_KIOSK_RATE', 0.0)
+        if kiosk_rate > 0:
+            buckets = _shared(
+                'kiosk', TokenBucketMap, kiosk_rate, getattr(settings, 'CHECKIN_KIOSK_BURST', 5)
+            )
+            kiosk = request.headers.get(KIOSK_HEADER) or self.get_ident(request)
+            wait = buckets.try_acquire(kiosk)
+            if wait:
+                ADMISSION_SHED.labels(reason='kiosk_rate').inc()
+                self._wait = wait
+                return False
+        
+        global_rate = getattr(settings, 'CHECKIN_GLOBAL_RATE', 0.0)
+        if global_rate > 0:
+            bucket = _shared(
+                'global', TokenBucket, global_rate, getattr(settings, 'CHECKIN_GLOBAL_BURST', 50)
+            )
+            wait = bucket.try_acquire()
+            if wait:
+                ADMISSION_SHED.labels(reason='global_rate').inc()
+                self._wait = wait
+                return False
+        return True
+    
+    def wait(self):
+        return self._wait
+
+
+def limit_concurrency(method):
+    """
+    Decorador para métodos de APIView que aplica CHECKIN_MAX_CONCURRENCY.
+    
+    Con el límite en 0 no hace nada. ServiceOverloaded se convierte en la
+    respuesta 503 mediante el manejador de excepciones de DRF.
+    """
+    @functools.wraps(method)
+    def wrapper(view, request, *args, **kwargs):
+        max_concurrency = getattr(settings, 'CHECKIN_MAX_CONCURRENCY', 0)
+        if max_concurrency <= 0:
+            return method(view, request, *args, **kwargs)
+        
+        max_wait = getattr(settings, 'CHECKIN_QUEUE_TIMEOUT_MS', 2000) / 1000.0
+        limiter = _shared(
+            'concurrency', ConcurrencyLimiter,
+            max_concurrency, getattr(settings, 'CHECKIN_MAX_QUEUE', 32), max_wait
+        )
+        if not limiter.acquire():
+            ADMISSION_SHED.labels(reason='concurrency').inc()
+            raise ServiceOverloaded(wait=max_wait)
+        ADMISSION_IN_FLIGHT.inc()
+        try:
+            return method(view, request, *args, **kwargs)
+        finally:
+            ADMISSION_IN_FLIGHT.dec()
+            limiter.release()
+    return wrapper
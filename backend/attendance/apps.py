@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class AttendanceConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'attendance'
+    
+    def ready(self):
+        # Registrar los signal handlers
+        from attendance import signals  # noqa: F401
@@ -0,0 +1,306 @@
+"""
+Cold archive of old attendance events in compressed columnar files.
+
+``archive_events`` moves events older than a cutoff out of the
+``AttendanceEvent`` table into files under ``ARCHIVE_DIR``, then deletes the
+archived rows in chunks. Each file holds a contiguous (timestamp, id) range:
+
+    MAGIC | header length (uint32 LE) | header (JSON) | column blocks
+
+Every column is a separately zlib-compressed block, so a query only
+decompresses the columns it needs. Integer columns are delta-encoded,
+strings and thresholds are dictionary-encoded (the dictionary lives in the
+header), and the header keeps the time range and employee IDs of the file
+so ``ArchiveReader`` can skip files without decompressing them.
+"""
+import bisect
+import json
+import os
+import struct
+import sys
+import tempfile
+import zlib
+from array import array
+from datetime import datetime, timedelta, timezone as dt_timezone
+from typing import Callable, Dict, Iterator, List, Optional, Sequence
+from attendance.repositories import AttendanceRepository
+
+MAGIC = b'ATTARC1\n'
+FILE_SUFFIX = '.col'
+
+# (columna, codificación); el orden es el de las tuplas de AttendanceRepository.get_archive_batch
+COLUMNS = (
+    ('id', 'delta'),
+    ('employee_id', 'int'),
+    ('employee_code', 'dict'),
+    ('timestamp', 'delta'),
+    ('score', 'float'),
+    ('decision', 'bool'),
+    ('provider_name', 'dict'),
+    ('threshold_used', 'dict'),
+    ('site', 'dict'),
+)
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+
+
+def _to_micros(value: datetime) -> int:
+    return (value - _EPOCH) // timedelta(microseconds=1)
+
+
+def _from_micros(value: int) -> datetime:
+    return _EPOCH + timedelta(microseconds=value)
+
+
+def _pack(typecode: str, values) -> bytes:
+    data = array(typecode, values)
+    if sys.byteorder != 'little':
+        data.byteswap()
+    return zlib.compress(data.tobytes(), 6)
+
+
+def _unpack(typecode: str, blob: bytes) -> array:
+    data = array(typecode)
+    data.frombytes(zlib.decompress(blob))
+    if sys.byteorder != 'little':
+        data.byteswap()
+    return data
+
+
+def _encode_column(encoding: str, values: list):
+    """Codificar una columna; retorna (bloque comprimido, metadatos para el header)."""
+    if encoding == 'delta':
+        deltas = [values[0]] + [current - previous for previous, current in zip(values, values[1:])]
+        return _pack('q', deltas), {}
+    if encoding == 'int':
+        return _pack('q', values), {}
+    if encoding == 'float':
+        return _pack('d', values), {}
+    if encoding == 'bool':
+        return _pack('B', [1 if value else 0 for value in values]), {}
+    dictionary = {}
+    codes = [dictionary.setdefault(value, len(dictionary)) for value in values]
+    typecode = 'H' if len(dictionary) <= 0xFFFF else 'I'
+    return _pack(typecode, codes), {'dictionary': list(dictionary), 'typecode': typecode}
+
+
+def _decode_column(encoding: str, meta: dict, blob: bytes) -> list:
+    if encoding == 'delta':
+        values, total = [], 0
+        for delta in _unpack('q', blob):
+            total += delta
+            values.append(total)
+        return values
+    if encoding == 'int':
+        return _unpack('q', blob).tolist()
+    if encoding == 'float':
+        return _unpack('d', blob).tolist()
+    if encoding == 'bool':
+        return [bool(value) for value in _unpack('B', blob)]
+    dictionary = meta['dictionary']
+    return [dictionary[code] for code in _unpack(meta['typecode'], blob)]
+
+
+def write_archive_file(directory: str, rows: Sequence[tuple]) -> str:
+    """
+    Escribir un archivo columnar con filas ordenadas por (timestamp, id).
+    
+    La escritura es atómica: se escribe a un temporal, se hace fsync y
+    recién entonces se renombra.
+    
+    Returns:
+        Ruta del archivo creado
+    """
+    if not rows:
+        raise ValueError("No hay filas para archivar")
+    columns = {name: [row[index] for row in rows] for index, (name, _) in enumerate(COLUMNS)}
+    columns['timestamp'] = [_to_micros(value) for value in columns['timestamp']]
+    
+    header = {
+        'version': 1,
+        'rows': len(rows),
+        'min_timestamp': columns['timestamp'][0],
+        'max_timestamp': columns['timestamp'][-1],
+        'employee_ids': sorted(set(columns['employee_id'])),
+        'columns': {},
+    }
+    blocks, offset = [], 0
+    for name, encoding in COLUMNS:
+        blob, meta = _encode_column(encoding, columns[name])
+        header['columns'][name] = {'encoding': encoding, 'offset': offset, 'length': len(blob), **meta}
+        blocks.append(blob)
+        offset += len(blob)
+    header_bytes = json.dumps(header, separators=(',', ':')).encode()
+    
+    first = _from_micros(header['min_timestamp'])
+    last = _from_micros(header['max_timestamp'])
+    name = f"events-{first:%Y%m%d}-{last:%Y%m%d}-{rows[0][0]}{FILE_SUFFIX}"
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, name)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as output:
+            output.write(MAGIC)
+            output.write(struct.pack('<I', len(header_bytes)))
+            output.write(header_bytes)
+            for blob in blocks:
+                output.write(blob)
+            output.flush()
+            os.fsync(output.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+    return path
+
+
+class ArchiveFile:
+    """Archivo columnar; lee el header al abrir y cada columna solo cuando se pide."""
+    
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, 'rb') as source:
+            if source.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f"{path} no es un archivo de archivo de asistencia")
+            (length,) = struct.unpack('<I', source.read(4))
+            self.header = json.loads(source.read(length))
+            self._data_offset = len(MAGIC) + 4 + length
+        self._columns = {}
+    
+    @property
+    def rows(self) -> int:
+        """Número de eventos del archivo."""
+        return self.header['rows']
+    
+    def overlaps(self, start_us: Optional[int], end_us: Optional[int]) -> bool:
+        """True si el rango [start, end) del archivo puede tener eventos."""
+        if start_us is not None and self.header['max_timestamp'] < start_us:
+            return False
+        if end_us is not None and self.header['min_timestamp'] >= end_us:
+            return False
+        return True
+    
+    def has_employee(self, employee_id: Optional[int] = None, employee_code: Optional[str] = None) -> bool:
+        """True si el archivo puede tener eventos del empleado."""
+        if employee_id is not None:
+            ids = self.header['employee_ids']
+            position = bisect.bisect_left(ids, employee_id)
+            if position == len(ids) or ids[position] != employee_id:
+                return False
+        if employee_code is not None and employee_code not in self.header['columns']['employee_code']['dictionary']:
+            return False
+        return True
+    
+    def column(self, name: str) -> list:
+        """Valores decodificados de una columna."""
+        if name not in self._columns:
+            meta = self.header['columns'][name]
+            with open(self.path, 'rb') as source:
+                source.seek(self._data_offset + meta['offset'])
+                blob = source.read(meta['length'])
+            self._columns[name] = _decode_column(meta['encoding'], meta, blob)
+        return self._columns[name]
+
+
+class ArchiveReader:
+    """Consultas por rango de fechas y empleado sobre los archivos de un directorio."""
+    
+    def __init__(self, directory: str):
+        self.directory = directory
+    
+    def files(self) -> List[ArchiveFile]:
+        """Archivos del directorio, en orden de nombre (cronológico)."""
+        if not os.path.isdir(self.directory):
+            return []
+        return [
+            ArchiveFile(os.path.join(self.directory, name))
+            for name in sorted(os.listdir(self.directory))
+            if name.endswith(FILE_SUFFIX)
+        ]
+    
+    def query(
+        self,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        employee_id: Optional[int] = None,
+        employee_code: Optional[str] = None
+    ) -> Iterator[Dict[str, any]]:
+        """
+        Eventos archivados con start <= timestamp < end, opcionalmente de un empleado.
+        
+        Un evento archivado dos veces (p.ej. si se interrumpió un borrado y el
+        comando se reejecutó) se devuelve una sola vez.
+        """
+        start_us = _to_micros(start) if start is not None else None
+        end_us = _to_micros(end) if end is not None else None
+        seen = set()
+        for archive in self.files():
+            if not archive.overlaps(start_us, end_us) or not archive.has_employee(employee_id, employee_code):
+                continue
+            # Las filas están ordenadas por timestamp: el rango se ubica por bisección
+            timestamps = archive.column('timestamp')
+            low = bisect.bisect_left(timestamps, start_us) if start_us is not None else 0
+            high = bisect.bisect_left(timestamps, end_us) if end_us is not None else len(timestamps)
+            if employee_id is not None:
+                column, wanted = archive.column('employee_id'), employee_id
+            elif employee_code is not None:
+                column, wanted = archive.column('employee_code'), employee_code
+            else:
+                column = wanted = None
+            for index in range(low, high):
+                if column is not None and column[index] != wanted:
+                    continue
+                event_id = archive.column('id')[index]
+                if event_id in seen:
+                    continue
+                seen.add(event_id)
+                row = {name: archive.column(name)[index] for name, _ in COLUMNS}
+                row['timestamp'] = _from_micros(row['timestamp'])
+                yield row
+
+
+def archive_events(
+    before: Optional[datetime],
+    directory: str,
+    rows_per_file: int = 100000,
+    chunk_size: int = 1000,
+    dry_run: bool = False,
+    repository: AttendanceRepository = None,
+    employee_id: Optional[int] = None,
+    on_chunk: Optional[Callable[[int], None]] = None
+) -> Dict[str, any]:
+    """
+    Mover a archivos columnares los eventos con timestamp anterior a `before`.
+    
+    Por cada lote de hasta `rows_per_file` eventos se escribe un archivo y,
+    una vez escrito y sincronizado a disco, se borran esas filas en chunks
+    de `chunk_size` (cada chunk en su propia transacción, para no retener
+    locks ni generar una única transacción enorme).
+    
+    Args:
+        before: Límite de timestamp (None: todos los eventos)
+        employee_id: Solo los eventos de este empleado (purga de bajas)
+        on_chunk: Se llama con los eventos borrados tras cada chunk
+    
+    Returns:
+        Dict con archivos escritos, eventos archivados y eventos borrados
+    """
+    repository = repository or AttendanceRepository()
+    summary = {'files': [], 'archived': 0, 'deleted': 0}
+    after = None
+    while True:
+        rows = repository.get_archive_batch(before, after, rows_per_file, employee_id=employee_id)
+        if not rows:
+            return summary
+        summary['archived'] += len(rows)
+        if dry_run:
+            after = (rows[-1][3], rows[-1][0])
+            continue
+        summary['files'].append(write_archive_file(directory, rows))
+        ids = [row[0] for row in rows]
+        for offset in range(0, len(ids), chunk_size):
+            deleted = repository.delete_by_ids(ids[offset:offset + chunk_size])
+            summary['deleted'] += deleted
+            if on_chunk is not None:
+                on_chunk(deleted)
@@ -0,0 +1,3 @@
+"""
+Benchmarks de rendimiento para el sistema de asistencia.
+"""
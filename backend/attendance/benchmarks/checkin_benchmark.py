@@ -0,0 +1,135 @@
+"""
+Micro-benchmark for the check-in pipeline.
+"""
+import json
+import platform
+import time
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+import django
+from django.db import connection
+from attendance.benchmarks.stats import summarize
+from attendance.metrics import collect_stages
+from attendance.services import CheckInEmployeeService
+
+
+# Etapas de stage_timer en CheckInEmployeeService más el camino completo medido desde afuera
+STAGES = [
+    'get_by_code',
+    'process_capture_image',
+    'read_reference_image',
+    'prefilter',
+    'provider_verify',
+    'attendance_create',
+    'total',
+    'end_to_end',
+]
+
+
+def run_checkin_benchmark(
+    employee_codes: List[str],
+    captures: List[str],
+    iterations: int = 200,
+    warmup: int = 20,
+    service: Optional[CheckInEmployeeService] = None
+) -> Dict[str, Dict[str, float]]:
+    """
+    Medir cada etapa de CheckInEmployeeService.execute y el camino completo.
+    
+    Cada iteración es una llamada real a execute; las etapas son las
+    observaciones de stage_timer de esa llamada (ver collect_stages), así
+    que incluyen los cachés de empleados y de referencias tal como estén
+    configurados. Una etapa que execute no recorre (p.ej. provider_verify
+    si un pre-filtro decide) no suma muestra en esa iteración. Las
+    primeras `warmup` iteraciones no se registran.
+    
+    Args:
+        employee_codes: Códigos de empleados existentes y activos
+        captures: Capturas en base64 (data:image/...;base64,...)
+        iterations: Iteraciones medidas
+        warmup: Iteraciones de calentamiento
+        service: Servicio a medir (por defecto uno nuevo)
+    
+    Returns:
+        Resumen por etapa (ver summarize)
+    """
+    service = service or CheckInEmployeeService()
+    samples: Dict[str, List[int]] = {stage: [] for stage in STAGES}
+    
+    for i in range(warmup + iterations):
+        code = employee_codes[i % len(employee_codes)]
+        capture = captures[i % len(captures)]
+        
+        with collect_stages() as stages:
+            start = time.perf_counter_ns()
+            service.execute(employee_code=code, capture_image_data=capture)
+            elapsed = time.perf_counter_ns() - start
+        if i < warmup:
+            continue
+        samples['end_to_end'].append(elapsed)
+        for stage, durations in stages.items():
+            samples.setdefault(stage, []).extend(durations)
+    
+    return {stage: summarize(durations) for stage, durations in samples.items()}
+
+
+def build_report(stages: Dict[str, Dict[str, float]], config: dict, provider_name: str) -> dict:
+    """Construir el reporte JSON con metadatos del entorno."""
+    return {
+        'benchmark': 'checkin',
+        'created_at': datetime.now(timezone.utc).isoformat(),
+        'environment': {
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'database': connection.vendor,
+            'machine': platform.machine(),
+            'provider': provider_name,
+        },
+        'config': config,
+        'stages': stages,
+    }
+
+
+def compare_to_baseline(
+    report: dict,
+    baseline: dict,
+    tolerance: float = 0.25,
+    min_delta_ms: float = 0.1,
+    metric: str = 'p50_ms'
+) -> List[str]:
+    """
+    Comparar un reporte contra un baseline guardado.
+    
+    Una etapa regresa si su métrica supera la del baseline en más de
+    `tolerance` (relativo) y en más de `min_delta_ms` (absoluto, para
+    ignorar ruido en etapas de microsegundos).
+    
+    Returns:
+        Lista de mensajes, uno por etapa que regresó (vacía si no hay regresiones)
+    """
+    regressions = []
+    for stage, base_stats in baseline.get('stages', {}).items():
+        current_stats = report['stages'].get(stage)
+        if not current_stats or metric not in current_stats or metric not in base_stats:
+            continue
+        current = current_stats[metric]
+        reference = base_stats[metric]
+        if current > reference * (1 + tolerance) and current - reference > min_delta_ms:
+            regressions.append(
+                f"{stage}: {metric} {current:.3f} ms > baseline {reference:.3f} ms "
+                f"(+{(current / reference - 1) * 100 if reference else float('inf'):.0f}%)"
+            )
+    return regressions
+
+
+def load_report(path: str) -> dict:
+    """Leer un reporte/baseline JSON."""
+    with open(path, 'r', encoding='utf-8') as fh:
+        return json.load(fh)
+
+
+def write_report(report: dict, path: str) -> None:
+    """Escribir un reporte JSON."""
+    with open(path, 'w', encoding='utf-8') as fh:
+        json.dump(report, fh, indent=2, sort_keys=True)
+        fh.write('\n')
@@ -0,0 +1,82 @@
+"""
+Synthetic data generation for benchmarks.
+"""
+import base64
+import random
+from io import BytesIO
+from typing import Tuple
+from django.core.files.uploadedfile import SimpleUploadedFile
+
+
+# Tamaños típicos: captura de webcam y foto de carnet
+CAPTURE_SIZE = (640, 480)
+REFERENCE_SIZE = (480, 640)
+
+
+def make_jpeg(size: Tuple[int, int] = CAPTURE_SIZE, seed: int = 0, quality: int = 85) -> bytes:
+    """
+    Generar un JPEG sintético de tamaño realista.
+    
+    Combina un gradiente suave con ruido gaussiano para que la compresión
+    produzca archivos de tamaño comparable a una foto real.
+    
+    Args:
+        size: (ancho, alto) en píxeles
+        seed: Semilla para variar el contenido entre imágenes
+        quality: Calidad JPEG
+    
+    Returns:
+        Bytes de la imagen JPEG
+    """
+    from PIL import Image
+    
+    rng = random.Random(seed)
+    gradient = Image.linear_gradient('L').resize(size).rotate(rng.randint(0, 359))
+    noise_r = Image.effect_noise(size, rng.uniform(20, 40))
+    noise_b = Image.effect_noise(size, rng.uniform(20, 40))
+    img = Image.merge('RGB', (noise_r, gradient, noise_b))
+    
+    buffer = BytesIO()
+    img.save(buffer, format='JPEG', quality=quality)
+    return buffer.getvalue()
+
+
+def make_capture_data(size: Tuple[int, int] = CAPTURE_SIZE, seed: int = 0) -> str:
+    """Generar una captura en base64 con el prefijo que envía el frontend."""
+    encoded = base64.b64encode(make_jpeg(size, seed=seed)).decode('ascii')
+    return f"data:image/jpeg;base64,{encoded}"
+
+
+def create_employees(
+    count: int,
+    prefix: str = 'BENCH',
+    reference_size: Tuple[int, int] = REFERENCE_SIZE
+) -> list:
+    """
+    Crear empleados sintéticos con foto de referencia JPEG.
+    
+    Args:
+        count: Número de empleados
+        prefix: Prefijo del código de empleado
+        reference_size: Tamaño de la foto de referencia
+    
+    Returns:
+        Lista de empleados creados
+    """
+    from attendance.models import Employee
+    
+    employees = []
+    for i in range(count):
+        code = f"{prefix}{i:06d}"
+        photo = SimpleUploadedFile(
+            f"{code}.jpg",
+            make_jpeg(reference_size, seed=i),
+            content_type='image/jpeg'
+        )
+        employees.append(Employee.objects.create(
+            employee_code=code,
+            full_name=f"Empleado Sintético {i}",
+            status='active',
+            photo_ref=photo
+        ))
+    return employees
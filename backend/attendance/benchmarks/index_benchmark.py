@@ -0,0 +1,240 @@
+"""
+Benchmark of the AttendanceEvent index schemes on a seeded dataset.
+
+Builds two scratch tables with the shape of ``attendance_attendanceevent``:
+one with the original indexes (B-trees on ``(employee, -timestamp)``,
+``timestamp``, ``decision`` and ``capture_hash``, plus ``created_at``) and
+one with the append-optimized scheme of migrations 0006 and 0010 (BRIN on
+``timestamp``, covering ``(employee, -id)``, partial index for rejected
+attempts, no index on ``capture_hash``). Both are seeded with the same
+time-ordered rows; then single-row insert throughput and the latency of the
+list, range, rollup and duplicate-capture queries are measured on each.
+"""
+import random
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List
+from django.db import connection
+from attendance.benchmarks.stats import summarize
+
+SCHEMES = ['before', 'after']
+
+_COLUMNS = '''
+    id bigserial PRIMARY KEY,
+    employee_id bigint NOT NULL,
+    timestamp timestamptz NOT NULL,
+    score double precision NOT NULL,
+    decision boolean NOT NULL,
+    provider_name varchar(100) NOT NULL,
+    threshold_used double precision NOT NULL,
+    capture_hash varchar(64) NOT NULL,
+    site varchar(50) NOT NULL
+'''
+
+_INDEXES = {
+    'before': [
+        'CREATE INDEX {table}_emp_ts ON {table} (employee_id, timestamp DESC)',
+        'CREATE INDEX {table}_ts ON {table} (timestamp)',
+        'CREATE INDEX {table}_decision ON {table} (decision)',
+        'CREATE INDEX {table}_hash ON {table} (capture_hash)',
+    ],
+    'after': [
+        'CREATE INDEX {table}_ts_brin ON {table} USING brin (timestamp) WITH (pages_per_range = 32)',
+        'CREATE INDEX {table}_emp ON {table} (employee_id, id DESC) INCLUDE (timestamp, decision)',
+        'CREATE INDEX {table}_rejected ON {table} (id DESC) WHERE NOT decision',
+    ],
+}
+
+# Cada esquema con la consulta que usa la aplicación en ese momento:
+# antes los listados ordenaban por timestamp, ahora por id
+_LIST_ORDER = {'before': 'timestamp', 'after': 'id'}
+
+QUERIES = {
+    'list': 'SELECT * FROM {table} ORDER BY {order} DESC LIMIT 20',
+    'list_employee': 'SELECT * FROM {table} WHERE employee_id = %(employee)s ORDER BY {order} DESC LIMIT 20',
+    'list_rejected': 'SELECT * FROM {table} WHERE NOT decision ORDER BY {order} DESC LIMIT 20',
+    'count_day': (
+        'SELECT count(*) FROM {table} '
+        'WHERE timestamp >= %(day)s AND timestamp < %(day)s + interval \'1 day\''
+    ),
+    'rollup_week': (
+        'SELECT timestamp::date, count(*) FILTER (WHERE decision), count(*) FILTER (WHERE NOT decision) '
+        'FROM {table} WHERE timestamp >= %(day)s AND timestamp < %(day)s + interval \'7 days\' GROUP BY 1'
+    ),
+    'rollup_employee': (
+        'SELECT timestamp::date, count(*) FILTER (WHERE decision), count(*) FILTER (WHERE NOT decision) '
+        'FROM {table} WHERE employee_id = %(employee)s '
+        'AND timestamp >= %(day)s AND timestamp < %(day)s + interval \'30 days\' GROUP BY 1'
+    ),
+    # Búsqueda de check-ins duplicados (get_recent_by_capture) con una captura
+    # nueva, como casi todos los check-ins: antes por el índice de
+    # capture_hash; ahora lee los últimos eventos del empleado del índice
+    # (employee, -id) y, sin ninguno en la ventana, no busca el hash
+    'recent_capture': {
+        'before': (
+            'SELECT * FROM {table} WHERE employee_id = %(employee)s AND timestamp >= %(recent)s '
+            'AND capture_hash = %(hash)s ORDER BY id DESC LIMIT 1'
+        ),
+        'after': 'SELECT id, timestamp FROM {table} WHERE employee_id = %(employee)s ORDER BY id DESC LIMIT 20',
+    },
+}
+
+
+def _sql(scheme: str, query: str) -> str:
+    template = QUERIES[query]
+    if isinstance(template, dict):
+        template = template[scheme]
+    return template.format(table=_table(scheme), order=_LIST_ORDER[scheme])
+
+
+def _params(rng: random.Random, employees: int, start: datetime, days: int) -> Dict[str, object]:
+    return {
+        'employee': rng.randint(1, employees),
+        'day': start + timedelta(days=rng.randrange(max(1, days - 30))),
+        'recent': start + timedelta(days=days, minutes=-5),
+        'hash': f'{rng.getrandbits(256):064x}',
+    }
+
+
+def _table(scheme: str) -> str:
+    return f'bench_attendance_{scheme}'
+
+
+def _seed_sql(table: str, created_at: bool) -> str:
+    # Filas en orden de tiempo, como las escribe el check-in
+    return f'''
+        INSERT INTO {table} (employee_id, timestamp, score, decision, provider_name,
+                             threshold_used, capture_hash, site{', created_at' if created_at else ''})
+        SELECT 1 + (g %% %(employees)s),
+               %(start)s + g::float8 * %(step)s * interval '1 microsecond',
+               random(),
+               random() > 0.15,
+               'dummy',
+               0.8,
+               md5(g::text) || md5((g + 1)::text),
+               'SITE' || (g %% 5)
+               {", %(start)s + g::float8 * %(step)s * interval '1 microsecond'" if created_at else ''}
+        FROM generate_series(%(first)s, %(last)s) AS g
+    '''
+
+
+def _create(cursor, scheme: str, rows: int, employees: int, start: datetime, step_us: int) -> Dict[str, float]:
+    table = _table(scheme)
+    created_at = scheme == 'before'
+    cursor.execute(f'DROP TABLE IF EXISTS {table}')
+    cursor.execute(
+        f'CREATE TABLE {table} ({_COLUMNS}{", created_at timestamptz NOT NULL" if created_at else ""})'
+    )
+    params = {'employees': employees, 'start': start, 'step': step_us, 'first': 1, 'last': rows}
+    seed_start = time.perf_counter()
+    cursor.execute(_seed_sql(table, created_at), params)
+    seed_s = time.perf_counter() - seed_start
+    
+    build_start = time.perf_counter()
+    for statement in _INDEXES[scheme]:
+        cursor.execute(statement.format(table=table))
+    build_s = time.perf_counter() - build_start
+    
+    # VACUUM no puede correr dentro de una transacción (p.ej. en los tests)
+    cursor.execute(f'{"ANALYZE" if connection.in_atomic_block else "VACUUM ANALYZE"} {table}')
+    return {'seed_s': seed_s, 'index_build_s': build_s}
+
+
+def _sizes(cursor, scheme: str) -> Dict[str, int]:
+    table = _table(scheme)
+    cursor.execute('SELECT pg_relation_size(%s), pg_indexes_size(%s)', [table, table])
+    table_bytes, index_bytes = cursor.fetchone()
+    cursor.execute(
+        'SELECT indexname, pg_relation_size(indexname::regclass) FROM pg_indexes WHERE tablename = %s',
+        [table]
+    )
+    indexes = {name[len(table) + 1:] or name: size for name, size in cursor.fetchall()}
+    return {'table_bytes': table_bytes, 'index_bytes': index_bytes, 'indexes': indexes}
+
+
+def _measure_inserts(cursor, scheme: str, count: int, employees: int, start: datetime, step_us: int, offset: int):
+    """Inserts de a una fila, como los hace el check-in."""
+    table = _table(scheme)
+    created_at = scheme == 'before'
+    sql = _seed_sql(table, created_at)
+    samples = []
+    begin = time.perf_counter()
+    for index in range(offset + 1, offset + count + 1):
+        params = {'employees': employees, 'start': start, 'step': step_us, 'first': index, 'last': index}
+        sample_start = time.perf_counter_ns()
+        cursor.execute(sql, params)
+        samples.append(time.perf_counter_ns() - sample_start)
+    elapsed = time.perf_counter() - begin
+    return {'rows_per_s': count / elapsed if elapsed else 0.0, 'latency': summarize(samples)}
+
+
+def _measure_queries(cursor, scheme: str, repeat: int, employees: int, start: datetime, days: int, seed: int):
+    results = {}
+    for name in QUERIES:
+        sql = _sql(scheme, name)
+        rng = random.Random(seed)
+        samples = []
+        for _ in range(repeat):
+            params = _params(rng, employees, start, days)
+            sample_start = time.perf_counter_ns()
+            cursor.execute(sql, params)
+            cursor.fetchall()
+            samples.append(time.perf_counter_ns() - sample_start)
+        results[name] = summarize(samples)
+    return results
+
+
+def run_index_benchmark(
+    rows: int = 2_000_000,
+    employees: int = 2000,
+    days: int = 365,
+    inserts: int = 5000,
+    repeat: int = 50,
+    seed: int = 42,
+    keep: bool = False
+) -> Dict[str, Dict]:
+    """
+    Comparar los esquemas de índices 'before' y 'after' (solo PostgreSQL).
+    
+    Args:
+        rows: Filas sembradas en cada tabla
+        employees: Empleados distintos
+        days: Días que cubren las filas sembradas
+        inserts: Inserts de una fila medidos sobre la tabla ya indexada
+        repeat: Repeticiones de cada consulta
+        seed: Semilla de los parámetros de las consultas
+        keep: No borrar las tablas al terminar
+    
+    Returns:
+        Dict por esquema con tiempos de siembra y creación de índices,
+        tamaños, throughput y latencia de inserts y latencia por consulta
+    """
+    if connection.vendor != 'postgresql':
+        raise RuntimeError("El benchmark de índices requiere PostgreSQL")
+    start = datetime.now(timezone.utc) - timedelta(days=days)
+    step_us = max(1, int(days * 86400 * 1e6 / max(rows, 1)))
+    results = {}
+    with connection.cursor() as cursor:
+        try:
+            for scheme in SCHEMES:
+                result = _create(cursor, scheme, rows, employees, start, step_us)
+                result['queries'] = _measure_queries(cursor, scheme, repeat, employees, start, days, seed)
+                result['insert'] = _measure_inserts(cursor, scheme, inserts, employees, start, step_us, rows)
+                result.update(_sizes(cursor, scheme))
+                results[scheme] = result
+        finally:
+            if not keep:
+                for scheme in SCHEMES:
+                    cursor.execute(f'DROP TABLE IF EXISTS {_table(scheme)}')
+    return results
+
+
+def explain(scheme: str, query: str) -> List[str]:
+    """Plan de una consulta sobre una tabla conservada con keep=True."""
+    sql = _sql(scheme, query)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'EXPLAIN ' + sql,
+            _params(random.Random(0), 1, datetime.now(timezone.utc) - timedelta(days=30), 30)
+        )
+        return [row[0] for row in cursor.fetchall()]
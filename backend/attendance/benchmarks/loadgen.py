@@ -0,0 +1,293 @@
+"""
+Load generator for the attendance API.
+
+Can be run as a script (``python -m attendance.benchmarks.loadgen``) or
+through ``python manage.py loadtest``. Only needs the standard library and
+Pillow; it talks to the server over HTTP.
+"""
+import argparse
+import json
+import random
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+from urllib import error, request as urlrequest
+from attendance.benchmarks.fixtures import CAPTURE_SIZE, REFERENCE_SIZE, make_capture_data, make_jpeg
+from attendance.benchmarks.stats import summarize
+
+
+ENDPOINTS = ('checkin', 'employees', 'events')
+DEFAULT_MIX = 'checkin=8,employees=1,events=1'
+
+
+class EndpointStats:
+    """Resultados acumulados de un endpoint."""
+    
+    def __init__(self):
+        self.latencies_ns: List[int] = []
+        self.statuses: Counter = Counter()
+        self.errors = 0
+        self._lock = threading.Lock()
+    
+    def record(self, latency_ns: int, status: int, ok: bool) -> None:
+        with self._lock:
+            self.latencies_ns.append(latency_ns)
+            self.statuses[status] += 1
+            if not ok:
+                self.errors += 1
+    
+    def report(self, elapsed_s: float) -> dict:
+        total = len(self.latencies_ns)
+        return {
+            'requests': total,
+            'errors': self.errors,
+            'error_rate': (self.errors / total) if total else 0.0,
+            'throughput_rps': (total / elapsed_s) if elapsed_s else 0.0,
+            'statuses': {str(code): count for code, count in sorted(self.statuses.items())},
+            'latency': summarize(self.latencies_ns),
+        }
+
+
+def parse_mix(value: str) -> Dict[str, float]:
+    """Parsear pesos de endpoints: 'checkin=8,employees=1,events=1'."""
+    weights = {}
+    for part in value.split(','):
+        name, _, weight = part.partition('=')
+        name = name.strip()
+        if name not in ENDPOINTS:
+            raise ValueError(f"Endpoint desconocido en --mix: {name}")
+        weights[name] = float(weight or 1)
+    if not any(weights.values()):
+        raise ValueError('--mix debe tener al menos un peso positivo')
+    return weights
+
+
+def _encode_multipart(fields: Dict[str, str], files: Dict[str, tuple]):
+    boundary = uuid.uuid4().hex
+    lines = []
+    for name, value in fields.items():
+        lines.append(f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n{value}\r\n'.encode())
+    for name, (filename, content, content_type) in files.items():
+        lines.append(
+            f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"; filename="{filename}"\r\n'
+            f'Content-Type: {content_type}\r\n\r\n'.encode() + content + b'\r\n'
+        )
+    lines.append(f'--{boundary}--\r\n'.encode())
+    return b''.join(lines), f'multipart/form-data; boundary={boundary}'
+
+
+class LoadGenerator:
+    """
+    Generador de carga HTTP contra un servidor local.
+    
+    Con `rate` > 0 trabaja en lazo abierto: las llegadas siguen un proceso
+    de Poisson y la latencia se mide desde el instante programado, de modo
+    que la espera por falta de workers cuenta como latencia. Con `rate` = 0
+    trabaja en lazo cerrado con `concurrency` clientes sin pausa.
+    """
+    
+    def __init__(
+        self,
+        base_url: str,
+        employee_codes: List[str],
+        captures: List[str],
+        concurrency: int = 8,
+        rate: float = 0.0,
+        duration: float = 30.0,
+        mix: Optional[Dict[str, float]] = None,
+        timeout: float = 10.0,
+        seed: int = 0
+    ):
+        self.base_url = base_url.rstrip('/')
+        self.employee_codes = employee_codes
+        self.captures = captures
+        self.concurrency = concurrency
+        self.rate = rate
+        self.duration = duration
+        self.mix = mix or parse_mix(DEFAULT_MIX)
+        self.timeout = timeout
+        self.rng = random.Random(seed)
+        self.stats = {name: EndpointStats() for name in self.mix}
+    
+    def _build_request(self, endpoint: str) -> urlrequest.Request:
+        code = self.rng.choice(self.employee_codes)
+        if endpoint == 'checkin':
+            body = json.dumps({
+                'employee_code': code,
+                'capture_image': self.rng.choice(self.captures),
+            }).encode()
+            return urlrequest.Request(
+                f'{self.base_url}/api/check-in/',
+                data=body,
+                headers={'Content-Type': 'application/json'},
+                method='POST'
+            )
+        if endpoint == 'employees':
+            return urlrequest.Request(f'{self.base_url}/api/employees/')
+        return urlrequest.Request(f'{self.base_url}/api/attendance-events/?employee_code={code}')
+    
+    def _pick_endpoint(self) -> str:
+        names = list(self.mix)
+        return self.rng.choices(names, weights=[self.mix[name] for name in names])[0]
+    
+    def _send(self, endpoint: str, req: urlrequest.Request, scheduled_ns: int) -> None:
+        status = 0
+        try:
+            with urlrequest.urlopen(req, timeout=self.timeout) as response:
+                response.read()
+                status = response.status
+        except error.HTTPError as e:
+            status = e.code
+        except Exception:
+            status = 0
+        latency = time.perf_counter_ns() - scheduled_ns
+        self.stats[endpoint].record(latency, status, 200 <= status < 400)
+    
+    def _closed_loop_worker(self, deadline: float) -> None:
+        while time.perf_counter() < deadline:
+            endpoint = self._pick_endpoint()
+            req = self._build_request(endpoint)
+            self._send(endpoint, req, time.perf_counter_ns())
+    
+    def run(self) -> dict:
+        """Ejecutar la carga y devolver el reporte."""
+        start = time.perf_counter()
+        deadline = start + self.duration
+        with ThreadPoolExecutor(max_workers=self.concurrency) as pool:
+            if self.rate > 0:
+                next_arrival = start
+                while True:
+                    next_arrival += self.rng.expovariate(self.rate)
+                    if next_arrival >= deadline:
+                        break
+                    delay = next_arrival - time.perf_counter()
+                    if delay > 0:
+                        time.sleep(delay)
+                    scheduled_ns = time.perf_counter_ns() - int(max(0.0, -delay) * 1e9)
+                    endpoint = self._pick_endpoint()
+                    pool.submit(self._send, endpoint, self._build_request(endpoint), scheduled_ns)
+            else:
+                for _ in range(self.concurrency):
+                    pool.submit(self._closed_loop_worker, deadline)
+        elapsed = time.perf_counter() - start
+        
+        return {
+            'benchmark': 'loadtest',
+            'config': {
+                'base_url': self.base_url,
+                'concurrency': self.concurrency,
+                'rate': self.rate,
+                'duration': self.duration,
+                'mix': self.mix,
+                'employees': len(self.employee_codes),
+            },
+            'elapsed_s': elapsed,
+            'endpoints': {name: stats.report(elapsed) for name, stats in self.stats.items()},
+        }
+
+
+def seed_employees(base_url: str, count: int, prefix: str = 'LOAD', timeout: float = 30.0) -> List[str]:
+    """
+    Crear `count` empleados vía API (los existentes se reutilizan).
+    
+    Returns:
+        Lista de códigos de empleado
+    """
+    base_url = base_url.rstrip('/')
+    codes = []
+    for i in range(count):
+        code = f'{prefix}{i:06d}'
+        body, content_type = _encode_multipart(
+            {'employee_code': code, 'full_name': f'Empleado Carga {i}', 'status': 'active'},
+            {'photo_ref': (f'{code}.jpg', make_jpeg(REFERENCE_SIZE, seed=i), 'image/jpeg')}
+        )
+        req = urlrequest.Request(
+            f'{base_url}/api/employees/',
+            data=body,
+            headers={'Content-Type': content_type},
+            method='POST'
+        )
+        try:
+            with urlrequest.urlopen(req, timeout=timeout) as response:
+                response.read()
+        except error.HTTPError as e:
+            # 400 = el código ya existe; cualquier otro error es fatal
+            if e.code != 400:
+                raise
+        codes.append(code)
+    return codes
+
+
+def format_report(report: dict) -> str:
+    """Tabla legible del reporte."""
+    header = f"{'endpoint':<10} {'reqs':>7} {'rps':>8} {'err%':>6} {'p50 ms':>8} {'p90 ms':>8} {'p99 ms':>8} {'max ms':>8}"
+    lines = [header, '-' * len(header)]
+    for name, data in report['endpoints'].items():
+        latency = data['latency']
+        if not latency['n']:
+            lines.append(f"{name:<10} {0:>7}")
+            continue
+        lines.append(
+            f"{name:<10} {data['requests']:>7} {data['throughput_rps']:>8.1f} "
+            f"{data['error_rate'] * 100:>6.2f} {latency['p50_ms']:>8.1f} {latency['p90_ms']:>8.1f} "
+            f"{latency['p99_ms']:>8.1f} {latency['max_ms']:>8.1f}"
+        )
+    return '\n'.join(lines)
+
+
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+    """Argumentos compartidos por el script y el comando de manage.py."""
+    parser.add_argument('--base-url', default='http://localhost:8000', help='URL del servidor')
+    parser.add_argument('--employees', type=int, default=100, help='Empleados a sembrar')
+    parser.add_argument('--prefix', default='LOAD', help='Prefijo de los códigos sembrados')
+    parser.add_argument('--skip-seed', action='store_true', help='No crear empleados (ya existen)')
+    parser.add_argument('--captures', type=int, default=5, help='Capturas distintas a enviar')
+    parser.add_argument('--concurrency', type=int, default=8, help='Clientes concurrentes')
+    parser.add_argument('--rate', type=float, default=0.0, help='Llegadas por segundo (0 = lazo cerrado)')
+    parser.add_argument('--duration', type=float, default=30.0, help='Duración en segundos')
+    parser.add_argument('--mix', default=DEFAULT_MIX, help='Pesos por endpoint')
+    parser.add_argument('--timeout', type=float, default=10.0, help='Timeout por request (s)')
+    parser.add_argument('--output', help='Ruta del reporte JSON')
+
+
+def run(options: dict, out=sys.stdout) -> dict:
+    """Sembrar empleados, generar carga y reportar."""
+    if options['skip_seed']:
+        codes = [f"{options['prefix']}{i:06d}" for i in range(options['employees'])]
+    else:
+        out.write(f"Sembrando {options['employees']} empleados...\n")
+        codes = seed_employees(options['base_url'], options['employees'], prefix=options['prefix'])
+    
+    captures = [make_capture_data(CAPTURE_SIZE, seed=10_000 + i) for i in range(options['captures'])]
+    generator = LoadGenerator(
+        options['base_url'],
+        codes,
+        captures,
+        concurrency=options['concurrency'],
+        rate=options['rate'],
+        duration=options['duration'],
+        mix=parse_mix(options['mix']),
+        timeout=options['timeout']
+    )
+    report = generator.run()
+    out.write(format_report(report) + '\n')
+    
+    if options.get('output'):
+        with open(options['output'], 'w', encoding='utf-8') as fh:
+            json.dump(report, fh, indent=2, sort_keys=True)
+    return report
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description='Generador de carga para la API de asistencia')
+    add_arguments(parser)
+    run(vars(parser.parse_args(argv)))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,127 @@
+"""
+Benchmark of the per-request logging overhead on the check-in hot path.
+"""
+import base64
+import logging
+import os
+import queue
+import time
+from logging.handlers import QueueListener
+from typing import Dict, List
+from attendance.benchmarks.stats import summarize
+from core.log_queue import NonBlockingQueueHandler
+
+
+VARIANTS = ['eager_sync', 'lazy_sync', 'lazy_queue']
+
+
+class SlowStream:
+    """Stream que simula un destino lento (pipe, driver de logs de docker, disco)."""
+    
+    def __init__(self, latency_us: float):
+        self.latency = latency_us / 1e6
+        self.writes = 0
+    
+    def write(self, data: str) -> int:
+        if self.latency > 0:
+            time.sleep(self.latency)
+        self.writes += 1
+        return len(data)
+    
+    def flush(self) -> None:
+        pass
+
+
+def _eager_request(logger: logging.Logger, data: Dict[str, str]) -> None:
+    # Réplica del patrón anterior de CheckInView.post y DummyProvider.verify
+    logger.info(f"Datos recibidos en check-in: {list(data.keys())}")
+    logger.debug(f"Employee code recibido: {data.get('employee_code', 'NO ENCONTRADO')}")
+    logger.debug(f"Imagen recibida (primeros 100 chars): {str(data.get('capture_image', 'NO ENCONTRADO'))[:100]}")
+    logger.debug(f"DummyProvider: score={0.87:.2f}, match={True}, ref_len={48000}, cap_len={len(data['capture_image'])}")
+    logger.info(f"Check-in registrado: {data['employee_code']} - score={0.87:.2f}, decision={True}, threshold={0.75}")
+
+
+def _lazy_request(logger: logging.Logger, data: Dict[str, str]) -> None:
+    # Patrón actual: formato diferido y campos estructurados
+    logger.info("Datos recibidos en check-in: %s", data.keys())
+    logger.debug("Employee code recibido: %s", data.get('employee_code', 'NO ENCONTRADO'))
+    logger.debug("Imagen recibida (primeros 100 chars): %.100s", data.get('capture_image', 'NO ENCONTRADO'))
+    logger.debug(
+        "DummyProvider: score=%.2f, match=%s, ref_len=%d, cap_len=%d",
+        0.87, True, 48000, len(data['capture_image'])
+    )
+    logger.info(
+        "Check-in registrado: %s - score=%.2f, decision=%s, threshold=%s",
+        data['employee_code'], 0.87, True, 0.75,
+        extra={'employee_code': data['employee_code'], 'score': 0.87, 'decision': True, 'threshold': 0.75}
+    )
+
+
+def make_request_data(image_bytes: int = 75_000) -> Dict[str, str]:
+    """Payload de check-in con una imagen base64 de ~4/3 * image_bytes caracteres."""
+    image = base64.b64encode(os.urandom(image_bytes)).decode('ascii')
+    return {'employee_code': 'BENCH0001', 'capture_image': f"data:image/jpeg;base64,{image}"}
+
+
+def run_logging_benchmark(
+    iterations: int = 2000,
+    warmup: int = 100,
+    latency_us: float = 200.0,
+    level: int = logging.INFO,
+    queue_size: int = 10000
+) -> Dict[str, Dict]:
+    """
+    Medir el costo por request de cada variante de logging.
+    
+    Un "request" emite 2 registros INFO y 3 DEBUG, igual que el camino de
+    check-in. Las variantes son: f-strings con handler síncrono
+    (eager_sync), formato diferido con handler síncrono (lazy_sync) y
+    formato diferido detrás de QueueHandler/QueueListener (lazy_queue).
+    
+    Args:
+        iterations: Requests medidos por variante
+        warmup: Requests de calentamiento (no se registran)
+        latency_us: Latencia simulada por escritura del destino
+        level: Nivel del logger
+        queue_size: Tamaño de la cola en la variante lazy_queue
+    
+    Returns:
+        Dict por variante con el resumen de latencias y contadores
+    """
+    data = make_request_data()
+    results = {}
+    for variant in VARIANTS:
+        stream = SlowStream(latency_us)
+        sink = logging.StreamHandler(stream)
+        sink.setFormatter(logging.Formatter('%(asctime)s [%(levelname)s] %(name)s: %(message)s'))
+        logger = logging.getLogger(f'attendance.benchmarks.logging.{variant}')
+        logger.propagate = False
+        logger.setLevel(level)
+        listener = None
+        handler = sink
+        if variant == 'lazy_queue':
+            handler = NonBlockingQueueHandler(queue.Queue(maxsize=queue_size))
+            listener = QueueListener(handler.queue, sink)
+            listener.start()
+        logger.handlers = [handler]
+        emit = _eager_request if variant == 'eager_sync' else _lazy_request
+        
+        samples: List[int] = []
+        try:
+            for i in range(warmup + iterations):
+                start = time.perf_counter_ns()
+                emit(logger, data)
+                elapsed = time.perf_counter_ns() - start
+                if i >= warmup:
+                    samples.append(elapsed)
+        finally:
+            if listener is not None:
+                listener.stop()
+            logger.handlers = []
+        
+        results[variant] = {
+            'latency': summarize(samples),
+            'writes': stream.writes,
+            'dropped': getattr(handler, 'dropped', 0),
+        }
+    return results
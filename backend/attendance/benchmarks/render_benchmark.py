@@ -0,0 +1,106 @@
+"""
+Benchmark of list-page serialization and rendering.
+
+Seeds employees and attendance events inside a transaction that is rolled
+back, then renders the same page of ``rows`` objects (queryset already
+evaluated, so only CPU is measured) with every combination of the DRF model
+serializers and the flat list serializers, and of ``JSONRenderer`` and
+``FastJSONRenderer``.
+"""
+import time
+from datetime import timedelta
+from typing import Dict
+from django.conf import settings
+from django.db import transaction
+from django.test import RequestFactory
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+from attendance.benchmarks.stats import summarize
+from attendance.models import AttendanceEvent, Employee
+from attendance.renderers import FastJSONRenderer, orjson
+from attendance.serializers import (
+    AttendanceEventListSerializer,
+    AttendanceEventSerializer,
+    EmployeeListSerializer,
+    EmployeeSerializer,
+)
+
+SERIALIZERS = {
+    'employees': {'model': EmployeeSerializer, 'flat': EmployeeListSerializer},
+    'events': {'model': AttendanceEventSerializer, 'flat': AttendanceEventListSerializer},
+}
+RENDERERS = {'json': JSONRenderer, 'fast': FastJSONRenderer}
+
+
+def _seed(rows: int) -> Dict[str, list]:
+    now = timezone.now()
+    employees = Employee.objects.bulk_create([
+        Employee(
+            employee_code=f"RND{index:06d}",
+            full_name=f"Empleada Número {index} Muñoz",
+            photo_ref=f"photos/rnd{index:06d}.jpg"
+        )
+        for index in range(rows)
+    ])
+    events = AttendanceEvent.objects.bulk_create([
+        AttendanceEvent(
+            employee=employees[index % len(employees)],
+            timestamp=now - timedelta(seconds=index),
+            score=0.5 + (index % 50) / 100,
+            decision=index % 3 != 0,
+            provider_name='dummy',
+            threshold_used=0.8,
+            site='NORTE'
+        )
+        for index in range(rows)
+    ])
+    ids = [event.id for event in events]
+    return {
+        'employees': list(Employee.objects.filter(employee_code__startswith='RND').order_by('id')),
+        'events': list(AttendanceEvent.objects.select_related('employee').filter(id__in=ids).order_by('-id')),
+    }
+
+
+def run_render_benchmark(rows: int = 1000, repeat: int = 30, warmup: int = 3) -> Dict[str, Dict]:
+    """
+    Medir serialización + renderizado de una página de `rows` objetos.
+    
+    Args:
+        rows: Objetos por página
+        repeat: Repeticiones medidas por combinación
+        warmup: Repeticiones previas no medidas
+    
+    Returns:
+        Dict por listado ('employees', 'events') y combinación
+        ('model+json', 'flat+fast', ...) con latencia, páginas por segundo
+        y tamaño en bytes; 'identical' indica si todas las combinaciones
+        generan el mismo JSON
+    """
+    # Un host permitido: las URLs de foto son absolutas
+    hosts = [host for host in settings.ALLOWED_HOSTS if host != '*' and not host.startswith('.')]
+    request = RequestFactory().get('/api/', HTTP_HOST=hosts[0] if hosts else 'localhost')
+    context = {'request': request}
+    results = {'rows': rows, 'orjson': orjson is not None}
+    with transaction.atomic():
+        pages = _seed(rows)
+        for listing, serializers in SERIALIZERS.items():
+            outputs = set()
+            results[listing] = {}
+            for serializer_name, serializer_class in serializers.items():
+                for renderer_name, renderer_class in RENDERERS.items():
+                    renderer = renderer_class()
+                    samples = []
+                    for iteration in range(warmup + repeat):
+                        sample_start = time.perf_counter_ns()
+                        data = serializer_class(pages[listing], many=True, context=context).data
+                        body = renderer.render({'count': rows, 'results': data}, 'application/json')
+                        if iteration >= warmup:
+                            samples.append(time.perf_counter_ns() - sample_start)
+                    outputs.add(body)
+                    summary = summarize(samples)
+                    summary['pages_per_s'] = 1000.0 / summary['mean_ms'] if summary['mean_ms'] else 0.0
+                    summary['bytes'] = len(body)
+                    results[listing][f"{serializer_name}+{renderer_name}"] = summary
+            results[listing]['identical'] = len(outputs) == 1
+        transaction.set_rollback(True)
+    return results
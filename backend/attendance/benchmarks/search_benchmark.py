@@ -0,0 +1,81 @@
+"""
+Benchmark of the trigram employee search on a seeded roster.
+
+Seeds ``Employee`` with synthetic Spanish names (with and without accents)
+inside a transaction, runs the same queries the search endpoint runs (the
+first page plus the paginator's count) and rolls the transaction back, so
+the real roster is left untouched.
+"""
+import random
+import time
+from typing import Dict
+from django.db import connection, transaction
+from attendance.benchmarks.stats import summarize
+from attendance.repositories import EmployeeRepository
+
+FIRST_NAMES = [
+    'José', 'María', 'Juan', 'Ana', 'Luis', 'Lucía', 'Andrés', 'Sofía', 'Martín', 'Inés',
+    'Ramón', 'Verónica', 'Tomás', 'Mónica', 'Raúl', 'Begoña', 'Óscar', 'Ángela', 'Iván', 'Noemí',
+]
+LAST_NAMES = [
+    'Pérez', 'González', 'Rodríguez', 'Fernández', 'López', 'Martínez', 'Sánchez', 'Gómez',
+    'Díaz', 'Hernández', 'Muñoz', 'Álvarez', 'Jiménez', 'Ruiz', 'Domínguez', 'Vázquez',
+    'Castaño', 'Ibáñez', 'Peña', 'Ordóñez', 'Núñez', 'Cortés', 'Suárez', 'Ríos',
+]
+
+# Lo que escribe un operador: sin acentos, con acentos, parciales, con errores y por código
+TERMS = [
+    'jose perez', 'María González', 'nunez', 'ordonez', 'ibañez', 'fernandes', 'gonzales',
+    'lucia', 'ramon castaño', 'SRC0001234', 'SRC00999', 'suarez rios', 'an', 'xyzzy',
+]
+
+_SEED_SQL = '''
+    INSERT INTO attendance_employee (employee_code, full_name, status, photo_ref, created_at, updated_at)
+    SELECT 'SRC' || lpad(g::text, 7, '0'),
+           (%(first)s::text[])[1 + (g * 7) %% %(n_first)s] || ' ' ||
+           (%(last)s::text[])[1 + (g * 13) %% %(n_last)s] || ' ' ||
+           (%(last)s::text[])[1 + (g / 3) %% %(n_last)s],
+           'active', 'photos/bench.jpg', now(), now()
+    FROM generate_series(1, %(count)s) AS g
+'''
+
+
+def run_search_benchmark(employees: int = 100_000, repeat: int = 20, page_size: int = 20, seed: int = 42) -> Dict:
+    """
+    Medir la búsqueda de empleados sobre un padrón sembrado (solo PostgreSQL).
+    
+    Args:
+        employees: Empleados sembrados (se descartan al terminar)
+        repeat: Repeticiones de cada término
+        page_size: Tamaño de la primera página
+        seed: Semilla del orden de los términos
+    
+    Returns:
+        Dict con la latencia total y por término (página + count del paginador)
+    """
+    if connection.vendor != 'postgresql':
+        raise RuntimeError("El benchmark de búsqueda requiere PostgreSQL")
+    results = {'employees': employees, 'terms': {}}
+    rng = random.Random(seed)
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            cursor.execute(_SEED_SQL, {
+                'first': FIRST_NAMES, 'n_first': len(FIRST_NAMES),
+                'last': LAST_NAMES, 'n_last': len(LAST_NAMES),
+                'count': employees,
+            })
+            cursor.execute('ANALYZE attendance_employee')
+        samples = {term: [] for term in TERMS}
+        for _ in range(repeat):
+            for term in rng.sample(TERMS, len(TERMS)):
+                sample_start = time.perf_counter_ns()
+                queryset = EmployeeRepository.search(term)
+                total = queryset.count()
+                list(queryset[:page_size])
+                samples[term].append(time.perf_counter_ns() - sample_start)
+                results['terms'].setdefault(term, {})['matches'] = total
+        for term, term_samples in samples.items():
+            results['terms'][term].update(summarize(term_samples))
+        results['all'] = summarize([sample for term_samples in samples.values() for sample in term_samples])
+        transaction.set_rollback(True)
+    return results
@@ -0,0 +1,39 @@
+"""
+Latency statistics shared by the benchmarks.
+"""
+import math
+import statistics
+from typing import Dict, List
+
+
+def summarize(samples_ns: List[int]) -> Dict[str, float]:
+    """
+    Resumir muestras de tiempo (en nanosegundos) en milisegundos.
+    
+    Args:
+        samples_ns: Lista de duraciones en nanosegundos
+    
+    Returns:
+        Dict con n, min, p50, p90, p95, p99, mean, stdev y max en ms
+    """
+    ordered = sorted(samples_ns)
+    n = len(ordered)
+    if n == 0:
+        return {'n': 0}
+    
+    def percentile(p: float) -> float:
+        # Percentil por rango más cercano
+        index = max(0, min(n - 1, math.ceil(p / 100.0 * n) - 1))
+        return ordered[index] / 1e6
+    
+    return {
+        'n': n,
+        'min_ms': ordered[0] / 1e6,
+        'p50_ms': percentile(50),
+        'p90_ms': percentile(90),
+        'p95_ms': percentile(95),
+        'p99_ms': percentile(99),
+        'mean_ms': statistics.fmean(ordered) / 1e6,
+        'stdev_ms': (statistics.stdev(ordered) / 1e6) if n > 1 else 0.0,
+        'max_ms': ordered[-1] / 1e6,
+    }
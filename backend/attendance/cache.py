@@ -0,0 +1,109 @@
+"""
+Versioned cache for the employee roster.
+
+Every ``Employee`` write bumps a roster version stored in the Django cache
+(see ``attendance/signals.py``). Listing responses are cached under the
+current version and exposed with an ETag derived from it, so an unchanged
+roster is answered from the cache, or with a 304, without a database query.
+
+The version lives in the ``default`` cache, so that cache must be shared
+by every worker (file, memcached, redis). With the per-process
+``LocMemCache`` a write in one worker is not seen by the others, so the
+roster cache and its ETags are turned off (see ``roster_cache_enabled``)
+unless there is a single worker or every worker's version is kept current
+by the LISTEN/NOTIFY listener of ``attendance/invalidation.py``.
+"""
+import hashlib
+import time
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.http import parse_etags, quote_etag
+from attendance.metrics import record_cache
+
+ROSTER_VERSION_KEY = 'attendance:roster:version'
+
+
+# Backends que guardan en memoria de cada proceso (o no guardan)
+PER_PROCESS_BACKENDS = ('LocMemCache', 'DummyCache')
+
+
+def cache_is_per_process() -> bool:
+    """True si la caché default no se comparte entre workers."""
+    return settings.CACHES['default']['BACKEND'].endswith(PER_PROCESS_BACKENDS)
+
+
+def roster_cache_enabled() -> bool:
+    """
+    True si la versión del padrón es la misma en todos los workers.
+    
+    Con una caché compartida siempre. Con LocMemCache solo si hay un único
+    worker (ROSTER_CACHE_SINGLE_WORKER) o si el listener de invalidación
+    está escuchando: cada notificación de cambio incrementa la versión
+    local. DummyCache no guarda la versión, así que nunca.
+    """
+    backend = settings.CACHES['default']['BACKEND']
+    if not cache_is_per_process():
+        return True
+    if backend.endswith('DummyCache'):
+        return False
+    if getattr(settings, 'ROSTER_CACHE_SINGLE_WORKER', False):
+        return True
+    from attendance.invalidation import get_invalidation_listener
+    
+    listener = get_invalidation_listener()
+    return listener is not None and listener.live
+
+
+def get_roster_version() -> int:
+    """Versión actual del padrón de empleados."""
+    version = cache.get(ROSTER_VERSION_KEY)
+    if version is None:
+        # Sembrada con el reloj: tras un reinicio o desalojo no repite versiones previas
+        cache.add(ROSTER_VERSION_KEY, time.time_ns(), None)
+        version = cache.get(ROSTER_VERSION_KEY)
+    return version
+
+
+def bump_roster_version() -> None:
+    """Invalidar el padrón cacheado (llamar tras cada escritura de Employee)."""
+    try:
+        cache.incr(ROSTER_VERSION_KEY)
+    except ValueError:
+        cache.set(ROSTER_VERSION_KEY, time.time_ns(), None)
+
+
+def roster_variant(request) -> str:
+    """
+    Identificador de la variante de respuesta de un request.
+    
+    Incluye ruta, query string y host, porque la respuesta contiene URLs
+    absolutas (photo_ref_url, links de paginación).
+    """
+    raw = f"{request.get_host()}|{request.get_full_path()}"
+    return hashlib.sha1(raw.encode()).hexdigest()[:16]
+
+
+def roster_etag(version: int, variant: str) -> str:
+    """ETag fuerte para una versión y variante."""
+    return quote_etag(f"roster-{version}-{variant}")
+
+
+def etag_matches(request, etag: str) -> bool:
+    """True si el header If-None-Match del request coincide con el ETag."""
+    header = request.headers.get('If-None-Match')
+    if not header:
+        return False
+    etags = parse_etags(header)
+    return '*' in etags or etag in etags
+
+
+def get_cached_roster(version: int, variant: str):
+    """Respuesta serializada cacheada, o None."""
+    data = cache.get(f"attendance:roster:{version}:{variant}")
+    record_cache('roster', data is not None)
+    return data
+
+
+def set_cached_roster(version: int, variant: str, data, timeout: int) -> None:
+    """Guardar la respuesta serializada para una versión y variante."""
+    cache.set(f"attendance:roster:{version}:{variant}", data, timeout)
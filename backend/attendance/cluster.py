@@ -0,0 +1,207 @@
+"""
+Optional cluster mode: consistent-hash sharding of check-ins across nodes.
+
+With ``CLUSTER_NODES`` set, employee codes are hashed onto a ring of
+backend nodes. The owner of an employee is the only node that keeps its
+reference images warm (see ``attendance/reference_cache.py``); a node that
+receives a check-in for someone else's employee forwards it to the owner
+over HTTP. It handles the check-in locally only when the owner could not
+be reached at all; once the request may have reached the owner, a failure
+is answered 503/504 so the check-in is never recorded on two nodes.
+
+Membership is static configuration, identical on every node::
+    
+    CLUSTER_NODES=node1=http://10.0.0.1:8000,node2=http://10.0.0.2:8000
+    CLUSTER_NODE_NAME=node1
+
+Adding or removing a node only moves the employees of the ring segments
+next to it; the rest keep their owner and their warm cache.
+"""
+import bisect
+import hashlib
+import json
+import logging
+import socket
+import threading
+import time
+from typing import Dict, Iterable, Optional, Tuple
+from urllib import error, request as urlrequest
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from attendance.metrics import CLUSTER_FORWARDS
+
+logger = logging.getLogger(__name__)
+
+# Un request reenviado se procesa siempre en el nodo que lo recibe: con
+# configuraciones distintas entre nodos hay a lo sumo un salto
+FORWARDED_HEADER = 'X-Attendance-Forwarded-By'
+NODE_HEADER = 'X-Attendance-Node'
+
+
+def _hash(value: str) -> int:
+    return int.from_bytes(hashlib.md5(value.encode()).digest()[:8], 'big')
+
+
+class HashRing:
+    """Anillo de hashing consistente con `replicas` nodos virtuales por nodo."""
+    
+    def __init__(self, nodes: Iterable[str], replicas: int = 100):
+        points = sorted(
+            (_hash(f"{node}#{replica}"), node)
+            for node in set(nodes)
+            for replica in range(replicas)
+        )
+        if not points:
+            raise ValueError("HashRing requiere al menos un nodo")
+        self._hashes = [point for point, _ in points]
+        self._nodes = [node for _, node in points]
+    
+    def owner(self, key: str) -> str:
+        """Nodo dueño de una clave: el primer punto del anillo a partir de su hash."""
+        index = bisect.bisect(self._hashes, _hash(key)) % len(self._hashes)
+        return self._nodes[index]
+
+
+class Cluster:
+    """Membresía del cluster, dueño de cada empleado y reenvío de check-ins."""
+    
+    def __init__(
+        self,
+        nodes: Dict[str, str],
+        node_name: str,
+        replicas: int = 100,
+        timeout: float = 5.0,
+        cooldown: float = 10.0
+    ):
+        """
+        Inicializar Cluster.
+        
+        Args:
+            nodes: URL base de cada nodo por nombre
+            node_name: Nombre de este nodo (debe estar en nodes)
+            replicas: Nodos virtuales por nodo en el anillo
+            timeout: Segundos máximos de espera de un reenvío
+            cooldown: Segundos sin reenviar a un nodo al que no se pudo conectar
+        """
+        if node_name not in nodes:
+            raise ValueError(f"CLUSTER_NODE_NAME {node_name!r} no está en CLUSTER_NODES")
+        self.nodes = {name: url.rstrip('/') for name, url in nodes.items()}
+        self.node_name = node_name
+        self.timeout = timeout
+        self.cooldown = cooldown
+        self.ring = HashRing(self.nodes, replicas)
+        self._down_until = {}
+        self._lock = threading.Lock()
+    
+    def owner(self, employee_code: str) -> str:
+        """Nodo dueño de un empleado."""
+        return self.ring.owner(employee_code)
+    
+    def owns(self, employee_code: str) -> bool:
+        """True si el empleado es del shard de este nodo."""
+        return self.owner(employee_code) == self.node_name
+    
+    def forward(
+        self,
+        node: str,
+        path: str,
+        payload: Dict[str, any],
+        headers: Dict[str, str]
+    ) -> Optional[Tuple[int, dict, Dict[str, str]]]:
+        """
+        Reenviar un request JSON a otro nodo.
+        
+        Solo se devuelve None (procesar localmente) si el request nunca
+        llegó al dueño: conexión rechazada, nombre que no resuelve o nodo
+        en pausa. Si hubo conexión, el dueño pudo haber registrado el
+        check-in aunque la respuesta no llegue, así que un timeout se
+        responde 504 y un 5xx o una respuesta inválida 503, sin procesar
+        localmente. Solo las fallas de conexión ponen al nodo en pausa: un
+        503 por sobrecarga del dueño se propaga con su Retry-After.
+        
+        Returns:
+            (status, cuerpo JSON, headers a propagar) para responder al
+            kiosco, o None si el request debe procesarse localmente
+        """
+        with self._lock:
+            if self._down_until.get(node, 0.0) > time.monotonic():
+                CLUSTER_FORWARDS.labels(outcome='node_down').inc()
+                return None
+        forward_request = urlrequest.Request(
+            f"{self.nodes[node]}{path}",
+            data=json.dumps(payload).encode(),
+            headers={**headers, 'Content-Type': 'application/json', FORWARDED_HEADER: self.node_name},
+            method='POST'
+        )
+        try:
+            try:
+                with urlrequest.urlopen(forward_request, timeout=self.timeout) as response:
+                    status, body, response_headers = response.status, response.read(), response.headers
+            except error.HTTPError as e:
+                status, body, response_headers = e.code, e.read(), e.headers
+            propagated = {
+                name: response_headers[name] for name in ('Retry-After', NODE_HEADER) if response_headers.get(name)
+            }
+            data = json.loads(body or b'{}')
+        except error.URLError as e:
+            if isinstance(e.reason, (ConnectionRefusedError, socket.gaierror)):
+                with self._lock:
+                    self._down_until[node] = time.monotonic() + self.cooldown
+                CLUSTER_FORWARDS.labels(outcome='fallback').inc()
+                logger.warning("No se pudo conectar con %s (%s); se procesa en %s", node, e.reason, self.node_name)
+                return None
+            return self._failed(node, e.reason)
+        except (OSError, ValueError) as e:
+            # Timeout esperando la respuesta, conexión cortada o respuesta no JSON
+            return self._failed(node, e)
+        if status >= 500:
+            CLUSTER_FORWARDS.labels(outcome='unavailable').inc()
+            return 503, data, propagated
+        CLUSTER_FORWARDS.labels(outcome='forwarded').inc()
+        return status, data, propagated
+    
+    def _failed(self, node: str, reason) -> Tuple[int, dict, Dict[str, str]]:
+        """Respuesta para un reenvío que pudo llegar al dueño pero no tuvo respuesta válida."""
+        logger.warning("Reenvío a %s sin respuesta válida (%s); no se procesa localmente", node, reason)
+        if isinstance(reason, TimeoutError):
+            CLUSTER_FORWARDS.labels(outcome='timeout').inc()
+            return 504, {'error': f'El nodo {node} no respondió a tiempo'}, {}
+        CLUSTER_FORWARDS.labels(outcome='unavailable').inc()
+        return 503, {'error': f'El nodo {node} no está disponible'}, {}
+
+
+_cluster: Optional[Cluster] = None
+_cluster_lock = threading.Lock()
+
+
+def get_cluster() -> Optional[Cluster]:
+    """Obtener la membresía del cluster (None si el modo cluster está desactivado)."""
+    global _cluster
+    nodes = getattr(settings, 'CLUSTER_NODES', {})
+    if not nodes:
+        return None
+    if _cluster is None:
+        with _cluster_lock:
+            if _cluster is None:
+                _cluster = Cluster(
+                    nodes,
+                    getattr(settings, 'CLUSTER_NODE_NAME', ''),
+                    replicas=getattr(settings, 'CLUSTER_VIRTUAL_NODES', 100),
+                    timeout=getattr(settings, 'CLUSTER_FORWARD_TIMEOUT', 5.0),
+                    cooldown=getattr(settings, 'CLUSTER_NODE_COOLDOWN_SECONDS', 10.0)
+                )
+    return _cluster
+
+
+def owns_employee(employee_code: str) -> bool:
+    """True si este nodo es el dueño del empleado (siempre, sin modo cluster)."""
+    cluster = get_cluster()
+    return cluster is None or cluster.owns(employee_code)
+
+
+@receiver(setting_changed)
+def _reset_on_setting_changed(setting, **kwargs):
+    global _cluster
+    if setting.startswith('CLUSTER_'):
+        _cluster = None
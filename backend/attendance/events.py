@@ -0,0 +1,287 @@
+"""
+Broker and cross-process fan-out for the live attendance event stream.
+
+Each process has an ``EventBroker`` that fans events out to the server-sent
+events subscribers of ``/api/attendance-events/stream/`` it serves. Each
+message is encoded once per event, not once per subscriber. Every
+subscriber has a bounded queue: a consumer that falls behind is
+disconnected instead of buffered.
+
+On PostgreSQL a new ``AttendanceEvent`` is sent as JSON on the
+``attendance_events`` channel, which PostgreSQL delivers when the check-in
+commits, to every process. A process starts ``EventStreamListener`` with
+its first stream subscriber and publishes what it receives to its broker,
+so the stream sees check-ins handled by any worker or node sharing the
+database. If the listener loses its connection, the streams of that process
+are closed on reconnect: EventSource reconnects with ``Last-Event-ID`` and
+the gap is replayed from the database. Other databases have no channel and
+each process only publishes its own check-ins.
+"""
+import asyncio
+import json
+import logging
+import threading
+from typing import Dict, Iterable, Optional
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.core.signals import setting_changed
+from django.db import connection, transaction
+from django.dispatch import receiver
+from attendance.metrics import EVENT_STREAM_DROPPED, EVENT_STREAM_SUBSCRIBERS
+from attendance.notifications import ChannelListener
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = 'attendance_events'
+
+
+class TooManySubscribers(Exception):
+    """Se alcanzó el máximo de suscriptores del stream."""
+
+
+def event_payload(event) -> Dict[str, any]:
+    """Representación publicada de un AttendanceEvent."""
+    return {
+        'id': event.id,
+        'employee_code': event.employee.employee_code,
+        'employee_name': event.employee.full_name,
+        'site': event.site,
+        'timestamp': event.timestamp,
+        'score': event.score,
+        'decision': event.decision,
+        'provider_name': event.provider_name,
+    }
+
+
+def encode_message(payload: Dict[str, any]) -> str:
+    """Codificar un evento como mensaje SSE (el id permite reanudar con Last-Event-ID)."""
+    data = json.dumps(payload, cls=DjangoJSONEncoder, separators=(',', ':'))
+    return f"id: {payload['id']}\nevent: attendance\ndata: {data}\n\n"
+
+
+class Subscription:
+    """Suscriptor del stream con su cola acotada y sus filtros."""
+    
+    def __init__(
+        self,
+        loop: asyncio.AbstractEventLoop,
+        max_queue: int,
+        employee_codes: Iterable[str] = (),
+        sites: Iterable[str] = ()
+    ):
+        self.loop = loop
+        self.queue = asyncio.Queue(maxsize=max_queue)
+        self.employee_codes = frozenset(employee_codes)
+        self.sites = frozenset(sites)
+        self.dropped = False
+    
+    def matches(self, payload: Dict[str, any]) -> bool:
+        """True si el evento pasa los filtros de empleado y sede."""
+        if self.employee_codes and payload['employee_code'] not in self.employee_codes:
+            return False
+        if self.sites and payload['site'] not in self.sites:
+            return False
+        return True
+    
+    def offer(self, event_id: int, message: str) -> None:
+        """
+        Encolar (event_id, mensaje) sin bloquear (ejecutar en el loop del suscriptor).
+        
+        Si la cola está llena el suscriptor se descarta: se vacía la cola y
+        queda solo None, que le indica al stream que debe cerrarse.
+        """
+        if self.dropped:
+            return
+        try:
+            self.queue.put_nowait((event_id, message))
+        except asyncio.QueueFull:
+            EVENT_STREAM_DROPPED.inc()
+            self.close()
+    
+    def close(self) -> None:
+        """Descartar lo pendiente e indicarle al stream que se cierre (en el loop del suscriptor)."""
+        if self.dropped:
+            return
+        self.dropped = True
+        while not self.queue.empty():
+            self.queue.get_nowait()
+        self.queue.put_nowait(None)
+
+
+class EventBroker:
+    """Distribuye eventos publicados desde cualquier hilo a suscriptores asyncio."""
+    
+    def __init__(self, max_queue: int = 100, max_subscribers: int = 200):
+        """
+        Inicializar EventBroker.
+        
+        Args:
+            max_queue: Mensajes pendientes por suscriptor antes de descartarlo
+            max_subscribers: Máximo de suscriptores simultáneos
+        """
+        self.max_queue = max_queue
+        self.max_subscribers = max_subscribers
+        self._subscribers = set()
+        self._lock = threading.Lock()
+    
+    def subscribe(self, employee_codes: Iterable[str] = (), sites: Iterable[str] = ()) -> Subscription:
+        """
+        Registrar un suscriptor en el loop asyncio actual.
+        
+        Raises:
+            TooManySubscribers: Si se alcanzó max_subscribers
+        """
+        subscription = Subscription(asyncio.get_running_loop(), self.max_queue, employee_codes, sites)
+        with self._lock:
+            if len(self._subscribers) >= self.max_subscribers:
+                raise TooManySubscribers()
+            self._subscribers.add(subscription)
+        EVENT_STREAM_SUBSCRIBERS.inc()
+        return subscription
+    
+    def unsubscribe(self, subscription: Subscription) -> None:
+        """Quitar un suscriptor (idempotente)."""
+        with self._lock:
+            if subscription not in self._subscribers:
+                return
+            self._subscribers.discard(subscription)
+        EVENT_STREAM_SUBSCRIBERS.dec()
+    
+    @property
+    def subscriber_count(self) -> int:
+        """Número de suscriptores activos."""
+        with self._lock:
+            return len(self._subscribers)
+    
+    def publish(self, payload: Dict[str, any]) -> int:
+        """
+        Publicar un evento a los suscriptores cuyos filtros lo aceptan.
+        
+        No bloquea: el mensaje se entrega a cada loop con call_soon_threadsafe.
+        
+        Returns:
+            Número de suscriptores a los que se envió
+        """
+        with self._lock:
+            targets = [subscription for subscription in self._subscribers if subscription.matches(payload)]
+        if not targets:
+            return 0
+        message = encode_message(payload)
+        sent = 0
+        for subscription in targets:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription.offer, payload['id'], message)
+                sent += 1
+            except RuntimeError:
+                # El loop del suscriptor ya cerró
+                self.unsubscribe(subscription)
+        return sent
+    
+    def close_all(self) -> None:
+        """Cerrar todos los streams; los clientes reconectan y reciben lo perdido con Last-Event-ID."""
+        with self._lock:
+            subscriptions = list(self._subscribers)
+        for subscription in subscriptions:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription.close)
+            except RuntimeError:
+                self.unsubscribe(subscription)
+
+
+class EventStreamListener(ChannelListener):
+    """Hilo que recibe los eventos de todos los procesos y los publica en el broker local."""
+    
+    channel = CHANNEL
+    thread_name = 'event-stream'
+    
+    def on_connect(self) -> None:
+        # Los eventos enviados mientras no escuchábamos no llegarán por el canal
+        get_event_broker().close_all()
+    
+    def on_notify(self, payload: str) -> None:
+        try:
+            event = json.loads(payload)
+            event_id = int(event['id'])
+        except (ValueError, KeyError, TypeError):
+            logger.warning("Notificación inválida en %s: %r", CHANNEL, payload)
+            return
+        event['id'] = event_id
+        get_event_broker().publish(event)
+
+
+_broker: Optional[EventBroker] = None
+_listener: Optional[EventStreamListener] = None
+_broker_lock = threading.Lock()
+
+
+def get_event_broker() -> EventBroker:
+    """Obtener el broker de eventos del proceso."""
+    global _broker
+    if _broker is None:
+        with _broker_lock:
+            if _broker is None:
+                _broker = EventBroker(
+                    max_queue=getattr(settings, 'EVENT_STREAM_QUEUE_SIZE', 100),
+                    max_subscribers=getattr(settings, 'EVENT_STREAM_MAX_SUBSCRIBERS', 200)
+                )
+    return _broker
+
+
+def get_event_listener() -> Optional[EventStreamListener]:
+    """
+    Obtener el listener de eventos del proceso, iniciándolo en el primer uso.
+    
+    Returns:
+        EventStreamListener, o None si la base no es PostgreSQL
+    """
+    global _listener
+    if connection.vendor != 'postgresql':
+        return None
+    if _listener is None:
+        with _broker_lock:
+            if _listener is None:
+                _listener = EventStreamListener(
+                    connection.get_connection_params(),
+                    max_backoff=getattr(settings, 'EVENT_STREAM_RECONNECT_MAX_SECONDS', 30.0)
+                )
+                _listener.start()
+    return _listener
+
+
+def publish_local(event) -> int:
+    """Publicar un AttendanceEvent en el broker de este proceso; sin suscriptores no serializa nada."""
+    broker = get_event_broker()
+    if not broker.subscriber_count:
+        return 0
+    return broker.publish(event_payload(event))
+
+
+def publish_attendance_event(event) -> None:
+    """
+    Publicar un AttendanceEvent recién creado cuando confirme su transacción.
+    
+    En PostgreSQL se envía por el canal, que lo entrega al confirmar a todos
+    los procesos (incluido este, por su listener); si la transacción se
+    revierte no se entrega. En otras bases solo se publica en este proceso.
+    Sin EVENT_STREAM_ENABLED no se publica: el NOTIFY serializa los commits.
+    """
+    if not getattr(settings, 'EVENT_STREAM_ENABLED', False):
+        return
+    if connection.vendor != 'postgresql':
+        transaction.on_commit(lambda: publish_local(event))
+        return
+    data = json.dumps(event_payload(event), cls=DjangoJSONEncoder, separators=(',', ':'))
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT pg_notify(%s, %s)', [CHANNEL, data])
+
+
+@receiver(setting_changed)
+def _reset_on_setting_changed(setting, **kwargs):
+    global _broker, _listener
+    if setting in ('EVENT_STREAM_QUEUE_SIZE', 'EVENT_STREAM_MAX_SUBSCRIBERS'):
+        _broker = None
+    if setting.startswith('EVENT_STREAM_'):
+        with _broker_lock:
+            listener, _listener = _listener, None
+        if listener is not None:
+            listener.stop()
@@ -0,0 +1,258 @@
+"""
+Cross-worker invalidation of in-process employee caches via LISTEN/NOTIFY.
+
+Every ``Employee`` or ``EmployeeReference`` write sends the employee ID on
+the ``attendance_employee_changes`` Postgres channel (see
+``attendance/signals.py``). PostgreSQL delivers the notification when the
+writing transaction commits, and only then. With ``EMPLOYEE_CACHE_ENABLED``
+each worker process runs ``InvalidationListener``, a daemon thread with its
+own connection that waits on the channel. On each notification it evicts
+the employee from:
+
+- the employee cache below, which lets a check-in skip the employee and
+  reference queries;
+- the reference image cache (``attendance/reference_cache.py``);
+- the roster version, if the Django cache is per process (``LocMemCache``).
+
+Notifications sent while the listener is disconnected are lost. While it
+is disconnected the employee cache is not used, and after every
+(re)connection all three caches are flushed.
+"""
+import json
+import logging
+import threading
+from collections import OrderedDict
+from typing import List, Optional, Tuple
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.db import connection, transaction
+from django.db.models.fields.files import FieldFile
+from django.dispatch import receiver
+from attendance.metrics import CACHE_INVALIDATIONS, record_cache
+from attendance.notifications import ChannelListener
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = 'attendance_employee_changes'
+
+
+def _values(instance) -> Tuple[tuple, tuple]:
+    """Columnas de una instancia, con los archivos por nombre (para from_db)."""
+    fields = instance._meta.concrete_fields
+    values = []
+    for field in fields:
+        value = field.value_from_object(instance)
+        values.append(value.name if isinstance(value, FieldFile) else value)
+    return tuple(field.attname for field in fields), tuple(values)
+
+
+def _instance(model, snapshot):
+    # Una instancia nueva por lectura: los FieldFile no se comparten entre hilos
+    names, values = snapshot
+    return model.from_db(connection.alias, names, values)
+
+
+class EmployeeCache:
+    """
+    Empleados por código con sus referencias adicionales, en memoria del proceso.
+    
+    Guarda los valores de las columnas y devuelve instancias nuevas en cada
+    lectura. Cada desalojo incrementa una generación: un put() con datos
+    leídos antes de un desalojo se ignora.
+    """
+    
+    def __init__(self, max_entries: int = 10000):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._codes = {}
+        self._generation = 0
+        self._lock = threading.Lock()
+    
+    @property
+    def generation(self) -> int:
+        """Generación actual; se pasa a put() junto con los datos leídos después."""
+        return self._generation
+    
+    def __len__(self) -> int:
+        return len(self._entries)
+    
+    def get(self, employee_code: str):
+        """
+        Empleado y referencias cacheados.
+        
+        Returns:
+            (Employee, lista de EmployeeReference) o None
+        """
+        from attendance.models import Employee, EmployeeReference
+        
+        with self._lock:
+            entry = self._entries.get(employee_code)
+            if entry is not None:
+                self._entries.move_to_end(employee_code)
+        record_cache('employee', entry is not None)
+        if entry is None:
+            return None
+        _, employee, references = entry
+        return (
+            _instance(Employee, employee),
+            [_instance(EmployeeReference, reference) for reference in references],
+        )
+    
+    def put(self, employee, references: List, generation: int) -> bool:
+        """
+        Guardar un empleado leído de la base en la generación `generation`.
+        
+        Returns:
+            False si hubo un desalojo desde esa generación (no se guarda)
+        """
+        entry = (employee.id, _values(employee), tuple(_values(reference) for reference in references))
+        with self._lock:
+            if generation != self._generation:
+                return False
+            self._entries[employee.employee_code] = entry
+            self._entries.move_to_end(employee.employee_code)
+            self._codes[employee.id] = employee.employee_code
+            while len(self._entries) > self.max_entries:
+                _, (employee_id, _, _) = self._entries.popitem(last=False)
+                self._codes.pop(employee_id, None)
+        return True
+    
+    def evict(self, employee_id: int) -> None:
+        """Descartar un empleado por ID."""
+        with self._lock:
+            self._generation += 1
+            code = self._codes.pop(employee_id, None)
+            if code is not None:
+                self._entries.pop(code, None)
+    
+    def clear(self) -> None:
+        """Vaciar el caché."""
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+            self._codes.clear()
+
+
+class InvalidationListener(ChannelListener):
+    """Hilo que escucha el canal de cambios de empleados y desaloja los cachés."""
+    
+    channel = CHANNEL
+    thread_name = 'cache-invalidation'
+    
+    def on_connect(self) -> None:
+        # Lo ocurrido mientras no escuchábamos se perdió
+        flush_employee_caches()
+    
+    def on_notify(self, payload: str) -> None:
+        try:
+            employee_id = int(json.loads(payload)['employee_id'])
+        except (ValueError, KeyError, TypeError):
+            logger.warning("Notificación inválida en %s: %r", CHANNEL, payload)
+            return
+        evict_employee_caches(employee_id)
+
+
+_cache: Optional[EmployeeCache] = None
+_listener: Optional[InvalidationListener] = None
+_lock = threading.Lock()
+
+
+def get_invalidation_listener() -> Optional[InvalidationListener]:
+    """
+    Obtener el listener del proceso, iniciándolo en el primer uso.
+    
+    Returns:
+        InvalidationListener, o None si EMPLOYEE_CACHE_ENABLED está apagado
+        o la base no es PostgreSQL
+    """
+    global _listener
+    if not getattr(settings, 'EMPLOYEE_CACHE_ENABLED', False) or connection.vendor != 'postgresql':
+        return None
+    if _listener is None:
+        with _lock:
+            if _listener is None:
+                _listener = InvalidationListener(
+                    connection.get_connection_params(),
+                    max_backoff=getattr(settings, 'EMPLOYEE_CACHE_RECONNECT_MAX_SECONDS', 30.0)
+                )
+                _listener.start()
+    return _listener
+
+
+def get_employee_cache() -> Optional[EmployeeCache]:
+    """
+    Obtener el caché de empleados del proceso.
+    
+    Returns:
+        EmployeeCache, o None si está desactivado o el listener no está
+        escuchando (sin invalidación no es seguro usarlo)
+    """
+    global _cache
+    listener = get_invalidation_listener()
+    if listener is None or not listener.live:
+        return None
+    if _cache is None:
+        with _lock:
+            if _cache is None:
+                _cache = EmployeeCache(getattr(settings, 'EMPLOYEE_CACHE_MAX_ENTRIES', 10000))
+    return _cache
+
+
+def evict_employee_caches(employee_id: int) -> None:
+    """Desalojar un empleado de los cachés de este proceso."""
+    from attendance.cache import bump_roster_version
+    from attendance.reference_cache import evict_reference_images
+    
+    if _cache is not None:
+        _cache.evict(employee_id)
+    evict_reference_images(employee_id)
+    if _roster_cache_is_local():
+        bump_roster_version()
+    CACHE_INVALIDATIONS.labels(kind='evict').inc()
+
+
+def flush_employee_caches() -> None:
+    """Vaciar los cachés de empleados de este proceso."""
+    from attendance.cache import bump_roster_version
+    from attendance.reference_cache import get_reference_cache
+    
+    if _cache is not None:
+        _cache.clear()
+    reference_cache = get_reference_cache()
+    if reference_cache is not None:
+        reference_cache.clear()
+    if _roster_cache_is_local():
+        bump_roster_version()
+    CACHE_INVALIDATIONS.labels(kind='flush').inc()
+
+
+def _roster_cache_is_local() -> bool:
+    # Con un caché compartido la versión ya la incrementó el proceso que escribió
+    from attendance.cache import cache_is_per_process
+    
+    return cache_is_per_process()
+
+
+def notify_employee_changed(employee_id: int) -> None:
+    """
+    Avisar a todos los workers que cambió un empleado.
+    
+    Desaloja en este proceso de inmediato y otra vez al confirmar (una
+    lectura concurrente puede haber cacheado los datos previos) y envía
+    la notificación, que PostgreSQL entrega al confirmar la transacción.
+    """
+    evict_employee_caches(employee_id)
+    transaction.on_commit(lambda: evict_employee_caches(employee_id))
+    if connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT pg_notify(%s, %s)', [CHANNEL, json.dumps({'employee_id': employee_id})])
+
+
+@receiver(setting_changed)
+def _reset_on_setting_changed(setting, **kwargs):
+    global _cache, _listener
+    if setting.startswith('EMPLOYEE_CACHE_'):
+        with _lock:
+            listener, _listener, _cache = _listener, None, None
+        if listener is not None:
+            listener.stop()
@@ -0,0 +1,50 @@
+"""
+Management command: move old attendance events to the columnar cold archive.
+"""
+from datetime import timedelta
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from attendance.archive import archive_events
+
+
+class Command(BaseCommand):
+    help = (
+        'Mueve los eventos de asistencia más antiguos que el límite a archivos '
+        'columnares comprimidos y los elimina de la base en chunks.'
+    )
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--older-than-days', type=int, default=None,
+            help='Antigüedad mínima en días (por defecto ARCHIVE_AFTER_DAYS)'
+        )
+        parser.add_argument('--directory', default=None, help='Directorio destino (por defecto ARCHIVE_DIR)')
+        parser.add_argument('--rows-per-file', type=int, default=100000, help='Eventos por archivo')
+        parser.add_argument('--chunk-size', type=int, default=1000, help='Eventos eliminados por transacción')
+        parser.add_argument('--dry-run', action='store_true', help='Solo contar los eventos a archivar')
+    
+    def handle(self, *args, **options):
+        days = options['older_than_days']
+        if days is None:
+            days = getattr(settings, 'ARCHIVE_AFTER_DAYS', 365)
+        before = timezone.now() - timedelta(days=days)
+        directory = options['directory'] or settings.ARCHIVE_DIR
+        
+        summary = archive_events(
+            before,
+            directory,
+            rows_per_file=options['rows_per_file'],
+            chunk_size=options['chunk_size'],
+            dry_run=options['dry_run']
+        )
+        
+        if options['dry_run']:
+            self.stdout.write(f"{summary['archived']} eventos anteriores a {before:%Y-%m-%d} se archivarían")
+            return
+        for path in summary['files']:
+            self.stdout.write(f"  {path}")
+        self.stdout.write(self.style.SUCCESS(
+            f"{summary['archived']} eventos archivados en {len(summary['files'])} archivos, "
+            f"{summary['deleted']} eliminados de la base"
+        ))
@@ -0,0 +1,72 @@
+"""
+Management command: compare AttendanceEvent index schemes on a seeded dataset.
+"""
+import json
+from django.core.management.base import BaseCommand, CommandError
+from attendance.benchmarks.index_benchmark import QUERIES, explain, run_index_benchmark
+
+
+class Command(BaseCommand):
+    help = (
+        'Siembra dos tablas temporales con millones de eventos, una con los índices '
+        'anteriores y otra con los de la migración 0006, y compara throughput de '
+        'inserts y latencia de consultas.'
+    )
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=2_000_000, help='Filas sembradas por tabla')
+        parser.add_argument('--employees', type=int, default=2000, help='Empleados distintos')
+        parser.add_argument('--days', type=int, default=365, help='Días cubiertos por los datos')
+        parser.add_argument('--inserts', type=int, default=5000, help='Inserts de una fila medidos')
+        parser.add_argument('--repeat', type=int, default=50, help='Repeticiones por consulta')
+        parser.add_argument('--keep', action='store_true', help='Conservar las tablas y mostrar los planes')
+        parser.add_argument('--json', action='store_true', help='Emitir el resultado como JSON')
+    
+    def handle(self, *args, **options):
+        try:
+            results = run_index_benchmark(
+                rows=options['rows'],
+                employees=options['employees'],
+                days=options['days'],
+                inserts=options['inserts'],
+                repeat=options['repeat'],
+                keep=options['keep']
+            )
+        except RuntimeError as e:
+            raise CommandError(str(e))
+        
+        if options['json']:
+            self.stdout.write(json.dumps(results, indent=2, sort_keys=True))
+            return
+        
+        before, after = results['before'], results['after']
+        self.stdout.write(f"{'':<18} {'antes':>12} {'después':>12}")
+        self.stdout.write(
+            f"{'índices (MB)':<18} {before['index_bytes'] / 2**20:>12.1f} {after['index_bytes'] / 2**20:>12.1f}"
+        )
+        self.stdout.write(f"{'tabla (MB)':<18} {before['table_bytes'] / 2**20:>12.1f} {after['table_bytes'] / 2**20:>12.1f}")
+        self.stdout.write(f"{'crear índices (s)':<18} {before['index_build_s']:>12.2f} {after['index_build_s']:>12.2f}")
+        self.stdout.write(
+            f"{'inserts/s':<18} {before['insert']['rows_per_s']:>12.0f} {after['insert']['rows_per_s']:>12.0f}"
+        )
+        self.stdout.write(
+            f"{'insert p99 ms':<18} {before['insert']['latency']['p99_ms']:>12.3f} "
+            f"{after['insert']['latency']['p99_ms']:>12.3f}"
+        )
+        for scheme, result in results.items():
+            self.stdout.write(f"índices {scheme}: " + '  '.join(
+                f"{name}={size / 2**20:.1f}MB" for name, size in sorted(result['indexes'].items())
+            ))
+        self.stdout.write('consultas (p50 / p95 ms):')
+        for query in QUERIES:
+            old, new = before['queries'][query], after['queries'][query]
+            self.stdout.write(
+                f"  {query:<16} {old['p50_ms']:>7.2f} / {old['p95_ms']:<7.2f} {new['p50_ms']:>7.2f} / {new['p95_ms']:<7.2f}"
+            )
+        
+        if options['keep']:
+            for scheme in ('before', 'after'):
+                for query in QUERIES:
+                    self.stdout.write(f"== {scheme} {query}")
+                    for line in explain(scheme, query):
+                        self.stdout.write(f"   {line}")
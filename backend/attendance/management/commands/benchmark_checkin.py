@@ -0,0 +1,94 @@
+"""
+Management command: micro-benchmark of the check-in pipeline.
+"""
+import json
+import tempfile
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.test.utils import override_settings
+from attendance.benchmarks.checkin_benchmark import (
+    build_report,
+    compare_to_baseline,
+    load_report,
+    run_checkin_benchmark,
+    write_report,
+)
+from attendance.benchmarks.fixtures import create_employees, make_capture_data
+from attendance.services import CheckInEmployeeService
+
+
+def _parse_size(value: str):
+    try:
+        width, height = value.lower().split('x')
+        return int(width), int(height)
+    except ValueError:
+        raise CommandError(f"Tamaño inválido: {value} (usar ANCHOxALTO)")
+
+
+class Command(BaseCommand):
+    help = (
+        'Mide cada etapa de CheckInEmployeeService.execute con datos sintéticos. '
+        'Los datos se crean en una transacción que se revierte al terminar.'
+    )
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--employees', type=int, default=50, help='Empleados sintéticos')
+        parser.add_argument('--captures', type=int, default=10, help='Capturas distintas')
+        parser.add_argument('--iterations', type=int, default=200, help='Iteraciones medidas')
+        parser.add_argument('--warmup', type=int, default=20, help='Iteraciones de calentamiento')
+        parser.add_argument('--capture-size', default='640x480', help='Tamaño de la captura')
+        parser.add_argument('--reference-size', default='480x640', help='Tamaño de la foto de referencia')
+        parser.add_argument('--output', help='Ruta del reporte JSON (por defecto stdout)')
+        parser.add_argument('--baseline', help='Baseline JSON contra el que comparar')
+        parser.add_argument('--save-baseline', help='Guardar el reporte como baseline en esta ruta')
+        parser.add_argument('--tolerance', type=float, default=0.25, help='Regresión relativa tolerada')
+        parser.add_argument('--min-delta-ms', type=float, default=0.1, help='Regresión absoluta mínima')
+    
+    def handle(self, *args, **options):
+        capture_size = _parse_size(options['capture_size'])
+        reference_size = _parse_size(options['reference_size'])
+        config = {
+            'employees': options['employees'],
+            'captures': options['captures'],
+            'iterations': options['iterations'],
+            'warmup': options['warmup'],
+            'capture_size': list(capture_size),
+            'reference_size': list(reference_size),
+        }
+        
+        with tempfile.TemporaryDirectory() as media_root, override_settings(MEDIA_ROOT=media_root):
+            with transaction.atomic():
+                employees = create_employees(options['employees'], reference_size=reference_size)
+                captures = [make_capture_data(capture_size, seed=10_000 + i) for i in range(options['captures'])]
+                service = CheckInEmployeeService()
+                stages = run_checkin_benchmark(
+                    [employee.employee_code for employee in employees],
+                    captures,
+                    iterations=options['iterations'],
+                    warmup=options['warmup'],
+                    service=service
+                )
+                # No dejar datos sintéticos en la base de datos
+                transaction.set_rollback(True)
+        
+        report = build_report(stages, config, service.provider.name)
+        
+        if options['output']:
+            write_report(report, options['output'])
+        else:
+            self.stdout.write(json.dumps(report, indent=2, sort_keys=True))
+        
+        if options['save_baseline']:
+            write_report(report, options['save_baseline'])
+            self.stderr.write(f"Baseline guardado en {options['save_baseline']}")
+        
+        if options['baseline']:
+            regressions = compare_to_baseline(
+                report,
+                load_report(options['baseline']),
+                tolerance=options['tolerance'],
+                min_delta_ms=options['min_delta_ms']
+            )
+            if regressions:
+                raise CommandError('Regresiones detectadas:\n  ' + '\n  '.join(regressions))
+            self.stderr.write('Sin regresiones respecto al baseline')
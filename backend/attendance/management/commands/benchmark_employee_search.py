@@ -0,0 +1,37 @@
+"""
+Management command: measure the employee search on a seeded 100k roster.
+"""
+import json
+from django.core.management.base import BaseCommand, CommandError
+from attendance.benchmarks.search_benchmark import run_search_benchmark
+
+
+class Command(BaseCommand):
+    help = (
+        'Siembra empleados sintéticos dentro de una transacción que se descarta y '
+        'mide la latencia de GET /api/employees/search/ (página y count).'
+    )
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--employees', type=int, default=100_000, help='Empleados sembrados')
+        parser.add_argument('--repeat', type=int, default=20, help='Repeticiones por término')
+        parser.add_argument('--budget-ms', type=float, default=20.0, help='Presupuesto de p95 en ms')
+        parser.add_argument('--json', action='store_true', help='Emitir el resultado como JSON')
+    
+    def handle(self, *args, **options):
+        try:
+            results = run_search_benchmark(employees=options['employees'], repeat=options['repeat'])
+        except RuntimeError as e:
+            raise CommandError(str(e))
+        
+        if options['json']:
+            self.stdout.write(json.dumps(results, indent=2, sort_keys=True))
+            return
+        
+        self.stdout.write(f"{'término':<18} {'resultados':>10} {'p50 ms':>8} {'p95 ms':>8}")
+        for term, result in results['terms'].items():
+            self.stdout.write(f"{term:<18} {result['matches']:>10} {result['p50_ms']:>8.2f} {result['p95_ms']:>8.2f}")
+        overall = results['all']
+        self.stdout.write(f"{'total':<18} {'':>10} {overall['p50_ms']:>8.2f} {overall['p95_ms']:>8.2f}")
+        if overall['p95_ms'] > options['budget_ms']:
+            raise CommandError(f"p95 {overall['p95_ms']:.2f} ms supera el presupuesto de {options['budget_ms']} ms")
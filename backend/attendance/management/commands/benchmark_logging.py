@@ -0,0 +1,50 @@
+"""
+Management command: per-request logging overhead benchmark.
+"""
+import json
+import logging
+from django.core.management.base import BaseCommand, CommandError
+from attendance.benchmarks.logging_benchmark import run_logging_benchmark
+
+
+class Command(BaseCommand):
+    help = (
+        'Compara el costo por request del logging del check-in: f-strings con handler '
+        'síncrono, formato diferido síncrono y formato diferido detrás de una cola.'
+    )
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=2000, help='Requests medidos por variante')
+        parser.add_argument('--warmup', type=int, default=100, help='Requests de calentamiento')
+        parser.add_argument('--latency-us', type=float, default=200.0, help='Latencia simulada del destino por escritura')
+        parser.add_argument('--level', default='INFO', help='Nivel del logger (DEBUG, INFO, ...)')
+        parser.add_argument('--queue-size', type=int, default=10000, help='Tamaño de la cola')
+        parser.add_argument('--json', action='store_true', help='Emitir el resultado como JSON')
+    
+    def handle(self, *args, **options):
+        level = logging.getLevelName(options['level'].upper())
+        if not isinstance(level, int):
+            raise CommandError(f"Nivel inválido: {options['level']}")
+        
+        results = run_logging_benchmark(
+            iterations=options['iterations'],
+            warmup=options['warmup'],
+            latency_us=options['latency_us'],
+            level=level,
+            queue_size=options['queue_size']
+        )
+        
+        if options['json']:
+            self.stdout.write(json.dumps(results, indent=2, sort_keys=True))
+            return
+        
+        self.stdout.write(
+            f"{'variante':<12} {'p50 ms':>9} {'p99 ms':>9} "
+            f"{'media ms':>9} {'escrituras':>11} {'descartados':>12}"
+        )
+        for variant, result in results.items():
+            latency = result['latency']
+            self.stdout.write(
+                f"{variant:<12} {latency['p50_ms']:>9.3f} {latency['p99_ms']:>9.3f} "
+                f"{latency['mean_ms']:>9.3f} {result['writes']:>11} {result['dropped']:>12}"
+            )
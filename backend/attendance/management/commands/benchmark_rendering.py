@@ -0,0 +1,41 @@
+"""
+Management command: compare serializers and JSON renderers on list pages.
+"""
+import json
+from django.core.management.base import BaseCommand
+from attendance.benchmarks.render_benchmark import run_render_benchmark
+
+
+class Command(BaseCommand):
+    help = (
+        'Mide serialización y renderizado JSON de una página de empleados y de '
+        'eventos con los serializers de DRF y los livianos, y con JSONRenderer y '
+        'FastJSONRenderer. Los datos se siembran en una transacción que se descarta.'
+    )
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=1000, help='Objetos por página')
+        parser.add_argument('--repeat', type=int, default=30, help='Repeticiones por combinación')
+        parser.add_argument('--json', action='store_true', help='Emitir el resultado como JSON')
+    
+    def handle(self, *args, **options):
+        results = run_render_benchmark(rows=options['rows'], repeat=options['repeat'])
+        
+        if options['json']:
+            self.stdout.write(json.dumps(results, indent=2, sort_keys=True))
+            return
+        
+        if not results['orjson']:
+            self.stdout.write(self.style.WARNING('orjson no está instalado: FastJSONRenderer usa JSONRenderer'))
+        for listing in ('employees', 'events'):
+            combos = {name: value for name, value in results[listing].items() if name != 'identical'}
+            baseline = combos['model+json']['mean_ms']
+            self.stdout.write(f"{listing} ({results['rows']} filas por página):")
+            self.stdout.write(f"  {'':<12} {'p50 ms':>8} {'p95 ms':>8} {'páginas/s':>10} {'speedup':>8}")
+            for name, summary in combos.items():
+                self.stdout.write(
+                    f"  {name:<12} {summary['p50_ms']:>8.2f} {summary['p95_ms']:>8.2f} "
+                    f"{summary['pages_per_s']:>10.1f} {baseline / summary['mean_ms']:>7.2f}x"
+                )
+            if not results[listing]['identical']:
+                self.stderr.write(f"  {listing}: las combinaciones generan JSON distinto")
@@ -0,0 +1,21 @@
+"""
+Management command: HTTP load test against a running server.
+"""
+from django.core.management.base import BaseCommand, CommandError
+from attendance.benchmarks import loadgen
+
+
+class Command(BaseCommand):
+    help = (
+        'Siembra empleados y genera carga sobre /api/check-in/, /api/employees/ y '
+        '/api/attendance-events/, reportando throughput, errores y percentiles por endpoint.'
+    )
+    
+    def add_arguments(self, parser):
+        loadgen.add_arguments(parser)
+    
+    def handle(self, *args, **options):
+        try:
+            loadgen.run(options, out=self.stdout)
+        except ValueError as e:
+            raise CommandError(str(e))
@@ -0,0 +1,54 @@
+"""
+Management command: purge the event history of soft-deleted employees.
+"""
+import time
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from attendance.services import EmployeePurgeService
+
+
+class Command(BaseCommand):
+    help = (
+        'Archiva o elimina en chunks los eventos de los empleados dados de baja '
+        '(EmployeePurgeJob pendientes) y luego elimina al empleado.'
+    )
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size', type=int, default=None,
+            help='Eventos por transacción (por defecto EMPLOYEE_PURGE_CHUNK_SIZE)'
+        )
+        parser.add_argument(
+            '--pause', type=float, default=None,
+            help='Segundos entre chunks (por defecto EMPLOYEE_PURGE_PAUSE_SECONDS)'
+        )
+        parser.add_argument('--rows-per-file', type=int, default=100000, help='Eventos por archivo (modo archive)')
+        parser.add_argument('--max-jobs', type=int, default=None, help='Máximo de purgas por ejecución')
+        parser.add_argument(
+            '--watch', type=float, default=None, metavar='SECONDS',
+            help='Seguir corriendo y buscar purgas nuevas cada SECONDS'
+        )
+    
+    def handle(self, *args, **options):
+        chunk_size = options['chunk_size'] or getattr(settings, 'EMPLOYEE_PURGE_CHUNK_SIZE', 500)
+        pause = options['pause']
+        if pause is None:
+            pause = getattr(settings, 'EMPLOYEE_PURGE_PAUSE_SECONDS', 0.05)
+        service = EmployeePurgeService(
+            chunk_size=chunk_size,
+            rows_per_file=options['rows_per_file'],
+            pause_seconds=pause,
+            stale_seconds=getattr(settings, 'EMPLOYEE_PURGE_STALE_SECONDS', 300)
+        )
+        
+        while True:
+            for job in service.run_pending(options['max_jobs']):
+                if job.status == 'done':
+                    self.stdout.write(self.style.SUCCESS(
+                        f"{job.employee_code}: {job.processed_events} eventos purgados ({job.mode})"
+                    ))
+                else:
+                    self.stderr.write(f"{job.employee_code}: falló tras {job.processed_events} eventos: {job.error}")
+            if options['watch'] is None:
+                return
+            time.sleep(options['watch'])
@@ -0,0 +1,46 @@
+"""
+Management command: query archived attendance events.
+"""
+import json
+from datetime import datetime, time
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils import timezone
+from attendance.archive import ArchiveReader
+
+
+def _parse_date(value):
+    if value is None:
+        return None
+    try:
+        return timezone.make_aware(datetime.combine(datetime.strptime(value, '%Y-%m-%d').date(), time.min))
+    except ValueError:
+        raise CommandError(f"Fecha inválida: {value} (usar AAAA-MM-DD)")
+
+
+class Command(BaseCommand):
+    help = 'Consulta eventos del archivo frío por rango de fechas y/o empleado (una línea JSON por evento).'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--from', dest='start', help='Fecha inicial AAAA-MM-DD (inclusive)')
+        parser.add_argument('--to', dest='end', help='Fecha final AAAA-MM-DD (exclusiva)')
+        parser.add_argument('--employee-id', type=int, help='ID del empleado')
+        parser.add_argument('--employee-code', help='Código del empleado')
+        parser.add_argument('--directory', default=None, help='Directorio del archivo (por defecto ARCHIVE_DIR)')
+        parser.add_argument('--count', action='store_true', help='Mostrar solo la cantidad de eventos')
+    
+    def handle(self, *args, **options):
+        reader = ArchiveReader(options['directory'] or settings.ARCHIVE_DIR)
+        events = reader.query(
+            start=_parse_date(options['start']),
+            end=_parse_date(options['end']),
+            employee_id=options['employee_id'],
+            employee_code=options['employee_code']
+        )
+        
+        if options['count']:
+            self.stdout.write(str(sum(1 for _ in events)))
+            return
+        for event in events:
+            self.stdout.write(json.dumps(event, cls=DjangoJSONEncoder))
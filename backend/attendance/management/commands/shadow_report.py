@@ -0,0 +1,55 @@
+"""
+Management command: compare shadow provider scores against the primary.
+"""
+import json
+from datetime import timedelta
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from attendance.repositories import ShadowComparisonRepository
+from attendance.shadow import build_shadow_report
+
+
+class Command(BaseCommand):
+    help = (
+        'Compara las distribuciones de score y las decisiones del proveedor en sombra '
+        'con las del proveedor principal.'
+    )
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--provider', help='Proveedor en sombra (por defecto todos)')
+        parser.add_argument('--days', type=int, default=7, help='Días hacia atrás (0 = todo)')
+        parser.add_argument('--json', action='store_true', help='Emitir el reporte como JSON')
+    
+    def handle(self, *args, **options):
+        since = timezone.now() - timedelta(days=options['days']) if options['days'] else None
+        comparisons = ShadowComparisonRepository.get_for_report(options['provider'], since)
+        report = build_shadow_report(comparisons)
+        
+        if options['json']:
+            self.stdout.write(json.dumps(report, indent=2, sort_keys=True))
+            return
+        if not report:
+            self.stdout.write('Sin comparaciones en el período')
+            return
+        
+        for shadow_provider, data in report.items():
+            self.stdout.write(f"== {shadow_provider} vs {', '.join(data['primary_providers'])}")
+            self.stdout.write(f"comparaciones: {data['comparisons']}  errores: {data['errors']}")
+            if data['agreement_rate'] is not None:
+                self.stdout.write(f"acuerdo en la decisión: {data['agreement_rate'] * 100:.1f}%")
+            self.stdout.write('decisiones (principal/sombra): ' + '  '.join(
+                f"{key}={value}" for key, value in data['decisions'].items()
+            ))
+            self.stdout.write(f"{'':<10} {'media':>7} {'p10':>7} {'p50':>7} {'p90':>7}  histograma 0.0-1.0")
+            for label, key in (('principal', 'primary_scores'), ('sombra', 'shadow_scores')):
+                dist = data[key]
+                if not dist['n']:
+                    continue
+                self.stdout.write(
+                    f"{label:<10} {dist['mean']:>7.3f} {dist['p10']:>7.3f} {dist['p50']:>7.3f} "
+                    f"{dist['p90']:>7.3f}  {' '.join(str(count) for count in dist['histogram'])}"
+                )
+            self.stdout.write(f"diferencia media absoluta: {data['mean_abs_diff']}  correlación: {data['correlation']}")
+            latency = data['shadow_latency']
+            if latency['n']:
+                self.stdout.write(f"latencia sombra: p50 {latency['p50_ms']:.1f} ms  p95 {latency['p95_ms']:.1f} ms")
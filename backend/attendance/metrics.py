@@ -0,0 +1,242 @@
+"""
+Prometheus metrics for the attendance system.
+
+Metrics are process-local unless the ``PROMETHEUS_MULTIPROC_DIR``
+environment variable points to a writable directory before the workers
+start; in that case every worker writes its samples there and the
+``/metrics`` endpoint aggregates them.
+"""
+import contextlib
+import functools
+import os
+import time
+from contextvars import ContextVar
+from typing import Dict, List, Optional
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+)
+
+
+# Buckets desde 0.5 ms hasta 10 s: cubren desde un lookup por PK hasta un proveedor remoto lento
+LATENCY_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+    0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+
+CHECKIN_STAGE_SECONDS = Histogram(
+    'attendance_checkin_stage_seconds',
+    'Duración de cada etapa de CheckInEmployeeService.execute',
+    ['stage'],
+    buckets=LATENCY_BUCKETS
+)
+
+CHECKIN_RESULTS = Counter(
+    'attendance_checkin_results',
+    'Resultados de check-in',
+    ['result']
+)
+
+CHECKIN_COALESCED = Counter(
+    'attendance_checkin_coalesced',
+    'Check-ins duplicados resueltos con el resultado de otro request',
+    ['scope']
+)
+
+REPOSITORY_CALL_SECONDS = Histogram(
+    'attendance_repository_call_seconds',
+    'Duración de los métodos de repositorio',
+    ['repository', 'method'],
+    buckets=LATENCY_BUCKETS
+)
+
+PROVIDER_CALLS = Counter(
+    'attendance_provider_calls',
+    'Llamadas al proveedor de validación facial por resultado',
+    ['provider', 'outcome']
+)
+
+PREFILTER_RESULTS = Counter(
+    'attendance_prefilter_results',
+    'Resultado de cada etapa de pre-filtro antes del proveedor',
+    ['stage', 'outcome']
+)
+
+ADMISSION_SHED = Counter(
+    'attendance_admission_shed',
+    'Requests de check-in rechazados por control de admisión',
+    ['reason']
+)
+
+ADMISSION_QUEUE_WAIT_SECONDS = Histogram(
+    'attendance_admission_queue_wait_seconds',
+    'Espera en la cola del límite de concurrencia del check-in',
+    buckets=(0.0,) + LATENCY_BUCKETS
+)
+
+ADMISSION_IN_FLIGHT = Gauge(
+    'attendance_admission_in_flight',
+    'Check-ins en proceso dentro del límite de concurrencia',
+    multiprocess_mode='livesum'
+)
+
+SHADOW_JOBS = Counter(
+    'attendance_shadow_jobs',
+    'Evaluaciones en sombra por resultado',
+    ['outcome']
+)
+
+PROVIDER_BATCH_SIZE = Histogram(
+    'attendance_provider_batch_size',
+    'Elementos por lote despachado al proveedor',
+    ['provider'],
+    buckets=(1, 2, 4, 8, 16, 32, 64, 128)
+)
+
+PROVIDER_BATCH_WAIT_SECONDS = Histogram(
+    'attendance_provider_batch_wait_seconds',
+    'Espera agregada por el micro-batching antes de despachar el lote',
+    ['provider'],
+    buckets=LATENCY_BUCKETS
+)
+
+EVENT_STREAM_SUBSCRIBERS = Gauge(
+    'attendance_event_stream_subscribers',
+    'Suscriptores conectados al stream de eventos de asistencia',
+    multiprocess_mode='livesum'
+)
+
+EVENT_STREAM_DROPPED = Counter(
+    'attendance_event_stream_dropped',
+    'Suscriptores del stream desconectados por no consumir a tiempo'
+)
+
+CACHE_REQUESTS = Counter(
+    'attendance_cache_requests',
+    'Consultas a cachés en memoria (hit/miss)',
+    ['cache', 'result']
+)
+
+CACHE_INVALIDATIONS = Counter(
+    'attendance_cache_invalidations',
+    'Invalidaciones de cachés de empleados recibidas (evict: un empleado, flush: todo)',
+    ['kind']
+)
+
+CLUSTER_FORWARDS = Counter(
+    'attendance_cluster_forwards',
+    'Check-ins de otro shard: reenviados al dueño, fallidos o procesados localmente',
+    ['outcome']
+)
+
+
+# Muestras por etapa del contexto actual mientras hay un collect_stages() activo
+_collected_stages: ContextVar[Optional[Dict[str, List[int]]]] = ContextVar('collected_stages', default=None)
+
+
+@contextlib.contextmanager
+def stage_timer(stage: str):
+    """
+    Context manager que mide una etapa del check-in.
+    
+    Uso:
+        with stage_timer('provider_verify'):
+            ...
+    """
+    start = time.perf_counter_ns()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter_ns() - start
+        CHECKIN_STAGE_SECONDS.labels(stage=stage).observe(elapsed / 1e9)
+        collected = _collected_stages.get()
+        if collected is not None:
+            collected.setdefault(stage, []).append(elapsed)
+
+
+@contextlib.contextmanager
+def collect_stages():
+    """
+    Recolectar además las duraciones de stage_timer (en nanosegundos) por etapa.
+    
+    Uso (benchmarks):
+        with collect_stages() as samples:
+            service.execute(...)
+        samples['provider_verify']  # [ns, ...]
+    """
+    samples = {}
+    token = _collected_stages.set(samples)
+    try:
+        yield samples
+    finally:
+        _collected_stages.reset(token)
+
+
+def record_cache(cache: str, hit: bool) -> None:
+    """Registrar un hit o miss de una caché en memoria."""
+    CACHE_REQUESTS.labels(cache=cache, result='hit' if hit else 'miss').inc()
+
+
+def _timed(func, histogram):
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            histogram.observe(time.perf_counter() - start)
+    return wrapper
+
+
+def instrument_repository(name: str):
+    """
+    Decorador de clase que mide cada método estático público del repositorio.
+    
+    Args:
+        name: Nombre del repositorio en la etiqueta `repository`
+    """
+    def decorator(cls):
+        for attr, value in list(vars(cls).items()):
+            if attr.startswith('_') or not isinstance(value, staticmethod):
+                continue
+            histogram = REPOSITORY_CALL_SECONDS.labels(repository=name, method=attr)
+            setattr(cls, attr, staticmethod(_timed(value.__func__, histogram)))
+        return cls
+    return decorator
+
+
+def render_latest():
+    """
+    Serializar las métricas en formato de texto de Prometheus.
+    
+    Returns:
+        Tupla (contenido, content_type)
+    """
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        from prometheus_client import multiprocess
+        
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
+
+
+def mark_process_dead(pid: int) -> None:
+    """
+    Limpiar las métricas de un worker terminado (modo multiproceso).
+    
+    Pensado para el hook `child_exit` de gunicorn:
+        def child_exit(server, worker):
+            from attendance.metrics import mark_process_dead
+            mark_process_dead(worker.pid)
+    """
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        from prometheus_client import multiprocess
+        
+        multiprocess.mark_process_dead(pid)
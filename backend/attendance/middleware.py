@@ -0,0 +1,145 @@
+"""
+Middleware for the attendance system.
+"""
+import cProfile
+import hmac
+import logging
+import os
+import random
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+
+logger = logging.getLogger(__name__)
+
+PROFILE_HEADER = 'X-Profile-Token'
+
+
+class StackSampler:
+    """
+    Perfilador por muestreo de un único hilo.
+    
+    Un hilo auxiliar toma la pila del hilo objetivo cada `interval`
+    segundos y acumula las pilas colapsadas (formato de flamegraph.pl /
+    speedscope: "raiz;...;hoja conteo").
+    """
+    
+    def __init__(self, thread_id: int, interval: float = 0.005):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='request-profiler', daemon=True)
+    
+    def start(self) -> None:
+        self._thread.start()
+    
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+    
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            names = []
+            while frame is not None:
+                code = frame.f_code
+                names.append(f"{os.path.basename(code.co_filename)}:{code.co_name}:{frame.f_lineno}")
+                frame = frame.f_back
+            self.stacks[';'.join(reversed(names))] += 1
+    
+    def write(self, path: str) -> None:
+        with open(path, 'w', encoding='utf-8') as fh:
+            for stack, count in self.stacks.most_common():
+                fh.write(f"{stack} {count}\n")
+
+
+class RequestProfilingMiddleware:
+    """
+    Perfila requests individuales bajo demanda.
+    
+    Un request se perfila si trae el header `X-Profile-Token` con el token
+    configurado, o si cae en la fracción de muestreo. El perfil cubre todo
+    lo que está por debajo de este middleware (resto de middlewares, DRF,
+    servicio, proveedor y renderizado) y se guarda en
+    REQUEST_PROFILING_DIR como `.prof` (pstats, modo `cprofile`) o
+    `.collapsed` (pilas colapsadas, modo `sampling`).
+    
+    Si REQUEST_PROFILING_ENABLED es False, Django descarta el middleware
+    al arrancar y no tiene costo alguno.
+    """
+    
+    def __init__(self, get_response):
+        if not getattr(settings, 'REQUEST_PROFILING_ENABLED', False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.token = getattr(settings, 'REQUEST_PROFILING_TOKEN', '')
+        self.sample_rate = getattr(settings, 'REQUEST_PROFILING_SAMPLE_RATE', 0.0)
+        self.mode = getattr(settings, 'REQUEST_PROFILING_MODE', 'cprofile')
+        self.interval = getattr(settings, 'REQUEST_PROFILING_INTERVAL_MS', 5.0) / 1000.0
+        self.path_prefix = getattr(settings, 'REQUEST_PROFILING_PATH_PREFIX', '/api/')
+        self.output_dir = getattr(settings, 'REQUEST_PROFILING_DIR')
+        if self.mode not in ('cprofile', 'sampling'):
+            raise ValueError(f"REQUEST_PROFILING_MODE inválido: {self.mode}")
+        os.makedirs(self.output_dir, exist_ok=True)
+    
+    def __call__(self, request):
+        trigger = self._trigger(request)
+        if trigger is None:
+            return self.get_response(request)
+        
+        start = time.perf_counter()
+        if self.mode == 'sampling':
+            sampler = StackSampler(threading.get_ident(), self.interval)
+            sampler.start()
+            try:
+                response = self.get_response(request)
+            finally:
+                sampler.stop()
+        else:
+            profiler = cProfile.Profile()
+            profiler.enable()
+            try:
+                response = self.get_response(request)
+            finally:
+                profiler.disable()
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        
+        filename = self._filename(request, elapsed_ms)
+        path = os.path.join(self.output_dir, filename)
+        if self.mode == 'sampling':
+            sampler.write(path)
+        else:
+            profiler.dump_stats(path)
+        
+        logger.info(
+            "Request perfilado (%s): %s %s %.1f ms -> %s",
+            trigger, request.method, request.path, elapsed_ms, filename
+        )
+        if trigger == 'header':
+            response['X-Profile-File'] = filename
+        return response
+    
+    def _trigger(self, request):
+        """Retornar 'header', 'sample' o None según si hay que perfilar."""
+        if not request.path.startswith(self.path_prefix):
+            return None
+        supplied = request.headers.get(PROFILE_HEADER)
+        if supplied is not None and self.token and hmac.compare_digest(supplied.encode(), self.token.encode()):
+            return 'header'
+        if self.sample_rate > 0 and random.random() < self.sample_rate:
+            return 'sample'
+        return None
+    
+    def _filename(self, request, elapsed_ms: float) -> str:
+        slug = re.sub(r'[^A-Za-z0-9]+', '-', request.path).strip('-') or 'root'
+        stamp = datetime.now().strftime('%Y%m%dT%H%M%S%f')
+        extension = 'collapsed' if self.mode == 'sampling' else 'prof'
+        return f"{stamp}_{request.method}_{slug}_{elapsed_ms:.0f}ms.{extension}"
@@ -0,0 +1,18 @@
+# Generated migration - Capture hash for check-in coalescing
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attendance', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='attendanceevent',
+            name='capture_hash',
+            field=models.CharField(blank=True, db_index=True, default='', help_text='SHA-256 de la imagen capturada, para agrupar check-ins duplicados', max_length=64, verbose_name='Hash de Captura'),
+        ),
+    ]
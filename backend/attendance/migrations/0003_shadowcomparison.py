@@ -0,0 +1,36 @@
+# Generated migration - Shadow provider comparisons
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attendance', '0002_attendanceevent_capture_hash'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ShadowComparison',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('primary_provider', models.CharField(max_length=100, verbose_name='Proveedor Principal')),
+                ('primary_score', models.FloatField(verbose_name='Score Principal')),
+                ('primary_decision', models.BooleanField(verbose_name='Decisión Principal')),
+                ('shadow_provider', models.CharField(max_length=100, verbose_name='Proveedor en Sombra')),
+                ('shadow_score', models.FloatField(blank=True, null=True, verbose_name='Score en Sombra')),
+                ('shadow_decision', models.BooleanField(blank=True, help_text='shadow_score >= threshold del evento; vacío si el proveedor falló', null=True, verbose_name='Decisión en Sombra')),
+                ('shadow_error', models.TextField(blank=True, default='', verbose_name='Error en Sombra')),
+                ('shadow_latency_ms', models.FloatField(verbose_name='Latencia en Sombra (ms)')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Fecha de Creación')),
+                ('attendance_event', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='shadow_comparisons', to='attendance.attendanceevent', verbose_name='Evento de Asistencia')),
+            ],
+            options={
+                'verbose_name': 'Comparación en Sombra',
+                'verbose_name_plural': 'Comparaciones en Sombra',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['shadow_provider', '-created_at'], name='attendance__shadow__1309e1_idx')],
+            },
+        ),
+    ]
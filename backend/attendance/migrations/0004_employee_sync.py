@@ -0,0 +1,32 @@
+# Generated migration - Delta roster sync (tombstones and cursor index)
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attendance', '0003_shadowcomparison'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EmployeeTombstone',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('employee_id', models.BigIntegerField(verbose_name='ID de Empleado')),
+                ('employee_code', models.CharField(max_length=50, verbose_name='Código de Empleado')),
+                ('deleted_at', models.DateTimeField(auto_now_add=True, verbose_name='Fecha de Eliminación')),
+            ],
+            options={
+                'verbose_name': 'Empleado Eliminado',
+                'verbose_name_plural': 'Empleados Eliminados',
+                'ordering': ['deleted_at', 'id'],
+                'indexes': [models.Index(fields=['deleted_at', 'id'], name='attendance_tombstone_sync_idx')],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='employee',
+            index=models.Index(fields=['updated_at', 'id'], name='attendance_employee_sync_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated migration - Site of the kiosk that registered a check-in
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attendance', '0004_employee_sync'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='attendanceevent',
+            name='site',
+            field=models.CharField(blank=True, default='', help_text='Sede del kiosco que registró el check-in (header X-Site-Id)', max_length=50, verbose_name='Sede'),
+        ),
+    ]
@@ -0,0 +1,46 @@
+# Generated migration - Append-optimized indexes for AttendanceEvent
+
+import django.contrib.postgres.indexes
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attendance', '0005_attendanceevent_site'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='attendanceevent',
+            options={'ordering': ['-id'], 'verbose_name': 'Evento de Asistencia', 'verbose_name_plural': 'Eventos de Asistencia'},
+        ),
+        migrations.RemoveIndex(
+            model_name='attendanceevent',
+            name='attendance_a_employe_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='attendanceevent',
+            name='attendance_a_timesta_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='attendanceevent',
+            name='attendance_a_decisio_idx',
+        ),
+        migrations.RemoveField(
+            model_name='attendanceevent',
+            name='created_at',
+        ),
+        migrations.AddIndex(
+            model_name='attendanceevent',
+            index=django.contrib.postgres.indexes.BrinIndex(fields=['timestamp'], name='attendance_event_ts_brin', pages_per_range=32),
+        ),
+        migrations.AddIndex(
+            model_name='attendanceevent',
+            index=models.Index(fields=['employee', '-id'], include=('timestamp', 'decision'), name='attendance_event_employee_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='attendanceevent',
+            index=models.Index(condition=models.Q(('decision', False)), fields=['-id'], name='attendance_event_rejected_idx'),
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated migration - Trigram indexes for accent-insensitive employee search
+
+from django.contrib.postgres.operations import TrigramExtension, UnaccentExtension
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    
+    dependencies = [
+        ('attendance', '0006_attendanceevent_indexes'),
+    ]
+    
+    operations = [
+        TrigramExtension(),
+        UnaccentExtension(),
+        # unaccent() es STABLE y no puede usarse en un índice: envoltorio
+        # IMMUTABLE con el diccionario fijo
+        migrations.RunSQL(
+            sql="""
+                CREATE FUNCTION f_unaccent(text) RETURNS text
+                LANGUAGE sql IMMUTABLE PARALLEL SAFE STRICT
+                AS $$ SELECT public.unaccent('public.unaccent'::regdictionary, $1) $$;
+            """,
+            reverse_sql='DROP FUNCTION f_unaccent(text);',
+        ),
+        migrations.RunSQL(
+            sql=(
+                'CREATE INDEX attendance_employee_name_trgm ON attendance_employee '
+                'USING gin (f_unaccent(lower(full_name)) gin_trgm_ops);'
+            ),
+            reverse_sql='DROP INDEX attendance_employee_name_trgm;',
+        ),
+        migrations.RunSQL(
+            sql=(
+                'CREATE INDEX attendance_employee_code_trgm ON attendance_employee '
+                'USING gin (employee_code gin_trgm_ops);'
+            ),
+            reverse_sql='DROP INDEX attendance_employee_code_trgm;',
+        ),
+    ]
@@ -0,0 +1,53 @@
+# Generated migration - Employee soft delete and background purge jobs
+
+import django.core.validators
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    
+    dependencies = [
+        ('attendance', '0007_employee_search'),
+    ]
+    
+    operations = [
+        migrations.CreateModel(
+            name='EmployeePurgeJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('employee_id', models.BigIntegerField(verbose_name='ID de Empleado')),
+                ('employee_code', models.CharField(max_length=50, verbose_name='Código de Empleado')),
+                ('mode', models.CharField(choices=[('archive', 'Archivar'), ('delete', 'Eliminar')], default='archive', max_length=10, verbose_name='Modo')),
+                ('status', models.CharField(choices=[('pending', 'Pendiente'), ('running', 'En curso'), ('done', 'Terminada'), ('failed', 'Fallida')], default='pending', max_length=10, verbose_name='Estado')),
+                ('total_events', models.PositiveIntegerField(default=0, verbose_name='Eventos a Purgar')),
+                ('processed_events', models.PositiveIntegerField(default=0, verbose_name='Eventos Purgados')),
+                ('error', models.TextField(blank=True, default='', verbose_name='Error')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Fecha de Creación')),
+                ('started_at', models.DateTimeField(blank=True, null=True, verbose_name='Inicio')),
+                ('finished_at', models.DateTimeField(blank=True, null=True, verbose_name='Fin')),
+            ],
+            options={
+                'verbose_name': 'Purga de Empleado',
+                'verbose_name_plural': 'Purgas de Empleados',
+                'ordering': ['-id'],
+            },
+        ),
+        migrations.AddField(
+            model_name='employee',
+            name='deleted_at',
+            field=models.DateTimeField(blank=True, help_text='Baja lógica; el historial se purga en segundo plano (ver EmployeePurgeJob)', null=True, verbose_name='Fecha de Baja'),
+        ),
+        migrations.AlterField(
+            model_name='employee',
+            name='employee_code',
+            field=models.CharField(max_length=50, validators=[django.core.validators.RegexValidator(message='El código de empleado solo puede contener letras mayúsculas, números, guiones y guiones bajos.', regex='^[A-Z0-9_-]+$')], verbose_name='Código de Empleado'),
+        ),
+        migrations.AddConstraint(
+            model_name='employee',
+            constraint=models.UniqueConstraint(condition=models.Q(('deleted_at__isnull', True)), fields=('employee_code',), name='attendance_employee_code_live_uniq'),
+        ),
+        migrations.AddIndex(
+            model_name='employeepurgejob',
+            index=models.Index(fields=['status', 'id'], name='attendance_purge_status_idx'),
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated migration - Multiple reference images per employee
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    
+    dependencies = [
+        ('attendance', '0008_employee_soft_delete'),
+    ]
+    
+    operations = [
+        migrations.CreateModel(
+            name='EmployeeReference',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('image', models.ImageField(upload_to='photos/references/', verbose_name='Imagen')),
+                ('label', models.CharField(blank=True, default='', help_text='Descripción de la referencia, p.ej. "con casco"', max_length=100, verbose_name='Etiqueta')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Fecha de Creación')),
+                ('employee', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='references', to='attendance.employee', verbose_name='Empleado')),
+            ],
+            options={
+                'verbose_name': 'Referencia Facial',
+                'verbose_name_plural': 'Referencias Faciales',
+                'ordering': ['id'],
+            },
+        ),
+        # Columna nullable sin default ni índice: en PostgreSQL no reescribe la tabla
+        migrations.AddField(
+            model_name='attendanceevent',
+            name='matched_reference',
+            field=models.ForeignKey(blank=True, db_index=False, help_text='Referencia con mejor score; vacío si fue photo_ref o decidió un pre-filtro', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='matched_events', to='attendance.employeereference', verbose_name='Referencia Coincidente'),
+        ),
+    ]
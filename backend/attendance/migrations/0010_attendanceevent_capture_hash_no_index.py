@@ -0,0 +1,18 @@
+# Generated migration - Drop the capture_hash B-tree from AttendanceEvent
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attendance', '0009_employee_references'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='attendanceevent',
+            name='capture_hash',
+            field=models.CharField(blank=True, default='', help_text='SHA-256 de la imagen capturada, para agrupar check-ins duplicados', max_length=64, verbose_name='Hash de Captura'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated migration - Owner and heartbeat of EmployeePurgeJob
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    
+    dependencies = [
+        ('attendance', '0010_attendanceevent_capture_hash_no_index'),
+    ]
+    
+    operations = [
+        migrations.AddField(
+            model_name='employeepurgejob',
+            name='owner',
+            field=models.CharField(blank=True, default='', help_text='host:pid del proceso que la ejecuta', max_length=100, verbose_name='Proceso'),
+        ),
+        migrations.AddField(
+            model_name='employeepurgejob',
+            name='heartbeat_at',
+            field=models.DateTimeField(blank=True, help_text='Se actualiza con cada chunk; una purga en curso sin avance reciente se puede retomar', null=True, verbose_name='Último Avance'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated migration - Partial index on AttendanceEvent.matched_reference
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attendance', '0011_employeepurgejob_owner_heartbeat'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='attendanceevent',
+            index=models.Index(condition=models.Q(('matched_reference__isnull', False)), fields=['matched_reference'], name='attendance_event_matched_ref_idx'),
+        ),
+    ]
@@ -1,10 +1,18 @@
 """
 Models for attendance system.
 """
+from django.contrib.postgres.indexes import BrinIndex
 from django.db import models
 from django.core.validators import RegexValidator
 
 
+class LiveEmployeeManager(models.Manager):
+    """Manager por defecto de Employee: excluye los empleados dados de baja."""
+    
+    def get_queryset(self):
+        return super().get_queryset().filter(deleted_at__isnull=True)
+
+
 class Employee(models.Model):
     """Modelo de empleado."""
     
@@ -15,7 +23,6 @@ class Employee(models.Model):
     
     employee_code = models.CharField(
         max_length=50,
-        unique=True,
         validators=[
             RegexValidator(
                 regex=r'^[A-Z0-9_-]+$',
@@ -37,6 +44,17 @@ class Employee(models.Model):
     )
     created_at = models.DateTimeField(auto_now_add=True, verbose_name='Fecha de Creación')
     updated_at = models.DateTimeField(auto_now=True, verbose_name='Fecha de Actualización')
+    deleted_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name='Fecha de Baja',
+        help_text='Baja lógica; el historial se purga en segundo plano (ver EmployeePurgeJob)'
+    )
+    
+    # Las consultas de la aplicación no ven a los empleados dados de baja;
+    # all_objects los incluye (purga, admin de bajas)
+    objects = LiveEmployeeManager()
+    all_objects = models.Manager()
     
     class Meta:
         verbose_name = 'Empleado'
@@ -45,12 +63,133 @@ class Employee(models.Model):
         indexes = [
             models.Index(fields=['employee_code']),
             models.Index(fields=['status']),
+            # Cursor de sincronización de kioscos (ver EmployeeSyncService)
+            models.Index(fields=['updated_at', 'id'], name='attendance_employee_sync_idx'),
+        ]
+        constraints = [
+            # El código de un empleado dado de baja puede reutilizarse
+            models.UniqueConstraint(
+                fields=['employee_code'],
+                condition=models.Q(deleted_at__isnull=True),
+                name='attendance_employee_code_live_uniq'
+            ),
         ]
     
     def __str__(self):
         return f"{self.employee_code} - {self.full_name}"
 
 
+class EmployeeReference(models.Model):
+    """
+    Referencia facial adicional de un empleado (con lentes, barba, casco...).
+    
+    El check-in compara la captura con photo_ref y con todas las referencias
+    del empleado; el evento guarda cuál coincidió (ver matched_reference).
+    """
+    
+    employee = models.ForeignKey(
+        Employee,
+        on_delete=models.CASCADE,
+        related_name='references',
+        verbose_name='Empleado'
+    )
+    image = models.ImageField(upload_to='photos/references/', verbose_name='Imagen')
+    label = models.CharField(
+        max_length=100,
+        blank=True,
+        default='',
+        verbose_name='Etiqueta',
+        help_text='Descripción de la referencia, p.ej. "con casco"'
+    )
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name='Fecha de Creación')
+    
+    class Meta:
+        verbose_name = 'Referencia Facial'
+        verbose_name_plural = 'Referencias Faciales'
+        ordering = ['id']
+    
+    def __str__(self):
+        return f"{self.employee.employee_code} - {self.label or self.id}"
+
+
+class EmployeeTombstone(models.Model):
+    """Registro de un empleado eliminado, para la sincronización incremental de kioscos."""
+    
+    employee_id = models.BigIntegerField(verbose_name='ID de Empleado')
+    employee_code = models.CharField(max_length=50, verbose_name='Código de Empleado')
+    deleted_at = models.DateTimeField(auto_now_add=True, verbose_name='Fecha de Eliminación')
+    
+    class Meta:
+        verbose_name = 'Empleado Eliminado'
+        verbose_name_plural = 'Empleados Eliminados'
+        ordering = ['deleted_at', 'id']
+        indexes = [
+            models.Index(fields=['deleted_at', 'id'], name='attendance_tombstone_sync_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.employee_code} - eliminado {self.deleted_at}"
+
+
+class EmployeePurgeJob(models.Model):
+    """Purga en segundo plano del historial de un empleado dado de baja."""
+    
+    MODE_CHOICES = [
+        ('archive', 'Archivar'),
+        ('delete', 'Eliminar'),
+    ]
+    STATUS_CHOICES = [
+        ('pending', 'Pendiente'),
+        ('running', 'En curso'),
+        ('done', 'Terminada'),
+        ('failed', 'Fallida'),
+    ]
+    
+    employee_id = models.BigIntegerField(verbose_name='ID de Empleado')
+    employee_code = models.CharField(max_length=50, verbose_name='Código de Empleado')
+    mode = models.CharField(max_length=10, choices=MODE_CHOICES, default='archive', verbose_name='Modo')
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending', verbose_name='Estado')
+    total_events = models.PositiveIntegerField(default=0, verbose_name='Eventos a Purgar')
+    processed_events = models.PositiveIntegerField(default=0, verbose_name='Eventos Purgados')
+    error = models.TextField(blank=True, default='', verbose_name='Error')
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name='Fecha de Creación')
+    started_at = models.DateTimeField(null=True, blank=True, verbose_name='Inicio')
+    finished_at = models.DateTimeField(null=True, blank=True, verbose_name='Fin')
+    owner = models.CharField(
+        max_length=100,
+        blank=True,
+        default='',
+        verbose_name='Proceso',
+        help_text='host:pid del proceso que la ejecuta'
+    )
+    heartbeat_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name='Último Avance',
+        help_text='Se actualiza con cada chunk; una purga en curso sin avance reciente se puede retomar'
+    )
+    
+    class Meta:
+        verbose_name = 'Purga de Empleado'
+        verbose_name_plural = 'Purgas de Empleados'
+        ordering = ['-id']
+        indexes = [
+            models.Index(fields=['status', 'id'], name='attendance_purge_status_idx'),
+        ]
+    
+    @property
+    def progress(self) -> float:
+        """Fracción purgada (0.0 - 1.0)."""
+        if self.status == 'done':
+            return 1.0
+        if not self.total_events:
+            return 0.0
+        return min(1.0, self.processed_events / self.total_events)
+    
+    def __str__(self):
+        return f"{self.employee_code} - {self.get_status_display()} ({self.processed_events}/{self.total_events})"
+
+
 class AttendanceEvent(models.Model):
     """Modelo de evento de asistencia (check-in)."""
     
@@ -78,17 +217,101 @@ class AttendanceEvent(models.Model):
         verbose_name='Umbral Aplicado',
         help_text='Umbral de validación usado en este check-in'
     )
-    created_at = models.DateTimeField(auto_now_add=True, verbose_name='Fecha de Creación')
+    capture_hash = models.CharField(
+        max_length=64,
+        blank=True,
+        default='',
+        # Sin índice: solo lo consulta la deduplicación entre workers, que ya
+        # acota por empleado (índice (employee, -id)) y por ventana de tiempo
+        verbose_name='Hash de Captura',
+        help_text='SHA-256 de la imagen capturada, para agrupar check-ins duplicados'
+    )
+    site = models.CharField(
+        max_length=50,
+        blank=True,
+        default='',
+        verbose_name='Sede',
+        help_text='Sede del kiosco que registró el check-in (header X-Site-Id)'
+    )
+    matched_reference = models.ForeignKey(
+        EmployeeReference,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='matched_events',
+        # Sin índice completo: casi todos los eventos coinciden con photo_ref
+        # (columna nula); el índice parcial de Meta.indexes cubre el SET_NULL
+        db_index=False,
+        verbose_name='Referencia Coincidente',
+        help_text='Referencia con mejor score; vacío si fue photo_ref o decidió un pre-filtro'
+    )
     
     class Meta:
         verbose_name = 'Evento de Asistencia'
         verbose_name_plural = 'Eventos de Asistencia'
-        ordering = ['-timestamp']
+        # La tabla solo crece en orden de tiempo: el id sigue el orden de
+        # timestamp y ordenar por id usa la clave primaria
+        ordering = ['-id']
         indexes = [
-            models.Index(fields=['employee', '-timestamp']),
-            models.Index(fields=['timestamp']),
-            models.Index(fields=['decision']),
+            # Rangos de fechas (archivo, presencia, resúmenes): BRIN ocupa
+            # unos pocos KB y casi no encarece los inserts
+            BrinIndex(fields=['timestamp'], pages_per_range=32, name='attendance_event_ts_brin'),
+            # Listado y resúmenes por empleado sin leer la tabla (index-only)
+            models.Index(
+                fields=['employee', '-id'],
+                include=['timestamp', 'decision'],
+                name='attendance_event_employee_idx'
+            ),
+            # Solo los intentos rechazados, en vez de un B-tree sobre un booleano
+            models.Index(
+                fields=['-id'],
+                condition=models.Q(decision=False),
+                name='attendance_event_rejected_idx'
+            ),
+            # Borrar una referencia (endpoint o purga del empleado) hace el
+            # SET_NULL de sus eventos; sin índice recorrería toda la tabla
+            models.Index(
+                fields=['matched_reference'],
+                condition=models.Q(matched_reference__isnull=False),
+                name='attendance_event_matched_ref_idx'
+            ),
         ]
     
     def __str__(self):
         return f"{self.employee.employee_code} - {self.timestamp} - {'✓' if self.decision else '✗'}"
+
+
+class ShadowComparison(models.Model):
+    """Resultado de un proveedor candidato evaluado en sombra sobre un check-in real."""
+    
+    attendance_event = models.ForeignKey(
+        AttendanceEvent,
+        on_delete=models.CASCADE,
+        related_name='shadow_comparisons',
+        verbose_name='Evento de Asistencia'
+    )
+    primary_provider = models.CharField(max_length=100, verbose_name='Proveedor Principal')
+    primary_score = models.FloatField(verbose_name='Score Principal')
+    primary_decision = models.BooleanField(verbose_name='Decisión Principal')
+    shadow_provider = models.CharField(max_length=100, verbose_name='Proveedor en Sombra')
+    shadow_score = models.FloatField(null=True, blank=True, verbose_name='Score en Sombra')
+    shadow_decision = models.BooleanField(
+        null=True,
+        blank=True,
+        verbose_name='Decisión en Sombra',
+        help_text='shadow_score >= threshold del evento; vacío si el proveedor falló'
+    )
+    shadow_error = models.TextField(blank=True, default='', verbose_name='Error en Sombra')
+    shadow_latency_ms = models.FloatField(verbose_name='Latencia en Sombra (ms)')
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name='Fecha de Creación')
+    
+    class Meta:
+        verbose_name = 'Comparación en Sombra'
+        verbose_name_plural = 'Comparaciones en Sombra'
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['shadow_provider', '-created_at']),
+        ]
+    
+    def __str__(self):
+        return f"{self.shadow_provider} vs {self.primary_provider} - evento {self.attendance_event_id}"
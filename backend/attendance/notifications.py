@@ -0,0 +1,103 @@
+"""
+Background listeners for PostgreSQL LISTEN/NOTIFY channels.
+
+A listener is a daemon thread with its own psycopg2 connection (outside the
+Django connection handling) that waits on one channel and hands every
+payload to ``on_notify``. When the connection drops it reconnects with
+exponential backoff and calls ``on_connect`` again before reporting itself
+live: notifications sent while it was disconnected are lost, so that is the
+place to discard whatever depended on them.
+"""
+import logging
+import select
+import threading
+from abc import ABC, abstractmethod
+
+logger = logging.getLogger(__name__)
+
+
+class ChannelListener(ABC):
+    """Hilo que escucha un canal de PostgreSQL con una conexión propia."""
+    
+    channel = ''
+    thread_name = 'pg-listener'
+    
+    def __init__(self, connection_params: dict, poll_seconds: float = 1.0, max_backoff: float = 30.0):
+        """
+        Inicializar el listener.
+        
+        Args:
+            connection_params: Argumentos de psycopg2.connect
+            poll_seconds: Espera máxima por notificaciones antes de revisar si debe detenerse
+            max_backoff: Espera máxima entre intentos de reconexión
+        """
+        self.connection_params = connection_params
+        self.poll_seconds = poll_seconds
+        self.max_backoff = max_backoff
+        self._live = threading.Event()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=self.thread_name, daemon=True)
+        self._connection = None
+    
+    @property
+    def live(self) -> bool:
+        """True mientras el hilo está escuchando el canal."""
+        return self._live.is_set()
+    
+    def start(self) -> None:
+        self._thread.start()
+    
+    def wait_live(self, timeout: float) -> bool:
+        """Esperar a que el hilo escuche el canal."""
+        return self._live.wait(timeout)
+    
+    def stop(self) -> None:
+        """Detener el hilo y cerrar su conexión."""
+        self._stop.set()
+        self._thread.join(timeout=self.poll_seconds + 1)
+    
+    def on_connect(self) -> None:
+        """Llamado tras cada (re)conexión, antes de marcar el listener como activo."""
+    
+    @abstractmethod
+    def on_notify(self, payload: str) -> None:
+        """Procesar el payload de una notificación (en el hilo del listener)."""
+    
+    def _run(self) -> None:
+        backoff = 0.5
+        while not self._stop.is_set():
+            try:
+                self._listen()
+                backoff = 0.5
+            except Exception as e:
+                logger.warning("Listener de %s desconectado: %s", self.channel, e)
+            finally:
+                self._disconnect()
+            if not self._stop.wait(backoff):
+                backoff = min(backoff * 2, self.max_backoff)
+    
+    def _listen(self) -> None:
+        import psycopg2
+        
+        self._connection = psycopg2.connect(**self.connection_params)
+        self._connection.autocommit = True
+        with self._connection.cursor() as cursor:
+            cursor.execute(f'LISTEN {self.channel}')
+        self.on_connect()
+        self._live.set()
+        logger.info("Listener escuchando %s", self.channel)
+        while not self._stop.is_set():
+            if select.select([self._connection], [], [], self.poll_seconds) == ([], [], []):
+                continue
+            self._connection.poll()
+            while self._connection.notifies:
+                self.on_notify(self._connection.notifies.pop(0).payload)
+    
+    def _disconnect(self) -> None:
+        self._live.clear()
+        if self._connection is not None:
+            try:
+                self._connection.close()
+            except Exception:
+                pass
+            self._connection = None
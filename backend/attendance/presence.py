@@ -0,0 +1,222 @@
+"""
+In-memory presence board and per-employee recent-event ring buffers.
+
+Each committed check-in updates the board (see ``attendance/signals.py``),
+so "who is on site" and "last N check-ins of an employee" are answered
+from memory. The board is loaded from the database on first use and, with
+several worker processes, catches up on check-ins handled by the other
+workers with a small incremental query at most every
+``PRESENCE_REFRESH_SECONDS``. The same refresh reads the employees removed
+since the previous one (``EmployeeTombstone``) and drops them, so a removal
+made through another worker disappears from every board.
+"""
+import threading
+import time
+from collections import deque
+from datetime import timedelta
+from typing import Dict, List, Optional
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.utils import timezone
+from attendance.events import event_payload
+from attendance.repositories import AttendanceRepository, EmployeeRepository
+
+# Margen de la consulta incremental: cubre eventos de otros workers cuyo
+# timestamp es anterior a la última consulta pero que confirmaron después
+REFRESH_OVERLAP = timedelta(seconds=30)
+
+
+def _key(payload: Dict[str, any]):
+    return payload['timestamp'], payload['id']
+
+
+class PresenceBoard:
+    """
+    Presencia por empleado y buffer circular de sus últimos eventos.
+    
+    Un empleado está presente si su último check-in aceptado ocurrió dentro
+    de las últimas `window_hours` horas. Los eventos se guardan con la forma
+    de attendance.events.event_payload, por código de empleado y junto con
+    el ID del empleado dueño del código: un código reutilizado por otro
+    empleado no hereda el historial del anterior.
+    """
+    
+    def __init__(
+        self,
+        ring_size: int = 5,
+        window_hours: float = 12,
+        refresh_seconds: float = 5,
+        repository: AttendanceRepository = None,
+        employee_repository: EmployeeRepository = None
+    ):
+        """
+        Inicializar PresenceBoard.
+        
+        Args:
+            ring_size: Eventos recientes guardados por empleado
+            window_hours: Horas desde el último check-in aceptado en que un
+                empleado se considera presente
+            refresh_seconds: Intervalo mínimo entre consultas incrementales
+                (0 las desactiva: solo se ven los check-ins de este proceso)
+            repository: Repositorio de eventos
+            employee_repository: Repositorio de empleados (bajas)
+        """
+        self.ring_size = ring_size
+        self.window = timedelta(hours=window_hours)
+        self.refresh_seconds = refresh_seconds
+        self.repository = repository or AttendanceRepository()
+        self.employee_repository = employee_repository or EmployeeRepository()
+        self._owners = {}
+        self._recent = {}
+        self._present = {}
+        self._lock = threading.Lock()
+        self._load_lock = threading.Lock()
+        self._loaded = False
+        self._refreshed_at = 0.0
+        self._refreshed_since = None
+    
+    @property
+    def loaded(self) -> bool:
+        """True si el tablero ya se cargó desde la base de datos."""
+        return self._loaded
+    
+    def record(self, payload: Dict[str, any], employee_id: int) -> None:
+        """Registrar un evento confirmado del empleado `employee_id` (idempotente por ID)."""
+        code = payload['employee_code']
+        with self._lock:
+            if self._owners.get(code, employee_id) != employee_id:
+                self._drop(code)
+            self._owners[code] = employee_id
+            ring = self._recent.get(code)
+            if ring is None:
+                ring = self._recent[code] = deque(maxlen=self.ring_size)
+            self._insert(ring, payload)
+            if payload['decision']:
+                current = self._present.get(code)
+                if current is None or _key(current) < _key(payload):
+                    self._present[code] = payload
+    
+    def _insert(self, ring: deque, payload: Dict[str, any]) -> None:
+        if any(entry['id'] == payload['id'] for entry in ring):
+            return
+        if not ring or _key(ring[-1]) < _key(payload):
+            ring.append(payload)
+            return
+        # Llegó fuera de orden (p.ej. desde la consulta incremental)
+        if len(ring) == ring.maxlen and _key(payload) < _key(ring[0]):
+            return
+        ordered = sorted([*ring, payload], key=_key)
+        ring.clear()
+        ring.extend(ordered)
+    
+    def forget(self, employee_code: str, employee_id: int) -> None:
+        """Quitar a un empleado eliminado (si el código sigue siendo suyo)."""
+        with self._lock:
+            if self._owners.get(employee_code) == employee_id:
+                self._drop(employee_code)
+    
+    def _drop(self, employee_code: str) -> None:
+        self._owners.pop(employee_code, None)
+        self._recent.pop(employee_code, None)
+        self._present.pop(employee_code, None)
+    
+    def recent(self, employee_code: str, limit: Optional[int] = None) -> List[Dict[str, any]]:
+        """Últimos eventos de un empleado, del más reciente al más antiguo."""
+        self._ensure_fresh()
+        with self._lock:
+            ring = self._recent.get(employee_code)
+            events = list(reversed(ring)) if ring else []
+        return events[:limit] if limit else events
+    
+    def present(self, site: Optional[str] = None) -> List[Dict[str, any]]:
+        """
+        Empleados presentes, del check-in más reciente al más antiguo.
+        
+        Args:
+            site: Solo los presentes cuyo último check-in aceptado fue en esa sede
+        """
+        self._ensure_fresh()
+        cutoff = timezone.now() - self.window
+        with self._lock:
+            expired = [code for code, payload in self._present.items() if payload['timestamp'] < cutoff]
+            for code in expired:
+                del self._present[code]
+            entries = [
+                payload for payload in self._present.values()
+                if site is None or payload['site'] == site
+            ]
+        return sorted(entries, key=_key, reverse=True)
+    
+    def load(self) -> None:
+        """Reconstruir el tablero desde la base de datos."""
+        # Vaciar antes de consultar: lo que se registre mientras tanto se conserva
+        with self._lock:
+            self._owners = {}
+            self._recent = {}
+            self._present = {}
+        since = timezone.now() - self.window
+        events = self.repository.get_latest_per_employee(self.ring_size)
+        events += self.repository.get_since(since, accepted_only=True)
+        for event in events:
+            self.record(event_payload(event), event.employee_id)
+        self._refreshed_since = timezone.now()
+        self._refreshed_at = time.monotonic()
+        self._loaded = True
+    
+    def _ensure_fresh(self) -> None:
+        if not self._loaded:
+            with self._load_lock:
+                if not self._loaded:
+                    self.load()
+            return
+        if not self.refresh_seconds or time.monotonic() - self._refreshed_at < self.refresh_seconds:
+            return
+        # Un solo hilo consulta; los demás responden con lo que ya hay
+        if not self._load_lock.acquire(blocking=False):
+            return
+        try:
+            started = timezone.now()
+            since = self._refreshed_since - REFRESH_OVERLAP
+            for event in self.repository.get_since(since):
+                self.record(event_payload(event), event.employee_id)
+            # Bajas hechas en otros workers (forget() solo corre en el que la hizo)
+            for employee_id, employee_code in self.employee_repository.get_removed_since(since):
+                self.forget(employee_code, employee_id)
+            self._refreshed_since = started
+            self._refreshed_at = time.monotonic()
+        finally:
+            self._load_lock.release()
+
+
+_board: Optional[PresenceBoard] = None
+_board_lock = threading.Lock()
+
+
+def get_presence_board() -> PresenceBoard:
+    """Obtener el tablero de presencia del proceso."""
+    global _board
+    if _board is None:
+        with _board_lock:
+            if _board is None:
+                _board = PresenceBoard(
+                    ring_size=getattr(settings, 'PRESENCE_RING_SIZE', 5),
+                    window_hours=getattr(settings, 'PRESENCE_WINDOW_HOURS', 12),
+                    refresh_seconds=getattr(settings, 'PRESENCE_REFRESH_SECONDS', 5)
+                )
+    return _board
+
+
+def record_presence(event) -> None:
+    """Registrar un AttendanceEvent confirmado si el tablero ya está cargado."""
+    board = get_presence_board()
+    # Antes de la primera consulta no hace falta: load() lo leerá de la base
+    if board.loaded:
+        board.record(event_payload(event), event.employee_id)
+
+
+@receiver(setting_changed)
+def _reset_on_setting_changed(setting, **kwargs):
+    global _board
+    if setting in ('PRESENCE_RING_SIZE', 'PRESENCE_WINDOW_HOURS', 'PRESENCE_REFRESH_SECONDS'):
+        _board = None
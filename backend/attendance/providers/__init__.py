@@ -1,4 +1,23 @@
-from .face_verification_provider import FaceVerificationProvider
-from .dummy_provider import DummyProvider
+"""
+Face verification providers.
 
-__all__ = ['FaceVerificationProvider', 'DummyProvider']
+The names below are resolved on first access (PEP 562), so importing the
+package, or ``attendance.providers.factory``, does not import every
+provider module.
+"""
+import importlib
+
+_EXPORTS = {
+    'FaceVerificationProvider': 'attendance.providers.face_verification_provider',
+    'DummyProvider': 'attendance.providers.dummy_provider',
+    'CompositeProvider': 'attendance.providers.composite_provider',
+    'BatchingProvider': 'attendance.providers.batching_provider',
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    return getattr(importlib.import_module(_EXPORTS[name]), name)
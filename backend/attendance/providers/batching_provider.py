@@ -0,0 +1,170 @@
+"""
+Batching Provider: micro-batching of concurrent verify calls.
+"""
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from typing import Dict, List, Optional
+from attendance.metrics import PROVIDER_BATCH_SIZE, PROVIDER_BATCH_WAIT_SECONDS
+from attendance.providers.face_verification_provider import FaceVerificationProvider
+
+logger = logging.getLogger(__name__)
+
+
+class ProviderClosed(RuntimeError):
+    """Verificación pedida a un BatchingProvider ya cerrado."""
+
+
+class BatchingProvider(FaceVerificationProvider):
+    """
+    Agrupa llamadas concurrentes a verify() en lotes para el proveedor interno.
+    
+    Un hilo despachador toma la primera solicitud pendiente y espera como
+    máximo `max_wait_ms` (o hasta juntar `max_batch` solicitudes) antes de
+    llamar a `verify_batch` del proveedor interno. Mientras un lote está en
+    inferencia, las solicitudes nuevas se acumulan para el siguiente, así que
+    con carga alta los lotes crecen solos y con carga baja la espera
+    agregada es como mucho `max_wait_ms`.
+    """
+    
+    def __init__(
+        self,
+        provider: FaceVerificationProvider,
+        max_batch: int = 16,
+        max_wait_ms: float = 5.0,
+        timeout: Optional[float] = 30.0
+    ):
+        """
+        Inicializar BatchingProvider.
+        
+        Args:
+            provider: Proveedor interno que recibe los lotes
+            max_batch: Tamaño máximo de lote
+            max_wait_ms: Espera máxima para completar un lote
+            timeout: Segundos máximos que un request espera su resultado
+        """
+        if max_batch < 1:
+            raise ValueError("max_batch debe ser >= 1")
+        self.provider = provider
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000.0
+        self.timeout = timeout
+        self._queue = queue.Queue()
+        self._thread = None
+        self._start_lock = threading.Lock()
+        self._closed = False
+    
+    @property
+    def name(self) -> str:
+        """Nombre del proveedor (el del proveedor interno)."""
+        return self.provider.name
+    
+    def verify(
+        self,
+        reference_image_bytes: bytes,
+        capture_image_bytes: bytes,
+        employee_code: str = None
+    ) -> Dict[str, any]:
+        """Encolar la verificación y esperar el resultado de su lote."""
+        self._ensure_started()
+        future = Future()
+        item = {
+            'reference_image_bytes': reference_image_bytes,
+            'capture_image_bytes': capture_image_bytes,
+            'employee_code': employee_code,
+        }
+        # Bajo el lock: close() no deja solicitudes encoladas sin responder
+        with self._start_lock:
+            if self._closed:
+                raise ProviderClosed(f"Proveedor {self.name} cerrado")
+            self._queue.put((item, future, time.perf_counter()))
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeoutError:
+            # Si el lote aún no se despachó, la solicitud se descarta
+            future.cancel()
+            raise
+    
+    def verify_batch(self, items: List[Dict[str, any]]) -> List[Dict[str, any]]:
+        """Los lotes explícitos van directo al proveedor interno."""
+        return self.provider.verify_batch(items)
+    
+    def _ensure_started(self) -> None:
+        if self._thread is not None:
+            return
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='provider-batcher', daemon=True)
+                self._thread.start()
+    
+    def _collect(self) -> list:
+        """Bloquear hasta la primera solicitud y juntar el resto del lote."""
+        batch = [self._queue.get()]
+        deadline = time.perf_counter() + self.max_wait
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.perf_counter()
+            try:
+                batch.append(self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+    
+    def _run(self) -> None:
+        while True:
+            batch = [entry for entry in self._collect() if entry is not None]
+            if self._closed:
+                self._fail_closed(batch)
+                return
+            if not batch:
+                continue
+            # Solicitudes cuyo request ya no espera (timeout) no se envían
+            batch = [entry for entry in batch if entry[1].set_running_or_notify_cancel()]
+            if not batch:
+                continue
+            dispatched = time.perf_counter()
+            wait_histogram = PROVIDER_BATCH_WAIT_SECONDS.labels(provider=self.name)
+            for _, _, enqueued in batch:
+                wait_histogram.observe(dispatched - enqueued)
+            PROVIDER_BATCH_SIZE.labels(provider=self.name).observe(len(batch))
+            self._dispatch(batch)
+    
+    def _dispatch(self, batch: list) -> None:
+        try:
+            results = self.provider.verify_batch([item for item, _, _ in batch])
+            if len(results) != len(batch):
+                raise RuntimeError(
+                    f"verify_batch retornó {len(results)} resultados para {len(batch)} elementos"
+                )
+        except Exception as e:
+            logger.error("BatchingProvider: lote de %d falló: %s", len(batch), e)
+            for _, future, _ in batch:
+                future.set_exception(e)
+            return
+        for (_, future, _), result in zip(batch, results):
+            future.set_result(result)
+    
+    def _fail_closed(self, batch: list) -> None:
+        for _, future, _ in batch:
+            if future.set_running_or_notify_cancel():
+                future.set_exception(ProviderClosed(f"Proveedor {self.name} cerrado"))
+    
+    def close(self) -> None:
+        """Detener el hilo despachador; las solicitudes pendientes fallan con ProviderClosed."""
+        with self._start_lock:
+            self._closed = True
+        pending = []
+        while True:
+            try:
+                entry = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if entry is not None:
+                pending.append(entry)
+        self._fail_closed(pending)
+        # Desbloquear _collect si está esperando
+        self._queue.put(None)
+        closer = getattr(self.provider, 'close', None)
+        if closer is not None:
+            closer()
@@ -0,0 +1,235 @@
+"""
+Composite Provider: fan-out to several face verification providers.
+"""
+import logging
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Dict, List, Optional, Sequence
+from attendance.metrics import PROVIDER_CALLS
+from attendance.providers.face_verification_provider import FaceVerificationProvider
+
+logger = logging.getLogger(__name__)
+
+POLICIES = ('first_confident', 'majority', 'weighted_average')
+
+
+class CompositeProvider(FaceVerificationProvider):
+    """
+    Proveedor que consulta varios proveedores en paralelo y combina sus respuestas.
+    
+    Políticas:
+        - first_confident: la primera respuesta con score a más de `margin`
+          del threshold decide; si ninguna es concluyente, promedio ponderado.
+        - majority: decide la mayoría de votos (score >= threshold); el score
+          es el promedio del lado ganador.
+        - weighted_average: promedio ponderado de los scores.
+    
+    Cada política termina en cuanto el resultado ya no puede cambiar con las
+    respuestas pendientes; esas llamadas se cancelan si no empezaron y, si ya
+    están corriendo, terminan en segundo plano sin que el request las espere.
+    """
+    
+    def __init__(
+        self,
+        providers: Sequence[FaceVerificationProvider],
+        policy: str = 'first_confident',
+        weights: Optional[Sequence[float]] = None,
+        threshold: float = 0.80,
+        margin: float = 0.10,
+        timeout: Optional[float] = None,
+        max_workers: Optional[int] = None
+    ):
+        """
+        Inicializar CompositeProvider.
+        
+        Args:
+            providers: Proveedores a consultar
+            policy: Política de decisión (ver POLICIES)
+            weights: Peso de cada proveedor (por defecto 1.0)
+            threshold: Umbral de match usado por las políticas
+            margin: Distancia al threshold para considerar un score concluyente
+            timeout: Segundos máximos de espera; al vencer se decide con lo disponible
+            max_workers: Hilos del pool (por defecto 4 por proveedor)
+        """
+        if not providers:
+            raise ValueError("CompositeProvider requiere al menos un proveedor")
+        if policy not in POLICIES:
+            raise ValueError(f"Política desconocida: {policy}")
+        if weights is not None and len(weights) != len(providers):
+            raise ValueError("weights debe tener un valor por proveedor")
+        self.providers = list(providers)
+        self.policy = policy
+        self.weights = list(weights) if weights is not None else [1.0] * len(self.providers)
+        self.threshold = threshold
+        self.margin = margin
+        self.timeout = timeout
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers or 4 * len(self.providers),
+            thread_name_prefix='composite-provider'
+        )
+    
+    @property
+    def name(self) -> str:
+        """Nombre del proveedor."""
+        return 'composite'
+    
+    def verify(
+        self,
+        reference_image_bytes: bytes,
+        capture_image_bytes: bytes,
+        employee_code: str = None
+    ) -> Dict[str, any]:
+        """
+        Consultar los proveedores en paralelo y decidir según la política.
+        
+        Returns:
+            Dict con score, match y provider ('<política>:<p1>+<p2>...' con
+            los proveedores cuyas respuestas se usaron)
+        
+        Raises:
+            Exception: La última excepción si ningún proveedor respondió
+        """
+        futures = {
+            self._executor.submit(
+                provider.verify,
+                reference_image_bytes=reference_image_bytes,
+                capture_image_bytes=capture_image_bytes,
+                employee_code=employee_code
+            ): index
+            for index, provider in enumerate(self.providers)
+        }
+        deadline = None if self.timeout is None else time.monotonic() + self.timeout
+        results = {}
+        last_error = None
+        pending = set(futures)
+        decision = None
+        
+        while pending and decision is None:
+            remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+            done, pending = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+            if not done:
+                logger.warning("CompositeProvider: timeout con %d proveedores pendientes", len(pending))
+                break
+            for future in done:
+                index = futures[future]
+                provider_name = self.providers[index].name
+                try:
+                    result = future.result()
+                except Exception as e:
+                    last_error = e
+                    PROVIDER_CALLS.labels(provider=provider_name, outcome='error').inc()
+                    logger.warning("CompositeProvider: %s falló: %s", provider_name, e)
+                    continue
+                PROVIDER_CALLS.labels(
+                    provider=provider_name,
+                    outcome='match' if result.get('match', False) else 'no_match'
+                ).inc()
+                results[index] = result
+            decision = self._decide(results, [futures[future] for future in pending])
+        
+        for future in pending:
+            if future.cancel():
+                PROVIDER_CALLS.labels(provider=self.providers[futures[future]].name, outcome='cancelled').inc()
+        
+        if decision is None:
+            if not results:
+                raise last_error or TimeoutError("Ningún proveedor respondió a tiempo")
+            # Sin más respuestas posibles: decidir con las disponibles
+            decision = self._decide(results, [])
+        score, contributors = decision
+        score = round(score, 4)
+        return {
+            'score': score,
+            'match': score >= self.threshold,
+            'provider': f"{self.policy}:" + '+'.join(
+                self.providers[index].name for index in sorted(contributors)
+            ),
+        }
+    
+    def _decide(self, results: Dict[int, dict], pending: List[int]):
+        """
+        Aplicar la política.
+        
+        Args:
+            results: Respuestas recibidas por índice de proveedor
+            pending: Índices de proveedores que aún pueden responder
+        
+        Returns:
+            Tupla (score, índices usados) si el resultado ya es definitivo, o None
+        """
+        if not results:
+            return None
+        deciders = {
+            'first_confident': self._decide_first_confident,
+            'majority': self._decide_majority,
+            'weighted_average': self._decide_weighted_average,
+        }
+        return deciders[self.policy](results, pending)
+    
+    def _decide_first_confident(self, results: Dict[int, dict], pending: List[int]):
+        """La primera respuesta lejos del threshold (margin); sin ninguna, el promedio ponderado."""
+        for index, result in results.items():
+            if abs(result['score'] - self.threshold) >= self.margin:
+                return result['score'], [index]
+        if pending:
+            return None
+        return self._weighted(results), list(results)
+    
+    def _decide_majority(self, results: Dict[int, dict], pending: List[int]):
+        """Definitivo cuando los pendientes ya no pueden cambiar la mayoría."""
+        votes_for = [index for index, result in results.items() if result['score'] >= self.threshold]
+        votes_against = [index for index in results if index not in votes_for]
+        total = len(results) + len(pending)
+        if len(votes_for) * 2 > total:
+            winners = votes_for
+        elif len(votes_against) * 2 >= total:
+            # Sin mayoría posible a favor (un empate también rechaza)
+            winners = votes_against
+        else:
+            return None
+        return sum(results[index]['score'] for index in winners) / len(winners), winners
+    
+    def _decide_weighted_average(self, results: Dict[int, dict], pending: List[int]):
+        """Definitivo si los pendientes no pueden cruzar el threshold."""
+        score = self._weighted(results)
+        if pending:
+            done_weight = sum(self.weights[index] for index in results)
+            pending_weight = sum(self.weights[index] for index in pending)
+            lowest = score * done_weight / (done_weight + pending_weight)
+            highest = (score * done_weight + pending_weight) / (done_weight + pending_weight)
+            if (lowest >= self.threshold) != (highest >= self.threshold):
+                return None
+        return score, list(results)
+    
+    def _weighted(self, results: Dict[int, dict]) -> float:
+        total_weight = sum(self.weights[index] for index in results)
+        if total_weight <= 0:
+            return sum(result['score'] for result in results.values()) / len(results)
+        return sum(self.weights[index] * result['score'] for index, result in results.items()) / total_weight
+    
+    def close(self) -> None:
+        """Liberar el pool de hilos."""
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+def build_composite_provider(**options) -> CompositeProvider:
+    """
+    Crear el proveedor compuesto configurado en FACE_VERIFICATION_COMPOSITE_*.
+    
+    Los proveedores internos se crean por nombre a través del registro.
+    """
+    from django.conf import settings
+    from attendance.providers.factory import build_provider
+    
+    names = getattr(settings, 'FACE_VERIFICATION_COMPOSITE_PROVIDERS', [])
+    if 'composite' in names:
+        raise ValueError("Un proveedor compuesto no puede incluirse a sí mismo")
+    config = {
+        'policy': getattr(settings, 'FACE_VERIFICATION_COMPOSITE_POLICY', 'first_confident'),
+        'weights': getattr(settings, 'FACE_VERIFICATION_COMPOSITE_WEIGHTS', None) or None,
+        'threshold': getattr(settings, 'FACE_VERIFICATION_THRESHOLD', 0.80),
+        'margin': getattr(settings, 'FACE_VERIFICATION_COMPOSITE_MARGIN', 0.10),
+        'timeout': getattr(settings, 'FACE_VERIFICATION_COMPOSITE_TIMEOUT', None),
+    }
+    config.update(options)
+    return CompositeProvider([build_provider(name) for name in names], **config)
@@ -41,7 +41,7 @@ class DummyProvider(FaceVerificationProvider):
         # Modo demo: retornar score alto para ciertos códigos
         if self.demo_mode and employee_code:
             if employee_code.endswith('001') or employee_code.endswith('DEMO'):
-                logger.info(f"DummyProvider: Modo demo activado para {employee_code}")
+                logger.info("DummyProvider: Modo demo activado para %s", employee_code)
                 return {
                     'score': 0.95,
                     'match': True,
@@ -77,8 +77,8 @@ class DummyProvider(FaceVerificationProvider):
         match = score >= 0.80  # Threshold por defecto
         
         logger.debug(
-            f"DummyProvider: score={score:.2f}, match={match}, "
-            f"ref_len={len(reference_image_bytes)}, cap_len={len(capture_image_bytes)}"
+            "DummyProvider: score=%.2f, match=%s, ref_len=%d, cap_len=%d",
+            score, match, len(reference_image_bytes), len(capture_image_bytes)
         )
         
         return {
@@ -2,7 +2,7 @@
 Interface for Face Verification Providers.
 """
 from abc import ABC, abstractmethod
-from typing import Dict
+from typing import Dict, List
 
 
 class FaceVerificationProvider(ABC):
@@ -31,6 +31,23 @@ class FaceVerificationProvider(ABC):
         """
         pass
     
+    def verify_batch(self, items: List[Dict[str, any]]) -> List[Dict[str, any]]:
+        """
+        Verificar varios pares referencia/captura en una sola llamada.
+        
+        La implementación por defecto llama a verify() para cada elemento;
+        los proveedores basados en modelos deben sobrescribirla para hacer
+        una única inferencia por lote.
+        
+        Args:
+            items: Lista de dicts con los argumentos de verify()
+                (reference_image_bytes, capture_image_bytes, employee_code)
+        
+        Returns:
+            Lista de resultados de verify(), en el mismo orden
+        """
+        return [self.verify(**item) for item in items]
+    
     @property
     @abstractmethod
     def name(self) -> str:
@@ -2,23 +2,75 @@
 Factory para crear instancias de Face Verification Providers.
 """
 import logging
+import threading
 from django.conf import settings
-from attendance.providers.dummy_provider import DummyProvider
+from django.core.signals import setting_changed
+from django.dispatch import receiver
 from attendance.providers.face_verification_provider import FaceVerificationProvider
+from attendance.providers.registry import get_provider_registry, provider_options
 
 logger = logging.getLogger(__name__)
 
+# Instancia compartida por proceso: el proveedor compuesto mantiene un pool de hilos
+_provider = None
+_provider_lock = threading.Lock()
+
 
 def get_face_verification_provider() -> FaceVerificationProvider:
     """
     Obtener instancia del proveedor de validación facial configurado.
     
+    La instancia se crea una vez por proceso y se reutiliza.
+    
     Returns:
         Instancia de FaceVerificationProvider
     """
-    provider_name = getattr(settings, 'FACE_VERIFICATION_PROVIDER', 'dummy')
+    global _provider
+    if _provider is None:
+        with _provider_lock:
+            if _provider is None:
+                provider = build_provider(getattr(settings, 'FACE_VERIFICATION_PROVIDER', 'dummy'))
+                if getattr(settings, 'FACE_VERIFICATION_BATCHING', False):
+                    from attendance.providers.batching_provider import BatchingProvider
+                    
+                    provider = BatchingProvider(
+                        provider,
+                        max_batch=getattr(settings, 'FACE_VERIFICATION_BATCH_MAX_SIZE', 16),
+                        max_wait_ms=getattr(settings, 'FACE_VERIFICATION_BATCH_MAX_WAIT_MS', 5.0)
+                    )
+                _provider = provider
+    return _provider
+
+
+def build_provider(provider_name: str) -> FaceVerificationProvider:
+    """
+    Crear una instancia nueva del proveedor indicado.
+    
+    El módulo del proveedor se importa recién aquí, la primera vez (ver
+    attendance/providers/registry.py).
     
-    if provider_name == 'dummy':
-        return DummyProvider(demo_mode=True)
-    else:
-        raise ValueError(f"Proveedor desconocido: {provider_name}")
+    Args:
+        provider_name: Nombre registrado del proveedor ('dummy', 'composite', plugins)
+    
+    Returns:
+        Instancia de FaceVerificationProvider
+    
+    Raises:
+        ValueError: Si el proveedor no está registrado
+    """
+    return get_provider_registry().build(provider_name, **provider_options(provider_name))
+
+
+def reset_face_verification_provider() -> None:
+    """Descartar la instancia compartida (se recrea en el próximo uso)."""
+    global _provider
+    with _provider_lock:
+        provider, _provider = _provider, None
+    if provider is not None and hasattr(provider, 'close'):
+        provider.close()
+
+
+@receiver(setting_changed)
+def _reset_on_setting_changed(setting, **kwargs):
+    if setting.startswith('FACE_VERIFICATION_'):
+        reset_face_verification_provider()
@@ -0,0 +1,190 @@
+"""
+Lazy registry of face verification providers.
+
+A provider is registered by name with the dotted path of its factory: a
+``FaceVerificationProvider`` subclass or a function that returns one
+(``package.module:attribute`` or ``package.module.attribute``). The module
+is imported the first time the provider is built, so a worker or a
+management command that never verifies does not pay for heavy ML imports.
+
+Names come from three sources; later sources override earlier ones:
+
+1. ``BUILTIN_PROVIDERS`` below.
+2. The ``attendance.face_providers`` entry point group of installed
+   packages, e.g. in the plugin's ``pyproject.toml``::
+
+       [project.entry-points."attendance.face_providers"]
+       arcface = "acme_faces.arcface:ArcFaceProvider"
+
+3. The ``FACE_VERIFICATION_PROVIDER_PATHS`` setting
+   (``name=package.module:Factory`` pairs).
+
+Every provider import is timed and logged.
+"""
+import importlib
+import logging
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+
+logger = logging.getLogger(__name__)
+
+ENTRY_POINT_GROUP = 'attendance.face_providers'
+
+BUILTIN_PROVIDERS = {
+    'dummy': 'attendance.providers.dummy_provider:DummyProvider',
+    'composite': 'attendance.providers.composite_provider:build_composite_provider',
+    'simulated': 'attendance.providers.simulated_provider:build_simulated_provider',
+}
+
+# Argumentos por defecto de cada factory; FACE_VERIFICATION_PROVIDER_OPTIONS los completa
+BUILTIN_OPTIONS = {
+    'dummy': {'demo_mode': True},
+}
+
+
+def import_from_path(path: str) -> Callable:
+    """
+    Importar un objeto por ruta: 'paquete.modulo:atributo' o 'paquete.modulo.atributo'.
+    
+    Raises:
+        ImportError: Si el módulo o el atributo no existen
+    """
+    module_name, separator, attribute = path.partition(':')
+    if not separator:
+        module_name, _, attribute = path.rpartition('.')
+    if not module_name or not attribute:
+        raise ImportError(f"Ruta de proveedor inválida: {path}")
+    module = importlib.import_module(module_name)
+    try:
+        return getattr(module, attribute)
+    except AttributeError:
+        raise ImportError(f"{module_name} no define {attribute}")
+
+
+class ProviderRegistry:
+    """Nombres de proveedores y sus factories, importadas en el primer uso."""
+    
+    def __init__(self):
+        self._targets: Dict[str, any] = {}
+        self._sources: Dict[str, str] = {}
+        self._factories: Dict[str, Callable] = {}
+        self._import_ms: Dict[str, float] = {}
+        self._lock = threading.Lock()
+    
+    def register(self, name: str, target, source: str = 'código') -> None:
+        """
+        Registrar (o reemplazar) un proveedor.
+        
+        Args:
+            name: Nombre con el que se configura el proveedor
+            target: Ruta de la factory, entry point, o la factory ya importada
+            source: Origen del registro, para el log
+        """
+        with self._lock:
+            self._targets[name] = target
+            self._sources[name] = source
+            self._factories.pop(name, None)
+    
+    def names(self) -> List[str]:
+        """Nombres registrados."""
+        return sorted(self._targets)
+    
+    def is_loaded(self, name: str) -> bool:
+        """True si la factory del proveedor ya se importó."""
+        return name in self._factories
+    
+    @property
+    def import_times(self) -> Dict[str, float]:
+        """Milisegundos que tardó en importarse cada proveedor cargado."""
+        return dict(self._import_ms)
+    
+    def get_factory(self, name: str) -> Callable:
+        """
+        Obtener la factory de un proveedor, importándola si hace falta.
+        
+        Raises:
+            ValueError: Si el nombre no está registrado
+            ImportError: Si la factory no se puede importar
+        """
+        factory = self._factories.get(name)
+        if factory is not None:
+            return factory
+        with self._lock:
+            if name in self._factories:
+                return self._factories[name]
+            if name not in self._targets:
+                raise ValueError(f"Proveedor desconocido: {name}")
+            target = self._targets[name]
+            start = time.perf_counter()
+            if isinstance(target, str):
+                factory, origin = import_from_path(target), target
+            elif callable(target):
+                factory, origin = target, getattr(target, '__qualname__', repr(target))
+            else:
+                # importlib.metadata.EntryPoint
+                factory, origin = target.load(), target.value
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            self._factories[name] = factory
+            self._import_ms[name] = elapsed_ms
+        logger.info(
+            "Proveedor %s cargado desde %s (%s) en %.1f ms",
+            name, origin, self._sources[name], elapsed_ms
+        )
+        return factory
+    
+    def build(self, name: str, **options):
+        """Crear una instancia nueva del proveedor."""
+        return self.get_factory(name)(**options)
+
+
+def load_entry_points(registry: ProviderRegistry, group: str = ENTRY_POINT_GROUP) -> int:
+    """Registrar los proveedores declarados como entry points (sin importarlos)."""
+    from importlib.metadata import entry_points
+    
+    count = 0
+    for entry_point in entry_points(group=group):
+        registry.register(entry_point.name, entry_point, source='entry point')
+        count += 1
+    return count
+
+
+_registry: Optional[ProviderRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def get_provider_registry() -> ProviderRegistry:
+    """Obtener el registro de proveedores del proceso."""
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                start = time.perf_counter()
+                registry = ProviderRegistry()
+                for name, path in BUILTIN_PROVIDERS.items():
+                    registry.register(name, path, source='incluido')
+                plugins = load_entry_points(registry)
+                for name, path in getattr(settings, 'FACE_VERIFICATION_PROVIDER_PATHS', {}).items():
+                    registry.register(name, path, source='settings')
+                logger.info(
+                    "Registro de proveedores: %s (%d por entry point) en %.1f ms",
+                    ', '.join(registry.names()), plugins, (time.perf_counter() - start) * 1000
+                )
+                _registry = registry
+    return _registry
+
+
+def provider_options(name: str) -> Dict[str, any]:
+    """Argumentos para la factory de un proveedor."""
+    configured = getattr(settings, 'FACE_VERIFICATION_PROVIDER_OPTIONS', {}).get(name, {})
+    return {**BUILTIN_OPTIONS.get(name, {}), **configured}
+
+
+@receiver(setting_changed)
+def _reset_on_setting_changed(setting, **kwargs):
+    global _registry
+    if setting == 'FACE_VERIFICATION_PROVIDER_PATHS':
+        _registry = None
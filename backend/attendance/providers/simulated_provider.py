@@ -0,0 +1,200 @@
+"""
+Simulated Provider: deterministic scoring with realistic latency and failures.
+
+Scores like ``DummyProvider`` but every call takes a sampled amount of time
+and can fail, so load tests of worker counts, timeouts and batching see the
+queueing behavior of a real provider without one.
+"""
+import math
+import random
+import threading
+import time
+from typing import Dict, List, Optional
+from attendance.providers.dummy_provider import DummyProvider
+from attendance.providers.face_verification_provider import FaceVerificationProvider
+
+DISTRIBUTIONS = ('fixed', 'normal', 'lognormal', 'pareto')
+MODES = ('sleep', 'cpu')
+
+
+class InjectedProviderError(RuntimeError):
+    """Error inyectado por SimulatedProvider."""
+
+
+class SimulatedProvider(FaceVerificationProvider):
+    """
+    Proveedor simulado con latencia configurable e inyección de fallas.
+    
+    Distribuciones de latencia (en ms):
+        - fixed: siempre latency_ms.
+        - normal: media latency_ms y desvío stddev_ms (nunca negativa).
+        - lognormal: mediana latency_ms y sigma; cola derecha moderada, la
+          forma habitual de la latencia de un servicio.
+        - pareto: mínimo latency_ms y cola pesada de índice alpha (con
+          alpha <= 2 la varianza es infinita: pocas llamadas muy lentas).
+    
+    Con mode='sleep' la espera libera el GIL, como una llamada HTTP a un
+    servicio externo; con mode='cpu' ocupa un núcleo en un bucle Python que
+    retiene el GIL, como una inferencia local.
+    """
+    
+    def __init__(
+        self,
+        distribution: str = 'fixed',
+        latency_ms: float = 50.0,
+        stddev_ms: float = 10.0,
+        sigma: float = 0.5,
+        alpha: float = 1.5,
+        max_latency_ms: Optional[float] = None,
+        mode: str = 'sleep',
+        batch_item_ms: float = 0.0,
+        error_rate: float = 0.0,
+        timeout_rate: float = 0.0,
+        timeout_seconds: float = 30.0,
+        seed: Optional[int] = None,
+        demo_mode: bool = True
+    ):
+        """
+        Inicializar SimulatedProvider.
+        
+        Args:
+            distribution: Distribución de la latencia (ver DISTRIBUTIONS)
+            latency_ms: Media, mediana o mínimo según la distribución
+            stddev_ms: Desvío de la distribución normal
+            sigma: Sigma de la distribución log-normal
+            alpha: Índice de cola de la distribución de Pareto
+            max_latency_ms: Tope de la latencia muestreada (None: sin tope)
+            mode: 'sleep' o 'cpu' (ver MODES)
+            batch_item_ms: Latencia extra por cada elemento adicional de verify_batch
+            error_rate: Fracción de llamadas que fallan tras la latencia
+            timeout_rate: Fracción de llamadas que se cuelgan timeout_seconds y
+                terminan en TimeoutError
+            timeout_seconds: Duración de una llamada colgada
+            seed: Semilla para reproducir la secuencia de latencias y fallas
+            demo_mode: Modo demo del scoring (ver DummyProvider)
+        """
+        if distribution not in DISTRIBUTIONS:
+            raise ValueError(f"Distribución desconocida: {distribution}")
+        if mode not in MODES:
+            raise ValueError(f"Modo desconocido: {mode}")
+        if error_rate < 0 or timeout_rate < 0 or error_rate + timeout_rate > 1:
+            raise ValueError("error_rate y timeout_rate deben sumar entre 0 y 1")
+        self.distribution = distribution
+        self.latency_ms = latency_ms
+        self.stddev_ms = stddev_ms
+        self.sigma = sigma
+        self.alpha = alpha
+        self.max_latency_ms = max_latency_ms
+        self.mode = mode
+        self.batch_item_ms = batch_item_ms
+        self.error_rate = error_rate
+        self.timeout_rate = timeout_rate
+        self.timeout_seconds = timeout_seconds
+        self._scorer = DummyProvider(demo_mode=demo_mode)
+        self._random = random.Random(seed)
+        # Random no es seguro entre hilos para gauss/lognormvariate
+        self._random_lock = threading.Lock()
+    
+    @property
+    def name(self) -> str:
+        """Nombre del proveedor."""
+        return 'simulated'
+    
+    def verify(
+        self,
+        reference_image_bytes: bytes,
+        capture_image_bytes: bytes,
+        employee_code: str = None
+    ) -> Dict[str, any]:
+        """
+        Verificar con el scoring de DummyProvider tras la latencia simulada.
+        
+        Raises:
+            InjectedProviderError: Con probabilidad error_rate
+            TimeoutError: Con probabilidad timeout_rate, tras timeout_seconds
+        """
+        self._simulate_call(1)
+        result = self._scorer.verify(reference_image_bytes, capture_image_bytes, employee_code)
+        result['provider'] = self.name
+        return result
+    
+    def verify_batch(self, items: List[Dict[str, any]]) -> List[Dict[str, any]]:
+        """
+        Verificar un lote como una única llamada simulada.
+        
+        El lote tarda una latencia muestreada más batch_item_ms por cada
+        elemento adicional, y falla o se cuelga entero.
+        """
+        if not items:
+            return []
+        self._simulate_call(len(items))
+        results = []
+        for item in items:
+            result = self._scorer.verify(**item)
+            result['provider'] = self.name
+            results.append(result)
+        return results
+    
+    def sample_latency_ms(self) -> float:
+        """Muestrear una latencia de la distribución configurada."""
+        with self._random_lock:
+            if self.distribution == 'fixed':
+                latency = self.latency_ms
+            elif self.distribution == 'normal':
+                latency = self._random.gauss(self.latency_ms, self.stddev_ms)
+            elif self.distribution == 'lognormal':
+                latency = self._random.lognormvariate(math.log(max(self.latency_ms, 1e-6)), self.sigma)
+            else:
+                latency = self.latency_ms * self._random.paretovariate(self.alpha)
+        latency = max(0.0, latency)
+        if self.max_latency_ms is not None:
+            latency = min(latency, self.max_latency_ms)
+        return latency
+    
+    def _simulate_call(self, size: int) -> None:
+        with self._random_lock:
+            draw = self._random.random()
+        if draw < self.timeout_rate:
+            # Un servicio colgado no consume CPU local
+            time.sleep(self.timeout_seconds)
+            raise TimeoutError(f"SimulatedProvider: sin respuesta tras {self.timeout_seconds:.1f} s")
+        
+        latency_ms = self.sample_latency_ms() + self.batch_item_ms * (size - 1)
+        if self.mode == 'cpu':
+            _burn(latency_ms / 1000.0)
+        elif latency_ms > 0:
+            time.sleep(latency_ms / 1000.0)
+        
+        if draw < self.timeout_rate + self.error_rate:
+            raise InjectedProviderError("SimulatedProvider: error inyectado")
+
+
+def _burn(seconds: float) -> None:
+    """Ocupar la CPU (y el GIL) durante `seconds`."""
+    deadline = time.perf_counter() + seconds
+    value = 0
+    while time.perf_counter() < deadline:
+        for step in range(1000):
+            value = (value * 31 + step) & 0xFFFFFFFF
+
+
+def build_simulated_provider(**options) -> SimulatedProvider:
+    """Crear el proveedor simulado configurado en FACE_VERIFICATION_SIMULATION_*."""
+    from django.conf import settings
+    
+    config = {
+        'distribution': getattr(settings, 'FACE_VERIFICATION_SIMULATION_DISTRIBUTION', 'fixed'),
+        'latency_ms': getattr(settings, 'FACE_VERIFICATION_SIMULATION_LATENCY_MS', 50.0),
+        'stddev_ms': getattr(settings, 'FACE_VERIFICATION_SIMULATION_STDDEV_MS', 10.0),
+        'sigma': getattr(settings, 'FACE_VERIFICATION_SIMULATION_SIGMA', 0.5),
+        'alpha': getattr(settings, 'FACE_VERIFICATION_SIMULATION_ALPHA', 1.5),
+        'max_latency_ms': getattr(settings, 'FACE_VERIFICATION_SIMULATION_MAX_LATENCY_MS', None),
+        'mode': getattr(settings, 'FACE_VERIFICATION_SIMULATION_MODE', 'sleep'),
+        'batch_item_ms': getattr(settings, 'FACE_VERIFICATION_SIMULATION_BATCH_ITEM_MS', 0.0),
+        'error_rate': getattr(settings, 'FACE_VERIFICATION_SIMULATION_ERROR_RATE', 0.0),
+        'timeout_rate': getattr(settings, 'FACE_VERIFICATION_SIMULATION_TIMEOUT_RATE', 0.0),
+        'timeout_seconds': getattr(settings, 'FACE_VERIFICATION_SIMULATION_TIMEOUT_SECONDS', 30.0),
+        'seed': getattr(settings, 'FACE_VERIFICATION_SIMULATION_SEED', None),
+    }
+    config.update(options)
+    return SimulatedProvider(**config)
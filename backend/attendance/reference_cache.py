@@ -0,0 +1,117 @@
+"""
+In-process cache of employee reference images (face templates).
+
+The check-in reads ``photo_ref`` and every ``EmployeeReference`` image from
+storage on each request. This cache keeps those bytes per employee, bounded
+by ``REFERENCE_CACHE_MAX_MB`` with LRU eviction. An entry is only served if
+the employee's current file names match the cached ones, so a new photo or
+reference is never answered with old bytes even before the entry is
+evicted. In cluster mode (see ``attendance/cluster.py``) each node only
+caches the employees of its own shard.
+"""
+import threading
+from collections import OrderedDict
+from typing import List, Optional, Sequence, Tuple
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from attendance.metrics import record_cache
+
+
+class ReferenceCache:
+    """LRU de imágenes de referencia por empleado, acotado en bytes."""
+    
+    def __init__(self, max_bytes: int):
+        """
+        Inicializar ReferenceCache.
+        
+        Args:
+            max_bytes: Tamaño máximo de las imágenes guardadas (0 desactiva el caché)
+        """
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+    
+    @property
+    def size(self) -> int:
+        """Bytes de imágenes guardadas."""
+        return self._size
+    
+    def __len__(self) -> int:
+        return len(self._entries)
+    
+    def get(self, employee_id: int, names: Tuple[str, ...]) -> Optional[List[bytes]]:
+        """
+        Imágenes de un empleado si las guardadas corresponden a `names`.
+        
+        Args:
+            employee_id: ID del empleado
+            names: Nombres de archivo actuales (photo_ref y referencias, en orden)
+        """
+        with self._lock:
+            entry = self._entries.get(employee_id)
+            if entry is not None and entry[0] == names:
+                self._entries.move_to_end(employee_id)
+            else:
+                entry = None
+        record_cache('reference', entry is not None)
+        return list(entry[1]) if entry is not None else None
+    
+    def put(self, employee_id: int, names: Tuple[str, ...], images: Sequence[bytes]) -> None:
+        """Guardar las imágenes de un empleado, desalojando las menos usadas."""
+        size = sum(len(image) for image in images)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(employee_id, None)
+            if previous is not None:
+                self._size -= previous[2]
+            self._entries[employee_id] = (names, tuple(images), size)
+            self._size += size
+            while self._size > self.max_bytes:
+                _, (_, _, evicted) = self._entries.popitem(last=False)
+                self._size -= evicted
+    
+    def evict(self, employee_id: int) -> None:
+        """Descartar las imágenes de un empleado."""
+        with self._lock:
+            entry = self._entries.pop(employee_id, None)
+            if entry is not None:
+                self._size -= entry[2]
+    
+    def clear(self) -> None:
+        """Vaciar el caché."""
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+
+_cache: Optional[ReferenceCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_reference_cache() -> Optional[ReferenceCache]:
+    """Obtener el caché de referencias del proceso (None si está desactivado)."""
+    global _cache
+    max_bytes = int(getattr(settings, 'REFERENCE_CACHE_MAX_MB', 64) * 1024 * 1024)
+    if max_bytes <= 0:
+        return None
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = ReferenceCache(max_bytes)
+    return _cache
+
+
+def evict_reference_images(employee_id: int) -> None:
+    """Descartar las imágenes cacheadas de un empleado (si el caché existe)."""
+    if _cache is not None:
+        _cache.evict(employee_id)
+
+
+@receiver(setting_changed)
+def _reset_on_setting_changed(setting, **kwargs):
+    global _cache
+    if setting == 'REFERENCE_CACHE_MAX_MB':
+        _cache = None
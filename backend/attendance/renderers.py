@@ -0,0 +1,53 @@
+"""
+Fast JSON renderer for the API.
+
+``FastJSONRenderer`` encodes with ``orjson`` when it is installed and falls
+back to DRF's ``JSONRenderer`` otherwise. It produces the same document as
+``JSONRenderer`` with the default settings (compact, UTF-8, ``\\u2028`` and
+``\\u2029`` escaped, datetimes and other non-JSON types through DRF's
+encoder). Floats are written in orjson's shortest form (``1e-5`` instead of
+``1e-05``, the same number), and NaN/Infinity become ``null`` instead of
+raising.
+"""
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils import encoders
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - depende del entorno
+    orjson = None
+
+# datetime, date y time pasan por el encoder de DRF (isoformat con "Z"), no por el de orjson
+_OPTIONS = (
+    orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+    if orjson is not None else 0
+)
+
+_LINE_SEPARATOR = '\u2028'.encode()
+_PARAGRAPH_SEPARATOR = '\u2029'.encode()
+
+_encoder = encoders.JSONEncoder()
+
+
+class FastJSONRenderer(JSONRenderer):
+    """JSONRenderer que usa orjson en el caso común (sin indentación)."""
+    
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        """Renderizar data a JSON; delega en JSONRenderer si orjson no aplica."""
+        if data is None:
+            return b''
+        if (
+            orjson is None
+            or not self.compact
+            or self.ensure_ascii
+            or self.get_indent(accepted_media_type, renderer_context or {}) is not None
+        ):
+            return super().render(data, accepted_media_type, renderer_context)
+        try:
+            ret = orjson.dumps(data, default=_encoder.default, option=_OPTIONS)
+        except orjson.JSONEncodeError:
+            # Enteros de más de 64 bits y tipos que el encoder de DRF resuelve distinto
+            return super().render(data, accepted_media_type, renderer_context)
+        if _LINE_SEPARATOR in ret or _PARAGRAPH_SEPARATOR in ret:
+            ret = ret.replace(_LINE_SEPARATOR, b'\\u2028').replace(_PARAGRAPH_SEPARATOR, b'\\u2029')
+        return ret
@@ -1,4 +1,5 @@
 from .employee_repository import EmployeeRepository
 from .attendance_repository import AttendanceRepository
+from .shadow_repository import ShadowComparisonRepository
 
-__all__ = ['EmployeeRepository', 'AttendanceRepository']
+__all__ = ['EmployeeRepository', 'AttendanceRepository', 'ShadowComparisonRepository']
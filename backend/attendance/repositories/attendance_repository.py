@@ -1,11 +1,17 @@
 """
 Repository for AttendanceEvent model.
 """
-from typing import List, Optional
+from typing import Iterable, List, Optional, Tuple
 from datetime import datetime
-from attendance.models import AttendanceEvent, Employee
+from django.db import connection
+from django.db.models import Count, F, Q, Window
+from django.db.models.expressions import RawSQL
+from django.db.models.functions import RowNumber, TruncDate
+from attendance.metrics import instrument_repository
+from attendance.models import AttendanceEvent, Employee, EmployeeReference
 
 
+@instrument_repository('attendance')
 class AttendanceRepository:
     """Repositorio para acceso a datos de AttendanceEvent."""
     
@@ -16,7 +22,10 @@ class AttendanceRepository:
         decision: bool,
         provider_name: str,
         threshold_used: float,
-        timestamp: Optional[datetime] = None
+        timestamp: Optional[datetime] = None,
+        capture_hash: str = '',
+        site: str = '',
+        matched_reference: Optional[EmployeeReference] = None
     ) -> AttendanceEvent:
         """Crear nuevo evento de asistencia."""
         event = AttendanceEvent(
@@ -25,7 +34,10 @@ class AttendanceRepository:
             decision=decision,
             provider_name=provider_name,
             threshold_used=threshold_used,
-            timestamp=timestamp or datetime.now()
+            timestamp=timestamp or datetime.now(),
+            capture_hash=capture_hash,
+            site=site,
+            matched_reference=matched_reference
         )
         event.save()
         return event
@@ -33,11 +45,39 @@ class AttendanceRepository:
     @staticmethod
     def get_by_employee(employee: Employee, limit: Optional[int] = None) -> List[AttendanceEvent]:
         """Obtener eventos de asistencia de un empleado."""
-        queryset = AttendanceEvent.objects.filter(employee=employee).order_by('-timestamp')
+        queryset = AttendanceEvent.objects.filter(employee=employee).order_by('-id')
         if limit:
             queryset = queryset[:limit]
         return list(queryset)
     
+    @staticmethod
+    def get_recent_by_capture(
+        employee_code: str,
+        capture_hash: str,
+        since: datetime,
+        max_events: int = 20
+    ) -> Optional[AttendanceEvent]:
+        """
+        Obtener el último evento de un empleado con la misma captura desde `since`.
+        
+        capture_hash no tiene índice. Primero se leen id y timestamp de los
+        últimos `max_events` eventos del empleado desde el índice
+        (employee, -id), sin tocar la tabla; solo si alguno cae en la ventana
+        se busca el hash entre esos. Sin el tope, una captura nueva (el caso
+        normal) recorrería todo el historial del empleado: PostgreSQL no sabe
+        que el timestamp baja junto con el id.
+        """
+        latest = AttendanceEvent.objects.filter(
+            employee__employee_code=employee_code
+        ).order_by('-id').values_list('id', 'timestamp')[:max_events]
+        recent_ids = [event_id for event_id, timestamp in latest if timestamp >= since]
+        if not recent_ids:
+            return None
+        return AttendanceEvent.objects.filter(
+            id__in=recent_ids,
+            capture_hash=capture_hash
+        ).order_by('-id').first()
+    
     @staticmethod
     def get_by_id(event_id: int) -> Optional[AttendanceEvent]:
         """Obtener evento por ID."""
@@ -49,7 +89,138 @@ class AttendanceRepository:
     @staticmethod
     def get_all(limit: Optional[int] = None) -> List[AttendanceEvent]:
         """Obtener todos los eventos."""
-        queryset = AttendanceEvent.objects.all().order_by('-timestamp')
+        queryset = AttendanceEvent.objects.all().order_by('-id')
         if limit:
             queryset = queryset[:limit]
         return list(queryset)
+    
+    @staticmethod
+    def get_after_id(
+        last_id: int,
+        employee_codes: Iterable[str] = (),
+        sites: Iterable[str] = (),
+        limit: int = 100
+    ) -> List[AttendanceEvent]:
+        """Obtener los eventos posteriores a last_id en orden de creación, opcionalmente filtrados."""
+        queryset = AttendanceEvent.objects.select_related('employee').filter(id__gt=last_id)
+        if employee_codes:
+            queryset = queryset.filter(employee__employee_code__in=list(employee_codes))
+        if sites:
+            queryset = queryset.filter(site__in=list(sites))
+        return list(queryset.order_by('id')[:limit])
+    
+    @staticmethod
+    def get_latest_per_employee(per_employee: int) -> List[AttendanceEvent]:
+        """
+        Obtener los últimos `per_employee` eventos de cada empleado activo en una sola consulta.
+        
+        En PostgreSQL, un LATERAL con LIMIT por empleado lee solo esas filas
+        del índice (employee, -id); ROW_NUMBER() numeraría la tabla entera.
+        """
+        queryset = AttendanceEvent.objects.select_related('employee')
+        if connection.vendor == 'postgresql':
+            quote = connection.ops.quote_name
+            latest_ids = RawSQL(
+                f"SELECT latest.id FROM {quote(Employee._meta.db_table)} employee "
+                f"CROSS JOIN LATERAL (SELECT event.id FROM {quote(AttendanceEvent._meta.db_table)} event "
+                f"WHERE event.employee_id = employee.id ORDER BY event.id DESC LIMIT %s) latest "
+                f"WHERE employee.deleted_at IS NULL",
+                [per_employee]
+            )
+            queryset = queryset.filter(id__in=latest_ids)
+        else:
+            queryset = queryset.filter(employee__deleted_at__isnull=True).annotate(
+                position=Window(
+                    expression=RowNumber(),
+                    partition_by=[F('employee_id')],
+                    order_by=[F('id').desc()]
+                )
+            ).filter(position__lte=per_employee)
+        return list(queryset.order_by('timestamp', 'id'))
+    
+    @staticmethod
+    def get_since(since: datetime, accepted_only: bool = False) -> List[AttendanceEvent]:
+        """Obtener los eventos desde `since` de empleados no eliminados, en orden cronológico."""
+        queryset = AttendanceEvent.objects.select_related('employee').filter(
+            timestamp__gte=since, employee__deleted_at__isnull=True
+        )
+        if accepted_only:
+            queryset = queryset.filter(decision=True)
+        return list(queryset.order_by('timestamp', 'id'))
+    
+    @staticmethod
+    def get_archive_batch(
+        before: Optional[datetime],
+        after: Optional[Tuple[datetime, int]],
+        limit: int,
+        employee_id: Optional[int] = None
+    ) -> List[tuple]:
+        """
+        Obtener eventos anteriores a `before` para archivar, en orden (timestamp, id).
+        
+        Cada fila es (id, employee_id, employee_code, timestamp, score,
+        decision, provider_name, threshold_used, site).
+        
+        Args:
+            before: Límite superior de timestamp (None: sin límite)
+            after: Última (timestamp, id) del lote anterior
+            limit: Máximo de filas
+            employee_id: Solo eventos de este empleado
+        """
+        queryset = AttendanceEvent.objects.all()
+        if before is not None:
+            queryset = queryset.filter(timestamp__lt=before)
+        if employee_id is not None:
+            queryset = queryset.filter(employee_id=employee_id)
+        if after is not None:
+            queryset = queryset.filter(Q(timestamp__gt=after[0]) | Q(timestamp=after[0], id__gt=after[1]))
+        return list(
+            queryset.order_by('timestamp', 'id').values_list(
+                'id', 'employee_id', 'employee__employee_code', 'timestamp', 'score',
+                'decision', 'provider_name', 'threshold_used', 'site'
+            )[:limit]
+        )
+    
+    @staticmethod
+    def count_by_employee(employee_id: int) -> int:
+        """Contar los eventos de un empleado (desde el índice (employee, -id))."""
+        return AttendanceEvent.objects.filter(employee_id=employee_id).count()
+    
+    @staticmethod
+    def get_ids_by_employee(employee_id: int, limit: int) -> List[int]:
+        """IDs de los eventos más antiguos de un empleado."""
+        return list(
+            AttendanceEvent.objects.filter(employee_id=employee_id).order_by('id').values_list('id', flat=True)[:limit]
+        )
+    
+    @staticmethod
+    def delete_by_ids(event_ids: List[int]) -> int:
+        """Eliminar eventos por ID; retorna cuántos eventos se eliminaron."""
+        _, deleted = AttendanceEvent.objects.filter(id__in=event_ids).delete()
+        return deleted.get(AttendanceEvent._meta.label, 0)
+    
+    @staticmethod
+    def get_daily_counts(
+        since: datetime,
+        until: datetime,
+        employee: Optional[Employee] = None
+    ) -> List[dict]:
+        """
+        Contar check-ins aceptados y rechazados por día en [since, until).
+        
+        Sin empleado recorre el rango con el índice BRIN de timestamp; con
+        empleado se resuelve solo desde el índice (employee, id) que incluye
+        timestamp y decision.
+        """
+        queryset = AttendanceEvent.objects.filter(timestamp__gte=since, timestamp__lt=until)
+        if employee is not None:
+            queryset = queryset.filter(employee=employee)
+        return list(
+            queryset.annotate(day=TruncDate('timestamp'))
+            .values('day')
+            .annotate(
+                accepted=Count('id', filter=Q(decision=True)),
+                rejected=Count('id', filter=Q(decision=False))
+            )
+            .order_by('day')
+        )
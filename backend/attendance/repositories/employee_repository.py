@@ -1,11 +1,33 @@
 """
 Repository for Employee model.
 """
-from typing import Optional, List
+import unicodedata
+from datetime import datetime
+from typing import Optional, List, Tuple
+from django.contrib.postgres.search import TrigramWordSimilarity
 from django.core.exceptions import ValidationError
-from attendance.models import Employee
+from django.db import transaction
+from django.utils import timezone
+from django.db.models import Case, F, FloatField, Func, Q, QuerySet, TextField, Value, When
+from django.db.models.functions import Greatest, Lower
+from attendance.metrics import instrument_repository
+from attendance.models import Employee, EmployeePurgeJob, EmployeeReference, EmployeeTombstone
 
 
+class Unaccent(Func):
+    """f_unaccent(): unaccent() inmutable creado en la migración 0007."""
+    
+    function = 'f_unaccent'
+    output_field = TextField()
+
+
+def normalize_search_term(term: str) -> str:
+    """Minúsculas y sin acentos, igual que f_unaccent(lower(...)) en la base."""
+    decomposed = unicodedata.normalize('NFKD', term.strip().lower())
+    return ''.join(char for char in decomposed if not unicodedata.combining(char))
+
+
+@instrument_repository('employee')
 class EmployeeRepository:
     """Repositorio para acceso a datos de Employee."""
     
@@ -75,7 +97,206 @@ class EmployeeRepository:
         """Eliminar empleado."""
         employee.delete()
     
+    @staticmethod
+    def get_references(employee: Employee) -> List[EmployeeReference]:
+        """Obtener las referencias faciales adicionales de un empleado."""
+        return list(EmployeeReference.objects.filter(employee=employee).order_by('id'))
+    
+    @staticmethod
+    def get_reference(employee: Employee, reference_id: int) -> Optional[EmployeeReference]:
+        """Obtener una referencia de un empleado por ID."""
+        return EmployeeReference.objects.filter(employee=employee, id=reference_id).first()
+    
+    @staticmethod
+    def count_references(employee: Employee) -> int:
+        """Contar las referencias adicionales de un empleado."""
+        return EmployeeReference.objects.filter(employee=employee).count()
+    
+    @staticmethod
+    def add_reference(employee: Employee, image, label: str = '') -> EmployeeReference:
+        """Registrar una referencia facial adicional."""
+        reference = EmployeeReference(employee=employee, image=image, label=label)
+        reference.full_clean()
+        reference.save()
+        return reference
+    
+    @staticmethod
+    def delete_reference(reference: EmployeeReference) -> None:
+        """Eliminar una referencia (los eventos que la usaron quedan sin referencia)."""
+        reference.delete()
+    
+    @staticmethod
+    def soft_delete(employee: Employee) -> Employee:
+        """Dar de baja un empleado sin tocar su historial."""
+        employee.deleted_at = timezone.now()
+        employee.save(update_fields=['deleted_at', 'updated_at'])
+        return employee
+    
+    @staticmethod
+    def hard_delete(employee_id: int) -> bool:
+        """Eliminar definitivamente un empleado dado de baja; False si ya no existe."""
+        employee = Employee.all_objects.filter(id=employee_id, deleted_at__isnull=False).first()
+        if employee is None:
+            return False
+        employee.delete()
+        return True
+    
+    @staticmethod
+    def create_purge_job(employee: Employee, mode: str, total_events: int) -> EmployeePurgeJob:
+        """Registrar la purga pendiente del historial de un empleado."""
+        return EmployeePurgeJob.objects.create(
+            employee_id=employee.id,
+            employee_code=employee.employee_code,
+            mode=mode,
+            total_events=total_events
+        )
+    
+    @staticmethod
+    def claim_purge_job(
+        owner: str,
+        stale_before: datetime,
+        job_id: Optional[int] = None
+    ) -> Optional[EmployeePurgeJob]:
+        """
+        Reclamar la purga ejecutable más antigua (o la `job_id`) para `owner`.
+        
+        Es ejecutable una purga pendiente o una 'running' cuyo último avance
+        es anterior a `stale_before` (su proceso terminó sin completarla).
+        La fila se bloquea con SKIP LOCKED, así que dos procesos nunca
+        reclaman la misma purga; la que se devuelve ya quedó 'running' a
+        nombre de `owner`.
+        
+        Returns:
+            EmployeePurgeJob reclamada, o None si no hay ninguna disponible
+        """
+        with transaction.atomic():
+            queryset = EmployeePurgeJob.objects.select_for_update(skip_locked=True).filter(
+                Q(status='pending')
+                | Q(status='running', heartbeat_at__lt=stale_before)
+                | Q(status='running', heartbeat_at__isnull=True)
+            )
+            if job_id is not None:
+                queryset = queryset.filter(id=job_id)
+            job = queryset.order_by('id').first()
+            if job is None:
+                return None
+            now = timezone.now()
+            job.status = 'running'
+            job.owner = owner
+            job.heartbeat_at = now
+            job.started_at = job.started_at or now
+            job.save(update_fields=['status', 'owner', 'heartbeat_at', 'started_at'])
+            return job
+    
+    @staticmethod
+    def heartbeat_purge_job(job: EmployeePurgeJob, owner: str) -> bool:
+        """
+        Guardar el avance de una purga y renovar su heartbeat.
+        
+        Returns:
+            False si la purga ya no es de `owner` (otro proceso la retomó)
+        """
+        job.heartbeat_at = timezone.now()
+        return bool(EmployeePurgeJob.objects.filter(id=job.id, owner=owner, status='running').update(
+            processed_events=job.processed_events,
+            heartbeat_at=job.heartbeat_at
+        ))
+    
+    @staticmethod
+    def update_purge_job(job: EmployeePurgeJob, **fields) -> EmployeePurgeJob:
+        """Guardar el avance o el estado de una purga."""
+        for name, value in fields.items():
+            setattr(job, name, value)
+        job.save(update_fields=list(fields))
+        return job
+    
     @staticmethod
     def exists_by_code(employee_code: str) -> bool:
         """Verificar si existe un empleado con el código dado."""
         return Employee.objects.filter(employee_code=employee_code).exists()
+    
+    @staticmethod
+    def get_changed_since(
+        after: Optional[datetime],
+        after_id: int,
+        until: datetime,
+        limit: int
+    ) -> List[Employee]:
+        """
+        Obtener empleados modificados después de (after, after_id) y hasta until.
+        
+        Ordenados por (updated_at, id) para paginar por keyset con el índice
+        de sincronización.
+        """
+        queryset = Employee.objects.filter(updated_at__lte=until)
+        if after is not None:
+            queryset = queryset.filter(
+                Q(updated_at__gt=after) | Q(updated_at=after, id__gt=after_id)
+            )
+        return list(queryset.order_by('updated_at', 'id')[:limit])
+    
+    @staticmethod
+    def get_tombstones_since(
+        after: Optional[datetime],
+        after_id: int,
+        until: datetime,
+        limit: int
+    ) -> List[EmployeeTombstone]:
+        """Obtener bajas registradas después de (after, after_id) y hasta until."""
+        queryset = EmployeeTombstone.objects.filter(deleted_at__lte=until)
+        if after is not None:
+            queryset = queryset.filter(
+                Q(deleted_at__gt=after) | Q(deleted_at=after, id__gt=after_id)
+            )
+        return list(queryset.order_by('deleted_at', 'id')[:limit])
+    
+    @staticmethod
+    def get_removed_since(since: datetime) -> List[Tuple[int, str]]:
+        """Obtener (employee_id, employee_code) de las bajas registradas desde since."""
+        return list(
+            EmployeeTombstone.objects.filter(deleted_at__gte=since).values_list('employee_id', 'employee_code')
+        )
+    
+    @staticmethod
+    def get_last_tombstone(until: datetime) -> Optional[EmployeeTombstone]:
+        """Obtener la última baja registrada hasta until."""
+        return EmployeeTombstone.objects.filter(deleted_at__lte=until).order_by('deleted_at', 'id').last()
+    
+    @staticmethod
+    def search(term: str) -> QuerySet:
+        """
+        Buscar empleados por nombre (sin distinguir acentos ni mayúsculas) o código.
+        
+        Las condiciones usan las expresiones de los índices GIN de trigramas
+        (migración 0007): f_unaccent(lower(full_name)) y employee_code.
+        Con 3 o más caracteres el nombre se compara por similitud de palabra
+        (tolera errores de tipeo); con menos, nombre y código por prefijo.
+        Los resultados se ordenan por relevancia: código exacto, prefijo de
+        código y luego similitud del nombre.
+        
+        Returns:
+            QuerySet ordenado, para paginar
+        """
+        normalized = normalize_search_term(term)
+        code = term.strip().upper()
+        queryset = Employee.objects.annotate(search_name=Unaccent(Lower('full_name')))
+        if len(normalized) >= 3:
+            condition = (
+                Q(search_name__trigram_word_similar=normalized)
+                | Q(search_name__contains=normalized)
+                | Q(employee_code__contains=code)
+            )
+        else:
+            # Menos de 3 caracteres no forman un trigrama completo
+            condition = Q(search_name__startswith=normalized) | Q(employee_code__startswith=code)
+        return queryset.filter(condition).annotate(
+            rank=Greatest(
+                TrigramWordSimilarity(Value(normalized), F('search_name')),
+                Case(
+                    When(employee_code=code, then=Value(2.0)),
+                    When(employee_code__startswith=code, then=Value(1.5)),
+                    default=Value(0.0),
+                    output_field=FloatField()
+                )
+            )
+        ).order_by('-rank', 'full_name', 'id')
@@ -0,0 +1,30 @@
+"""
+Repository for ShadowComparison model.
+"""
+from datetime import datetime
+from typing import List, Optional
+from attendance.metrics import instrument_repository
+from attendance.models import ShadowComparison
+
+
+@instrument_repository('shadow')
+class ShadowComparisonRepository:
+    """Repositorio para acceso a datos de ShadowComparison."""
+    
+    @staticmethod
+    def create(**fields) -> ShadowComparison:
+        """Crear una comparación en sombra."""
+        return ShadowComparison.objects.create(**fields)
+    
+    @staticmethod
+    def get_for_report(
+        shadow_provider: Optional[str] = None,
+        since: Optional[datetime] = None
+    ) -> List[ShadowComparison]:
+        """Obtener comparaciones para el reporte, opcionalmente filtradas."""
+        queryset = ShadowComparison.objects.all()
+        if shadow_provider:
+            queryset = queryset.filter(shadow_provider=shadow_provider)
+        if since:
+            queryset = queryset.filter(created_at__gte=since)
+        return list(queryset.order_by('created_at'))
@@ -1,12 +1,15 @@
 """
 Serializers for attendance API.
 """
+from django.conf import settings
+from django.utils import timezone
 from rest_framework import serializers
-from attendance.models import Employee, AttendanceEvent
+from attendance.models import Employee, EmployeePurgeJob, EmployeeReference, AttendanceEvent
 from attendance.services import (
     CreateEmployeeService,
     UpdateEmployeeService,
     DeleteEmployeeService,
+    AddEmployeeReferenceService,
 )
 
 
@@ -39,6 +42,51 @@ class EmployeeSerializer(serializers.ModelSerializer):
         return None
 
 
+class FlatSerializer(serializers.BaseSerializer):
+    """
+    Base de los serializers de solo lectura escritos a mano.
+    
+    Con many=True DRF crea una sola instancia para toda la lista: la zona
+    horaria se resuelve una vez y no por cada fecha.
+    """
+    
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        current = timezone.get_current_timezone() if settings.USE_TZ else None
+        self._datetime_field = serializers.DateTimeField(default_timezone=current)
+    
+    def datetime(self, value):
+        """Misma representación que DateTimeField (isoformat con "Z")."""
+        return self._datetime_field.to_representation(value) if value is not None else None
+
+
+class EmployeeListSerializer(FlatSerializer):
+    """
+    Serializer de solo lectura para listados de empleados.
+    
+    Escrito a mano: produce el mismo JSON que EmployeeSerializer sin recorrer
+    campo por campo, y arma la URL de la foto una sola vez por empleado.
+    """
+    
+    def to_representation(self, obj):
+        photo_url = None
+        if obj.photo_ref:
+            photo_url = obj.photo_ref.url
+            request = self.context.get('request')
+            if request:
+                photo_url = request.build_absolute_uri(photo_url)
+        return {
+            'id': obj.id,
+            'employee_code': obj.employee_code,
+            'full_name': obj.full_name,
+            'status': obj.status,
+            'photo_ref': photo_url,
+            'photo_ref_url': photo_url,
+            'created_at': self.datetime(obj.created_at),
+            'updated_at': self.datetime(obj.updated_at),
+        }
+
+
 class EmployeeCreateSerializer(serializers.Serializer):
     """Serializer para crear empleado."""
     
@@ -72,6 +120,42 @@ class EmployeeUpdateSerializer(serializers.Serializer):
         )
 
 
+class EmployeeReferenceSerializer(serializers.ModelSerializer):
+    """Serializer para las referencias faciales adicionales de un empleado."""
+    
+    image_url = serializers.SerializerMethodField()
+    
+    class Meta:
+        model = EmployeeReference
+        fields = [
+            'id',
+            'label',
+            'image',
+            'image_url',
+            'created_at',
+        ]
+        read_only_fields = fields
+    
+    def get_image_url(self, obj):
+        """Obtener URL completa de la imagen."""
+        request = self.context.get('request')
+        if request:
+            return request.build_absolute_uri(obj.image.url)
+        return obj.image.url
+
+
+class EmployeeReferenceCreateSerializer(serializers.Serializer):
+    """Serializer para agregar una referencia (el empleado viene en el contexto)."""
+    
+    image = serializers.ImageField()
+    label = serializers.CharField(max_length=100, required=False, allow_blank=True, default='')
+    
+    def create(self, validated_data):
+        """Agregar la referencia usando el servicio."""
+        service = AddEmployeeReferenceService()
+        return service.execute(employee_id=self.context['employee_id'], **validated_data)
+
+
 class CheckInSerializer(serializers.Serializer):
     """Serializer para check-in."""
     
@@ -97,6 +181,7 @@ class CheckInResponseSerializer(serializers.Serializer):
     threshold_used = serializers.FloatField()
     employee_code = serializers.CharField()
     timestamp = serializers.DateTimeField()
+    matched_reference = serializers.IntegerField(allow_null=True, required=False)
 
 
 class AttendanceEventSerializer(serializers.ModelSerializer):
@@ -104,6 +189,8 @@ class AttendanceEventSerializer(serializers.ModelSerializer):
     
     employee_code = serializers.CharField(source='employee.employee_code', read_only=True)
     employee_name = serializers.CharField(source='employee.full_name', read_only=True)
+    # Se mantiene en la API; el modelo ya no duplica timestamp en otra columna
+    created_at = serializers.DateTimeField(source='timestamp', read_only=True)
     
     class Meta:
         model = AttendanceEvent
@@ -116,6 +203,60 @@ class AttendanceEventSerializer(serializers.ModelSerializer):
             'decision',
             'provider_name',
             'threshold_used',
+            'site',
+            'matched_reference',
+            'created_at',
+        ]
+        read_only_fields = fields
+
+
+class AttendanceEventListSerializer(FlatSerializer):
+    """
+    Serializer de solo lectura para el listado de eventos.
+    
+    Mismo JSON que AttendanceEventSerializer; espera el empleado cargado con
+    select_related.
+    """
+    
+    def to_representation(self, obj):
+        employee = obj.employee
+        timestamp = self.datetime(obj.timestamp)
+        return {
+            'id': obj.id,
+            'employee_code': employee.employee_code,
+            'employee_name': employee.full_name,
+            'timestamp': timestamp,
+            'score': float(obj.score),
+            'decision': bool(obj.decision),
+            'provider_name': obj.provider_name,
+            'threshold_used': float(obj.threshold_used),
+            'site': obj.site,
+            'matched_reference': obj.matched_reference_id,
+            'created_at': timestamp,
+        }
+
+
+class EmployeePurgeJobSerializer(serializers.ModelSerializer):
+    """Serializer para el avance de la purga de un empleado dado de baja."""
+    
+    progress = serializers.FloatField(read_only=True)
+    
+    class Meta:
+        model = EmployeePurgeJob
+        fields = [
+            'id',
+            'employee_id',
+            'employee_code',
+            'mode',
+            'status',
+            'total_events',
+            'processed_events',
+            'progress',
+            'error',
             'created_at',
+            'started_at',
+            'finished_at',
+            'owner',
+            'heartbeat_at',
         ]
-        read_only_fields = '__all__'
+        read_only_fields = fields
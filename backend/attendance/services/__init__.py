@@ -1,9 +1,21 @@
-from .employee_service import CreateEmployeeService, UpdateEmployeeService, DeleteEmployeeService
+from .employee_service import (
+    CreateEmployeeService,
+    UpdateEmployeeService,
+    DeleteEmployeeService,
+    AddEmployeeReferenceService,
+    DeleteEmployeeReferenceService,
+)
 from .checkin_service import CheckInEmployeeService
+from .sync_service import EmployeeSyncService
+from .purge_service import EmployeePurgeService
 
 __all__ = [
     'CreateEmployeeService',
     'UpdateEmployeeService',
     'DeleteEmployeeService',
+    'AddEmployeeReferenceService',
+    'DeleteEmployeeReferenceService',
     'CheckInEmployeeService',
+    'EmployeeSyncService',
+    'EmployeePurgeService',
 ]
@@ -2,17 +2,60 @@
 Service for Check-in operations.
 """
 import base64
+import hashlib
 import logging
+from datetime import timedelta
 from io import BytesIO
-from PIL import Image
+from typing import Dict, List, Optional, Tuple
 from django.conf import settings
 from django.core.exceptions import ValidationError
+from django.db import DatabaseError, connection
+from django.utils import timezone
+from attendance.cluster import owns_employee
+from attendance.invalidation import get_employee_cache
 from attendance.repositories import EmployeeRepository, AttendanceRepository
 from attendance.providers.factory import get_face_verification_provider
-from attendance.models import Employee
+from attendance.services.prefilters import PrefilterCascade, get_prefilter_cascade
+from attendance.metrics import CHECKIN_COALESCED, CHECKIN_RESULTS, PROVIDER_CALLS, stage_timer
+from attendance.models import Employee, EmployeeReference
+from attendance.reference_cache import get_reference_cache
+from attendance.shadow import get_shadow_evaluator, submit_shadow_evaluation
+from attendance.singleflight import SingleFlight
 
 logger = logging.getLogger(__name__)
 
+# Check-ins en curso en este proceso, por (employee_code, hash de la captura)
+_checkin_flight = SingleFlight()
+
+REFERENCE_POLICIES = ('best', 'top_k')
+
+
+def combine_reference_scores(
+    results: List[Dict[str, any]],
+    policy: str = 'best',
+    top_k: int = 2
+) -> Tuple[Dict[str, any], int]:
+    """
+    Combinar los resultados de una captura contra varias referencias.
+    
+    Args:
+        results: Resultados del proveedor, uno por referencia
+        policy: 'best' (mejor score) o 'top_k' (promedio de los top_k mejores,
+            más estricto ante una única referencia con score alto por azar)
+        top_k: Referencias promediadas con la política 'top_k'
+    
+    Returns:
+        (resultado combinado, índice de la referencia con mejor score)
+    """
+    if policy not in REFERENCE_POLICIES:
+        raise ValueError(f"Política de referencias desconocida: {policy}")
+    best = max(range(len(results)), key=lambda index: results[index]['score'])
+    combined = dict(results[best])
+    if policy == 'top_k' and len(results) > 1:
+        scores = sorted((result['score'] for result in results), reverse=True)[:max(1, top_k)]
+        combined['score'] = round(sum(scores) / len(scores), 4)
+    return combined, best
+
 
 class CheckInEmployeeService:
     """Servicio para registrar entrada de empleados."""
@@ -21,17 +64,24 @@ class CheckInEmployeeService:
         self,
         employee_repo: EmployeeRepository = None,
         attendance_repo: AttendanceRepository = None,
-        provider=None
+        provider=None,
+        prefilters: PrefilterCascade = None,
+        shadow=None
     ):
         self.employee_repo = employee_repo or EmployeeRepository()
         self.attendance_repo = attendance_repo or AttendanceRepository()
         self.provider = provider or get_face_verification_provider()
+        self.prefilters = prefilters if prefilters is not None else get_prefilter_cascade()
+        self.shadow = shadow if shadow is not None else get_shadow_evaluator()
         self.threshold = getattr(settings, 'FACE_VERIFICATION_THRESHOLD', 0.80)
+        self.reference_policy = getattr(settings, 'FACE_VERIFICATION_REFERENCE_POLICY', 'best')
+        self.reference_top_k = getattr(settings, 'FACE_VERIFICATION_REFERENCE_TOP_K', 2)
     
     def execute(
         self,
         employee_code: str,
-        capture_image_data: str
+        capture_image_data: str,
+        site: str = ''
     ) -> dict:
         """
         Registrar entrada de empleado mediante validación facial.
@@ -39,6 +89,7 @@ class CheckInEmployeeService:
         Args:
             employee_code: Código del empleado
             capture_image_data: Imagen capturada en base64 (data:image/...;base64,...)
+            site: Sede del kiosco, guardada en el evento
         
         Returns:
             Dict con:
@@ -47,57 +98,152 @@ class CheckInEmployeeService:
                 - threshold_used: float
                 - employee_code: str
                 - timestamp: str
+                - matched_reference: ID de la referencia adicional que
+                  coincidió (None si fue photo_ref)
         
         Raises:
             Employee.DoesNotExist: Si el empleado no existe
             ValidationError: Si la imagen es inválida o el empleado está inactivo
+        
+        Requests concurrentes con el mismo empleado y la misma captura
+        comparten una única verificación y un único evento; los que llegan
+        después reciben la misma respuesta (ver _execute_once).
+        """
+        capture_hash = hashlib.sha256(capture_image_data.encode()).hexdigest()
+        if not getattr(settings, 'CHECKIN_SINGLEFLIGHT_ENABLED', True):
+            return self._execute_once(employee_code, capture_image_data, capture_hash, site)
+        
+        result, shared = _checkin_flight.do(
+            (employee_code, capture_hash),
+            lambda: self._execute_once(employee_code, capture_image_data, capture_hash, site)
+        )
+        if shared:
+            CHECKIN_COALESCED.labels(scope='process').inc()
+        return result
+    
+    def _execute_once(self, employee_code: str, capture_image_data: str, capture_hash: str, site: str = '') -> dict:
+        """
+        Ejecutar el check-in, opcionalmente serializado entre workers.
+        
+        Con CHECKIN_SINGLEFLIGHT_ADVISORY_LOCK (solo PostgreSQL) se toma un
+        advisory lock de sesión por (empleado, captura): un worker que
+        llega mientras otro verifica espera el lock y, si encuentra un evento
+        con la misma captura dentro de CHECKIN_SINGLEFLIGHT_WINDOW_SECONDS,
+        responde con ese evento en vez de verificar de nuevo.
+        
+        El lock es de sesión y no de transacción para no dejar la conexión
+        "idle in transaction" durante la verificación (hasta el timeout del
+        proveedor). A cambio se libera explícitamente; si la conexión se
+        cae, PostgreSQL lo libera al cerrar la sesión. El evento debe quedar
+        confirmado antes de liberar el lock, así que no debe llamarse dentro
+        de una transacción abierta.
         """
+        if not (getattr(settings, 'CHECKIN_SINGLEFLIGHT_ADVISORY_LOCK', False) and connection.vendor == 'postgresql'):
+            return self._timed_execute(employee_code, capture_image_data, capture_hash, site)
+        
+        window = getattr(settings, 'CHECKIN_SINGLEFLIGHT_WINDOW_SECONDS', 10)
+        lock_id = _advisory_lock_id(employee_code, capture_hash)
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT pg_advisory_lock(%s)', [lock_id])
+        try:
+            existing = self.attendance_repo.get_recent_by_capture(
+                employee_code, capture_hash, since=timezone.now() - timedelta(seconds=window)
+            )
+            if existing is not None:
+                CHECKIN_COALESCED.labels(scope='database').inc()
+                return {
+                    'decision': existing.decision,
+                    'score': existing.score,
+                    'threshold_used': existing.threshold_used,
+                    'employee_code': employee_code,
+                    'timestamp': existing.timestamp.isoformat(),
+                    'matched_reference': existing.matched_reference_id
+                }
+            return self._timed_execute(employee_code, capture_image_data, capture_hash, site)
+        finally:
+            _advisory_unlock(lock_id)
+    
+    def _timed_execute(self, employee_code: str, capture_image_data: str, capture_hash: str, site: str = '') -> dict:
+        """Ejecutar _execute midiendo la etapa total y registrando el resultado."""
+        with stage_timer('total'):
+            result = self._execute(employee_code, capture_image_data, capture_hash, site)
+        CHECKIN_RESULTS.labels(result='accepted' if result['decision'] else 'rejected').inc()
+        return result
+    
+    def _execute(self, employee_code: str, capture_image_data: str, capture_hash: str = '', site: str = '') -> dict:
+        """Pasos de execute, cada uno medido como etapa."""
         # Buscar empleado
-        employee = self.employee_repo.get_by_code(employee_code)
+        with stage_timer('get_by_code'):
+            employee, extra = self._get_employee(employee_code)
         if not employee:
+            CHECKIN_RESULTS.labels(result='not_found').inc()
             raise Employee.DoesNotExist(f"Empleado con código {employee_code} no existe")
         
         # Validar que el empleado esté activo
         if employee.status != 'active':
+            CHECKIN_RESULTS.labels(result='inactive').inc()
             raise ValidationError(f"Empleado {employee_code} está inactivo")
         
         # Validar y procesar imagen capturada
-        capture_image_bytes = self._process_capture_image(capture_image_data)
+        with stage_timer('process_capture_image'):
+            capture_image_bytes = self._process_capture_image(capture_image_data)
         
-        # Leer imagen de referencia
-        reference_image_bytes = self._read_reference_image(employee.photo_ref)
-        
-        # Verificar con el proveedor
-        try:
-            verification_result = self.provider.verify(
-                reference_image_bytes=reference_image_bytes,
-                capture_image_bytes=capture_image_bytes,
-                employee_code=employee_code
-            )
-        except Exception as e:
-            logger.error(f"Error en verificación facial para {employee_code}: {e}")
-            raise ValidationError(f"Error en verificación facial: {str(e)}")
+        # Leer photo_ref y las referencias adicionales del empleado
+        with stage_timer('read_reference_image'):
+            references = self._load_references(employee, extra)
+        reference_image_bytes = references[0][1]
+        matched_reference = None
         
-        score = verification_result['score']
-        provider_match = verification_result.get('match', False)
+        # Pre-filtros baratos: capturas inservibles no llegan al proveedor
+        # (las etapas que comparan usan todas las referencias del empleado)
+        prefilter_result = None
+        if self.prefilters:
+            with stage_timer('prefilter'):
+                prefilter_result = self.prefilters.run(capture_image_bytes, [image for _, image in references])
         
-        # Aplicar threshold configurado
-        decision = score >= self.threshold
+        if prefilter_result is not None:
+            verification_result = prefilter_result
+            score = prefilter_result['score']
+            # La etapa que decide fija el resultado, sin aplicar threshold
+            decision = prefilter_result['match']
+        else:
+            verification_result, matched = self._verify(
+                employee_code, [image for _, image in references], capture_image_bytes
+            )
+            matched_reference, reference_image_bytes = references[matched]
+            score = verification_result['score']
+            # Aplicar threshold configurado
+            decision = score >= self.threshold
         
         # Guardar evento (sin guardar la foto de captura)
         from datetime import datetime
-        event = self.attendance_repo.create(
-            employee=employee,
-            score=score,
-            decision=decision,
-            provider_name=verification_result['provider'],
-            threshold_used=self.threshold,
-            timestamp=datetime.now()
-        )
+        with stage_timer('attendance_create'):
+            event = self.attendance_repo.create(
+                employee=employee,
+                score=score,
+                decision=decision,
+                provider_name=verification_result['provider'],
+                threshold_used=self.threshold,
+                timestamp=datetime.now(),
+                capture_hash=capture_hash,
+                site=site,
+                matched_reference=matched_reference
+            )
+        
+        # Evaluación en sombra (con la referencia que coincidió) del proveedor candidato (fuera del request)
+        if prefilter_result is None:
+            submit_shadow_evaluation(self.shadow, event, reference_image_bytes, capture_image_bytes, employee_code)
         
         logger.info(
-            f"Check-in registrado: {employee_code} - "
-            f"score={score:.2f}, decision={decision}, threshold={self.threshold}"
+            "Check-in registrado: %s - score=%.2f, decision=%s, threshold=%s",
+            employee_code, score, decision, self.threshold,
+            extra={
+                'employee_code': employee_code,
+                'score': score,
+                'decision': decision,
+                'threshold': self.threshold,
+                'provider': verification_result['provider'],
+            }
         )
         
         return {
@@ -105,9 +251,62 @@ class CheckInEmployeeService:
             'score': score,
             'threshold_used': self.threshold,
             'employee_code': employee_code,
-            'timestamp': event.timestamp.isoformat()
+            'timestamp': event.timestamp.isoformat(),
+            'matched_reference': matched_reference.id if matched_reference else None
         }
     
+    def _verify(self, employee_code: str, reference_images: List[bytes], capture_image_bytes: bytes) -> Tuple[dict, int]:
+        """
+        Verificar con el proveedor y registrar el resultado de la llamada.
+        
+        Con varias referencias la captura se compara con todas en una sola
+        llamada a verify_batch (una inferencia por lote en los proveedores
+        basados en modelos) y los scores se combinan según
+        FACE_VERIFICATION_REFERENCE_POLICY.
+        
+        Returns:
+            (resultado, índice de la referencia con mejor score)
+        
+        Raises:
+            ValidationError: Si el proveedor falla
+        """
+        provider_name = getattr(self.provider, 'name', 'unknown')
+        try:
+            with stage_timer('provider_verify'):
+                if len(reference_images) == 1:
+                    verification_result = self.provider.verify(
+                        reference_image_bytes=reference_images[0],
+                        capture_image_bytes=capture_image_bytes,
+                        employee_code=employee_code
+                    )
+                    matched = 0
+                else:
+                    results = self.provider.verify_batch([
+                        {
+                            'reference_image_bytes': reference_image_bytes,
+                            'capture_image_bytes': capture_image_bytes,
+                            'employee_code': employee_code,
+                        }
+                        for reference_image_bytes in reference_images
+                    ])
+                    verification_result, matched = combine_reference_scores(
+                        results, self.reference_policy, self.reference_top_k
+                    )
+        except Exception as e:
+            PROVIDER_CALLS.labels(provider=provider_name, outcome='error').inc()
+            CHECKIN_RESULTS.labels(result='provider_error').inc()
+            logger.error(
+                "Error en verificación facial para %s: %s", employee_code, e,
+                extra={'employee_code': employee_code, 'provider': provider_name}
+            )
+            raise ValidationError(f"Error en verificación facial: {str(e)}")
+        
+        PROVIDER_CALLS.labels(
+            provider=provider_name,
+            outcome='match' if verification_result.get('match', False) else 'no_match'
+        ).inc()
+        return verification_result, matched
+    
     def _process_capture_image(self, image_data: str) -> bytes:
         """
         Procesar imagen capturada desde base64.
@@ -131,7 +330,9 @@ class CheckInEmployeeService:
             # Decodificar base64
             image_bytes = base64.b64decode(base64_data)
             
-            # Validar que sea una imagen válida
+            # Validar que sea una imagen válida (Pillow se importa en el primer check-in)
+            from PIL import Image
+            
             try:
                 img = Image.open(BytesIO(image_bytes))
                 img.verify()
@@ -142,15 +343,71 @@ class CheckInEmployeeService:
         except Exception as e:
             if isinstance(e, ValidationError):
                 raise
-            logger.error(f"Error procesando imagen capturada: {e}")
+            logger.error("Error procesando imagen capturada: %s", e)
             raise ValidationError(f"Error procesando imagen: {str(e)}")
     
+    def _get_employee(self, employee_code: str) -> Tuple[Optional[Employee], Optional[List[EmployeeReference]]]:
+        """
+        Empleado y, si salió del caché de empleados, sus referencias adicionales.
+        
+        El caché de empleados solo existe con EMPLOYEE_CACHE_ENABLED y el
+        listener de invalidación escuchando (ver attendance/invalidation.py).
+        
+        Returns:
+            (Employee o None, lista de EmployeeReference o None si hay que leerlas)
+        """
+        cache = get_employee_cache()
+        if cache is None:
+            return self.employee_repo.get_by_code(employee_code), None
+        cached = cache.get(employee_code)
+        if cached is not None:
+            return cached
+        # La generación se toma antes de leer: un cambio durante la lectura descarta el put
+        generation = cache.generation
+        employee = self.employee_repo.get_by_code(employee_code)
+        if employee is None:
+            return None, None
+        extra = self.employee_repo.get_references(employee)
+        cache.put(employee, extra, generation)
+        return employee, extra
+    
+    def _load_references(
+        self,
+        employee: Employee,
+        extra: Optional[List[EmployeeReference]] = None
+    ) -> List[Tuple[Optional[EmployeeReference], bytes]]:
+        """
+        photo_ref y referencias adicionales con sus imágenes.
+        
+        Las imágenes salen del caché de referencias si el empleado es del
+        shard de este nodo (siempre, sin modo cluster); las de otros shards
+        se leen del storage sin cachear.
+        
+        Args:
+            employee: Empleado
+            extra: Referencias adicionales ya leídas (None: se leen del repositorio)
+        
+        Returns:
+            Lista de (EmployeeReference o None para photo_ref, bytes)
+        """
+        if extra is None:
+            extra = self.employee_repo.get_references(employee)
+        files = [employee.photo_ref] + [reference.image for reference in extra]
+        cache = get_reference_cache() if owns_employee(employee.employee_code) else None
+        names = tuple(image_file.name for image_file in files)
+        images = cache.get(employee.id, names) if cache is not None else None
+        if images is None:
+            images = [self._read_reference_image(image_file) for image_file in files]
+            if cache is not None:
+                cache.put(employee.id, names, images)
+        return list(zip([None] + extra, images))
+    
     def _read_reference_image(self, photo_ref) -> bytes:
         """
         Leer imagen de referencia desde el archivo.
         
         Args:
-            photo_ref: Campo ImageField del modelo
+            photo_ref: Campo ImageField del modelo (photo_ref o EmployeeReference.image)
         
         Returns:
             Bytes de la imagen de referencia
@@ -164,5 +421,21 @@ class CheckInEmployeeService:
             photo_ref.close()
             return image_bytes
         except Exception as e:
-            logger.error(f"Error leyendo imagen de referencia: {e}")
+            logger.error("Error leyendo imagen de referencia: %s", e)
             raise ValidationError(f"Error leyendo imagen de referencia: {str(e)}")
+
+
+def _advisory_lock_id(employee_code: str, capture_hash: str) -> int:
+    """Clave de 64 bits con signo para pg_advisory_lock."""
+    digest = hashlib.sha256(f"checkin:{employee_code}:{capture_hash}".encode()).digest()
+    return int.from_bytes(digest[:8], 'big', signed=True)
+
+
+def _advisory_unlock(lock_id: int) -> None:
+    """Liberar el advisory lock de sesión (si falla, se libera al cerrar la conexión)."""
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT pg_advisory_unlock(%s)', [lock_id])
+    except DatabaseError as e:
+        logger.warning("No se pudo liberar el advisory lock %s: %s", lock_id, e)
+        connection.close_if_unusable_or_obsolete()
@@ -3,9 +3,11 @@ Services for Employee operations.
 """
 import logging
 from typing import Optional
+from django.conf import settings
 from django.core.exceptions import ValidationError
-from attendance.repositories import EmployeeRepository
-from attendance.models import Employee
+from django.db import transaction
+from attendance.repositories import AttendanceRepository, EmployeeRepository
+from attendance.models import Employee, EmployeePurgeJob, EmployeeReference
 
 logger = logging.getLogger(__name__)
 
@@ -112,25 +114,117 @@ class UpdateEmployeeService:
 
 
 class DeleteEmployeeService:
-    """Servicio para eliminar empleados."""
+    """
+    Servicio para eliminar empleados.
     
-    def __init__(self, repository: EmployeeRepository = None):
+    La baja es lógica e inmediata: el empleado deja de aparecer en consultas,
+    check-ins y cachés. Su historial de eventos se archiva o elimina después,
+    en segundo plano (EmployeePurgeService), para no borrar en una sola
+    transacción todos los eventos de un empleado con años de antigüedad.
+    """
+    
+    def __init__(
+        self,
+        repository: EmployeeRepository = None,
+        attendance_repository: AttendanceRepository = None,
+        mode: Optional[str] = None
+    ):
+        self.repository = repository or EmployeeRepository()
+        self.attendance_repository = attendance_repository or AttendanceRepository()
+        self.mode = mode or getattr(settings, 'EMPLOYEE_PURGE_MODE', 'archive')
+    
+    def execute(self, employee_id: int) -> EmployeePurgeJob:
+        """
+        Dar de baja un empleado y registrar la purga de su historial.
+        
+        Args:
+            employee_id: ID del empleado
+        
+        Returns:
+            EmployeePurgeJob pendiente
+        
+        Raises:
+            Employee.DoesNotExist: Si el empleado no existe
+        """
+        employee = self.repository.get_by_id(employee_id)
+        if not employee:
+            raise Employee.DoesNotExist(f"Empleado con ID {employee_id} no existe")
+        
+        with transaction.atomic():
+            self.repository.soft_delete(employee)
+            job = self.repository.create_purge_job(
+                employee,
+                mode=self.mode,
+                total_events=self.attendance_repository.count_by_employee(employee.id)
+            )
+        logger.info(f"Empleado dado de baja: {employee.employee_code} ({job.total_events} eventos a purgar)")
+        return job
+
+
+class AddEmployeeReferenceService:
+    """
+    Servicio para registrar referencias faciales adicionales.
+    
+    Cada referencia suma una comparación a cada check-in del empleado, por
+    eso se limitan a EMPLOYEE_MAX_REFERENCES.
+    """
+    
+    def __init__(self, repository: EmployeeRepository = None, max_references: Optional[int] = None):
         self.repository = repository or EmployeeRepository()
+        self.max_references = max_references or getattr(settings, 'EMPLOYEE_MAX_REFERENCES', 5)
     
-    def execute(self, employee_id: int) -> None:
+    def execute(self, employee_id: int, image, label: str = '') -> EmployeeReference:
         """
-        Eliminar empleado.
+        Agregar una referencia a un empleado.
         
         Args:
             employee_id: ID del empleado
+            image: Archivo de imagen
+            label: Descripción (p.ej. "con casco")
+        
+        Returns:
+            EmployeeReference creada
+        
+        Raises:
+            Employee.DoesNotExist: Si el empleado no existe
+            ValidationError: Si el empleado ya tiene el máximo de referencias
+        """
+        employee = self.repository.get_by_id(employee_id)
+        if not employee:
+            raise Employee.DoesNotExist(f"Empleado con ID {employee_id} no existe")
+        
+        if self.repository.count_references(employee) >= self.max_references:
+            raise ValidationError(
+                f"El empleado {employee.employee_code} ya tiene {self.max_references} referencias"
+            )
+        
+        reference = self.repository.add_reference(employee, image, label)
+        logger.info(f"Referencia agregada: {employee.employee_code} ({reference.id})")
+        return reference
+
+
+class DeleteEmployeeReferenceService:
+    """Servicio para eliminar referencias faciales adicionales."""
+    
+    def __init__(self, repository: EmployeeRepository = None):
+        self.repository = repository or EmployeeRepository()
+    
+    def execute(self, employee_id: int, reference_id: int) -> None:
+        """
+        Eliminar una referencia de un empleado.
         
         Raises:
             Employee.DoesNotExist: Si el empleado no existe
+            EmployeeReference.DoesNotExist: Si la referencia no es del empleado
         """
         employee = self.repository.get_by_id(employee_id)
         if not employee:
             raise Employee.DoesNotExist(f"Empleado con ID {employee_id} no existe")
         
-        employee_code = employee.employee_code
-        self.repository.delete(employee)
-        logger.info(f"Empleado eliminado: {employee_code}")
+        reference = self.repository.get_reference(employee, reference_id)
+        if reference is None:
+            raise EmployeeReference.DoesNotExist(
+                f"Referencia {reference_id} no existe para el empleado {employee.employee_code}"
+            )
+        self.repository.delete_reference(reference)
+        logger.info(f"Referencia eliminada: {employee.employee_code} ({reference_id})")
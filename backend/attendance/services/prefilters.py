@@ -0,0 +1,362 @@
+"""
+Cheap pre-filters run before the face verification provider.
+
+Each stage inspects the decoded capture (and, if it needs them, the
+employee's reference images) and either lets the check-in continue, rejects
+it or accepts it early. Only captures that pass every configured stage reach
+``provider.verify``.
+"""
+import logging
+import threading
+from abc import ABC, abstractmethod
+from io import BytesIO
+from typing import Dict, List, Optional, Sequence
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from attendance.metrics import PREFILTER_RESULTS
+
+logger = logging.getLogger(__name__)
+
+REJECT = 'reject'
+ACCEPT = 'accept'
+
+# Lado máximo de la versión reducida en escala de grises que usan las etapas
+ANALYSIS_SIZE = 256
+
+
+class PrefilterContext:
+    """
+    Imágenes de un check-in, decodificadas una sola vez y bajo demanda.
+    
+    Las etapas comparten la captura reducida en escala de grises; las
+    referencias (photo_ref y las adicionales) solo se decodifican si
+    alguna etapa las pide.
+    """
+    
+    def __init__(self, capture_image_bytes: bytes, reference_images: Sequence[bytes] = ()):
+        self.capture_image_bytes = capture_image_bytes
+        self.reference_images = [image for image in reference_images if image]
+        self._capture = None
+        self._capture_gray = None
+        self._references_gray = None
+    
+    @property
+    def capture(self):
+        """Captura decodificada (tamaño original)."""
+        if self._capture is None:
+            from PIL import Image
+            
+            self._capture = Image.open(BytesIO(self.capture_image_bytes))
+        return self._capture
+    
+    @property
+    def capture_gray(self):
+        """Captura reducida a ANALYSIS_SIZE en escala de grises."""
+        if self._capture_gray is None:
+            self._capture_gray = _analysis_image(self.capture)
+        return self._capture_gray
+    
+    @property
+    def references_gray(self) -> List:
+        """Referencias reducidas a ANALYSIS_SIZE en escala de grises (vacía si no hay)."""
+        if self._references_gray is None:
+            from PIL import Image
+            
+            self._references_gray = [
+                _analysis_image(Image.open(BytesIO(image))) for image in self.reference_images
+            ]
+        return self._references_gray
+
+
+def _analysis_image(image):
+    # draft() permite al decodificador JPEG reducir la escala al decodificar
+    image.draft('L', (ANALYSIS_SIZE, ANALYSIS_SIZE))
+    gray = image.convert('L')
+    gray.thumbnail((ANALYSIS_SIZE, ANALYSIS_SIZE))
+    return gray
+
+
+class PrefilterStage(ABC):
+    """Interfaz abstracta de una etapa del pre-filtro."""
+    
+    name = 'base'
+    
+    @abstractmethod
+    def check(self, context: PrefilterContext) -> Optional[Dict[str, any]]:
+        """
+        Evaluar la captura.
+        
+        Args:
+            context: Imágenes del check-in
+        
+        Returns:
+            None para continuar, o Dict con 'outcome' (REJECT/ACCEPT),
+            'score' y 'reason'
+        """
+        pass
+
+
+class SizeStage(PrefilterStage):
+    """Rechaza capturas demasiado pequeñas para contener un rostro útil."""
+    
+    name = 'size'
+    
+    def __init__(self, min_width: int = 160, min_height: int = 160):
+        self.min_width = min_width
+        self.min_height = min_height
+    
+    def check(self, context):
+        width, height = context.capture.size
+        if width < self.min_width or height < self.min_height:
+            return {'outcome': REJECT, 'score': 0.0, 'reason': f"captura de {width}x{height}"}
+        return None
+
+
+class BrightnessStage(PrefilterStage):
+    """Rechaza capturas casi negras o sobreexpuestas (brillo medio fuera de rango)."""
+    
+    name = 'brightness'
+    
+    def __init__(self, min_mean: float = 25.0, max_mean: float = 235.0):
+        self.min_mean = min_mean
+        self.max_mean = max_mean
+    
+    def check(self, context):
+        from PIL import ImageStat
+        
+        mean = ImageStat.Stat(context.capture_gray).mean[0]
+        if mean < self.min_mean or mean > self.max_mean:
+            return {'outcome': REJECT, 'score': 0.0, 'reason': f"brillo medio {mean:.1f}"}
+        return None
+
+
+class BlurStage(PrefilterStage):
+    """
+    Rechaza capturas borrosas.
+    
+    Usa la varianza del laplaciano de la imagen reducida: una imagen
+    enfocada tiene bordes marcados y varianza alta.
+    """
+    
+    name = 'blur'
+    
+    # Laplaciano 3x3; el offset evita que los valores negativos se recorten a 0
+    LAPLACIAN = (0, 1, 0, 1, -4, 1, 0, 1, 0)
+    
+    def __init__(self, min_variance: float = 60.0):
+        self.min_variance = min_variance
+    
+    def check(self, context):
+        from PIL import ImageFilter, ImageStat
+        
+        edges = context.capture_gray.filter(ImageFilter.Kernel((3, 3), self.LAPLACIAN, scale=1, offset=128))
+        variance = ImageStat.Stat(edges).var[0]
+        if variance < self.min_variance:
+            return {'outcome': REJECT, 'score': 0.0, 'reason': f"varianza del laplaciano {variance:.1f}"}
+        return None
+
+
+class FacePresenceStage(PrefilterStage):
+    """
+    Rechaza capturas sin rostro detectable (cascada Haar de OpenCV).
+    
+    Requiere opencv-python-headless; si no está instalado la etapa no se
+    construye (ver build_prefilter_cascade). El clasificador se carga una
+    vez por hilo: detectMultiScale no es seguro entre hilos.
+    """
+    
+    name = 'face'
+    
+    def __init__(self, min_size: int = 40, scale_factor: float = 1.2, min_neighbors: int = 4):
+        import cv2
+        import numpy
+        
+        self._cv2 = cv2
+        self._numpy = numpy
+        self.min_size = min_size
+        self.scale_factor = scale_factor
+        self.min_neighbors = min_neighbors
+        self._local = threading.local()
+    
+    @property
+    def classifier(self):
+        """Clasificador Haar del hilo actual (se carga en el primer uso)."""
+        classifier = getattr(self._local, 'classifier', None)
+        if classifier is None:
+            classifier = self._cv2.CascadeClassifier(
+                self._cv2.data.haarcascades + 'haarcascade_frontalface_default.xml'
+            )
+            self._local.classifier = classifier
+        return classifier
+    
+    def check(self, context):
+        pixels = self._numpy.asarray(context.capture_gray)
+        faces = self.classifier.detectMultiScale(
+            pixels,
+            scaleFactor=self.scale_factor,
+            minNeighbors=self.min_neighbors,
+            minSize=(self.min_size, self.min_size)
+        )
+        if len(faces) == 0:
+            return {'outcome': REJECT, 'score': 0.0, 'reason': 'sin rostro detectado'}
+        return None
+
+
+def dhash(image, hash_size: int = 8) -> int:
+    """
+    Hash perceptual por diferencias (dHash) de una imagen en escala de grises.
+    
+    Args:
+        image: Imagen PIL en modo 'L'
+        hash_size: Lado del hash (hash_size**2 bits)
+    
+    Returns:
+        Hash como entero
+    """
+    from PIL import Image
+    
+    small = image.resize((hash_size + 1, hash_size), Image.BILINEAR)
+    pixels = list(small.getdata())
+    value = 0
+    for row in range(hash_size):
+        offset = row * (hash_size + 1)
+        for col in range(hash_size):
+            value = (value << 1) | (pixels[offset + col] > pixels[offset + col + 1])
+    return value
+
+
+class PerceptualHashStage(PrefilterStage):
+    """
+    Compara el dHash de la captura con el de cada referencia del empleado.
+    
+    Usa la referencia más parecida: con distancia de Hamming
+    >= reject_distance contra todas rechaza; con distancia
+    <= accept_distance contra alguna acepta sin llamar al proveedor.
+    Cualquiera de los dos umbrales en None desactiva esa salida.
+    """
+    
+    name = 'phash'
+    BITS = 64
+    
+    def __init__(self, reject_distance: Optional[int] = 48, accept_distance: Optional[int] = None):
+        self.reject_distance = reject_distance
+        self.accept_distance = accept_distance
+    
+    def check(self, context):
+        if not context.references_gray:
+            return None
+        capture_hash = dhash(context.capture_gray)
+        distance = min(
+            bin(capture_hash ^ dhash(reference)).count('1') for reference in context.references_gray
+        )
+        similarity = 1.0 - distance / self.BITS
+        if self.accept_distance is not None and distance <= self.accept_distance:
+            return {'outcome': ACCEPT, 'score': round(similarity, 4), 'reason': f"distancia dHash {distance}"}
+        if self.reject_distance is not None and distance >= self.reject_distance:
+            return {'outcome': REJECT, 'score': round(similarity, 4), 'reason': f"distancia dHash {distance}"}
+        return None
+
+
+STAGES = {
+    SizeStage.name: SizeStage,
+    BrightnessStage.name: BrightnessStage,
+    BlurStage.name: BlurStage,
+    FacePresenceStage.name: FacePresenceStage,
+    PerceptualHashStage.name: PerceptualHashStage,
+}
+
+
+class PrefilterCascade:
+    """Ejecuta las etapas en orden y se detiene en la primera que decide."""
+    
+    def __init__(self, stages: List[PrefilterStage]):
+        self.stages = stages
+    
+    def __bool__(self) -> bool:
+        return bool(self.stages)
+    
+    def run(self, capture_image_bytes: bytes, reference_images: Sequence[bytes] = ()) -> Optional[Dict[str, any]]:
+        """
+        Ejecutar la cascada.
+        
+        Args:
+            capture_image_bytes: Bytes de la imagen capturada
+            reference_images: Bytes de cada referencia del empleado (photo_ref primero)
+        
+        Returns:
+            None si la captura debe ir al proveedor; si no, un Dict con la
+            forma del resultado de un proveedor ('score', 'match',
+            'provider' = 'prefilter:<etapa>') más 'reason'
+        """
+        context = PrefilterContext(capture_image_bytes, reference_images)
+        for stage in self.stages:
+            try:
+                result = stage.check(context)
+            except Exception as e:
+                # Un pre-filtro nunca debe tumbar el check-in: se deja pasar al proveedor
+                logger.warning("Pre-filtro %s falló: %s", stage.name, e)
+                PREFILTER_RESULTS.labels(stage=stage.name, outcome='error').inc()
+                continue
+            if result is None:
+                PREFILTER_RESULTS.labels(stage=stage.name, outcome='pass').inc()
+                continue
+            PREFILTER_RESULTS.labels(stage=stage.name, outcome=result['outcome']).inc()
+            logger.debug("Pre-filtro %s: %s (%s)", stage.name, result['outcome'], result['reason'])
+            return {
+                'score': result['score'],
+                'match': result['outcome'] == ACCEPT,
+                'provider': f"prefilter:{stage.name}",
+                'reason': result['reason'],
+            }
+        return None
+
+
+def build_prefilter_cascade() -> PrefilterCascade:
+    """
+    Construir la cascada configurada en settings.
+    
+    FACE_VERIFICATION_PREFILTERS es la lista ordenada de etapas y
+    FACE_VERIFICATION_PREFILTER_OPTIONS los argumentos de cada una, p.ej.
+    {'blur': {'min_variance': 80}}.
+    
+    Returns:
+        PrefilterCascade (vacía si no hay etapas configuradas)
+    """
+    names = getattr(settings, 'FACE_VERIFICATION_PREFILTERS', [])
+    options = getattr(settings, 'FACE_VERIFICATION_PREFILTER_OPTIONS', {})
+    stages = []
+    for name in names:
+        if name not in STAGES:
+            raise ValueError(f"Pre-filtro desconocido: {name}")
+        try:
+            stages.append(STAGES[name](**options.get(name, {})))
+        except ImportError as e:
+            logger.warning("Pre-filtro %s desactivado, falta dependencia: %s", name, e)
+    return PrefilterCascade(stages)
+
+
+_cascade: Optional[PrefilterCascade] = None
+_cascade_lock = threading.Lock()
+
+
+def get_prefilter_cascade() -> PrefilterCascade:
+    """
+    Obtener la cascada configurada, compartida por el proceso.
+    
+    Se construye una sola vez: las etapas no guardan estado por check-in y
+    construirlas puede ser caro (p.ej. cargar el clasificador Haar).
+    """
+    global _cascade
+    if _cascade is None:
+        with _cascade_lock:
+            if _cascade is None:
+                _cascade = build_prefilter_cascade()
+    return _cascade
+
+
+@receiver(setting_changed)
+def _reset_on_setting_changed(setting, **kwargs):
+    global _cascade
+    if setting.startswith('FACE_VERIFICATION_PREFILTER'):
+        _cascade = None
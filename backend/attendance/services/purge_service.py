@@ -0,0 +1,133 @@
+"""
+Service for the background purge of soft-deleted employees.
+"""
+import logging
+import os
+import socket
+import time
+from datetime import timedelta
+from typing import List, Optional
+from django.conf import settings
+from django.utils import timezone
+from attendance.archive import archive_events
+from attendance.models import EmployeePurgeJob
+from attendance.repositories import AttendanceRepository, EmployeeRepository
+
+logger = logging.getLogger(__name__)
+
+
+class PurgeJobLost(Exception):
+    """Otro proceso retomó la purga porque su heartbeat venció."""
+
+
+class EmployeePurgeService:
+    """
+    Servicio que purga el historial de los empleados dados de baja.
+    
+    Cada EmployeePurgeJob archiva (ARCHIVE_DIR) o elimina los eventos del
+    empleado en chunks de `chunk_size`, cada uno en su propia transacción,
+    con una pausa entre chunks para no competir con los check-ins. El avance
+    queda en processed_events; una purga interrumpida se retoma donde quedó.
+    Al terminar se elimina la fila del empleado.
+    
+    Cada purga se reclama a nombre de este proceso (owner) con SKIP
+    LOCKED, así que varios procesos pueden correr a la vez. Cada chunk
+    renueva heartbeat_at; una purga 'running' solo se retoma si su último
+    heartbeat tiene más de `stale_seconds`.
+    """
+    
+    def __init__(
+        self,
+        repository: EmployeeRepository = None,
+        attendance_repository: AttendanceRepository = None,
+        chunk_size: int = 500,
+        rows_per_file: int = 100000,
+        pause_seconds: float = 0.0,
+        archive_dir: Optional[str] = None,
+        stale_seconds: float = 300.0,
+        owner: Optional[str] = None
+    ):
+        """
+        Inicializar EmployeePurgeService.
+        
+        Args:
+            repository: Repositorio de empleados y purgas
+            attendance_repository: Repositorio de eventos
+            chunk_size: Eventos eliminados por transacción
+            rows_per_file: Eventos por archivo (modo 'archive')
+            pause_seconds: Pausa entre chunks
+            archive_dir: Directorio de archivo (por defecto ARCHIVE_DIR)
+            stale_seconds: Segundos sin heartbeat tras los que una purga en curso se retoma
+            owner: Identificador de este proceso (por defecto host:pid)
+        """
+        self.repository = repository or EmployeeRepository()
+        self.attendance_repository = attendance_repository or AttendanceRepository()
+        self.chunk_size = chunk_size
+        self.rows_per_file = rows_per_file
+        self.pause_seconds = pause_seconds
+        self.archive_dir = archive_dir or settings.ARCHIVE_DIR
+        self.stale_seconds = stale_seconds
+        self.owner = owner or f'{socket.gethostname()}:{os.getpid()}'
+    
+    def run_pending(self, max_jobs: Optional[int] = None) -> List[EmployeePurgeJob]:
+        """Reclamar y ejecutar las purgas pendientes o abandonadas, de a una y en orden."""
+        jobs = []
+        while max_jobs is None or len(jobs) < max_jobs:
+            job = self.repository.claim_purge_job(self.owner, self._stale_before())
+            if job is None:
+                break
+            jobs.append(self._execute(job))
+        return jobs
+    
+    def run(self, job: EmployeePurgeJob) -> EmployeePurgeJob:
+        """
+        Reclamar una purga y ejecutarla hasta terminarla.
+        
+        Returns:
+            El job con estado 'done', o 'failed' y el error; sin cambios si
+            otro proceso la está ejecutando
+        """
+        claimed = self.repository.claim_purge_job(self.owner, self._stale_before(), job_id=job.id)
+        if claimed is None:
+            logger.info(f"Purga de {job.employee_code} no disponible (terminada o en curso en otro proceso)")
+            return job
+        return self._execute(claimed)
+    
+    def _stale_before(self):
+        return timezone.now() - timedelta(seconds=self.stale_seconds)
+    
+    def _execute(self, job: EmployeePurgeJob) -> EmployeePurgeJob:
+        logger.info(f"Purga de {job.employee_code} iniciada ({job.mode}, {job.total_events} eventos)")
+        try:
+            if job.mode == 'archive':
+                archive_events(
+                    None,
+                    self.archive_dir,
+                    rows_per_file=self.rows_per_file,
+                    chunk_size=self.chunk_size,
+                    repository=self.attendance_repository,
+                    employee_id=job.employee_id,
+                    on_chunk=lambda deleted: self._advance(job, deleted)
+                )
+            else:
+                while True:
+                    ids = self.attendance_repository.get_ids_by_employee(job.employee_id, self.chunk_size)
+                    if not ids:
+                        break
+                    self._advance(job, self.attendance_repository.delete_by_ids(ids))
+            self.repository.hard_delete(job.employee_id)
+        except PurgeJobLost:
+            logger.warning(f"Purga de {job.employee_code} retomada por otro proceso; se abandona")
+            return job
+        except Exception as e:
+            logger.error(f"Error purgando empleado {job.employee_code}: {e}")
+            return self.repository.update_purge_job(job, status='failed', error=str(e), finished_at=timezone.now())
+        logger.info(f"Purga de {job.employee_code} terminada ({job.processed_events} eventos)")
+        return self.repository.update_purge_job(job, status='done', error='', finished_at=timezone.now())
+    
+    def _advance(self, job: EmployeePurgeJob, deleted: int) -> None:
+        job.processed_events += deleted
+        if not self.repository.heartbeat_purge_job(job, self.owner):
+            raise PurgeJobLost()
+        if self.pause_seconds:
+            time.sleep(self.pause_seconds)
@@ -0,0 +1,128 @@
+"""
+Service for incremental roster sync (kiosks).
+"""
+import base64
+import binascii
+from datetime import datetime, timedelta, timezone as dt_timezone
+from typing import Dict, Optional, Tuple
+from django.core.exceptions import ValidationError
+from django.utils import timezone
+from attendance.repositories import EmployeeRepository
+
+SYNC_FIELDS = ['id', 'employee_code', 'full_name', 'active', 'photo']
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+
+
+def _to_micros(value: datetime) -> int:
+    return (value - _EPOCH) // timedelta(microseconds=1)
+
+
+def _from_micros(value: int) -> Optional[datetime]:
+    return _EPOCH + timedelta(microseconds=value) if value else None
+
+
+def encode_cursor(employee_mark: Tuple[int, int], tombstone_mark: Tuple[int, int]) -> str:
+    """Codificar las marcas (microsegundos, id) de empleados y bajas en un cursor opaco."""
+    raw = '.'.join(str(part) for part in (*employee_mark, *tombstone_mark))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor: str) -> Tuple[Tuple[int, int], Tuple[int, int]]:
+    """
+    Decodificar un cursor generado por encode_cursor.
+    
+    Raises:
+        ValidationError: Si el cursor está malformado
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode()
+        parts = [int(part) for part in raw.split('.')]
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise ValidationError("Cursor inválido")
+    if len(parts) != 4 or any(part < 0 for part in parts):
+        raise ValidationError("Cursor inválido")
+    return (parts[0], parts[1]), (parts[2], parts[3])
+
+
+class EmployeeSyncService:
+    """
+    Servicio de sincronización incremental del padrón para kioscos.
+    
+    Devuelve los empleados creados o modificados (incluidas altas y bajas de
+    status) desde el cursor, según (updated_at, id), y los eliminados según
+    EmployeeTombstone. Solo se consideran cambios con más de `lag_seconds`
+    de antigüedad: updated_at se asigna al guardar y no al confirmar, así que
+    una transacción lenta podría hacer visible un cambio con marca anterior
+    a la de un cursor ya entregado.
+    """
+    
+    def __init__(self, repository: EmployeeRepository = None, lag_seconds: float = 2.0):
+        self.repository = repository or EmployeeRepository()
+        self.lag = timedelta(seconds=lag_seconds)
+    
+    def execute(self, cursor: Optional[str] = None, limit: int = 500) -> Dict[str, any]:
+        """
+        Obtener los cambios del padrón desde un cursor.
+        
+        Args:
+            cursor: Cursor de la respuesta anterior; sin cursor se devuelve
+                el padrón completo (sincronización inicial)
+            limit: Máximo de empleados y de bajas por respuesta
+        
+        Returns:
+            Dict con cursor (para el siguiente pedido), more (hay más
+            cambios pendientes), upserts (filas en el orden de SYNC_FIELDS),
+            deletes (IDs eliminados) y, en la sincronización inicial, fields
+        
+        Raises:
+            ValidationError: Si el cursor está malformado
+        """
+        until = timezone.now() - self.lag
+        initial = not cursor
+        if initial:
+            employee_mark = tombstone_mark = (0, 0)
+        else:
+            employee_mark, tombstone_mark = decode_cursor(cursor)
+        
+        employees = self.repository.get_changed_since(
+            _from_micros(employee_mark[0]), employee_mark[1], until, limit + 1
+        )
+        more = len(employees) > limit
+        employees = employees[:limit]
+        if employees:
+            employee_mark = (_to_micros(employees[-1].updated_at), employees[-1].id)
+        
+        tombstones = []
+        if initial:
+            # El padrón completo ya excluye a los eliminados: empezar desde la última baja
+            last = self.repository.get_last_tombstone(until)
+            if last is not None:
+                tombstone_mark = (_to_micros(last.deleted_at), last.id)
+        else:
+            tombstones = self.repository.get_tombstones_since(
+                _from_micros(tombstone_mark[0]), tombstone_mark[1], until, limit + 1
+            )
+            more = more or len(tombstones) > limit
+            tombstones = tombstones[:limit]
+            if tombstones:
+                tombstone_mark = (_to_micros(tombstones[-1].deleted_at), tombstones[-1].id)
+        
+        result = {
+            'cursor': encode_cursor(employee_mark, tombstone_mark),
+            'more': more,
+            'upserts': [
+                [
+                    employee.id,
+                    employee.employee_code,
+                    employee.full_name,
+                    1 if employee.status == 'active' else 0,
+                    employee.photo_ref.url if employee.photo_ref else None,
+                ]
+                for employee in employees
+            ],
+            'deletes': [tombstone.employee_id for tombstone in tombstones],
+        }
+        if initial:
+            result['fields'] = SYNC_FIELDS
+        return result
@@ -0,0 +1,271 @@
+"""
+Shadow evaluation of a candidate face verification provider.
+
+After a check-in is committed, the capture and reference are handed to a
+bounded in-memory queue. A background thread runs the candidate provider
+on them and stores its answer next to the primary one in
+``ShadowComparison``. The request never waits for the candidate: if the
+queue is full the job is dropped.
+"""
+import logging
+import math
+import queue
+import random
+import statistics
+import threading
+import time
+from collections import defaultdict
+from typing import Dict, Iterable
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.db import close_old_connections, transaction
+from django.dispatch import receiver
+from attendance.metrics import SHADOW_JOBS
+from attendance.repositories import ShadowComparisonRepository
+
+logger = logging.getLogger(__name__)
+
+
+class ShadowEvaluator:
+    """Cola acotada y workers que evalúan un proveedor candidato en segundo plano."""
+    
+    def __init__(self, provider, queue_size: int = 100, workers: int = 1, repository=None):
+        """
+        Inicializar ShadowEvaluator.
+        
+        Args:
+            provider: Proveedor candidato
+            queue_size: Máximo de trabajos pendientes
+            workers: Hilos que consumen la cola
+            repository: Repositorio de comparaciones
+        """
+        self.provider = provider
+        self.repository = repository or ShadowComparisonRepository()
+        self.queue = queue.Queue(maxsize=queue_size)
+        self._workers = workers
+        self._threads = []
+        self._start_lock = threading.Lock()
+    
+    def submit(self, event, reference_image_bytes: bytes, capture_image_bytes: bytes, employee_code: str) -> bool:
+        """
+        Encolar la evaluación en sombra de un evento sin bloquear.
+        
+        Returns:
+            True si se encoló, False si la cola estaba llena
+        """
+        self._ensure_started()
+        job = (
+            event.id, event.provider_name, event.score, event.decision, event.threshold_used,
+            reference_image_bytes, capture_image_bytes, employee_code
+        )
+        try:
+            self.queue.put_nowait(job)
+        except queue.Full:
+            SHADOW_JOBS.labels(outcome='dropped').inc()
+            return False
+        SHADOW_JOBS.labels(outcome='enqueued').inc()
+        return True
+    
+    def _ensure_started(self) -> None:
+        if self._threads:
+            return
+        with self._start_lock:
+            if self._threads:
+                return
+            for index in range(self._workers):
+                thread = threading.Thread(target=self._run, name=f'shadow-evaluator-{index}', daemon=True)
+                thread.start()
+                self._threads.append(thread)
+    
+    def _run(self) -> None:
+        while True:
+            job = self.queue.get()
+            try:
+                close_old_connections()
+                self.evaluate(*job)
+            except Exception as e:
+                SHADOW_JOBS.labels(outcome='error').inc()
+                logger.error("Error en evaluación en sombra: %s", e)
+            finally:
+                close_old_connections()
+                self.queue.task_done()
+    
+    def evaluate(
+        self,
+        event_id: int,
+        primary_provider: str,
+        primary_score: float,
+        primary_decision: bool,
+        threshold: float,
+        reference_image_bytes: bytes,
+        capture_image_bytes: bytes,
+        employee_code: str
+    ):
+        """Ejecutar el proveedor candidato y guardar la comparación."""
+        shadow_score = None
+        shadow_error = ''
+        start = time.perf_counter()
+        try:
+            result = self.provider.verify(
+                reference_image_bytes=reference_image_bytes,
+                capture_image_bytes=capture_image_bytes,
+                employee_code=employee_code
+            )
+            shadow_score = result['score']
+        except Exception as e:
+            shadow_error = str(e)[:1000]
+        latency_ms = (time.perf_counter() - start) * 1000
+        
+        comparison = self.repository.create(
+            attendance_event_id=event_id,
+            primary_provider=primary_provider,
+            primary_score=primary_score,
+            primary_decision=primary_decision,
+            shadow_provider=self.provider.name,
+            shadow_score=shadow_score,
+            shadow_decision=None if shadow_score is None else shadow_score >= threshold,
+            shadow_error=shadow_error,
+            shadow_latency_ms=latency_ms
+        )
+        SHADOW_JOBS.labels(outcome='failed' if shadow_error else 'completed').inc()
+        return comparison
+
+
+_evaluator = None
+_evaluator_lock = threading.Lock()
+
+
+def get_shadow_evaluator():
+    """
+    Obtener el evaluador en sombra del proceso.
+    
+    Returns:
+        ShadowEvaluator, o None si FACE_VERIFICATION_SHADOW_PROVIDER está vacío
+    """
+    global _evaluator
+    provider_name = getattr(settings, 'FACE_VERIFICATION_SHADOW_PROVIDER', '')
+    if not provider_name:
+        return None
+    if _evaluator is None:
+        with _evaluator_lock:
+            if _evaluator is None:
+                from attendance.providers.factory import build_provider
+                
+                _evaluator = ShadowEvaluator(
+                    build_provider(provider_name),
+                    queue_size=getattr(settings, 'SHADOW_QUEUE_SIZE', 100),
+                    workers=getattr(settings, 'SHADOW_WORKERS', 1)
+                )
+    return _evaluator
+
+
+def submit_shadow_evaluation(
+    evaluator,
+    event,
+    reference_image_bytes: bytes,
+    capture_image_bytes: bytes,
+    employee_code: str
+) -> None:
+    """
+    Programar la evaluación en sombra para cuando la transacción confirme.
+    
+    Solo una fracción SHADOW_SAMPLE_RATE de los check-ins se evalúa.
+    """
+    if evaluator is None or random.random() >= getattr(settings, 'SHADOW_SAMPLE_RATE', 1.0):
+        return
+    transaction.on_commit(
+        lambda: evaluator.submit(event, reference_image_bytes, capture_image_bytes, employee_code)
+    )
+
+
+def _distribution(scores) -> Dict[str, float]:
+    ordered = sorted(scores)
+    if not ordered:
+        return {'n': 0}
+    deciles = statistics.quantiles(ordered, n=10, method='inclusive') if len(ordered) > 1 else [ordered[0]] * 9
+    histogram = [0] * 10
+    for score in ordered:
+        histogram[min(int(score * 10), 9)] += 1
+    return {
+        'n': len(ordered),
+        'mean': round(statistics.fmean(ordered), 4),
+        'p10': round(deciles[0], 4),
+        'p50': round(deciles[4], 4),
+        'p90': round(deciles[8], 4),
+        'histogram': histogram,
+    }
+
+
+def _latency(latencies_ms) -> Dict[str, float]:
+    """Percentiles (rango más cercano) de las latencias del proveedor en sombra, en ms."""
+    ordered = sorted(latencies_ms)
+    n = len(ordered)
+    if not n:
+        return {'n': 0}
+    
+    def percentile(p: float) -> float:
+        return ordered[max(0, min(n - 1, math.ceil(p / 100.0 * n) - 1))]
+    
+    return {
+        'n': n,
+        'p50_ms': percentile(50),
+        'p95_ms': percentile(95),
+        'p99_ms': percentile(99),
+        'mean_ms': statistics.fmean(ordered),
+        'max_ms': ordered[-1],
+    }
+
+
+def build_shadow_report(comparisons: Iterable) -> Dict[str, dict]:
+    """
+    Comparar las distribuciones de score del proveedor principal y del candidato.
+    
+    Args:
+        comparisons: ShadowComparison a incluir
+    
+    Returns:
+        Dict por proveedor en sombra con conteos, matriz de acuerdo
+        (principal/sombra), distribución de scores de ambos (media, p10, p50,
+        p90 e histograma en 10 tramos de 0.1), diferencia media absoluta,
+        correlación y latencia del candidato
+    """
+    grouped = defaultdict(list)
+    for comparison in comparisons:
+        grouped[comparison.shadow_provider].append(comparison)
+    
+    report = {}
+    for shadow_provider, rows in grouped.items():
+        answered = [row for row in rows if row.shadow_score is not None]
+        confusion = {'accept/accept': 0, 'accept/reject': 0, 'reject/accept': 0, 'reject/reject': 0}
+        for row in answered:
+            key = f"{'accept' if row.primary_decision else 'reject'}/{'accept' if row.shadow_decision else 'reject'}"
+            confusion[key] += 1
+        primary_scores = [row.primary_score for row in answered]
+        shadow_scores = [row.shadow_score for row in answered]
+        agreement = confusion['accept/accept'] + confusion['reject/reject']
+        correlation = None
+        if len(answered) > 1 and len(set(primary_scores)) > 1 and len(set(shadow_scores)) > 1:
+            correlation = round(statistics.correlation(primary_scores, shadow_scores), 4)
+        report[shadow_provider] = {
+            'comparisons': len(rows),
+            'errors': len(rows) - len(answered),
+            'agreement_rate': round(agreement / len(answered), 4) if answered else None,
+            'decisions': confusion,
+            'primary_providers': sorted({row.primary_provider for row in rows}),
+            'primary_scores': _distribution(primary_scores),
+            'shadow_scores': _distribution(shadow_scores),
+            'mean_abs_diff': round(
+                statistics.fmean(abs(a - b) for a, b in zip(primary_scores, shadow_scores)), 4
+            ) if answered else None,
+            'correlation': correlation,
+            'shadow_latency': _latency([row.shadow_latency_ms for row in rows]),
+        }
+    return report
+
+
+@receiver(setting_changed)
+def _reset_on_setting_changed(setting, **kwargs):
+    global _evaluator
+    if setting in ('FACE_VERIFICATION_SHADOW_PROVIDER', 'SHADOW_QUEUE_SIZE', 'SHADOW_WORKERS'):
+        # Los hilos del evaluador anterior quedan bloqueados en su cola vacía
+        _evaluator = None
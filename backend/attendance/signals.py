@@ -0,0 +1,76 @@
+"""
+Signal handlers for the attendance app.
+"""
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from attendance.cache import bump_roster_version
+from attendance.events import publish_attendance_event
+from attendance.invalidation import notify_employee_changed
+from attendance.models import AttendanceEvent, Employee, EmployeeReference, EmployeeTombstone
+from attendance.presence import get_presence_board, record_presence
+
+
+@receiver(post_save, sender=Employee)
+@receiver(post_delete, sender=Employee)
+def invalidate_roster(sender, **kwargs):
+    """
+    Incrementar la versión del padrón cuando cambia un empleado.
+    
+    Se incrementa de inmediato y otra vez al confirmar la transacción: un
+    request concurrente que lea la versión intermedia antes del commit
+    puede cachear datos viejos bajo ella, y el segundo incremento la
+    descarta.
+    """
+    bump_roster_version()
+    transaction.on_commit(bump_roster_version)
+
+
+@receiver(post_save, sender=Employee)
+@receiver(post_delete, sender=Employee)
+def notify_employee_change(sender, instance, **kwargs):
+    """Avisar a los workers que descarten el empleado de sus cachés en memoria."""
+    notify_employee_changed(instance.id)
+
+
+@receiver(post_save, sender=EmployeeReference)
+@receiver(post_delete, sender=EmployeeReference)
+def notify_reference_change(sender, instance, **kwargs):
+    """Avisar a los workers que descarten el empleado al cambiar una referencia."""
+    notify_employee_changed(instance.employee_id)
+
+
+def _record_removal(employee: Employee) -> None:
+    EmployeeTombstone.objects.create(employee_id=employee.id, employee_code=employee.employee_code)
+    # Valores leídos ahora: tras delete() la instancia ya no tiene pk
+    employee_id, employee_code = employee.id, employee.employee_code
+    transaction.on_commit(lambda: get_presence_board().forget(employee_code, employee_id))
+
+
+@receiver(post_save, sender=Employee)
+def record_soft_delete(sender, instance, update_fields=None, **kwargs):
+    """Registrar la baja lógica para los kioscos y quitar al empleado del tablero."""
+    if instance.deleted_at is not None and update_fields and 'deleted_at' in update_fields:
+        _record_removal(instance)
+
+
+@receiver(post_delete, sender=Employee)
+def record_tombstone(sender, instance, **kwargs):
+    """Registrar la baja para que los kioscos la reciban en /api/employees/sync/."""
+    # La purga elimina empleados ya dados de baja: la baja ya quedó registrada
+    if instance.deleted_at is None:
+        _record_removal(instance)
+
+
+@receiver(post_save, sender=AttendanceEvent)
+def publish_event(sender, instance, created, **kwargs):
+    """Publicar el evento en el stream en vivo (se entrega al confirmar la transacción)."""
+    if created:
+        publish_attendance_event(instance)
+
+
+@receiver(post_save, sender=AttendanceEvent)
+def update_presence(sender, instance, created, **kwargs):
+    """Actualizar el tablero de presencia cuando confirma el check-in."""
+    if created:
+        transaction.on_commit(lambda: record_presence(instance))
@@ -0,0 +1,74 @@
+"""
+In-flight request coalescing (singleflight).
+
+Concurrent calls with the same key share a single execution: the first
+caller runs the function and the others wait for its result (or exception).
+"""
+import threading
+from typing import Any, Callable, Hashable, Tuple
+
+
+class _Call:
+    """Ejecución en curso de una clave."""
+    
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """Agrupa llamadas concurrentes con la misma clave dentro del proceso."""
+    
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+    
+    def do(self, key: Hashable, func: Callable[[], Any]) -> Tuple[Any, bool]:
+        """
+        Ejecutar func una sola vez por clave entre llamadas concurrentes.
+        
+        Args:
+            key: Clave de agrupación
+            func: Función sin argumentos a ejecutar
+        
+        Returns:
+            Tupla (resultado, compartido); compartido es True si el
+            resultado vino de la ejecución de otro llamador
+        
+        Raises:
+            La excepción de func, también en los llamadores que esperaban
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                call.waiters += 1
+                leader = False
+            else:
+                call = self._calls[key] = _Call()
+                leader = True
+        
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+        
+        try:
+            call.result = func()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            # Quitar la clave antes de liberar a los que esperan: un llamador
+            # posterior inicia una ejecución nueva
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result, False
+    
+    def in_flight(self) -> int:
+        """Número de claves en ejecución."""
+        with self._lock:
+            return len(self._calls)
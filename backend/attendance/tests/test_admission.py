@@ -0,0 +1,76 @@
+"""
+Tests for check-in admission control.
+"""
+import threading
+import unittest
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+from attendance.admission import ConcurrencyLimiter, TokenBucket, TokenBucketMap
+
+
+class TokenBucketTestCase(unittest.TestCase):
+    """Tests para TokenBucket y TokenBucketMap."""
+    
+    def test_burst_then_wait(self):
+        """Test que tras consumir la ráfaga se informa la espera."""
+        bucket = TokenBucket(rate=1.0, burst=2)
+        
+        self.assertEqual(bucket.try_acquire(), 0.0)
+        self.assertEqual(bucket.try_acquire(), 0.0)
+        wait = bucket.try_acquire()
+        
+        self.assertGreater(wait, 0.9)
+        self.assertLessEqual(wait, 1.0)
+    
+    def test_keys_are_independent_and_bounded(self):
+        """Test buckets independientes por kiosco con máximo de claves."""
+        buckets = TokenBucketMap(rate=1.0, burst=1, max_keys=2)
+        
+        self.assertEqual(buckets.try_acquire('k1'), 0.0)
+        self.assertGreater(buckets.try_acquire('k1'), 0.0)
+        self.assertEqual(buckets.try_acquire('k2'), 0.0)
+        buckets.try_acquire('k3')
+        
+        self.assertNotIn('k1', buckets._buckets)
+
+
+class ConcurrencyLimiterTestCase(unittest.TestCase):
+    """Tests para ConcurrencyLimiter."""
+    
+    def test_full_queue_rejects_immediately(self):
+        """Test que con la cola llena se rechaza sin esperar."""
+        limiter = ConcurrencyLimiter(max_concurrency=1, max_queue=0, max_wait=5.0)
+        
+        self.assertTrue(limiter.acquire())
+        self.assertFalse(limiter.acquire())
+    
+    def test_waiter_gets_released_slot(self):
+        """Test que un request en cola obtiene el lugar liberado."""
+        limiter = ConcurrencyLimiter(max_concurrency=1, max_queue=1, max_wait=5.0)
+        limiter.acquire()
+        threading.Timer(0.05, limiter.release).start()
+        
+        self.assertTrue(limiter.acquire())
+
+
+class CheckInAdmissionTestCase(TestCase):
+    """Tests de integración del control de admisión en /api/check-in/."""
+    
+    @override_settings(CHECKIN_KIOSK_RATE=0.001, CHECKIN_KIOSK_BURST=1)
+    def test_kiosk_rate_limit_returns_429(self):
+        """Test que un kiosco sobre su tasa recibe 429 con Retry-After."""
+        client = APIClient()
+        payload = {'employee_code': 'NOEXISTE', 'capture_image': 'data:image/jpeg;base64,AAAA'}
+        
+        first = client.post('/api/check-in/', payload, format='json', HTTP_X_KIOSK_ID='kiosco-1')
+        second = client.post('/api/check-in/', payload, format='json', HTTP_X_KIOSK_ID='kiosco-1')
+        other = client.post('/api/check-in/', payload, format='json', HTTP_X_KIOSK_ID='kiosco-2')
+        
+        self.assertNotEqual(first.status_code, 429)
+        self.assertEqual(second.status_code, 429)
+        self.assertIn('Retry-After', second)
+        self.assertNotEqual(other.status_code, 429)
+
+
+if __name__ == '__main__':
+    unittest.main()
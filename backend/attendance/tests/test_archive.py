@@ -0,0 +1,88 @@
+"""
+Tests for the columnar cold archive of attendance events.
+"""
+import os
+import tempfile
+from datetime import timedelta
+from io import StringIO
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from attendance.archive import ArchiveReader
+from attendance.benchmarks.fixtures import create_employees
+from attendance.models import AttendanceEvent, ShadowComparison
+from attendance.repositories import AttendanceRepository
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp())
+class ArchiveTestCase(TestCase):
+    """Tests para archive_attendance y ArchiveReader."""
+    
+    def setUp(self):
+        """Crear eventos antiguos y recientes."""
+        self.directory = tempfile.mkdtemp()
+        self.alice, self.bob = create_employees(2, prefix='ARC')
+        now = timezone.now()
+        self.old = []
+        for day in range(10):
+            for employee, provider in ((self.alice, 'dummy'), (self.bob, 'composite')):
+                event = AttendanceRepository.create(
+                    employee=employee, score=0.5 + day / 100, decision=day % 2 == 0,
+                    provider_name=provider, threshold_used=0.8, site='NORTE'
+                )
+                AttendanceEvent.objects.filter(id=event.id).update(timestamp=now - timedelta(days=400 + day))
+                self.old.append(event.id)
+        self.recent = AttendanceRepository.create(
+            employee=self.alice, score=0.9, decision=True, provider_name='dummy', threshold_used=0.8
+        )
+        ShadowComparison.objects.create(
+            attendance_event_id=self.old[0], primary_provider='dummy', primary_score=0.5,
+            primary_decision=False, shadow_provider='dummy', shadow_score=0.4,
+            shadow_decision=False, shadow_latency_ms=1.0
+        )
+    
+    def archive(self, **options):
+        call_command('archive_attendance', directory=self.directory, stdout=StringIO(), **options)
+    
+    def test_archive_moves_old_events_and_roundtrips(self):
+        """Test que los eventos antiguos pasan a archivos y se leen con los mismos valores."""
+        expected = {
+            row[0]: row for row in AttendanceRepository.get_archive_batch(timezone.now() - timedelta(days=365), None, 100)
+        }
+        
+        self.archive(rows_per_file=8, chunk_size=3)
+        
+        self.assertEqual(list(AttendanceEvent.objects.values_list('id', flat=True)), [self.recent.id])
+        self.assertFalse(ShadowComparison.objects.exists())
+        files = ArchiveReader(self.directory).files()
+        self.assertEqual([archive.rows for archive in files], [8, 8, 4])
+        self.assertEqual(sorted(files[0].header['columns']['provider_name']['dictionary']), ['composite', 'dummy'])
+        
+        archived = list(ArchiveReader(self.directory).query())
+        self.assertEqual(len(archived), 20)
+        for row in archived:
+            self.assertEqual(tuple(row.values()), expected[row['id']])
+    
+    def test_reader_filters_by_date_range_and_employee(self):
+        """Test que el lector responde por rango de fechas y por empleado."""
+        self.archive()
+        reader = ArchiveReader(self.directory)
+        now = timezone.now()
+        
+        in_range = list(reader.query(start=now - timedelta(days=405), end=now - timedelta(days=402)))
+        self.assertEqual(len(in_range), 6)
+        self.assertTrue(all(now - timedelta(days=405) <= row['timestamp'] < now - timedelta(days=402) for row in in_range))
+        
+        by_code = list(reader.query(employee_code=self.bob.employee_code))
+        by_id = list(reader.query(employee_id=self.bob.id))
+        self.assertEqual(len(by_code), 10)
+        self.assertEqual(by_code, by_id)
+        self.assertEqual({row['provider_name'] for row in by_code}, {'composite'})
+        self.assertEqual(list(reader.query(employee_code='NO-EXISTE')), [])
+    
+    def test_dry_run_keeps_rows(self):
+        """Test que --dry-run no escribe archivos ni elimina eventos."""
+        self.archive(dry_run=True)
+        
+        self.assertEqual(AttendanceEvent.objects.count(), 21)
+        self.assertFalse(os.listdir(self.directory))
@@ -0,0 +1,117 @@
+"""
+Tests for the benchmark suite.
+"""
+import unittest
+from django.test import TestCase
+from attendance.benchmarks.checkin_benchmark import (
+    STAGES,
+    compare_to_baseline,
+    run_checkin_benchmark,
+    summarize,
+)
+from attendance.benchmarks.fixtures import create_employees, make_capture_data
+from attendance.benchmarks.index_benchmark import QUERIES, SCHEMES, run_index_benchmark
+from attendance.models import AttendanceEvent
+from attendance.services import CheckInEmployeeService
+from attendance.services.prefilters import PrefilterCascade, SizeStage
+
+
+class SummarizeTestCase(unittest.TestCase):
+    """Tests para summarize."""
+    
+    def test_percentiles(self):
+        """Test percentiles por rango más cercano."""
+        samples = [i * 1_000_000 for i in range(1, 101)]
+        
+        stats = summarize(samples)
+        
+        self.assertEqual(stats['n'], 100)
+        self.assertEqual(stats['min_ms'], 1.0)
+        self.assertEqual(stats['p50_ms'], 50.0)
+        self.assertEqual(stats['p99_ms'], 99.0)
+        self.assertEqual(stats['max_ms'], 100.0)
+    
+    def test_empty(self):
+        """Test sin muestras."""
+        self.assertEqual(summarize([]), {'n': 0})
+
+
+class CompareToBaselineTestCase(unittest.TestCase):
+    """Tests para compare_to_baseline."""
+    
+    def test_detects_regression(self):
+        """Test regresión por encima de la tolerancia."""
+        baseline = {'stages': {'provider_verify': {'p50_ms': 1.0}}}
+        report = {'stages': {'provider_verify': {'p50_ms': 2.0}}}
+        
+        regressions = compare_to_baseline(report, baseline, tolerance=0.25)
+        
+        self.assertEqual(len(regressions), 1)
+        self.assertIn('provider_verify', regressions[0])
+    
+    def test_ignores_noise(self):
+        """Test que diferencias pequeñas en valor absoluto no fallan."""
+        baseline = {'stages': {'get_by_code': {'p50_ms': 0.01}}}
+        report = {'stages': {'get_by_code': {'p50_ms': 0.05}}}
+        
+        self.assertEqual(compare_to_baseline(report, baseline, min_delta_ms=0.1), [])
+
+
+class RunCheckInBenchmarkTestCase(TestCase):
+    """Tests para run_checkin_benchmark."""
+    
+    def test_all_stages_measured(self):
+        """Test que todas las etapas de execute tienen muestras."""
+        employees = create_employees(2, reference_size=(64, 64))
+        captures = [make_capture_data((64, 48), seed=1)]
+        service = CheckInEmployeeService(prefilters=PrefilterCascade([SizeStage(min_width=1, min_height=1)]))
+        
+        stages = run_checkin_benchmark(
+            [employee.employee_code for employee in employees],
+            captures,
+            iterations=3,
+            warmup=1,
+            service=service
+        )
+        
+        for stage in STAGES:
+            self.assertEqual(stages[stage]['n'], 3)
+        # Cada iteración es un check-in real, incluido el calentamiento
+        self.assertEqual(AttendanceEvent.objects.count(), 4)
+    
+    def test_skipped_stages_have_no_samples(self):
+        """Test que una etapa que execute no recorre no tiene muestras."""
+        employees = create_employees(1, reference_size=(64, 64))
+        service = CheckInEmployeeService(prefilters=PrefilterCascade([]))
+        
+        stages = run_checkin_benchmark(
+            [employees[0].employee_code],
+            [make_capture_data((64, 48), seed=1)],
+            iterations=2,
+            warmup=0,
+            service=service
+        )
+        
+        self.assertEqual(stages['prefilter']['n'], 0)
+        self.assertEqual(stages['provider_verify']['n'], 2)
+
+
+class RunIndexBenchmarkTestCase(TestCase):
+    """Tests para run_index_benchmark."""
+    
+    def test_both_schemes_measured(self):
+        """Test que ambos esquemas se siembran, se miden y se eliminan."""
+        results = run_index_benchmark(rows=2000, employees=20, days=60, inserts=5, repeat=2)
+        
+        for scheme in SCHEMES:
+            self.assertEqual(results[scheme]['insert']['latency']['n'], 5)
+            self.assertEqual(set(results[scheme]['queries']), set(QUERIES))
+            self.assertGreater(results[scheme]['index_bytes'], 0)
+        self.assertIn('ts_brin', results['after']['indexes'])
+        # La migración 0010 quitó el índice de capture_hash; se mide contra el esquema anterior
+        self.assertIn('hash', results['before']['indexes'])
+        self.assertNotIn('hash', results['after']['indexes'])
+
+
+if __name__ == '__main__':
+    unittest.main()
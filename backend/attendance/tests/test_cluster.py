@@ -0,0 +1,257 @@
+"""
+Tests for cluster mode: consistent hashing, check-in forwarding and the reference cache.
+"""
+import json
+import socket
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
+from django.test import SimpleTestCase, TestCase, override_settings
+from rest_framework.test import APIClient
+from attendance.benchmarks.fixtures import create_employees, make_capture_data
+from attendance.cluster import FORWARDED_HEADER, NODE_HEADER, HashRing, get_cluster
+from attendance.models import AttendanceEvent
+from attendance.reference_cache import ReferenceCache, get_reference_cache
+from attendance.services import CheckInEmployeeService
+from attendance.services.prefilters import PrefilterCascade
+
+
+class HashRingTestCase(SimpleTestCase):
+    """Tests para HashRing."""
+    
+    KEYS = [f"EMP{i:05d}" for i in range(3000)]
+    
+    def test_balanced(self):
+        """Test que los códigos se reparten de forma pareja entre los nodos."""
+        ring = HashRing(['a', 'b', 'c'])
+        counts = {'a': 0, 'b': 0, 'c': 0}
+        for key in self.KEYS:
+            counts[ring.owner(key)] += 1
+        
+        for count in counts.values():
+            self.assertGreater(count, 700)
+    
+    def test_adding_a_node_only_moves_keys_to_it(self):
+        """Test que al agregar un nodo solo cambian de dueño los códigos que pasan a él."""
+        before = HashRing(['a', 'b', 'c'])
+        after = HashRing(['a', 'b', 'c', 'd'])
+        
+        moved = [key for key in self.KEYS if before.owner(key) != after.owner(key)]
+        
+        self.assertTrue(moved)
+        self.assertTrue(all(after.owner(key) == 'd' for key in moved))
+        self.assertLess(len(moved), len(self.KEYS) / 2)
+
+
+class ReferenceCacheTestCase(SimpleTestCase):
+    """Tests para ReferenceCache."""
+    
+    def test_names_must_match(self):
+        """Test que un cambio de archivos no devuelve las imágenes viejas."""
+        cache = ReferenceCache(max_bytes=100)
+        cache.put(1, ('a.jpg',), [b'vieja'])
+        
+        self.assertEqual(cache.get(1, ('a.jpg',)), [b'vieja'])
+        self.assertIsNone(cache.get(1, ('b.jpg',)))
+    
+    def test_lru_bound(self):
+        """Test que se desaloja lo menos usado al superar max_bytes."""
+        cache = ReferenceCache(max_bytes=10)
+        cache.put(1, ('1',), [b'1234'])
+        cache.put(2, ('2',), [b'1234'])
+        cache.get(1, ('1',))
+        cache.put(3, ('3',), [b'1234'])
+        
+        self.assertIsNone(cache.get(2, ('2',)))
+        self.assertIsNotNone(cache.get(1, ('1',)))
+        self.assertEqual(cache.size, 8)
+
+
+class _OwnerNode(BaseHTTPRequestHandler):
+    """Nodo dueño falso: responde cada check-in con lo que recibió."""
+    
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+        payload = json.dumps({
+            'employee_code': body['employee_code'],
+            'forwarded_by': self.headers.get(FORWARDED_HEADER),
+            'kiosk': self.headers.get('X-Kiosk-Id'),
+        }).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header(NODE_HEADER, 'b')
+        self.end_headers()
+        self.wfile.write(payload)
+    
+    def log_message(self, *args):
+        pass
+
+
+class _FailingOwnerNode(BaseHTTPRequestHandler):
+    """Nodo dueño falso que recibe el check-in y luego tarda o responde 503 según el servidor."""
+    
+    def do_POST(self):
+        self.rfile.read(int(self.headers['Content-Length']))
+        self.server.received += 1
+        if self.server.delay:
+            time.sleep(self.server.delay)
+            return
+        self.send_response(503)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Retry-After', '2')
+        self.end_headers()
+        self.wfile.write(json.dumps({'error': 'Servicio sobrecargado'}).encode())
+    
+    def log_message(self, *args):
+        pass
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp(), CHECKIN_KIOSK_RATE=0.0, CHECKIN_GLOBAL_RATE=0.0)
+class CheckInForwardingTestCase(TestCase):
+    """Tests del reenvío de check-ins al nodo dueño."""
+    
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.server = ThreadingHTTPServer(('127.0.0.1', 0), _OwnerNode)
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+    
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+        super().tearDownClass()
+    
+    def setUp(self):
+        """Configurar test."""
+        self.client = APIClient()
+        self.employees = create_employees(10, prefix='CL')
+    
+    def _nodes(self, owner_url: str):
+        return {'a': 'http://127.0.0.1:1', 'b': owner_url}
+    
+    def _employee_of(self, node: str):
+        ring = HashRing(['a', 'b'])
+        return next(employee for employee in self.employees if ring.owner(employee.employee_code) == node)
+    
+    def _checkin(self, employee, **headers):
+        return self.client.post(
+            '/api/check-in/',
+            {'employee_code': employee.employee_code, 'capture_image': make_capture_data(seed=1)},
+            format='json',
+            **headers
+        )
+    
+    def test_forwards_to_owner(self):
+        """Test que un check-in de otro shard lo responde el nodo dueño."""
+        url = f'http://127.0.0.1:{self.server.server_address[1]}'
+        employee = self._employee_of('b')
+        
+        with self.settings(CLUSTER_NODES=self._nodes(url), CLUSTER_NODE_NAME='a'):
+            response = self._checkin(employee, HTTP_X_KIOSK_ID='K1')
+        
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data, {'employee_code': employee.employee_code, 'forwarded_by': 'a', 'kiosk': 'K1'})
+        self.assertEqual(response[NODE_HEADER], 'b')
+    
+    def test_own_shard_is_local(self):
+        """Test que un check-in del propio shard se procesa sin reenviar."""
+        employee = self._employee_of('a')
+        
+        with self.settings(CLUSTER_NODES=self._nodes('http://127.0.0.1:1'), CLUSTER_NODE_NAME='a'):
+            with mock.patch('attendance.cluster.Cluster.forward') as forward:
+                response = self._checkin(employee)
+        
+        forward.assert_not_called()
+        self.assertIn('decision', response.data)
+        self.assertEqual(response[NODE_HEADER], 'a')
+    
+    def test_forwarded_request_is_never_forwarded_again(self):
+        """Test que un check-in ya reenviado se procesa donde llega."""
+        employee = self._employee_of('b')
+        
+        with self.settings(CLUSTER_NODES=self._nodes('http://127.0.0.1:1'), CLUSTER_NODE_NAME='a'):
+            with mock.patch('attendance.cluster.Cluster.forward') as forward:
+                response = self._checkin(employee, HTTP_X_ATTENDANCE_FORWARDED_BY='c')
+        
+        forward.assert_not_called()
+        self.assertIn('decision', response.data)
+    
+    def test_unreachable_owner_falls_back_locally(self):
+        """Test que si el dueño no responde el check-in se procesa aquí y el nodo queda en pausa."""
+        employee = self._employee_of('b')
+        
+        with self.settings(CLUSTER_NODES=self._nodes(f'http://127.0.0.1:{_free_port()}'), CLUSTER_NODE_NAME='a'):
+            response = self._checkin(employee)
+            self.assertIn('decision', response.data)
+            
+            with mock.patch('attendance.cluster.urlrequest.urlopen') as urlopen:
+                response = self._checkin(employee)
+            urlopen.assert_not_called()
+            self.assertIn('decision', response.data)
+    
+    def _failing_owner(self, delay: float = 0.0) -> ThreadingHTTPServer:
+        server = ThreadingHTTPServer(('127.0.0.1', 0), _FailingOwnerNode)
+        server.daemon_threads = True
+        server.received = 0
+        server.delay = delay
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        return server
+    
+    def test_owner_timeout_is_not_processed_locally(self):
+        """Test que si el dueño recibe el check-in y no responde a tiempo se responde 504 sin registrarlo aquí."""
+        server = self._failing_owner(delay=1.0)
+        employee = self._employee_of('b')
+        nodes = self._nodes(f'http://127.0.0.1:{server.server_address[1]}')
+        
+        with self.settings(CLUSTER_NODES=nodes, CLUSTER_NODE_NAME='a', CLUSTER_FORWARD_TIMEOUT=0.2):
+            response = self._checkin(employee)
+            self.assertEqual(response.status_code, 504)
+            
+            # El nodo no queda en pausa: el reintento del kiosco vuelve al dueño
+            response = self._checkin(employee)
+            self.assertEqual(response.status_code, 504)
+        
+        self.assertEqual(server.received, 2)
+        self.assertFalse(AttendanceEvent.objects.filter(employee=employee).exists())
+    
+    def test_owner_overloaded_is_propagated(self):
+        """Test que un 503 del dueño llega al kiosco con su Retry-After y no pone al nodo en pausa."""
+        server = self._failing_owner()
+        employee = self._employee_of('b')
+        nodes = self._nodes(f'http://127.0.0.1:{server.server_address[1]}')
+        
+        with self.settings(CLUSTER_NODES=nodes, CLUSTER_NODE_NAME='a'):
+            for _ in range(2):
+                response = self._checkin(employee)
+                self.assertEqual(response.status_code, 503)
+                self.assertEqual(response['Retry-After'], '2')
+        
+        self.assertEqual(server.received, 2)
+        self.assertFalse(AttendanceEvent.objects.filter(employee=employee).exists())
+    
+    def test_only_own_shard_is_cached(self):
+        """Test que cada nodo cachea solo las referencias de su shard."""
+        service = CheckInEmployeeService(provider=mock.Mock(**{
+            'verify.return_value': {'score': 0.9, 'match': True, 'provider': 'mock'}
+        }), prefilters=PrefilterCascade([]))
+        own, other = self._employee_of('a'), self._employee_of('b')
+        
+        with self.settings(CLUSTER_NODES=self._nodes('http://127.0.0.1:1'), CLUSTER_NODE_NAME='a'):
+            get_reference_cache().clear()
+            service._load_references(own)
+            service._load_references(other)
+            
+            self.assertIsNotNone(get_cluster())
+            self.assertEqual(len(get_reference_cache()), 1)
+            self.assertIsNotNone(get_reference_cache().get(own.id, (own.photo_ref.name,)))
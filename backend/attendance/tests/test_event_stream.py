@@ -0,0 +1,259 @@
+"""
+Tests for the live attendance event stream.
+"""
+import asyncio
+import json
+import select
+import threading
+import time
+import unittest
+from types import SimpleNamespace
+from unittest import mock
+from django.db import connection, transaction
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from attendance.benchmarks.fixtures import create_employees
+from attendance.events import CHANNEL, EventBroker, TooManySubscribers, get_event_broker
+from attendance.repositories import AttendanceRepository
+
+
+def payload(event_id, employee_code='EMP001', site=''):
+    return {
+        'id': event_id,
+        'employee_code': employee_code,
+        'employee_name': 'Empleado',
+        'site': site,
+        'timestamp': '2024-01-01T08:00:00Z',
+        'score': 0.9,
+        'decision': True,
+        'provider_name': 'dummy',
+    }
+
+
+def event(event_id, employee_code='EMP001', site=''):
+    """Objeto con los atributos que usa event_payload."""
+    data = payload(event_id, employee_code, site)
+    return SimpleNamespace(
+        employee=SimpleNamespace(employee_code=employee_code, full_name=data['employee_name']),
+        **{key: value for key, value in data.items() if key not in ('employee_code', 'employee_name')}
+    )
+
+
+def _connect():
+    import psycopg2
+    
+    conn = psycopg2.connect(**connection.get_connection_params())
+    conn.autocommit = True
+    return conn
+
+
+class EventBrokerTestCase(unittest.IsolatedAsyncioTestCase):
+    """Tests para EventBroker."""
+    
+    async def test_publish_from_other_thread_reaches_subscriber(self):
+        """Test que un evento publicado desde otro hilo llega como mensaje SSE."""
+        broker = EventBroker()
+        subscription = broker.subscribe()
+        
+        thread = threading.Thread(target=broker.publish, args=(payload(7),))
+        thread.start()
+        thread.join()
+        
+        event_id, message = await asyncio.wait_for(subscription.queue.get(), timeout=1)
+        self.assertEqual(event_id, 7)
+        self.assertTrue(message.startswith('id: 7\nevent: attendance\ndata: {'))
+        self.assertTrue(message.endswith('\n\n'))
+    
+    async def test_filters_by_employee_and_site(self):
+        """Test que los filtros de empleado y sede seleccionan los eventos entregados."""
+        broker = EventBroker()
+        by_site = broker.subscribe(sites=['NORTE'])
+        by_employee = broker.subscribe(employee_codes=['EMP002'])
+        
+        self.assertEqual(broker.publish(payload(1, 'EMP001', 'NORTE')), 1)
+        self.assertEqual(broker.publish(payload(2, 'EMP002', 'SUR')), 1)
+        self.assertEqual(broker.publish(payload(3, 'EMP003', 'SUR')), 0)
+        await asyncio.sleep(0)
+        
+        self.assertTrue(by_site.queue.get_nowait()[1].startswith('id: 1\n'))
+        self.assertTrue(by_employee.queue.get_nowait()[1].startswith('id: 2\n'))
+        self.assertTrue(by_site.queue.empty() and by_employee.queue.empty())
+    
+    async def test_slow_consumer_is_dropped(self):
+        """Test que un suscriptor con la cola llena se descarta en vez de acumular."""
+        broker = EventBroker(max_queue=2)
+        subscription = broker.subscribe()
+        
+        for event_id in range(5):
+            broker.publish(payload(event_id))
+        await asyncio.sleep(0)
+        
+        self.assertTrue(subscription.dropped)
+        self.assertIsNone(subscription.queue.get_nowait())
+        self.assertTrue(subscription.queue.empty())
+    
+    async def test_subscriber_limit(self):
+        """Test que se rechazan suscriptores por encima del máximo."""
+        broker = EventBroker(max_subscribers=1)
+        subscription = broker.subscribe()
+        
+        with self.assertRaises(TooManySubscribers):
+            broker.subscribe()
+        broker.unsubscribe(subscription)
+        broker.unsubscribe(subscription)
+        self.assertEqual(broker.subscriber_count, 0)
+    
+    async def test_close_all(self):
+        """Test que close_all descarta lo pendiente y cierra cada suscriptor."""
+        broker = EventBroker()
+        first = broker.subscribe()
+        second = broker.subscribe()
+        broker.publish(payload(1))
+        
+        broker.close_all()
+        await asyncio.sleep(0)
+        
+        for subscription in (first, second):
+            self.assertIsNone(subscription.queue.get_nowait())
+            self.assertTrue(subscription.queue.empty())
+
+
+@override_settings(EVENT_STREAM_ENABLED=True, EVENT_STREAM_HEARTBEAT_SECONDS=5, EVENT_STREAM_MAX_SECONDS=0.5)
+class EventStreamViewTestCase(SimpleTestCase):
+    """Tests para GET /api/attendance-events/stream/."""
+    
+    async def test_stream_delivers_published_events(self):
+        """Test que el stream entrega los eventos publicados y se cierra al vencer su duración máxima."""
+        response = await self.async_client.get('/api/attendance-events/stream/', {'site': 'NORTE'})
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        chunks = response.streaming_content
+        
+        self.assertEqual(await anext(chunks), b'retry: 3000\n\n')
+        broker = get_event_broker()
+        broker.publish(payload(1, site='SUR'))
+        broker.publish(payload(2, site='NORTE'))
+        self.assertTrue((await anext(chunks)).startswith(b'id: 2\n'))
+        
+        with self.assertRaises(StopAsyncIteration):
+            await anext(chunks)
+        self.assertEqual(broker.subscriber_count, 0)
+    
+    
+    async def test_replay_does_not_repeat_queued_events(self):
+        """Test que un evento confirmado durante la reproducción de Last-Event-ID se envía una vez."""
+        broker = get_event_broker()
+        
+        def get_after_id(last_id, employee_codes, sites, limit):
+            # Confirmado después de suscribirse: llega también por la cola
+            broker.publish(payload(5))
+            broker.publish(payload(6))
+            return [event(5)]
+        
+        with mock.patch('attendance.views.AttendanceRepository.get_after_id', side_effect=get_after_id):
+            response = await self.async_client.get('/api/attendance-events/stream/', headers={'Last-Event-ID': '4'})
+            chunks = response.streaming_content
+            self.assertEqual(await anext(chunks), b'retry: 3000\n\n')
+            self.assertTrue((await anext(chunks)).startswith(b'id: 5\n'))
+        self.assertTrue((await anext(chunks)).startswith(b'id: 6\n'))
+        
+        with self.assertRaises(StopAsyncIteration):
+            await anext(chunks)
+
+
+@override_settings(EVENT_STREAM_ENABLED=True, EVENT_STREAM_HEARTBEAT_SECONDS=5, EVENT_STREAM_MAX_SECONDS=2)
+class CrossProcessStreamTestCase(TransactionTestCase):
+    """Tests de la entrega de eventos de otros procesos por LISTEN/NOTIFY."""
+    
+    def setUp(self):
+        if connection.vendor != 'postgresql':
+            self.skipTest('LISTEN/NOTIFY requiere PostgreSQL')
+        self.employee = create_employees(1, prefix='CRS')[0]
+    
+    async def test_stream_delivers_events_from_other_processes(self):
+        """Test que el stream entrega un evento notificado por otro proceso."""
+        response = await self.async_client.get('/api/attendance-events/stream/', {'site': 'NORTE'})
+        chunks = response.streaming_content
+        self.assertEqual(await anext(chunks), b'retry: 3000\n\n')
+        
+        notifier = _connect()
+        try:
+            with notifier.cursor() as cursor:
+                cursor.execute('SELECT pg_notify(%s, %s)', [CHANNEL, json.dumps(payload(41, site='SUR'))])
+                cursor.execute('SELECT pg_notify(%s, %s)', [CHANNEL, 'basura'])
+                cursor.execute('SELECT pg_notify(%s, %s)', [CHANNEL, json.dumps(payload(42, site='NORTE'))])
+        finally:
+            notifier.close()
+        
+        self.assertTrue((await anext(chunks)).startswith(b'id: 42\nevent: attendance\n'))
+    
+    def _received(self, listener, timeout: float) -> list:
+        payloads = []
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if select.select([listener], [], [], 0.05) != ([], [], []):
+                listener.poll()
+                payloads.extend(json.loads(n.payload) for n in listener.notifies)
+                listener.notifies.clear()
+        return payloads
+    
+    def test_checkin_notified_on_commit(self):
+        """Test que el check-in se notifica al confirmar y no si se revierte."""
+        listener = _connect()
+        self.addCleanup(listener.close)
+        with listener.cursor() as cursor:
+            cursor.execute(f'LISTEN {CHANNEL}')
+        
+        with self.assertRaises(RuntimeError):
+            with transaction.atomic():
+                AttendanceRepository.create(
+                    employee=self.employee, score=0.9, decision=True,
+                    provider_name='dummy', threshold_used=0.8, site='NORTE'
+                )
+                raise RuntimeError()
+        with transaction.atomic():
+            created = AttendanceRepository.create(
+                employee=self.employee, score=0.9, decision=True,
+                provider_name='dummy', threshold_used=0.8, site='NORTE'
+            )
+            self.assertEqual(self._received(listener, 0.2), [])
+        
+        received = self._received(listener, 0.5)
+        self.assertEqual([item['id'] for item in received], [created.id])
+        self.assertEqual(received[0]['employee_code'], 'CRS000000')
+        self.assertEqual(received[0]['site'], 'NORTE')
+    
+    def test_disabled_stream_does_not_notify(self):
+        """Test que sin EVENT_STREAM_ENABLED el check-in no hace NOTIFY y el stream responde 404."""
+        listener = _connect()
+        self.addCleanup(listener.close)
+        with listener.cursor() as cursor:
+            cursor.execute(f'LISTEN {CHANNEL}')
+        
+        with self.settings(EVENT_STREAM_ENABLED=False):
+            AttendanceRepository.create(
+                employee=self.employee, score=0.9, decision=True,
+                provider_name='dummy', threshold_used=0.8, site='NORTE'
+            )
+            response = self.client.get('/api/attendance-events/stream/')
+        
+        self.assertEqual(self._received(listener, 0.3), [])
+        self.assertEqual(response.status_code, 404)
+
+
+@override_settings(EVENT_STREAM_ENABLED=True)
+class PublishOnCommitTestCase(TestCase):
+    """Tests para la publicación local de eventos sin PostgreSQL."""
+    
+    @mock.patch('attendance.events.publish_local')
+    def test_event_published_after_commit(self, publish):
+        """Test que sin canal el evento se publica en el proceso recién al confirmar el check-in."""
+        employee = create_employees(1, prefix='EVT')[0]
+        
+        with mock.patch.object(connection, 'vendor', 'sqlite'):
+            with self.captureOnCommitCallbacks(execute=True):
+                event = AttendanceRepository.create(
+                    employee=employee, score=0.9, decision=True,
+                    provider_name='dummy', threshold_used=0.8, site='NORTE'
+                )
+                publish.assert_not_called()
+        
+        publish.assert_called_once_with(event)
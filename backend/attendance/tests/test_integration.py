@@ -246,3 +246,70 @@ class CheckInAPITestCase(TestCase):
         event = AttendanceEvent.objects.filter(employee=self.employee).first()
         self.assertIsNotNone(event)
         # No hay campo para foto de captura en el modelo (correcto)
+
+
+class AttendanceEventAPITestCase(TestCase):
+    """Tests de integración para API de eventos de asistencia."""
+    
+    def setUp(self):
+        """Configurar test."""
+        self.client = APIClient()
+        
+        photo = SimpleUploadedFile(
+            "test.jpg",
+            b"fake reference image",
+            content_type="image/jpeg"
+        )
+        
+        self.employee = Employee.objects.create(
+            employee_code='EMP001',
+            full_name='Juan Pérez',
+            status='active',
+            photo_ref=photo
+        )
+        
+        AttendanceEvent.objects.create(
+            employee=self.employee,
+            score=0.9,
+            decision=True,
+            provider_name='dummy',
+            threshold_used=0.8
+        )
+    
+    def test_list_events_by_employee(self):
+        """Test listar eventos filtrados por código de empleado."""
+        response = self.client.get('/api/attendance-events/?employee_code=EMP001')
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['count'], 1)
+        self.assertEqual(response.data['results'][0]['employee_code'], 'EMP001')
+    
+    def test_list_rejected_events(self):
+        """Test listar solo intentos rechazados, del más reciente al más antiguo."""
+        rejected = [
+            AttendanceEvent.objects.create(
+                employee=self.employee, score=score, decision=False,
+                provider_name='dummy', threshold_used=0.8
+            )
+            for score in (0.1, 0.2)
+        ]
+        
+        response = self.client.get('/api/attendance-events/?decision=false')
+        
+        self.assertEqual(response.data['count'], 2)
+        self.assertEqual([event['id'] for event in response.data['results']], [rejected[1].id, rejected[0].id])
+        self.assertEqual(response.data['results'][0]['created_at'], response.data['results'][0]['timestamp'])
+    
+    def test_daily_counts(self):
+        """Test resumen diario de aceptados y rechazados."""
+        AttendanceEvent.objects.create(
+            employee=self.employee, score=0.1, decision=False,
+            provider_name='dummy', threshold_used=0.8
+        )
+        
+        response = self.client.get('/api/attendance-events/daily/?employee_code=EMP001')
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['results']), 1)
+        self.assertEqual(response.data['results'][0]['accepted'], 1)
+        self.assertEqual(response.data['results'][0]['rejected'], 1)
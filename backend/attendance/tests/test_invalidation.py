@@ -0,0 +1,203 @@
+"""
+Tests for cross-worker cache invalidation: the employee cache and the LISTEN/NOTIFY listener.
+"""
+import json
+import select
+import tempfile
+import time
+from unittest import mock
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from attendance.benchmarks.fixtures import create_employees
+from attendance.invalidation import CHANNEL, EmployeeCache, get_employee_cache, get_invalidation_listener
+from attendance.models import Employee, EmployeeReference
+from attendance.reference_cache import get_reference_cache
+from attendance.services import CheckInEmployeeService, UpdateEmployeeService
+from attendance.services.prefilters import PrefilterCascade
+
+
+def _employee(employee_id: int, code: str) -> Employee:
+    return Employee(id=employee_id, employee_code=code, full_name=code, photo_ref=f'photos/{code}.jpg')
+
+
+def _connect():
+    import psycopg2
+    
+    conn = psycopg2.connect(**connection.get_connection_params())
+    conn.autocommit = True
+    return conn
+
+
+def _wait(condition, timeout: float = 5.0) -> bool:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.005)
+    return condition()
+
+
+class EmployeeCacheTestCase(SimpleTestCase):
+    """Tests para EmployeeCache."""
+    
+    def test_returns_fresh_instances(self):
+        """Test que cada lectura devuelve instancias nuevas con los mismos datos."""
+        cache = EmployeeCache()
+        reference = EmployeeReference(id=7, employee_id=1, image='photos/references/r.jpg', label='lentes')
+        cache.put(_employee(1, 'E1'), [reference], cache.generation)
+        
+        first, references = cache.get('E1')
+        second, _ = cache.get('E1')
+        
+        self.assertIsNot(first, second)
+        self.assertEqual(first.id, 1)
+        self.assertEqual(first.photo_ref.name, 'photos/E1.jpg')
+        self.assertEqual([(r.id, r.label, r.image.name) for r in references], [(7, 'lentes', 'photos/references/r.jpg')])
+        self.assertIsNone(cache.get('E2'))
+    
+    def test_evicts_by_id(self):
+        """Test que evict descarta el empleado por su ID."""
+        cache = EmployeeCache()
+        cache.put(_employee(1, 'E1'), [], cache.generation)
+        cache.put(_employee(2, 'E2'), [], cache.generation)
+        
+        cache.evict(1)
+        
+        self.assertIsNone(cache.get('E1'))
+        self.assertIsNotNone(cache.get('E2'))
+    
+    def test_lru_bound(self):
+        """Test que se desaloja el empleado menos usado al superar max_entries."""
+        cache = EmployeeCache(max_entries=2)
+        cache.put(_employee(1, 'E1'), [], cache.generation)
+        cache.put(_employee(2, 'E2'), [], cache.generation)
+        cache.get('E1')
+        cache.put(_employee(3, 'E3'), [], cache.generation)
+        
+        self.assertEqual(len(cache), 2)
+        self.assertIsNone(cache.get('E2'))
+        self.assertIsNotNone(cache.get('E1'))
+    
+    def test_stale_put_is_rejected(self):
+        """Test que no se guardan datos leídos antes de un desalojo."""
+        cache = EmployeeCache()
+        generation = cache.generation
+        cache.evict(1)
+        
+        self.assertFalse(cache.put(_employee(1, 'E1'), [], generation))
+        self.assertIsNone(cache.get('E1'))
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp())
+class InvalidationListenerTestCase(TestCase):
+    """Tests para el listener de invalidación."""
+    
+    def setUp(self):
+        # Al restaurar el setting se detiene el listener (antes de cerrar la base de test)
+        enabled = self.settings(EMPLOYEE_CACHE_ENABLED=True)
+        enabled.enable()
+        self.addCleanup(enabled.disable)
+        self.listener = get_invalidation_listener()
+        self.assertTrue(self.listener.wait_live(5))
+        self.cache = get_employee_cache()
+        self.employee = create_employees(1, prefix='INV')[0]
+        self.cache.put(self.employee, [], self.cache.generation)
+        self.notifier = _connect()
+        self.addCleanup(self.notifier.close)
+    
+    def test_notification_evicts(self):
+        """Test que un NOTIFY de otro proceso desaloja el empleado en milisegundos."""
+        get_reference_cache().put(self.employee.id, ('a.jpg',), [b'x'])
+        other = create_employees(1, prefix='KEEP')[0]
+        self.cache.put(other, [], self.cache.generation)
+        
+        start = time.monotonic()
+        with self.notifier.cursor() as cursor:
+            cursor.execute('SELECT pg_notify(%s, %s)', [CHANNEL, json.dumps({'employee_id': self.employee.id})])
+        
+        self.assertTrue(_wait(lambda: self.cache.get('INV000000') is None))
+        self.assertLess(time.monotonic() - start, 1.0)
+        self.assertIsNone(get_reference_cache().get(self.employee.id, ('a.jpg',)))
+        self.assertIsNotNone(self.cache.get('KEEP000000'))
+    
+    def test_invalid_payload_is_ignored(self):
+        """Test que una notificación mal formada no detiene el listener."""
+        with self.notifier.cursor() as cursor:
+            cursor.execute('SELECT pg_notify(%s, %s)', [CHANNEL, 'basura'])
+            cursor.execute('SELECT pg_notify(%s, %s)', [CHANNEL, json.dumps({'employee_id': self.employee.id})])
+        
+        self.assertTrue(_wait(lambda: self.cache.get('INV000000') is None))
+        self.assertTrue(self.listener.live)
+    
+    def test_flush_on_reconnect(self):
+        """Test que tras perder la conexión el caché no se usa y al reconectar se vacía."""
+        with self.notifier.cursor() as cursor:
+            cursor.execute('SELECT pg_terminate_backend(%s)', [self.listener._connection.get_backend_pid()])
+        
+        self.assertTrue(_wait(lambda: not self.listener.live))
+        self.assertTrue(self.listener.wait_live(5))
+        self.assertEqual(len(self.cache), 0)
+    
+    def test_checkin_uses_cache(self):
+        """Test que el check-in no consulta la base para un empleado cacheado."""
+        service = CheckInEmployeeService(provider=mock.Mock(), prefilters=PrefilterCascade([]))
+        service.employee_repo = mock.Mock()
+        
+        employee, references = service._get_employee('INV000000')
+        
+        self.assertEqual(employee.id, self.employee.id)
+        self.assertEqual(references, [])
+        service.employee_repo.get_by_code.assert_not_called()
+    
+    def test_disabled_without_setting(self):
+        """Test que sin EMPLOYEE_CACHE_ENABLED no hay caché ni listener."""
+        with self.settings(EMPLOYEE_CACHE_ENABLED=False):
+            self.assertIsNone(get_employee_cache())
+            self.assertIsNone(get_invalidation_listener())
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp())
+class EmployeeChangeNotificationTestCase(TransactionTestCase):
+    """Tests de las notificaciones enviadas al escribir empleados."""
+    
+    def setUp(self):
+        self.employee = create_employees(1, prefix='NTF')[0]
+        self.listener = _connect()
+        self.addCleanup(self.listener.close)
+        with self.listener.cursor() as cursor:
+            cursor.execute(f'LISTEN {CHANNEL}')
+    
+    def _received(self, timeout: float = 2.0) -> list:
+        payloads = []
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if select.select([self.listener], [], [], 0.05) != ([], [], []):
+                self.listener.poll()
+                while self.listener.notifies:
+                    payloads.append(json.loads(self.listener.notifies.pop(0).payload))
+            if payloads:
+                # Margen para notificaciones del mismo commit
+                time.sleep(0.05)
+                self.listener.poll()
+                payloads.extend(json.loads(n.payload) for n in self.listener.notifies)
+                self.listener.notifies.clear()
+                return payloads
+        return payloads
+    
+    def test_update_notifies_on_commit(self):
+        """Test que UpdateEmployeeService avisa a los workers al confirmar."""
+        UpdateEmployeeService().execute(self.employee.id, full_name='Nuevo Nombre')
+        
+        self.assertIn({'employee_id': self.employee.id}, self._received())
+    
+    def test_rollback_does_not_notify(self):
+        """Test que una escritura revertida no envía notificación."""
+        from django.db import transaction
+        
+        self._received(0.2)
+        with self.assertRaises(RuntimeError):
+            with transaction.atomic():
+                Employee.objects.filter(id=self.employee.id).get().save()
+                raise RuntimeError()
+        
+        self.assertEqual(self._received(0.3), [])
@@ -0,0 +1,98 @@
+"""
+Tests for the non-blocking logging handlers.
+"""
+import logging
+import queue
+import sys
+import unittest
+from unittest import mock
+from core.log_queue import ListenerQueueHandler, NonBlockingQueueHandler, queue_handler
+
+
+class NonBlockingQueueHandlerTestCase(unittest.TestCase):
+    """Tests para NonBlockingQueueHandler y queue_handler."""
+    
+    def _record(self, message):
+        return logging.LogRecord('attendance', logging.INFO, __file__, 1, message, None, None)
+    
+    def test_full_queue_drops_without_blocking(self):
+        """Test que con la cola llena el registro se descarta y se cuenta."""
+        handler = NonBlockingQueueHandler(queue.Queue(maxsize=1))
+        
+        handler.handle(self._record('uno'))
+        handler.handle(self._record('dos'))
+        
+        self.assertEqual(handler.queue.qsize(), 1)
+        self.assertEqual(handler.dropped, 1)
+    
+    def _target(self):
+        received = []
+        target = logging.Handler()
+        target.emit = received.append
+        return target, received
+    
+    def test_listener_forwards_to_targets(self):
+        """Test que el listener entrega los registros al handler destino, sin formatearlos antes."""
+        target, received = self._target()
+        
+        handler = ListenerQueueHandler([target], queue_size=10)
+        record = self._record('Check-in registrado: %s')
+        record.args = ('EMP001',)
+        handler.handle(record)
+        handler.stop_listener()
+        
+        self.assertEqual(len(received), 1)
+        self.assertEqual(received[0].msg, 'Check-in registrado: %s')
+        self.assertEqual(received[0].getMessage(), 'Check-in registrado: EMP001')
+    
+    def test_listener_starts_on_first_record(self):
+        """Test que el listener no se inicia al configurar sino con el primer registro."""
+        target, _ = self._target()
+        handler = ListenerQueueHandler([target], queue_size=10)
+        handler.setFormatter(logging.Formatter('%(levelname)s %(message)s'))
+        self.assertIsNone(handler.listener)
+        
+        handler.handle(self._record('uno'))
+        self.addCleanup(handler.stop_listener)
+        
+        self.assertIsNotNone(handler.listener)
+        self.assertIs(target.formatter, handler.formatter)
+    
+    def test_listener_restarts_after_fork(self):
+        """Test que un proceso hijo inicia su propio listener con una cola nueva."""
+        target, _ = self._target()
+        handler = ListenerQueueHandler([target], queue_size=10)
+        handler.handle(self._record('padre'))
+        parent_queue, parent_listener = handler.queue, handler.listener
+        
+        with mock.patch('core.log_queue.os.getpid', return_value=-1):
+            handler.handle(self._record('hijo'))
+            self.assertIsNot(handler.queue, parent_queue)
+            self.assertIsNot(handler.listener, parent_listener)
+            handler.stop_listener()
+        parent_listener.stop()
+    
+    def test_factory_builds_targets(self):
+        """Test que queue_handler crea los handlers destino a partir de sus clases."""
+        handler = queue_handler(['logging.NullHandler'], queue_size=5)
+        
+        self.assertEqual([type(target) for target in handler.targets], [logging.NullHandler])
+        self.assertEqual(handler.queue_size, 5)
+    
+    def test_exception_is_rendered_before_queueing(self):
+        """Test que el traceback se resuelve en el hilo que loguea."""
+        handler = NonBlockingQueueHandler(queue.Queue())
+        try:
+            raise RuntimeError('falla')
+        except RuntimeError:
+            record = logging.LogRecord('attendance', logging.ERROR, __file__, 1, 'error', None, sys.exc_info())
+        
+        handler.handle(record)
+        queued = handler.queue.get_nowait()
+        
+        self.assertIsNone(queued.exc_info)
+        self.assertIn('RuntimeError: falla', queued.exc_text)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,78 @@
+"""
+Tests for Prometheus metrics.
+"""
+import unittest
+from django.test import TestCase
+from prometheus_client import REGISTRY
+from rest_framework.test import APIClient
+from attendance.metrics import collect_stages, instrument_repository, stage_timer
+
+
+class InstrumentRepositoryTestCase(unittest.TestCase):
+    """Tests para instrument_repository."""
+    
+    def test_static_methods_are_timed(self):
+        """Test que los métodos estáticos públicos quedan medidos."""
+        @instrument_repository('fake')
+        class FakeRepository:
+            @staticmethod
+            def get(value):
+                return value * 2
+            
+            @staticmethod
+            def _private():
+                return 'private'
+        
+        self.assertEqual(FakeRepository.get(21), 42)
+        self.assertEqual(FakeRepository._private(), 'private')
+        
+        count = REGISTRY.get_sample_value(
+            'attendance_repository_call_seconds_count',
+            {'repository': 'fake', 'method': 'get'}
+        )
+        self.assertEqual(count, 1.0)
+        self.assertIsNone(REGISTRY.get_sample_value(
+            'attendance_repository_call_seconds_count',
+            {'repository': 'fake', 'method': '_private'}
+        ))
+
+
+class CollectStagesTestCase(unittest.TestCase):
+    """Tests para collect_stages."""
+    
+    def test_collects_stage_timer_observations(self):
+        """Test que las etapas medidas dentro del bloque quedan recolectadas y en el histograma."""
+        before = REGISTRY.get_sample_value('attendance_checkin_stage_seconds_count', {'stage': 'collect_test'}) or 0
+        
+        with collect_stages() as samples:
+            with stage_timer('collect_test'):
+                pass
+            with stage_timer('collect_test'):
+                pass
+        with stage_timer('collect_test'):
+            pass
+        
+        self.assertEqual(len(samples['collect_test']), 2)
+        self.assertEqual(
+            REGISTRY.get_sample_value('attendance_checkin_stage_seconds_count', {'stage': 'collect_test'}),
+            before + 3
+        )
+
+
+class MetricsEndpointTestCase(TestCase):
+    """Tests de integración para /metrics."""
+    
+    def test_metrics_exposed(self):
+        """Test que /metrics expone las métricas en formato Prometheus."""
+        client = APIClient()
+        client.get('/api/employees/')
+        
+        response = client.get('/metrics')
+        
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['Content-Type'].startswith('text/plain'))
+        self.assertIn(b'attendance_checkin_stage_seconds', response.content)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,83 @@
+"""
+Tests for the request profiling middleware.
+"""
+import os
+import pstats
+import tempfile
+import time
+from django.core.exceptions import MiddlewareNotUsed
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, override_settings
+from attendance.middleware import RequestProfilingMiddleware
+
+
+def slow_view(request):
+    time.sleep(0.03)
+    return HttpResponse('ok')
+
+
+class RequestProfilingMiddlewareTestCase(SimpleTestCase):
+    """Tests para RequestProfilingMiddleware."""
+    
+    def setUp(self):
+        """Configurar test."""
+        self.output_dir = tempfile.mkdtemp()
+        self.factory = RequestFactory()
+    
+    def _middleware(self, **overrides):
+        options = {
+            'REQUEST_PROFILING_ENABLED': True,
+            'REQUEST_PROFILING_TOKEN': 'secreto',
+            'REQUEST_PROFILING_SAMPLE_RATE': 0.0,
+            'REQUEST_PROFILING_MODE': 'cprofile',
+            'REQUEST_PROFILING_DIR': self.output_dir,
+        }
+        options.update(overrides)
+        with override_settings(**options):
+            return RequestProfilingMiddleware(slow_view)
+    
+    def test_disabled_is_not_used(self):
+        """Test que desactivado el middleware se descarta."""
+        with self.assertRaises(MiddlewareNotUsed):
+            self._middleware(REQUEST_PROFILING_ENABLED=False)
+    
+    def test_no_header_no_profile(self):
+        """Test que sin header ni muestreo no se perfila."""
+        middleware = self._middleware()
+        
+        response = middleware(self.factory.get('/api/check-in/'))
+        
+        self.assertNotIn('X-Profile-File', response)
+        self.assertEqual(os.listdir(self.output_dir), [])
+    
+    def test_wrong_token_no_profile(self):
+        """Test que un token incorrecto no activa el perfil."""
+        middleware = self._middleware()
+        
+        middleware(self.factory.get('/api/check-in/', HTTP_X_PROFILE_TOKEN='otro'))
+        
+        self.assertEqual(os.listdir(self.output_dir), [])
+    
+    def test_header_writes_pstats(self):
+        """Test que el header con token genera un archivo pstats."""
+        middleware = self._middleware()
+        
+        response = middleware(self.factory.get('/api/check-in/', HTTP_X_PROFILE_TOKEN='secreto'))
+        
+        filename = response['X-Profile-File']
+        self.assertTrue(filename.endswith('.prof'))
+        stats = pstats.Stats(os.path.join(self.output_dir, filename))
+        self.assertTrue(any(func[2] == 'slow_view' for func in stats.stats))
+    
+    def test_sampling_writes_collapsed_stacks(self):
+        """Test que el modo sampling genera pilas colapsadas."""
+        middleware = self._middleware(REQUEST_PROFILING_MODE='sampling', REQUEST_PROFILING_INTERVAL_MS=1.0)
+        
+        response = middleware(self.factory.get('/api/check-in/', HTTP_X_PROFILE_TOKEN='secreto'))
+        
+        with open(os.path.join(self.output_dir, response['X-Profile-File'])) as fh:
+            lines = fh.read().splitlines()
+        self.assertTrue(lines)
+        self.assertTrue(any('slow_view' in line for line in lines))
+        stack, count = lines[0].rsplit(' ', 1)
+        self.assertGreater(int(count), 0)
@@ -0,0 +1,150 @@
+"""
+Tests for the verification pre-filters.
+"""
+import base64
+import tempfile
+import unittest
+from io import BytesIO
+from unittest.mock import Mock
+from django.test import TestCase, override_settings
+from attendance.benchmarks.fixtures import create_employees, make_capture_data, make_jpeg
+from attendance.models import AttendanceEvent
+from attendance.services import CheckInEmployeeService
+from attendance.services.prefilters import (
+    BlurStage,
+    BrightnessStage,
+    PerceptualHashStage,
+    PrefilterCascade,
+    PrefilterStage,
+    SizeStage,
+    build_prefilter_cascade,
+)
+
+
+def solid_jpeg(size=(320, 240), color=0):
+    from PIL import Image
+    
+    buffer = BytesIO()
+    Image.new('RGB', size, (color, color, color)).save(buffer, format='JPEG')
+    return buffer.getvalue()
+
+
+class PrefilterCascadeTestCase(unittest.TestCase):
+    """Tests para PrefilterCascade."""
+    
+    def setUp(self):
+        """Configurar test."""
+        self.cascade = PrefilterCascade([SizeStage(), BrightnessStage(), BlurStage()])
+    
+    def test_plausible_capture_passes(self):
+        """Test que una captura nítida y bien expuesta pasa al proveedor."""
+        self.assertIsNone(self.cascade.run(make_jpeg(seed=1)))
+    
+    def test_small_capture_rejected(self):
+        """Test que una captura pequeña se rechaza en la etapa size."""
+        result = self.cascade.run(make_jpeg((64, 64)))
+        
+        self.assertEqual(result['provider'], 'prefilter:size')
+        self.assertFalse(result['match'])
+    
+    def test_black_capture_rejected(self):
+        """Test que una captura negra se rechaza en la etapa brightness."""
+        result = self.cascade.run(solid_jpeg(color=0))
+        
+        self.assertEqual(result['provider'], 'prefilter:brightness')
+    
+    def test_flat_capture_rejected_as_blurry(self):
+        """Test que una captura sin bordes se rechaza en la etapa blur."""
+        result = self.cascade.run(solid_jpeg(color=128))
+        
+        self.assertEqual(result['provider'], 'prefilter:blur')
+    
+    def test_phash_accepts_identical_reference(self):
+        """Test que la etapa phash puede aceptar temprano."""
+        image = make_jpeg(seed=3)
+        cascade = PrefilterCascade([PerceptualHashStage(reject_distance=None, accept_distance=0)])
+        
+        result = cascade.run(image, [image])
+        
+        self.assertTrue(result['match'])
+        self.assertEqual(result['score'], 1.0)
+    
+    def test_phash_uses_every_reference(self):
+        """Test que phash rechaza solo si la captura falla contra todas las referencias."""
+        capture = make_jpeg(seed=3)
+        other = solid_jpeg(color=128)
+        cascade = PrefilterCascade([PerceptualHashStage(reject_distance=5, accept_distance=None)])
+        
+        self.assertEqual(cascade.run(capture, [other])['provider'], 'prefilter:phash')
+        self.assertIsNone(cascade.run(capture, [other, capture]))
+        self.assertIsNone(cascade.run(capture, []))
+    
+    def test_stage_requires_check(self):
+        """Test que una etapa sin check no se puede instanciar."""
+        class IncompleteStage(PrefilterStage):
+            name = 'incomplete'
+        
+        with self.assertRaises(TypeError):
+            IncompleteStage()
+    
+    @override_settings(FACE_VERIFICATION_PREFILTERS=['unknown'])
+    def test_unknown_stage(self):
+        """Test error con etapa desconocida."""
+        with self.assertRaises(ValueError):
+            build_prefilter_cascade()
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp())
+class CheckInPrefilterTestCase(TestCase):
+    """Tests de integración del pre-filtro en CheckInEmployeeService."""
+    
+    def test_rejected_capture_skips_provider(self):
+        """Test que una captura rechazada no llega al proveedor y se registra."""
+        employee = create_employees(1, prefix='PRE')[0]
+        provider = Mock()
+        service = CheckInEmployeeService(
+            provider=provider,
+            prefilters=PrefilterCascade([BrightnessStage()])
+        )
+        
+        result = service.execute(
+            employee_code=employee.employee_code,
+            capture_image_data='data:image/jpeg;base64,' + base64.b64encode(solid_jpeg()).decode()
+        )
+        
+        self.assertFalse(result['decision'])
+        provider.verify.assert_not_called()
+        event = AttendanceEvent.objects.get(employee=employee)
+        self.assertEqual(event.provider_name, 'prefilter:brightness')
+    
+    def test_plausible_capture_reaches_provider(self):
+        """Test que una captura plausible se verifica con el proveedor."""
+        employee = create_employees(1, prefix='PRE')[0]
+        provider = Mock()
+        provider.verify.return_value = {'score': 0.9, 'match': True, 'provider': 'mock'}
+        service = CheckInEmployeeService(
+            provider=provider,
+            prefilters=PrefilterCascade([SizeStage(), BrightnessStage(), BlurStage()])
+        )
+        
+        result = service.execute(employee_code=employee.employee_code, capture_image_data=make_capture_data(seed=5))
+        
+        self.assertTrue(result['decision'])
+        provider.verify.assert_called_once()
+    
+    @override_settings(FACE_VERIFICATION_PREFILTERS=['size', 'brightness'])
+    def test_services_share_cascade(self):
+        """Test que los servicios comparten la cascada y se reconstruye al cambiar settings."""
+        first = CheckInEmployeeService(provider=Mock())
+        second = CheckInEmployeeService(provider=Mock())
+        
+        self.assertIs(first.prefilters, second.prefilters)
+        self.assertEqual([stage.name for stage in first.prefilters.stages], ['size', 'brightness'])
+        
+        with self.settings(FACE_VERIFICATION_PREFILTERS=['blur']):
+            third = CheckInEmployeeService(provider=Mock())
+        self.assertEqual([stage.name for stage in third.prefilters.stages], ['blur'])
+
+
+if __name__ == '__main__':
+    unittest.main()
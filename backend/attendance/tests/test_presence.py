@@ -0,0 +1,142 @@
+"""
+Tests for the in-memory presence board.
+"""
+import tempfile
+import time
+from datetime import timedelta
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+from attendance.benchmarks.fixtures import create_employees
+from attendance.events import event_payload
+from attendance.models import AttendanceEvent, EmployeeTombstone
+from attendance.presence import PresenceBoard, get_presence_board
+from attendance.repositories import AttendanceRepository
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp())
+class PresenceBoardTestCase(TestCase):
+    """Tests para el tablero de presencia y los eventos recientes."""
+    
+    def setUp(self):
+        """Configurar test con un tablero nuevo."""
+        override = override_settings(PRESENCE_RING_SIZE=5, PRESENCE_WINDOW_HOURS=12, PRESENCE_REFRESH_SECONDS=0)
+        override.enable()
+        self.addCleanup(override.disable)
+        self.client = APIClient()
+        self.alice, self.bob, self.carol = create_employees(3, prefix='PRS')
+    
+    def check_in(self, employee, decision=True, site='NORTE', hours_ago=0):
+        with self.captureOnCommitCallbacks(execute=True):
+            event = AttendanceRepository.create(
+                employee=employee, score=0.9 if decision else 0.1, decision=decision,
+                provider_name='dummy', threshold_used=0.8, site=site
+            )
+        if hours_ago:
+            AttendanceEvent.objects.filter(id=event.id).update(timestamp=timezone.now() - timedelta(hours=hours_ago))
+        return event
+    
+    def test_rebuild_from_database(self):
+        """Test que el tablero se reconstruye con los últimos N eventos y los presentes."""
+        events = [self.check_in(self.alice, hours_ago=6 - index) for index in range(7)]
+        self.check_in(self.bob, decision=False)
+        self.check_in(self.carol, hours_ago=13)
+        
+        board = get_presence_board()
+        recent = board.recent(self.alice.employee_code)
+        
+        self.assertEqual([event['id'] for event in recent], [event.id for event in reversed(events[2:])])
+        self.assertEqual(
+            [entry['employee_code'] for entry in board.present()],
+            [self.alice.employee_code]
+        )
+    
+    def test_endpoints_answer_from_memory(self):
+        """Test que tras la carga inicial los endpoints no consultan la base y ven los check-ins nuevos."""
+        self.check_in(self.alice, site='NORTE')
+        self.client.get('/api/attendance-events/presence/')
+        self.check_in(self.bob, site='SUR')
+        
+        with self.assertNumQueries(0):
+            everyone = self.client.get('/api/attendance-events/presence/').json()
+            north = self.client.get('/api/attendance-events/presence/', {'site': 'NORTE'}).json()
+            recent = self.client.get(
+                '/api/attendance-events/recent/', {'employee_code': self.bob.employee_code, 'limit': 5}
+            ).json()
+        
+        self.assertEqual(everyone['count'], 2)
+        self.assertEqual([entry['employee_code'] for entry in north['results']], [self.alice.employee_code])
+        self.assertEqual(len(recent['results']), 1)
+        self.assertEqual(recent['results'][0]['site'], 'SUR')
+    
+    def test_deleted_employee_is_forgotten(self):
+        """Test que un empleado eliminado sale del tablero."""
+        self.check_in(self.alice)
+        board = get_presence_board()
+        self.assertEqual(len(board.present()), 1)
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            self.alice.delete()
+        
+        self.assertEqual(board.present(), [])
+        self.assertEqual(board.recent(self.alice.employee_code), [])
+    
+    def test_soft_deleted_employee_is_not_reloaded(self):
+        """Test que un empleado dado de baja no vuelve al tablero al recargarlo desde la base."""
+        self.check_in(self.alice)
+        self.check_in(self.bob)
+        self.alice.deleted_at = timezone.now()
+        self.alice.save(update_fields=['deleted_at'])
+        
+        board = PresenceBoard(refresh_seconds=0)
+        
+        self.assertEqual([entry['employee_code'] for entry in board.present()], [self.bob.employee_code])
+        self.assertEqual(board.recent(self.alice.employee_code), [])
+    
+    def test_removal_in_other_worker_is_applied_on_refresh(self):
+        """Test que la consulta incremental quita a los empleados dados de baja por otro worker."""
+        self.check_in(self.alice)
+        board = PresenceBoard(refresh_seconds=0.001)
+        self.assertEqual(len(board.present()), 1)
+        
+        # Baja hecha en otro proceso: sin las señales de este
+        type(self.alice).objects.filter(id=self.alice.id).update(deleted_at=timezone.now())
+        EmployeeTombstone.objects.create(employee_id=self.alice.id, employee_code=self.alice.employee_code)
+        time.sleep(0.01)
+        
+        self.assertEqual(board.present(), [])
+        self.assertEqual(board.recent(self.alice.employee_code), [])
+    
+    def test_reused_code_does_not_inherit_history(self):
+        """Test que un código reutilizado por otro empleado no hereda los eventos del anterior."""
+        old = self.check_in(self.alice)
+        board = PresenceBoard(refresh_seconds=0)
+        board.load()
+        new_payload = {**event_payload(old), 'id': old.id + 1000}
+        
+        board.record(new_payload, employee_id=self.alice.id + 1000)
+        board.forget(self.alice.employee_code, self.alice.id)
+        
+        self.assertEqual([event['id'] for event in board.recent(self.alice.employee_code)], [new_payload['id']])
+    
+    def test_latest_per_employee(self):
+        """Test que se leen los últimos N eventos de cada empleado activo, sin numerar la tabla en PostgreSQL."""
+        alice_events = [self.check_in(self.alice) for _ in range(4)]
+        bob_events = [self.check_in(self.bob) for _ in range(2)]
+        self.check_in(self.carol)
+        self.carol.deleted_at = timezone.now()
+        self.carol.save(update_fields=['deleted_at'])
+        
+        with CaptureQueriesContext(connection) as queries:
+            events = AttendanceRepository.get_latest_per_employee(3)
+        
+        self.assertEqual(
+            sorted(event.id for event in events),
+            sorted(event.id for event in alice_events[1:] + bob_events)
+        )
+        if connection.vendor == 'postgresql':
+            sql = queries[0]['sql']
+            self.assertIn('LATERAL', sql)
+            self.assertNotIn('ROW_NUMBER', sql)
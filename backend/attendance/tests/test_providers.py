@@ -1,10 +1,25 @@
 """
 Unit tests for Face Verification Providers.
 """
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
 import unittest
+from importlib.metadata import EntryPoint
 from io import BytesIO
+from unittest import mock
 from PIL import Image
+from django.test import SimpleTestCase, override_settings
+from attendance.providers.batching_provider import BatchingProvider, ProviderClosed
+from attendance.providers.composite_provider import CompositeProvider
 from attendance.providers.dummy_provider import DummyProvider
+from attendance.providers.face_verification_provider import FaceVerificationProvider
+from attendance.providers.factory import build_provider, get_face_verification_provider
+from attendance.providers.registry import ProviderRegistry, load_entry_points
+from attendance.providers.simulated_provider import InjectedProviderError, SimulatedProvider
 
 
 class DummyProviderTestCase(unittest.TestCase):
@@ -88,5 +103,348 @@ class DummyProviderTestCase(unittest.TestCase):
         self.assertEqual(result1['score'], result2['score'])
 
 
+class FixedProvider(FaceVerificationProvider):
+    """Proveedor de prueba con score fijo y demora opcional."""
+    
+    def __init__(self, name, score, delay=0.0, error=None):
+        self._name = name
+        self.score = score
+        self.delay = delay
+        self.error = error
+        self.calls = 0
+        self.finished = threading.Event()
+    
+    @property
+    def name(self):
+        return self._name
+    
+    def verify(self, reference_image_bytes, capture_image_bytes, employee_code=None):
+        self.calls += 1
+        time.sleep(self.delay)
+        self.finished.set()
+        if self.error:
+            raise self.error
+        return {'score': self.score, 'match': self.score >= 0.80, 'provider': self._name}
+
+
+class CompositeProviderTestCase(unittest.TestCase):
+    """Tests para CompositeProvider."""
+    
+    def test_first_confident_does_not_wait_for_slow_provider(self):
+        """Test que una respuesta concluyente decide sin esperar al proveedor lento."""
+        slow = FixedProvider('lento', 0.10, delay=1.0)
+        provider = CompositeProvider([FixedProvider('rapido', 0.97), slow], policy='first_confident')
+        
+        start = time.monotonic()
+        result = provider.verify(b'ref', b'cap')
+        
+        self.assertLess(time.monotonic() - start, 0.5)
+        self.assertTrue(result['match'])
+        self.assertEqual(result['provider'], 'first_confident:rapido')
+        self.assertFalse(slow.finished.is_set())
+        provider.close()
+    
+    def test_majority_stops_when_decided(self):
+        """Test que la mayoría decide con 2 de 3 votos sin esperar el tercero."""
+        provider = CompositeProvider(
+            [FixedProvider('a', 0.90), FixedProvider('b', 0.85), FixedProvider('c', 0.10, delay=1.0)],
+            policy='majority'
+        )
+        
+        start = time.monotonic()
+        result = provider.verify(b'ref', b'cap')
+        
+        self.assertLess(time.monotonic() - start, 0.5)
+        self.assertEqual(result['score'], 0.875)
+        self.assertEqual(result['provider'], 'majority:a+b')
+        provider.close()
+    
+    def test_weighted_average_with_failure(self):
+        """Test promedio ponderado ignorando un proveedor que falla."""
+        provider = CompositeProvider(
+            [FixedProvider('a', 0.90), FixedProvider('b', 0.60), FixedProvider('c', 0.0, error=RuntimeError('caído'))],
+            policy='weighted_average',
+            weights=[3.0, 1.0, 1.0]
+        )
+        
+        result = provider.verify(b'ref', b'cap')
+        
+        self.assertEqual(result['score'], 0.825)
+        self.assertTrue(result['match'])
+        self.assertEqual(result['provider'], 'weighted_average:a+b')
+        provider.close()
+    
+    def test_all_fail_raises(self):
+        """Test que si todos fallan se propaga el error."""
+        provider = CompositeProvider([FixedProvider('a', 0.0, error=RuntimeError('caído'))])
+        
+        with self.assertRaises(RuntimeError):
+            provider.verify(b'ref', b'cap')
+        provider.close()
+
+
+class RecordingBatchProvider(FaceVerificationProvider):
+    """Proveedor de prueba que registra el tamaño de cada lote."""
+    
+    def __init__(self, delay=0.02, error=None):
+        self.delay = delay
+        self.error = error
+        self.batches = []
+    
+    @property
+    def name(self):
+        return 'lotes'
+    
+    def verify(self, reference_image_bytes, capture_image_bytes, employee_code=None):
+        return self.verify_batch([{'employee_code': employee_code}])[0]
+    
+    def verify_batch(self, items):
+        self.batches.append(len(items))
+        time.sleep(self.delay)
+        if self.error:
+            raise self.error
+        return [{'score': 0.9, 'match': True, 'provider': item['employee_code']} for item in items]
+
+
+class BatchingProviderTestCase(unittest.TestCase):
+    """Tests para BatchingProvider."""
+    
+    def _run_concurrently(self, provider, count):
+        results = [None] * count
+        errors = []
+        
+        def call(index):
+            try:
+                results[index] = provider.verify(b'ref', b'cap', employee_code=f'EMP{index}')
+            except Exception as e:
+                errors.append(e)
+        
+        threads = [threading.Thread(target=call, args=(index,)) for index in range(count)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return results, errors
+    
+    def test_concurrent_calls_are_batched(self):
+        """Test que llamadas concurrentes se agrupan y cada una recibe su resultado."""
+        inner = RecordingBatchProvider()
+        provider = BatchingProvider(inner, max_batch=4, max_wait_ms=50)
+        
+        results, errors = self._run_concurrently(provider, 8)
+        
+        self.assertEqual(errors, [])
+        self.assertEqual([result['provider'] for result in results], [f'EMP{index}' for index in range(8)])
+        self.assertEqual(sum(inner.batches), 8)
+        self.assertLess(len(inner.batches), 8)
+        self.assertLessEqual(max(inner.batches), 4)
+        provider.close()
+    
+    def test_batch_error_reaches_every_caller(self):
+        """Test que un error del lote llega a todas las solicitudes."""
+        provider = BatchingProvider(RecordingBatchProvider(error=RuntimeError('caído')), max_wait_ms=20)
+        
+        results, errors = self._run_concurrently(provider, 3)
+        
+        self.assertEqual(len(errors), 3)
+        provider.close()
+    
+    def test_closed_provider_fails_fast(self):
+        """Test que tras close() las solicitudes pendientes y nuevas fallan sin esperar el timeout."""
+        provider = BatchingProvider(RecordingBatchProvider(delay=0.2), max_batch=1, max_wait_ms=0, timeout=5)
+        outcomes = []
+        
+        def call():
+            try:
+                outcomes.append(provider.verify(b'ref', b'cap', employee_code='EMP'))
+            except Exception as e:
+                outcomes.append(e)
+        
+        # La primera ocupa al despachador; la segunda queda encolada
+        threads = [threading.Thread(target=call) for _ in range(2)]
+        for thread in threads:
+            thread.start()
+            time.sleep(0.05)
+        started = time.monotonic()
+        provider.close()
+        for thread in threads:
+            thread.join()
+        
+        self.assertLess(time.monotonic() - started, 1.0)
+        self.assertEqual(sorted(type(outcome).__name__ for outcome in outcomes), ['ProviderClosed', 'dict'])
+        with self.assertRaises(ProviderClosed):
+            provider.verify(b'ref', b'cap')
+
+
+class SimulatedProviderTestCase(unittest.TestCase):
+    """Tests para SimulatedProvider."""
+    
+    def test_scores_like_dummy(self):
+        """Test que el score es el de DummyProvider con el nombre del simulado."""
+        provider = SimulatedProvider(latency_ms=0)
+        
+        result = provider.verify(b'referencia', b'captura', 'EMP002')
+        
+        expected = DummyProvider().verify(b'referencia', b'captura', 'EMP002')
+        self.assertEqual(result['score'], expected['score'])
+        self.assertEqual(result['provider'], 'simulated')
+    
+    def test_latency_distributions(self):
+        """Test que cada distribución respeta su forma y el tope."""
+        normal = SimulatedProvider('normal', latency_ms=50, stddev_ms=5, seed=1)
+        samples = [normal.sample_latency_ms() for _ in range(2000)]
+        self.assertAlmostEqual(sum(samples) / len(samples), 50, delta=1)
+        
+        pareto = SimulatedProvider('pareto', latency_ms=10, alpha=1.2, max_latency_ms=500, seed=1)
+        samples = sorted(pareto.sample_latency_ms() for _ in range(2000))
+        self.assertGreaterEqual(samples[0], 10)
+        self.assertLessEqual(samples[-1], 500)
+        # Cola pesada: el p99 es muchas veces la mediana
+        self.assertGreater(samples[1979], 10 * samples[1000])
+    
+    def test_sleep_and_cpu_take_the_latency(self):
+        """Test que ambos modos tardan la latencia muestreada."""
+        for mode in ('sleep', 'cpu'):
+            provider = SimulatedProvider(latency_ms=30, mode=mode)
+            start = time.perf_counter()
+            provider.verify(b'a', b'b')
+            self.assertGreaterEqual(time.perf_counter() - start, 0.03)
+    
+    def test_injected_failures(self):
+        """Test que errores y timeouts se inyectan con la tasa configurada."""
+        provider = SimulatedProvider(latency_ms=0, error_rate=0.2, timeout_rate=0.1, timeout_seconds=0, seed=3)
+        outcomes = {'ok': 0, 'error': 0, 'timeout': 0}
+        for _ in range(2000):
+            try:
+                provider.verify(b'a', b'b')
+                outcomes['ok'] += 1
+            except InjectedProviderError:
+                outcomes['error'] += 1
+            except TimeoutError:
+                outcomes['timeout'] += 1
+        
+        self.assertAlmostEqual(outcomes['error'] / 2000, 0.2, delta=0.03)
+        self.assertAlmostEqual(outcomes['timeout'] / 2000, 0.1, delta=0.03)
+    
+    def test_batch_is_one_call(self):
+        """Test que un lote paga una latencia más batch_item_ms por elemento adicional."""
+        provider = SimulatedProvider(latency_ms=20, batch_item_ms=10)
+        items = [{'reference_image_bytes': b'a', 'capture_image_bytes': b'b'}] * 4
+        
+        start = time.perf_counter()
+        results = provider.verify_batch(items)
+        
+        self.assertEqual(len(results), 4)
+        self.assertGreaterEqual(time.perf_counter() - start, 0.05)
+        self.assertLess(time.perf_counter() - start, 0.5)
+
+
+class ProviderFactoryTestCase(SimpleTestCase):
+    """Tests para get_face_verification_provider."""
+    
+    @override_settings(
+        FACE_VERIFICATION_PROVIDER='composite',
+        FACE_VERIFICATION_COMPOSITE_PROVIDERS=['dummy', 'dummy'],
+        FACE_VERIFICATION_COMPOSITE_POLICY='majority'
+    )
+    def test_composite_is_shared(self):
+        """Test que el proveedor compuesto se crea una vez por proceso."""
+        provider = get_face_verification_provider()
+        
+        self.assertIsInstance(provider, CompositeProvider)
+        self.assertIs(provider, get_face_verification_provider())
+        self.assertEqual(provider.policy, 'majority')
+    
+    
+    @override_settings(
+        FACE_VERIFICATION_PROVIDER='strict',
+        FACE_VERIFICATION_PROVIDER_PATHS={'strict': 'attendance.providers.dummy_provider:DummyProvider'},
+        FACE_VERIFICATION_PROVIDER_OPTIONS={'strict': {'demo_mode': False}}
+    )
+    def test_provider_from_settings_path(self):
+        """Test que un proveedor declarado por ruta en settings se crea con sus opciones."""
+        provider = get_face_verification_provider()
+        
+        self.assertIsInstance(provider, DummyProvider)
+        self.assertFalse(provider.demo_mode)
+    
+    @override_settings(
+        FACE_VERIFICATION_PROVIDER='simulated',
+        FACE_VERIFICATION_SIMULATION_DISTRIBUTION='lognormal',
+        FACE_VERIFICATION_SIMULATION_ERROR_RATE=0.05
+    )
+    def test_simulated_from_settings(self):
+        """Test que el proveedor simulado toma FACE_VERIFICATION_SIMULATION_*."""
+        provider = get_face_verification_provider()
+        
+        self.assertIsInstance(provider, SimulatedProvider)
+        self.assertEqual(provider.distribution, 'lognormal')
+        self.assertEqual(provider.error_rate, 0.05)
+    
+    def test_unknown_provider(self):
+        """Test que un nombre no registrado falla con ValueError."""
+        with self.assertRaises(ValueError):
+            build_provider('inexistente')
+
+
+class ProviderRegistryTestCase(SimpleTestCase):
+    """Tests para ProviderRegistry."""
+    
+    def setUp(self):
+        """Crear un módulo de proveedor que todavía no se importó."""
+        self.directory = tempfile.mkdtemp()
+        self.module = f"lazy_provider_{os.getpid()}_{id(self)}"
+        with open(os.path.join(self.directory, f"{self.module}.py"), 'w') as source:
+            source.write(
+                'from attendance.providers.dummy_provider import DummyProvider\n'
+                'class LazyProvider(DummyProvider):\n'
+                '    pass\n'
+            )
+        sys.path.insert(0, self.directory)
+        self.addCleanup(sys.path.remove, self.directory)
+        self.addCleanup(sys.modules.pop, self.module, None)
+    
+    def test_module_imported_on_first_build(self):
+        """Test que el módulo se importa recién al crear el proveedor y se mide."""
+        registry = ProviderRegistry()
+        registry.register('lazy', f"{self.module}:LazyProvider")
+        
+        self.assertIn('lazy', registry.names())
+        self.assertNotIn(self.module, sys.modules)
+        self.assertFalse(registry.is_loaded('lazy'))
+        
+        with self.assertLogs('attendance.providers.registry', 'INFO') as logs:
+            provider = registry.build('lazy', demo_mode=False)
+        
+        self.assertEqual(type(provider).__name__, 'LazyProvider')
+        self.assertIn(self.module, sys.modules)
+        self.assertIn('lazy', registry.import_times)
+        self.assertIn('cargado desde', logs.output[0])
+    
+    def test_entry_points_are_registered_without_import(self):
+        """Test que los entry points se registran sin importar el módulo."""
+        entry_point = EntryPoint(name='plugin', value=f"{self.module}:LazyProvider", group='attendance.face_providers')
+        registry = ProviderRegistry()
+        with mock.patch('importlib.metadata.entry_points', return_value=[entry_point]):
+            self.assertEqual(load_entry_points(registry), 1)
+        
+        self.assertNotIn(self.module, sys.modules)
+        self.assertEqual(type(registry.build('plugin')).__name__, 'LazyProvider')
+    
+    def test_checkin_import_does_not_load_providers(self):
+        """Test que importar el servicio de check-in no importa Pillow ni los proveedores."""
+        code = (
+            'import sys, django; django.setup(); '
+            'import attendance.services.checkin_service; '
+            'print(",".join(name for name in ("PIL", "attendance.providers.dummy_provider", '
+            '"attendance.providers.composite_provider") if name in sys.modules))'
+        )
+        result = subprocess.run(
+            [sys.executable, '-c', code], capture_output=True, text=True, check=True,
+            env={**os.environ, 'DJANGO_SETTINGS_MODULE': os.environ.get('DJANGO_SETTINGS_MODULE', 'core.settings')}
+        )
+        self.assertEqual(result.stdout.strip(), '')
+
+
 if __name__ == '__main__':
     unittest.main()
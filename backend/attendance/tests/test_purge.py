@@ -0,0 +1,142 @@
+"""
+Tests for employee soft delete and the background history purge.
+"""
+import tempfile
+from datetime import timedelta
+from io import StringIO
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+from attendance.archive import ArchiveReader
+from attendance.benchmarks.fixtures import create_employees
+from attendance.models import AttendanceEvent, Employee, EmployeePurgeJob, EmployeeTombstone
+from attendance.repositories import AttendanceRepository, EmployeeRepository
+from attendance.services import DeleteEmployeeService, EmployeePurgeService
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp(), EMPLOYEE_PURGE_PAUSE_SECONDS=0)
+class EmployeePurgeTestCase(TestCase):
+    """Tests para la baja lógica y EmployeePurgeService."""
+    
+    def setUp(self):
+        """Crear un empleado con historial y otro sin bajas."""
+        self.client = APIClient()
+        self.directory = tempfile.mkdtemp()
+        self.alice, self.bob = create_employees(2, prefix='PRG')
+        for index in range(5):
+            for employee in (self.alice, self.bob):
+                AttendanceRepository.create(
+                    employee=employee, score=0.9, decision=index % 2 == 0,
+                    provider_name='dummy', threshold_used=0.8
+                )
+    
+    def purge(self, mode, chunk_size=2):
+        job = DeleteEmployeeService(mode=mode).execute(self.alice.id)
+        return EmployeePurgeService(chunk_size=chunk_size, archive_dir=self.directory).run(job)
+    
+    def test_delete_is_immediate_soft_delete(self):
+        """Test que DELETE oculta al empleado sin tocar sus eventos y registra la purga."""
+        response = self.client.delete(f'/api/employees/{self.alice.id}/')
+        
+        self.assertEqual(response.status_code, 204)
+        self.assertIsNone(EmployeeRepository.get_by_code(self.alice.employee_code))
+        self.assertIsNotNone(Employee.all_objects.get(id=self.alice.id).deleted_at)
+        self.assertEqual(AttendanceEvent.objects.filter(employee_id=self.alice.id).count(), 5)
+        self.assertTrue(EmployeeTombstone.objects.filter(employee_id=self.alice.id).exists())
+        
+        job = EmployeePurgeJob.objects.get(employee_id=self.alice.id)
+        self.assertEqual((job.status, job.total_events), ('pending', 5))
+        jobs = self.client.get('/api/employee-purge-jobs/', {'status': 'pending'}).json()
+        self.assertEqual([entry['employee_code'] for entry in jobs['results']], [self.alice.employee_code])
+    
+    def test_code_can_be_reused_after_delete(self):
+        """Test que el código de un empleado dado de baja puede asignarse a otro."""
+        DeleteEmployeeService().execute(self.alice.id)
+        
+        self.assertFalse(EmployeeRepository.exists_by_code(self.alice.employee_code))
+        Employee.objects.create(employee_code=self.alice.employee_code, full_name='Nuevo', photo_ref='photos/x.jpg')
+    
+    def test_delete_mode_purges_in_chunks(self):
+        """Test que el modo delete borra los eventos en chunks y luego al empleado."""
+        job = self.purge('delete')
+        
+        self.assertEqual((job.status, job.processed_events, job.progress), ('done', 5, 1.0))
+        self.assertFalse(AttendanceEvent.objects.filter(employee_id=self.alice.id).exists())
+        self.assertFalse(Employee.all_objects.filter(id=self.alice.id).exists())
+        self.assertEqual(AttendanceEvent.objects.filter(employee=self.bob).count(), 5)
+        self.assertEqual(EmployeeTombstone.objects.filter(employee_id=self.alice.id).count(), 1)
+    
+    def test_archive_mode_keeps_history_in_archive(self):
+        """Test que el modo archive deja los eventos consultables en el archivo frío."""
+        job = self.purge('archive')
+        
+        self.assertEqual(job.status, 'done')
+        archived = list(ArchiveReader(self.directory).query(employee_id=self.alice.id))
+        self.assertEqual(len(archived), 5)
+        self.assertFalse(AttendanceEvent.objects.filter(employee_id=self.alice.id).exists())
+    
+    def test_command_runs_pending_jobs(self):
+        """Test que purge_employees ejecuta las purgas pendientes."""
+        DeleteEmployeeService(mode='delete').execute(self.alice.id)
+        
+        out = StringIO()
+        call_command('purge_employees', chunk_size=3, stdout=out)
+        
+        self.assertIn('5 eventos purgados', out.getvalue())
+        self.assertEqual(EmployeePurgeJob.objects.get(employee_id=self.alice.id).status, 'done')
+    
+    def test_running_job_is_resumed_only_when_stale(self):
+        """Test que una purga en curso se retoma solo si su heartbeat venció."""
+        job = DeleteEmployeeService(mode='delete').execute(self.alice.id)
+        stale_before = timezone.now() - timedelta(minutes=5)
+        
+        claimed = EmployeeRepository.claim_purge_job('host-a:1', stale_before)
+        self.assertEqual((claimed.id, claimed.status, claimed.owner), (job.id, 'running', 'host-a:1'))
+        self.assertIsNone(EmployeeRepository.claim_purge_job('host-b:2', stale_before))
+        self.assertEqual(EmployeePurgeService(owner='host-b:2', archive_dir=self.directory).run_pending(), [])
+        
+        EmployeePurgeJob.objects.filter(id=job.id).update(heartbeat_at=timezone.now() - timedelta(minutes=10))
+        resumed = EmployeeRepository.claim_purge_job('host-b:2', stale_before)
+        self.assertEqual((resumed.id, resumed.owner), (job.id, 'host-b:2'))
+    
+    def test_lost_job_is_abandoned(self):
+        """Test que un proceso deja la purga si otro la retomó, sin marcarla fallida."""
+        DeleteEmployeeService(mode='delete').execute(self.alice.id)
+        job = EmployeeRepository.claim_purge_job('host-a:1', timezone.now())
+        EmployeePurgeJob.objects.filter(id=job.id).update(owner='host-b:2')
+        
+        result = EmployeePurgeService(chunk_size=2, owner='host-a:1', archive_dir=self.directory)._execute(job)
+        
+        stored = EmployeePurgeJob.objects.get(id=job.id)
+        self.assertEqual((stored.status, stored.owner), ('running', 'host-b:2'))
+        self.assertEqual(result.status, 'running')
+        # Solo se borró el primer chunk
+        self.assertEqual(AttendanceEvent.objects.filter(employee_id=self.alice.id).count(), 3)
+        self.assertTrue(Employee.all_objects.filter(id=self.alice.id).exists())
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp())
+class PurgeJobClaimTestCase(TransactionTestCase):
+    """Tests del bloqueo al reclamar purgas desde varios procesos."""
+    
+    def test_locked_job_is_skipped(self):
+        """Test que una purga bloqueada por otro proceso se saltea en vez de esperarla."""
+        if connection.vendor != 'postgresql':
+            self.skipTest('SKIP LOCKED requiere PostgreSQL')
+        import psycopg2
+        
+        first, second = create_employees(2, prefix='CLM')
+        first_job = DeleteEmployeeService(mode='delete').execute(first.id)
+        second_job = DeleteEmployeeService(mode='delete').execute(second.id)
+        other = psycopg2.connect(**connection.get_connection_params())
+        self.addCleanup(other.close)
+        with other.cursor() as cursor:
+            cursor.execute(f'SELECT id FROM {EmployeePurgeJob._meta.db_table} WHERE id = %s FOR UPDATE', [first_job.id])
+        
+        claimed = EmployeeRepository.claim_purge_job('host-a:1', timezone.now())
+        
+        self.assertEqual(claimed.id, second_job.id)
+        other.rollback()
+        self.assertEqual(EmployeeRepository.claim_purge_job('host-a:1', timezone.now()).id, first_job.id)
@@ -0,0 +1,184 @@
+"""
+Tests for multiple reference images per employee.
+"""
+import tempfile
+from io import BytesIO
+from unittest.mock import Mock
+from PIL import Image
+from django.core.exceptions import ValidationError
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+from attendance.benchmarks.fixtures import create_employees, make_capture_data, make_jpeg
+from attendance.models import AttendanceEvent, EmployeeReference
+from attendance.services import AddEmployeeReferenceService, CheckInEmployeeService
+from attendance.services.checkin_service import combine_reference_scores
+from attendance.services.prefilters import PerceptualHashStage, PrefilterCascade
+
+
+def reference_image(seed: int) -> SimpleUploadedFile:
+    return SimpleUploadedFile(f"ref{seed}.jpg", make_jpeg((120, 160), seed=seed), content_type='image/jpeg')
+
+
+class CombineReferenceScoresTestCase(TestCase):
+    """Tests para combine_reference_scores."""
+    
+    RESULTS = [
+        {'score': 0.4, 'match': False, 'provider': 'mock'},
+        {'score': 0.9, 'match': True, 'provider': 'mock'},
+        {'score': 0.7, 'match': False, 'provider': 'mock'},
+    ]
+    
+    def test_best(self):
+        """Test que 'best' toma el mejor score y su índice."""
+        result, index = combine_reference_scores(self.RESULTS, 'best')
+        
+        self.assertEqual(index, 1)
+        self.assertEqual(result['score'], 0.9)
+    
+    def test_top_k(self):
+        """Test que 'top_k' promedia los K mejores scores."""
+        result, index = combine_reference_scores(self.RESULTS, 'top_k', top_k=2)
+        
+        self.assertEqual(index, 1)
+        self.assertEqual(result['score'], 0.8)
+    
+    def test_unknown_policy(self):
+        """Test que una política desconocida falla."""
+        with self.assertRaises(ValueError):
+            combine_reference_scores(self.RESULTS, 'promedio')
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp())
+class ReferenceCheckInTestCase(TestCase):
+    """Tests de check-in con referencias adicionales."""
+    
+    def setUp(self):
+        """Configurar test."""
+        self.employee = create_employees(1, prefix='REF')[0]
+        self.helmet = EmployeeReference.objects.create(employee=self.employee, image=reference_image(1), label='casco')
+        EmployeeReference.objects.create(employee=self.employee, image=reference_image(2), label='lentes')
+    
+    def test_scores_all_references_in_one_batch(self):
+        """Test que la captura se compara con todas las referencias en una llamada y se guarda la mejor."""
+        provider = Mock()
+        provider.name = 'mock'
+        provider.verify_batch.return_value = [
+            {'score': 0.3, 'match': False, 'provider': 'mock'},
+            {'score': 0.92, 'match': True, 'provider': 'mock'},
+            {'score': 0.5, 'match': False, 'provider': 'mock'},
+        ]
+        service = CheckInEmployeeService(provider=provider, prefilters=PrefilterCascade([]))
+        
+        result = service.execute(self.employee.employee_code, make_capture_data(seed=3))
+        
+        provider.verify.assert_not_called()
+        self.assertEqual(len(provider.verify_batch.call_args[0][0]), 3)
+        self.assertTrue(result['decision'])
+        self.assertEqual(result['matched_reference'], self.helmet.id)
+        self.assertEqual(AttendanceEvent.objects.get().matched_reference, self.helmet)
+    
+    def test_photo_ref_match_has_no_reference(self):
+        """Test que si gana photo_ref el evento queda sin referencia."""
+        provider = Mock()
+        provider.name = 'mock'
+        provider.verify_batch.return_value = [
+            {'score': 0.95, 'match': True, 'provider': 'mock'},
+            {'score': 0.3, 'match': False, 'provider': 'mock'},
+            {'score': 0.3, 'match': False, 'provider': 'mock'},
+        ]
+        service = CheckInEmployeeService(provider=provider, prefilters=PrefilterCascade([]))
+        
+        result = service.execute(self.employee.employee_code, make_capture_data(seed=4))
+        
+        self.assertIsNone(result['matched_reference'])
+        self.assertIsNone(AttendanceEvent.objects.get().matched_reference)
+    
+    def test_prefilter_compares_every_reference(self):
+        """Test que phash no rechaza una captura que solo se parece a una referencia adicional."""
+        buffer = BytesIO()
+        Image.new('RGB', (120, 160), (128, 128, 128)).save(buffer, format='JPEG')
+        self.employee.photo_ref = SimpleUploadedFile('plain.jpg', buffer.getvalue(), content_type='image/jpeg')
+        self.employee.save()
+        provider = Mock()
+        provider.name = 'mock'
+        provider.verify_batch.return_value = [
+            {'score': 0.3, 'match': False, 'provider': 'mock'},
+            {'score': 0.92, 'match': True, 'provider': 'mock'},
+            {'score': 0.5, 'match': False, 'provider': 'mock'},
+        ]
+        service = CheckInEmployeeService(
+            provider=provider,
+            prefilters=PrefilterCascade([PerceptualHashStage(reject_distance=9)])
+        )
+        
+        result = service.execute(self.employee.employee_code, make_capture_data(seed=3))
+        
+        provider.verify_batch.assert_called_once()
+        self.assertTrue(result['decision'])
+    
+    def test_deleting_reference_keeps_events(self):
+        """Test que borrar una referencia deja los eventos sin referencia."""
+        event = AttendanceEvent.objects.create(
+            employee=self.employee, score=0.9, decision=True, provider_name='mock',
+            threshold_used=0.8, matched_reference=self.helmet
+        )
+        
+        self.helmet.delete()
+        
+        event.refresh_from_db()
+        self.assertIsNone(event.matched_reference)
+    
+    def test_deleting_reference_uses_partial_index(self):
+        """Test que el SET_NULL de un borrado de referencia usa el índice parcial y no recorre la tabla."""
+        if connection.vendor != 'postgresql':
+            self.skipTest('Requiere PostgreSQL')
+        table = AttendanceEvent._meta.db_table
+        
+        with connection.cursor() as cursor:
+            cursor.execute('SET LOCAL enable_seqscan = off')
+            cursor.execute(
+                f'EXPLAIN UPDATE {table} SET matched_reference_id = NULL WHERE matched_reference_id IN (%s)',
+                [self.helmet.id]
+            )
+            plan = '\n'.join(row[0] for row in cursor.fetchall())
+        
+        self.assertIn('attendance_event_matched_ref_idx', plan)
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp())
+class ReferenceEndpointTestCase(TestCase):
+    """Tests de /api/employees/{id}/references/."""
+    
+    def setUp(self):
+        """Configurar test."""
+        self.client = APIClient()
+        self.employee = create_employees(1, prefix='REF')[0]
+        self.url = f'/api/employees/{self.employee.id}/references/'
+    
+    def test_add_list_and_delete(self):
+        """Test alta, listado y baja de referencias."""
+        response = self.client.post(self.url, {'image': reference_image(5), 'label': 'barba'}, format='multipart')
+        self.assertEqual(response.status_code, 201)
+        reference_id = response.data['id']
+        
+        response = self.client.get(self.url)
+        self.assertEqual([item['label'] for item in response.data], ['barba'])
+        
+        response = self.client.delete(f'{self.url}{reference_id}/')
+        self.assertEqual(response.status_code, 204)
+        self.assertFalse(EmployeeReference.objects.exists())
+        
+        response = self.client.delete(f'{self.url}{reference_id}/')
+        self.assertEqual(response.status_code, 404)
+    
+    @override_settings(EMPLOYEE_MAX_REFERENCES=1)
+    def test_limit(self):
+        """Test que no se superan EMPLOYEE_MAX_REFERENCES referencias."""
+        AddEmployeeReferenceService().execute(self.employee.id, reference_image(6))
+        
+        with self.assertRaises(ValidationError):
+            AddEmployeeReferenceService().execute(self.employee.id, reference_image(7))
+        response = self.client.post(self.url, {'image': reference_image(8)}, format='multipart')
+        self.assertEqual(response.status_code, 400)
@@ -0,0 +1,101 @@
+"""
+Tests for the fast JSON renderer and the flat list serializers.
+"""
+import tempfile
+from datetime import datetime, timezone as dt_timezone
+from decimal import Decimal
+from unittest import mock
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.utils.translation import gettext_lazy
+from rest_framework.renderers import JSONRenderer
+from attendance import renderers
+from attendance.benchmarks.fixtures import create_employees
+from attendance.renderers import FastJSONRenderer
+from attendance.repositories import AttendanceRepository
+from attendance.models import AttendanceEvent
+from attendance.serializers import (
+    AttendanceEventListSerializer,
+    AttendanceEventSerializer,
+    EmployeeListSerializer,
+    EmployeeSerializer,
+)
+
+SAMPLE = {
+    'count': 2,
+    'next': None,
+    'results': [
+        {
+            'id': 1, 'name': 'José Ñúñez', 'score': 0.8125, 'ok': True,
+            'when': datetime(2024, 1, 2, 3, 4, 5, 600, dt_timezone.utc),
+        },
+        {'id': 2, 'name': 'línea\u2028nueva', 'amount': Decimal('1.50'), 'label': gettext_lazy('Activo'), 7: 'clave'},
+    ],
+}
+
+
+class FastJSONRendererTestCase(SimpleTestCase):
+    """Tests para FastJSONRenderer."""
+    
+    def test_same_output_as_json_renderer(self):
+        """Test que el JSON es idéntico al de JSONRenderer (fechas, Decimal, lazy, U+2028, claves int)."""
+        self.assertEqual(FastJSONRenderer().render(SAMPLE), JSONRenderer().render(SAMPLE))
+    
+    def test_indent_falls_back(self):
+        """Test que con indentación se delega en JSONRenderer."""
+        media_type = 'application/json; indent=4'
+        self.assertEqual(
+            FastJSONRenderer().render(SAMPLE, media_type),
+            JSONRenderer().render(SAMPLE, media_type)
+        )
+    
+    def test_without_orjson(self):
+        """Test que sin orjson se usa JSONRenderer."""
+        with mock.patch.object(renderers, 'orjson', None):
+            self.assertEqual(FastJSONRenderer().render(SAMPLE), JSONRenderer().render(SAMPLE))
+    
+    def test_big_integer_falls_back(self):
+        """Test que un entero fuera de 64 bits no rompe el render."""
+        data = {'id': 2 ** 70}
+        self.assertEqual(FastJSONRenderer().render(data), JSONRenderer().render(data))
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp())
+class FlatSerializerTestCase(TestCase):
+    """Tests para los serializers livianos de listados."""
+    
+    def setUp(self):
+        """Crear empleados y eventos."""
+        self.request = RequestFactory().get('/api/employees/')
+        self.employees = create_employees(2, prefix='FLT')
+        for employee in self.employees:
+            AttendanceRepository.create(
+                employee=employee, score=0.75, decision=False, provider_name='dummy',
+                threshold_used=0.8, site='NORTE'
+            )
+    
+    def test_employee_output_matches_model_serializer(self):
+        """Test que EmployeeListSerializer produce lo mismo que EmployeeSerializer."""
+        context = {'request': self.request}
+        self.assertEqual(
+            EmployeeListSerializer(self.employees, many=True, context=context).data,
+            EmployeeSerializer(self.employees, many=True, context=context).data
+        )
+        self.assertEqual(EmployeeListSerializer(self.employees[0]).data, EmployeeSerializer(self.employees[0]).data)
+    
+    def test_event_output_matches_model_serializer(self):
+        """Test que AttendanceEventListSerializer produce lo mismo que AttendanceEventSerializer."""
+        events = list(AttendanceEvent.objects.select_related('employee'))
+        self.assertEqual(
+            AttendanceEventListSerializer(events, many=True).data,
+            AttendanceEventSerializer(events, many=True).data
+        )
+    
+    def test_list_endpoints_keep_shape(self):
+        """Test que los listados responden con los mismos campos que el detalle."""
+        events = self.client.get('/api/attendance-events/').json()['results']
+        detail = self.client.get(f"/api/attendance-events/{events[0]['id']}/").json()
+        self.assertEqual(events[0], detail)
+        
+        employees = self.client.get('/api/employees/').json()['results']
+        detail = self.client.get(f"/api/employees/{employees[0]['id']}/").json()
+        self.assertEqual(employees[0], detail)
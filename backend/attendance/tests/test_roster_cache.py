@@ -0,0 +1,90 @@
+"""
+Tests for conditional GET and versioned caching of employee listings.
+"""
+import tempfile
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+from attendance.benchmarks.fixtures import create_employees
+from attendance.cache import roster_cache_enabled
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp(), ROSTER_CACHE_SINGLE_WORKER=True)
+class RosterCacheTestCase(TestCase):
+    """Tests para ETag/If-None-Match en listados de empleados."""
+    
+    def setUp(self):
+        """Configurar test."""
+        self.client = APIClient()
+        create_employees(3, prefix='ROS')
+    
+    def test_unchanged_roster_returns_304_without_queries(self):
+        """Test que un padrón sin cambios responde 304 sin tocar la base de datos."""
+        for url in ('/api/employees/', '/api/employees/active/'):
+            first = self.client.get(url)
+            self.assertEqual(first.status_code, 200)
+            etag = first['ETag']
+            
+            with self.assertNumQueries(0):
+                second = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+            
+            self.assertEqual(second.status_code, 304)
+            self.assertEqual(second['ETag'], etag)
+    
+    def test_cached_response_served_without_queries(self):
+        """Test que la respuesta de la misma versión se sirve desde la caché."""
+        first = self.client.get('/api/employees/active/')
+        
+        with self.assertNumQueries(0):
+            second = self.client.get('/api/employees/active/')
+        
+        self.assertEqual(second.status_code, 200)
+        self.assertEqual(second.json(), first.json())
+    
+    def test_write_changes_etag(self):
+        """Test que una escritura de Employee invalida ETag y caché."""
+        first = self.client.get('/api/employees/')
+        
+        create_employees(1, prefix='NEW')
+        second = self.client.get('/api/employees/', HTTP_IF_NONE_MATCH=first['ETag'])
+        
+        self.assertEqual(second.status_code, 200)
+        self.assertNotEqual(second['ETag'], first['ETag'])
+        self.assertEqual(second.json()['count'], 4)
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp())
+class RosterCacheBackendTestCase(TestCase):
+    """Tests de cuándo se activa el caché del padrón según la caché default."""
+    
+    def setUp(self):
+        """Configurar test."""
+        self.client = APIClient()
+        create_employees(2, prefix='RBK')
+    
+    def test_disabled_with_per_process_cache(self):
+        """Test que con LocMemCache y varios workers no hay ETag ni caché."""
+        self.assertFalse(roster_cache_enabled())
+        first = self.client.get('/api/employees/')
+        
+        self.assertEqual(first.status_code, 200)
+        self.assertNotIn('ETag', first)
+        with self.assertNumQueries(1):
+            self.client.get('/api/employees/active/')
+    
+    def test_enabled_with_shared_cache(self):
+        """Test que con una caché compartida entre workers se usa la versión."""
+        with tempfile.TemporaryDirectory() as location, self.settings(CACHES={'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': location,
+        }}):
+            self.assertTrue(roster_cache_enabled())
+            first = self.client.get('/api/employees/')
+            second = self.client.get('/api/employees/', HTTP_IF_NONE_MATCH=first['ETag'])
+        
+        self.assertEqual(second.status_code, 304)
+    
+    @override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}})
+    def test_disabled_with_dummy_cache(self):
+        """Test que DummyCache nunca activa el caché del padrón."""
+        with self.settings(ROSTER_CACHE_SINGLE_WORKER=True):
+            self.assertFalse(roster_cache_enabled())
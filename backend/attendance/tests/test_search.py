@@ -0,0 +1,63 @@
+"""
+Tests for the trigram employee search endpoint.
+"""
+import tempfile
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+from attendance.benchmarks.fixtures import create_employees
+from attendance.repositories.employee_repository import normalize_search_term
+
+
+class NormalizeSearchTermTestCase(TestCase):
+    """Tests para la normalización del término de búsqueda."""
+    
+    def test_strips_accents_and_case(self):
+        """Test que se quitan acentos y mayúsculas como f_unaccent(lower(...))."""
+        self.assertEqual(normalize_search_term('  José Ordóñez Muñoz '), 'jose ordonez munoz')
+        self.assertEqual(normalize_search_term('ÁNGELA'), 'angela')
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp())
+class EmployeeSearchTestCase(TestCase):
+    """Tests para GET /api/employees/search/ (requiere pg_trgm y unaccent)."""
+    
+    def setUp(self):
+        """Configurar test."""
+        self.client = APIClient()
+        names = ['José Pérez Muñoz', 'María Ordóñez', 'Josefina Castaño', 'Luis Gómez']
+        self.employees = create_employees(len(names), prefix='SRCH')
+        for employee, name in zip(self.employees, names):
+            employee.full_name = name
+            employee.save()
+    
+    def search(self, term):
+        response = self.client.get('/api/employees/search/', {'q': term})
+        self.assertEqual(response.status_code, 200)
+        return [row['full_name'] for row in response.json()['results']]
+    
+    def test_accent_and_case_insensitive(self):
+        """Test que la búsqueda sin acentos ni mayúsculas encuentra el nombre acentuado."""
+        self.assertEqual(self.search('jose perez')[0], 'José Pérez Muñoz')
+        self.assertIn('María Ordóñez', self.search('ORDONEZ'))
+    
+    def test_tolerates_typos(self):
+        """Test que un error de tipeo sigue encontrando al empleado por similitud."""
+        self.assertIn('José Pérez Muñoz', self.search('munos'))
+    
+    def test_search_by_code_ranks_exact_match_first(self):
+        """Test que el código exacto aparece primero."""
+        target = self.employees[2]
+        response = self.client.get('/api/employees/search/', {'q': target.employee_code.lower()})
+        self.assertEqual(response.json()['results'][0]['id'], target.id)
+    
+    def test_results_are_paginated(self):
+        """Test que la respuesta tiene la forma paginada del listado."""
+        response = self.client.get('/api/employees/search/', {'q': 'SRCH'})
+        data = response.json()
+        self.assertEqual(data['count'], 4)
+        self.assertIn('next', data)
+    
+    def test_missing_query_returns_400(self):
+        """Test que sin q se responde 400."""
+        response = self.client.get('/api/employees/search/')
+        self.assertEqual(response.status_code, 400)
@@ -0,0 +1,85 @@
+"""
+Tests for shadow provider evaluation.
+"""
+import tempfile
+from unittest.mock import Mock
+from django.test import TestCase, override_settings
+from attendance.benchmarks.fixtures import create_employees, make_capture_data
+from attendance.models import AttendanceEvent, ShadowComparison
+from attendance.providers.dummy_provider import DummyProvider
+from attendance.services import CheckInEmployeeService
+from attendance.services.prefilters import PrefilterCascade
+from attendance.shadow import ShadowEvaluator, build_shadow_report
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp())
+class ShadowEvaluatorTestCase(TestCase):
+    """Tests para ShadowEvaluator."""
+    
+    def setUp(self):
+        """Configurar test."""
+        self.employee = create_employees(1, prefix='SH')[0]
+        self.event = AttendanceEvent.objects.create(
+            employee=self.employee, score=0.9, decision=True, provider_name='dummy', threshold_used=0.8
+        )
+    
+    def test_evaluate_stores_comparison(self):
+        """Test que la evaluación guarda el score del candidato junto al principal."""
+        evaluator = ShadowEvaluator(DummyProvider(demo_mode=False), workers=0)
+        
+        evaluator.evaluate(self.event.id, 'dummy', 0.9, True, 0.8, b'ref', b'cap', 'SH000000')
+        
+        comparison = ShadowComparison.objects.get(attendance_event=self.event)
+        self.assertEqual(comparison.shadow_provider, 'dummy')
+        self.assertFalse(comparison.shadow_decision)
+        self.assertEqual(comparison.shadow_error, '')
+    
+    def test_provider_error_is_recorded(self):
+        """Test que un error del candidato queda registrado sin decisión."""
+        provider = Mock()
+        provider.name = 'candidato'
+        provider.verify.side_effect = RuntimeError('caído')
+        evaluator = ShadowEvaluator(provider, workers=0)
+        
+        comparison = evaluator.evaluate(self.event.id, 'dummy', 0.9, True, 0.8, b'ref', b'cap', 'SH000000')
+        
+        self.assertIsNone(comparison.shadow_decision)
+        self.assertEqual(comparison.shadow_error, 'caído')
+    
+    def test_full_queue_drops(self):
+        """Test que con la cola llena el trabajo se descarta sin bloquear."""
+        evaluator = ShadowEvaluator(DummyProvider(), queue_size=1, workers=0)
+        
+        self.assertTrue(evaluator.submit(self.event, b'ref', b'cap', 'SH000000'))
+        self.assertFalse(evaluator.submit(self.event, b'ref', b'cap', 'SH000000'))
+    
+    def test_checkin_submits_after_commit(self):
+        """Test que el check-in encola la evaluación al confirmar la transacción."""
+        shadow = Mock()
+        provider = Mock()
+        provider.verify.return_value = {'score': 0.9, 'match': True, 'provider': 'mock'}
+        service = CheckInEmployeeService(provider=provider, prefilters=PrefilterCascade([]), shadow=shadow)
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            service.execute(self.employee.employee_code, make_capture_data(seed=11))
+            shadow.submit.assert_not_called()
+        
+        shadow.submit.assert_called_once()
+    
+    def test_report(self):
+        """Test reporte de acuerdo y distribuciones."""
+        for primary, shadow in ((0.9, 0.85), (0.3, 0.9), (0.2, 0.1)):
+            ShadowComparison.objects.create(
+                attendance_event=self.event, primary_provider='dummy', primary_score=primary,
+                primary_decision=primary >= 0.8, shadow_provider='candidato', shadow_score=shadow,
+                shadow_decision=shadow >= 0.8, shadow_latency_ms=5.0
+            )
+        
+        report = build_shadow_report(ShadowComparison.objects.all())['candidato']
+        
+        self.assertEqual(report['comparisons'], 3)
+        self.assertEqual(report['decisions']['reject/accept'], 1)
+        self.assertAlmostEqual(report['agreement_rate'], 0.6667)
+        self.assertEqual(sum(report['shadow_scores']['histogram']), 3)
+        self.assertEqual(report['shadow_latency']['n'], 3)
+        self.assertEqual(report['shadow_latency']['p95_ms'], 5.0)
@@ -0,0 +1,210 @@
+"""
+Tests for check-in coalescing.
+"""
+import tempfile
+import threading
+import time
+import unittest
+from datetime import timedelta
+from unittest.mock import Mock
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from attendance.benchmarks.fixtures import create_employees, make_capture_data
+from attendance.models import AttendanceEvent
+from attendance.repositories import AttendanceRepository
+from attendance.services import CheckInEmployeeService
+from attendance.services.prefilters import PrefilterCascade
+from attendance.singleflight import SingleFlight
+
+
+class SingleFlightTestCase(unittest.TestCase):
+    """Tests para SingleFlight."""
+    
+    def test_concurrent_calls_share_execution(self):
+        """Test que llamadas concurrentes con la misma clave ejecutan una vez."""
+        flight = SingleFlight()
+        calls = []
+        release = threading.Event()
+        
+        def work():
+            calls.append(1)
+            release.wait(5)
+            return 'ok'
+        
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(flight.do('clave', work)))
+            for _ in range(4)
+        ]
+        for thread in threads:
+            thread.start()
+        while flight._calls.get('clave') is None or flight._calls['clave'].waiters < 3:
+            time.sleep(0.001)
+        release.set()
+        for thread in threads:
+            thread.join()
+        
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(sorted(shared for _, shared in results), [False, True, True, True])
+        self.assertTrue(all(result == 'ok' for result, _ in results))
+        self.assertEqual(flight.in_flight(), 0)
+    
+    def test_error_propagates_to_waiters(self):
+        """Test que la excepción del líder llega a los que esperan."""
+        flight = SingleFlight()
+        
+        def fail():
+            raise ValueError('falla')
+        
+        with self.assertRaises(ValueError):
+            flight.do('clave', fail)
+        self.assertEqual(flight.in_flight(), 0)
+
+
+class CheckInCoalescingTestCase(unittest.TestCase):
+    """Tests de agrupación en CheckInEmployeeService."""
+    
+    def test_double_submit_verifies_once(self):
+        """Test que dos check-ins simultáneos idénticos comparten verificación y evento."""
+        employee = Mock(status='active', employee_code='EMP001')
+        employee.photo_ref.read.return_value = b'referencia'
+        employee_repo = Mock()
+        employee_repo.get_by_code.return_value = employee
+        employee_repo.get_references.return_value = []
+        attendance_repo = Mock()
+        attendance_repo.create.return_value = Mock(timestamp=Mock(isoformat=lambda: '2026-01-01T08:00:00'))
+        started = threading.Event()
+        release = threading.Event()
+        
+        def slow_verify(**kwargs):
+            started.set()
+            release.wait(5)
+            return {'score': 0.9, 'match': True, 'provider': 'mock'}
+        
+        provider = Mock()
+        provider.verify.side_effect = slow_verify
+        service = CheckInEmployeeService(
+            employee_repo=employee_repo,
+            attendance_repo=attendance_repo,
+            provider=provider,
+            prefilters=PrefilterCascade([])
+        )
+        capture = make_capture_data(seed=7)
+        results = []
+        
+        first = threading.Thread(target=lambda: results.append(service.execute('EMP001', capture)))
+        first.start()
+        started.wait(5)
+        second = threading.Thread(target=lambda: results.append(service.execute('EMP001', capture)))
+        second.start()
+        time.sleep(0.05)
+        release.set()
+        first.join()
+        second.join()
+        
+        self.assertEqual(provider.verify.call_count, 1)
+        self.assertEqual(attendance_repo.create.call_count, 1)
+        self.assertEqual(results[0], results[1])
+
+
+@override_settings(
+    MEDIA_ROOT=tempfile.mkdtemp(),
+    CHECKIN_SINGLEFLIGHT_ADVISORY_LOCK=True,
+    CHECKIN_SINGLEFLIGHT_WINDOW_SECONDS=60
+)
+class CheckInAdvisoryLockTestCase(TestCase):
+    """Tests del modo entre workers con advisory lock."""
+    
+    def test_repeated_capture_reuses_event(self):
+        """Test que la misma captura dentro de la ventana reutiliza el evento."""
+        employee = create_employees(1, prefix='SF')[0]
+        provider = Mock()
+        provider.verify.return_value = {'score': 0.9, 'match': True, 'provider': 'mock'}
+        service = CheckInEmployeeService(provider=provider, prefilters=PrefilterCascade([]))
+        capture = make_capture_data(seed=8)
+        
+        first = service.execute(employee.employee_code, capture)
+        second = service.execute(employee.employee_code, capture)
+        service.execute(employee.employee_code, make_capture_data(seed=9))
+        
+        self.assertEqual(first, second)
+        self.assertEqual(provider.verify.call_count, 2)
+        self.assertEqual(AttendanceEvent.objects.filter(employee=employee).count(), 2)
+    
+    def test_provider_runs_outside_transaction(self):
+        """Test que la verificación no abre una transacción y el lock se libera al terminar."""
+        employee = create_employees(1, prefix='SF')[0]
+        depth = len(connection.atomic_blocks)
+        depths = []
+        provider = Mock()
+        provider.verify.side_effect = lambda **kwargs: depths.append(len(connection.atomic_blocks)) or {
+            'score': 0.9, 'match': True, 'provider': 'mock'
+        }
+        service = CheckInEmployeeService(provider=provider, prefilters=PrefilterCascade([]))
+        
+        service.execute(employee.employee_code, make_capture_data(seed=10))
+        
+        self.assertEqual(depths, [depth])
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT count(*) FROM pg_locks WHERE locktype = 'advisory' AND pid = pg_backend_pid()"
+            )
+            self.assertEqual(cursor.fetchone()[0], 0)
+    
+    def test_capture_outside_window_is_not_reused(self):
+        """Test que un evento con la misma captura fuera de la ventana no se reutiliza."""
+        employee = create_employees(1, prefix='SF')[0]
+        capture_hash = 'a' * 64
+        event = AttendanceRepository.create(
+            employee=employee, score=0.9, decision=True, provider_name='mock',
+            threshold_used=0.8, capture_hash=capture_hash
+        )
+        AttendanceEvent.objects.filter(id=event.id).update(timestamp=timezone.now() - timedelta(minutes=5))
+        
+        since = timezone.now() - timedelta(seconds=60)
+        self.assertIsNone(AttendanceRepository.get_recent_by_capture(employee.employee_code, capture_hash, since))
+        self.assertEqual(
+            AttendanceRepository.get_recent_by_capture(employee.employee_code, capture_hash, since - timedelta(minutes=10)).id,
+            event.id
+        )
+    
+    def test_lookup_reads_only_latest_events(self):
+        """Test que la búsqueda solo revisa los últimos max_events eventos del empleado."""
+        employee = create_employees(1, prefix='SF')[0]
+        capture_hash = 'b' * 64
+        event = AttendanceRepository.create(
+            employee=employee, score=0.9, decision=True, provider_name='mock',
+            threshold_used=0.8, capture_hash=capture_hash
+        )
+        for _ in range(3):
+            AttendanceRepository.create(
+                employee=employee, score=0.9, decision=True, provider_name='mock',
+                threshold_used=0.8, capture_hash='c' * 64
+            )
+        since = timezone.now() - timedelta(seconds=60)
+        
+        self.assertEqual(
+            AttendanceRepository.get_recent_by_capture(employee.employee_code, capture_hash, since).id,
+            event.id
+        )
+        self.assertIsNone(
+            AttendanceRepository.get_recent_by_capture(employee.employee_code, capture_hash, since, max_events=3)
+        )
+        # Sin eventos en la ventana no se busca el hash
+        with self.assertNumQueries(1):
+            AttendanceRepository.get_recent_by_capture(employee.employee_code, capture_hash, timezone.now())
+    
+    def test_capture_hash_is_not_indexed(self):
+        """Test que capture_hash no tiene índice propio en la tabla de solo inserción."""
+        with connection.cursor() as cursor:
+            constraints = connection.introspection.get_constraints(cursor, AttendanceEvent._meta.db_table)
+        
+        self.assertFalse([
+            name for name, constraint in constraints.items()
+            if constraint['index'] and constraint['columns'] == ['capture_hash']
+        ])
+
+
+if __name__ == '__main__':
+    unittest.main()
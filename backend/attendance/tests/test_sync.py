@@ -0,0 +1,71 @@
+"""
+Tests for the incremental roster sync endpoint.
+"""
+import tempfile
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+from attendance.benchmarks.fixtures import create_employees
+from attendance.models import EmployeeTombstone
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp(), EMPLOYEE_SYNC_LAG_SECONDS=0)
+class EmployeeSyncTestCase(TestCase):
+    """Tests para GET /api/employees/sync/."""
+    
+    def setUp(self):
+        """Configurar test."""
+        self.client = APIClient()
+        self.employees = create_employees(3, prefix='SYN')
+    
+    def sync(self, cursor=None, **params):
+        if cursor:
+            params['cursor'] = cursor
+        response = self.client.get('/api/employees/sync/', params)
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+    
+    def test_initial_sync_returns_full_roster(self):
+        """Test que sin cursor se devuelve el padrón completo con los nombres de campos."""
+        data = self.sync()
+        
+        self.assertEqual(data['fields'], ['id', 'employee_code', 'full_name', 'active', 'photo'])
+        self.assertEqual(len(data['upserts']), 3)
+        self.assertEqual(data['deletes'], [])
+        self.assertFalse(data['more'])
+    
+    def test_delta_contains_only_changes(self):
+        """Test que con cursor solo llegan altas, modificaciones, desactivaciones y bajas."""
+        cursor = self.sync()['cursor']
+        self.assertEqual(self.sync(cursor)['upserts'], [])
+        
+        updated, deleted = self.employees[0], self.employees[1]
+        updated.status = 'inactive'
+        updated.save()
+        deleted_id = deleted.id
+        deleted.delete()
+        
+        data = self.sync(cursor)
+        self.assertNotIn('fields', data)
+        self.assertEqual([row[0] for row in data['upserts']], [updated.id])
+        self.assertEqual(data['upserts'][0][3], 0)
+        self.assertEqual(data['deletes'], [deleted_id])
+        self.assertTrue(EmployeeTombstone.objects.filter(employee_id=deleted_id).exists())
+        
+        following = self.sync(data['cursor'])
+        self.assertEqual((following['upserts'], following['deletes']), ([], []))
+    
+    def test_pagination_with_limit(self):
+        """Test que limit pagina con more y el cursor continúa donde quedó."""
+        first = self.sync(limit=2)
+        self.assertTrue(first['more'])
+        second = self.sync(first['cursor'], limit=2)
+        self.assertFalse(second['more'])
+        
+        ids = [row[0] for row in first['upserts'] + second['upserts']]
+        self.assertEqual(sorted(ids), sorted(employee.id for employee in self.employees))
+    
+    def test_invalid_cursor_returns_400(self):
+        """Test que un cursor malformado responde 400."""
+        response = self.client.get('/api/employees/sync/', {'cursor': 'no-es-un-cursor'})
+        
+        self.assertEqual(response.status_code, 400)
@@ -8,8 +8,11 @@ from attendance import views
 router = DefaultRouter()
 router.register(r'employees', views.EmployeeViewSet, basename='employee')
 router.register(r'attendance-events', views.AttendanceEventViewSet, basename='attendance-event')
+router.register(r'employee-purge-jobs', views.EmployeePurgeJobViewSet, basename='employee-purge-job')
 
 urlpatterns = [
+    # Antes del router, que tomaría "stream" como pk de attendance-events
+    path('attendance-events/stream/', views.attendance_event_stream, name='attendance-event-stream'),
     path('', include(router.urls)),
     path('check-in/', views.CheckInView.as_view(), name='check-in'),
 ]
@@ -1,29 +1,56 @@
 """
 Views for attendance API.
 """
+import asyncio
 import logging
+import time
+from datetime import datetime, timedelta
+from asgiref.sync import sync_to_async
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.views import APIView
+from django.conf import settings
 from django.core.exceptions import ValidationError
-from django.http import Http404
-from attendance.models import Employee, AttendanceEvent
+from django.http import Http404, HttpResponse, JsonResponse, StreamingHttpResponse
+from django.utils import timezone
+from attendance.admission import KIOSK_HEADER, CheckInThrottle, limit_concurrency
+from attendance.cache import (
+    etag_matches,
+    get_cached_roster,
+    get_roster_version,
+    roster_cache_enabled,
+    roster_etag,
+    roster_variant,
+    set_cached_roster,
+)
+from attendance.cluster import FORWARDED_HEADER, NODE_HEADER, get_cluster
+from attendance.events import TooManySubscribers, encode_message, event_payload, get_event_broker, get_event_listener
+from attendance.models import Employee, EmployeePurgeJob, EmployeeReference, AttendanceEvent
 from attendance.serializers import (
     EmployeeSerializer,
+    EmployeeListSerializer,
     EmployeeCreateSerializer,
     EmployeeUpdateSerializer,
+    EmployeeReferenceSerializer,
+    EmployeeReferenceCreateSerializer,
     CheckInSerializer,
     CheckInResponseSerializer,
     AttendanceEventSerializer,
+    AttendanceEventListSerializer,
+    EmployeePurgeJobSerializer,
 )
 from attendance.services import (
     CreateEmployeeService,
     UpdateEmployeeService,
     DeleteEmployeeService,
+    DeleteEmployeeReferenceService,
     CheckInEmployeeService,
+    EmployeeSyncService,
 )
-from attendance.repositories import EmployeeRepository
+from attendance.repositories import AttendanceRepository, EmployeeRepository
+from attendance.metrics import render_latest
+from attendance.presence import get_presence_board
 
 logger = logging.getLogger(__name__)
 
@@ -41,6 +68,8 @@ class EmployeeViewSet(viewsets.ModelViewSet):
             return EmployeeCreateSerializer
         elif self.action in ['update', 'partial_update']:
             return EmployeeUpdateSerializer
+        elif self.action in ['list', 'active', 'search']:
+            return EmployeeListSerializer
         return EmployeeSerializer
     
     def create(self, request, *args, **kwargs):
@@ -109,7 +138,12 @@ class EmployeeViewSet(viewsets.ModelViewSet):
             )
     
     def destroy(self, request, *args, **kwargs):
-        """Eliminar empleado."""
+        """
+        Eliminar empleado.
+        
+        La baja es inmediata; el historial se purga en segundo plano
+        (ver /api/employee-purge-jobs/).
+        """
         instance = self.get_object()
         
         try:
@@ -128,28 +162,148 @@ class EmployeeViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
     
+    def list(self, request, *args, **kwargs):
+        """Listar empleados (cacheado por versión del padrón, con ETag)."""
+        parent_list = super().list
+        return self._versioned_response(request, lambda: parent_list(request, *args, **kwargs).data)
+    
     @action(detail=False, methods=['get'])
     def active(self, request):
         """Listar solo empleados activos."""
-        active_employees = Employee.objects.filter(status='active')
-        serializer = self.get_serializer(active_employees, many=True)
-        return Response(serializer.data)
+        def build():
+            active_employees = Employee.objects.filter(status='active')
+            serializer = self.get_serializer(active_employees, many=True)
+            return serializer.data
+        return self._versioned_response(request, build)
+    
+    @action(detail=False, methods=['get'])
+    def sync(self, request):
+        """
+        Cambios del padrón desde un cursor, para kioscos con copia local.
+        
+        Parámetros: cursor (de la respuesta anterior; sin él se devuelve el
+        padrón completo) y limit. Mientras more sea true el kiosco debe
+        volver a pedir con el cursor nuevo.
+        """
+        page_size = getattr(settings, 'EMPLOYEE_SYNC_PAGE_SIZE', 500)
+        try:
+            limit = min(int(request.query_params.get('limit', page_size)), page_size)
+        except ValueError:
+            return Response({'error': 'limit inválido'}, status=status.HTTP_400_BAD_REQUEST)
+        if limit < 1:
+            return Response({'error': 'limit inválido'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        service = EmployeeSyncService(lag_seconds=getattr(settings, 'EMPLOYEE_SYNC_LAG_SECONDS', 2.0))
+        try:
+            data = service.execute(cursor=request.query_params.get('cursor'), limit=limit)
+        except ValidationError as e:
+            return Response({'error': e.messages[0]}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(data, headers={'Cache-Control': 'no-store'})
+    
+    @action(detail=False, methods=['get'])
+    def search(self, request):
+        """
+        Buscar empleados por nombre o código (?q=), paginado y ordenado por relevancia.
+        
+        No distingue acentos ni mayúsculas: "jose perez" encuentra "José Pérez".
+        """
+        term = request.query_params.get('q', '').strip()
+        if not term:
+            return Response({'error': 'El parámetro q es requerido'}, status=status.HTTP_400_BAD_REQUEST)
+        queryset = EmployeeRepository.search(term[:100])
+        page = self.paginate_queryset(queryset)
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
+    
+    @action(detail=True, methods=['get', 'post'])
+    def references(self, request, pk=None):
+        """
+        Referencias faciales adicionales del empleado.
+        
+        GET lista las referencias; POST (multipart: image, label) agrega una.
+        El check-in compara la captura con photo_ref y con todas ellas.
+        """
+        employee = self.get_object()
+        if request.method == 'GET':
+            serializer = EmployeeReferenceSerializer(
+                EmployeeRepository.get_references(employee), many=True, context={'request': request}
+            )
+            return Response(serializer.data)
+        
+        serializer = EmployeeReferenceCreateSerializer(
+            data=request.data, context={'request': request, 'employee_id': employee.id}
+        )
+        serializer.is_valid(raise_exception=True)
+        try:
+            reference = serializer.save()
+        except ValidationError as e:
+            return Response({'error': e.messages[0]}, status=status.HTTP_400_BAD_REQUEST)
+        response_serializer = EmployeeReferenceSerializer(reference, context={'request': request})
+        return Response(response_serializer.data, status=status.HTTP_201_CREATED)
+    
+    @action(detail=True, methods=['delete'], url_path=r'references/(?P<reference_id>[0-9]+)')
+    def delete_reference(self, request, pk=None, reference_id=None):
+        """Eliminar una referencia adicional del empleado."""
+        employee = self.get_object()
+        try:
+            DeleteEmployeeReferenceService().execute(employee.id, int(reference_id))
+        except EmployeeReference.DoesNotExist:
+            return Response({'error': 'Referencia no encontrada'}, status=status.HTTP_404_NOT_FOUND)
+        return Response(status=status.HTTP_204_NO_CONTENT)
+    
+    def _versioned_response(self, request, build):
+        """
+        Responder un listado del padrón con ETag y caché por versión.
+        
+        Si el If-None-Match del cliente coincide con la versión actual se
+        responde 304 sin consultar la base de datos; si la respuesta de esa
+        versión ya está cacheada se devuelve sin reserializar. Si la versión
+        no es la misma en todos los workers (ver roster_cache_enabled) se
+        responde sin ETag ni caché.
+        """
+        if not roster_cache_enabled():
+            return Response(build())
+        
+        version = get_roster_version()
+        variant = roster_variant(request)
+        etag = roster_etag(version, variant)
+        headers = {'ETag': etag, 'Cache-Control': 'no-cache'}
+        if etag_matches(request, etag):
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers=headers)
+        
+        data = get_cached_roster(version, variant)
+        if data is None:
+            data = build()
+            set_cached_roster(version, variant, data, getattr(settings, 'ROSTER_CACHE_TIMEOUT', 3600))
+        return Response(data, headers=headers)
 
 
 class CheckInView(APIView):
     """
     View para registrar entrada de empleados (check-in).
+    
+    En modo cluster (ver attendance/cluster.py) un check-in de un empleado
+    de otro shard se reenvía al nodo dueño; se procesa aquí solo si no se
+    pudo conectar con él.
+    
+    El control de admisión (ver attendance/admission.py) descarta con 429
+    los kioscos o ráfagas que exceden su tasa y con 503 los requests que no
+    consiguen lugar dentro del límite de concurrencia.
     """
+    throttle_classes = [CheckInThrottle]
     
+    @limit_concurrency
     def post(self, request):
         """Registrar entrada mediante validación facial."""
-        logger.info(f"Datos recibidos en check-in: {list(request.data.keys())}")
-        logger.debug(f"Employee code recibido: {request.data.get('employee_code', 'NO ENCONTRADO')}")
-        logger.debug(f"Imagen recibida (primeros 100 chars): {str(request.data.get('capture_image', 'NO ENCONTRADO'))[:100]}")
+        # Formato diferido: los argumentos solo se formatean si el nivel está habilitado
+        # (%.100s recorta la imagen sin copiarla cuando DEBUG está apagado)
+        logger.info("Datos recibidos en check-in: %s", request.data.keys())
+        logger.debug("Employee code recibido: %s", request.data.get('employee_code', 'NO ENCONTRADO'))
+        logger.debug("Imagen recibida (primeros 100 chars): %.100s", request.data.get('capture_image', 'NO ENCONTRADO'))
         
         serializer = CheckInSerializer(data=request.data)
         if not serializer.is_valid():
-            logger.error(f"Error de validación en check-in: {serializer.errors}")
+            logger.error("Error de validación en check-in: %s", serializer.errors)
             return Response(
                 {'error': 'Error de validación', 'details': serializer.errors},
                 status=status.HTTP_400_BAD_REQUEST
@@ -158,15 +312,35 @@ class CheckInView(APIView):
         employee_code = serializer.validated_data['employee_code']
         capture_image = serializer.validated_data['capture_image']
         
+        cluster = get_cluster()
+        node_headers = {NODE_HEADER: cluster.node_name} if cluster else {}
+        if cluster and not request.headers.get(FORWARDED_HEADER):
+            owner = cluster.owner(employee_code)
+            if owner != cluster.node_name:
+                forwarded = cluster.forward(
+                    owner,
+                    request.path,
+                    {'employee_code': employee_code, 'capture_image': capture_image},
+                    {
+                        'X-Site-Id': request.headers.get('X-Site-Id', ''),
+                        # El dueño aplica el límite por kiosco al kiosco original, no a este nodo
+                        KIOSK_HEADER: request.headers.get(KIOSK_HEADER) or request.META.get('REMOTE_ADDR', ''),
+                    }
+                )
+                if forwarded is not None:
+                    status_code, data, headers = forwarded
+                    return Response(data, status=status_code, headers=headers)
+        
         try:
             service = CheckInEmployeeService()
             result = service.execute(
                 employee_code=employee_code,
-                capture_image_data=capture_image
+                capture_image_data=capture_image,
+                site=request.headers.get('X-Site-Id', '')[:50]
             )
             
             response_serializer = CheckInResponseSerializer(result)
-            return Response(response_serializer.data, status=status.HTTP_200_OK)
+            return Response(response_serializer.data, status=status.HTTP_200_OK, headers=node_headers)
         
         except Employee.DoesNotExist as e:
             return Response(
@@ -179,7 +353,7 @@ class CheckInView(APIView):
                 status=status.HTTP_400_BAD_REQUEST
             )
         except Exception as e:
-            logger.error(f"Error en check-in: {e}")
+            logger.error("Error en check-in: %s", e, extra={'employee_code': employee_code})
             return Response(
                 {'error': 'Error interno del servidor'},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
@@ -193,12 +367,206 @@ class AttendanceEventViewSet(viewsets.ReadOnlyModelViewSet):
     queryset = AttendanceEvent.objects.all()
     serializer_class = AttendanceEventSerializer
     
+    def get_serializer_class(self):
+        """Serializer liviano para el listado."""
+        if self.action == 'list':
+            return AttendanceEventListSerializer
+        return AttendanceEventSerializer
+    
     def get_queryset(self):
-        """Filtrar por employee_code si se proporciona."""
-        queryset = AttendanceEvent.objects.all()
+        """Filtrar por employee_code, site y decision si se proporcionan."""
+        # Solo las columnas que se serializan (sin capture_hash ni los datos del empleado)
+        queryset = AttendanceEvent.objects.select_related('employee').only(
+            'id', 'timestamp', 'score', 'decision', 'provider_name', 'threshold_used', 'site',
+            'matched_reference', 'employee__employee_code', 'employee__full_name'
+        )
         employee_code = self.request.query_params.get('employee_code', None)
+        site = self.request.query_params.get('site', None)
+        decision = self.request.query_params.get('decision', None)
         
         if employee_code:
             queryset = queryset.filter(employee__employee_code=employee_code)
+        if site:
+            queryset = queryset.filter(site=site)
+        if decision in ('true', 'false'):
+            queryset = queryset.filter(decision=decision == 'true')
+        
+        # Orden de inserción = orden cronológico (ver AttendanceEvent.Meta)
+        return queryset.order_by('-id')
+    
+    @action(detail=False, methods=['get'])
+    def daily(self, request):
+        """
+        Check-ins aceptados y rechazados por día.
         
-        return queryset.order_by('-timestamp')
+        Parámetros: from y to (AAAA-MM-DD, to exclusivo; por defecto los
+        últimos 30 días) y employee_code opcional.
+        """
+        try:
+            until = _parse_day(request.query_params.get('to')) or timezone.now()
+            since = _parse_day(request.query_params.get('from')) or until - timedelta(days=30)
+        except ValueError:
+            return Response({'error': 'Fecha inválida (usar AAAA-MM-DD)'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        employee = None
+        employee_code = request.query_params.get('employee_code')
+        if employee_code:
+            employee = EmployeeRepository.get_by_code(employee_code)
+            if employee is None:
+                return Response({'error': 'Empleado no encontrado'}, status=status.HTTP_404_NOT_FOUND)
+        return Response({'results': AttendanceRepository.get_daily_counts(since, until, employee)})
+    
+    @action(detail=False, methods=['get'])
+    def presence(self, request):
+        """Empleados presentes (último check-in aceptado dentro de la ventana), desde memoria."""
+        present = get_presence_board().present(site=request.query_params.get('site') or None)
+        return Response({'count': len(present), 'results': present})
+    
+    @action(detail=False, methods=['get'])
+    def recent(self, request):
+        """Últimos check-ins de un empleado (?employee_code=), desde memoria."""
+        employee_code = request.query_params.get('employee_code')
+        if not employee_code:
+            return Response({'error': 'employee_code es requerido'}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            limit = int(request.query_params.get('limit', 0)) or None
+        except ValueError:
+            return Response({'error': 'limit inválido'}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({'results': get_presence_board().recent(employee_code, limit=limit)})
+
+
+class EmployeePurgeJobViewSet(viewsets.ReadOnlyModelViewSet):
+    """
+    ViewSet de solo lectura para el avance de las purgas de empleados dados de baja.
+    """
+    queryset = EmployeePurgeJob.objects.all()
+    serializer_class = EmployeePurgeJobSerializer
+    
+    def get_queryset(self):
+        """Filtrar por status y employee_code si se proporcionan."""
+        queryset = EmployeePurgeJob.objects.all()
+        job_status = self.request.query_params.get('status', None)
+        employee_code = self.request.query_params.get('employee_code', None)
+        
+        if job_status:
+            queryset = queryset.filter(status=job_status)
+        if employee_code:
+            queryset = queryset.filter(employee_code=employee_code)
+        return queryset
+
+
+def _parse_day(value):
+    if not value:
+        return None
+    return timezone.make_aware(datetime.strptime(value, '%Y-%m-%d'))
+
+
+# Espera máxima a que el listener de eventos escuche antes de suscribir un stream
+EVENT_LISTENER_WAIT_SECONDS = 5
+
+
+def _csv_param(request, name: str) -> list:
+    return [value for value in request.GET.get(name, '').split(',') if value]
+
+
+def _last_event_id(request):
+    try:
+        return int(request.headers.get('Last-Event-ID', ''))
+    except ValueError:
+        return None
+
+
+async def _replay(last_event_id: int, employee_codes: list, sites: list, sent: list):
+    """Reenviar desde la base los eventos posteriores a Last-Event-ID, anotando el último en sent."""
+    missed = await sync_to_async(AttendanceRepository.get_after_id)(
+        last_event_id, employee_codes, sites,
+        limit=getattr(settings, 'EVENT_STREAM_REPLAY_LIMIT', 100)
+    )
+    for event in missed:
+        yield encode_message(event_payload(event))
+        sent.append(event.id)
+
+
+async def _follow(subscription, replayed_up_to, heartbeat: float, deadline: float):
+    """Enviar los eventos de la suscripción, con keepalives, hasta `deadline`."""
+    while True:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return
+        try:
+            item = await asyncio.wait_for(subscription.queue.get(), timeout=min(heartbeat, remaining))
+        except asyncio.TimeoutError:
+            if time.monotonic() < deadline:
+                yield ': keepalive\n\n'
+            continue
+        if item is None:
+            # Consumidor lento o listener reconectado: se corta y el
+            # cliente reconecta con Last-Event-ID
+            yield 'event: dropped\ndata: {}\n\n'
+            return
+        event_id, message = item
+        if replayed_up_to is not None and event_id <= replayed_up_to:
+            continue
+        yield message
+
+
+async def attendance_event_stream(request):
+    """
+    Stream en vivo de eventos de asistencia (server-sent events).
+    
+    Parámetros opcionales employee_code y site (separados por comas)
+    filtran los eventos. Con el header Last-Event-ID (lo envía EventSource
+    al reconectar) primero se reenvían desde la base de datos los eventos
+    posteriores a ese ID. Requiere un servidor ASGI.
+    """
+    if not getattr(settings, 'EVENT_STREAM_ENABLED', False):
+        return JsonResponse(
+            {'error': 'Stream de eventos desactivado (EVENT_STREAM_ENABLED)'},
+            status=status.HTTP_404_NOT_FOUND
+        )
+    employee_codes = _csv_param(request, 'employee_code')
+    sites = _csv_param(request, 'site')
+    listener = get_event_listener()
+    if listener is not None and not listener.live:
+        # Suscribirse antes de que escuche el canal perdería los eventos de otros procesos
+        await sync_to_async(listener.wait_live, thread_sensitive=False)(EVENT_LISTENER_WAIT_SECONDS)
+    broker = get_event_broker()
+    try:
+        subscription = broker.subscribe(employee_codes=employee_codes, sites=sites)
+    except TooManySubscribers:
+        return JsonResponse(
+            {'error': 'Demasiados suscriptores, reintentar más tarde'},
+            status=status.HTTP_503_SERVICE_UNAVAILABLE
+        )
+    
+    last_event_id = _last_event_id(request)
+    heartbeat = getattr(settings, 'EVENT_STREAM_HEARTBEAT_SECONDS', 15)
+    # Cerrar periódicamente: ASGI en Django 4.2 no avisa si el cliente se
+    # desconecta, y EventSource reconecta solo sin perder eventos (Last-Event-ID)
+    deadline = time.monotonic() + getattr(settings, 'EVENT_STREAM_MAX_SECONDS', 300)
+    
+    async def stream():
+        try:
+            yield 'retry: 3000\n\n'
+            # La suscripción es previa a la reproducción: un evento confirmado
+            # entre ambas llega por las dos vías y se envía una sola vez
+            replayed = []
+            if last_event_id is not None:
+                async for message in _replay(last_event_id, employee_codes, sites, replayed):
+                    yield message
+            async for message in _follow(subscription, replayed[-1] if replayed else None, heartbeat, deadline):
+                yield message
+        finally:
+            broker.unsubscribe(subscription)
+    
+    response = StreamingHttpResponse(stream(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    # Desactivar el buffering de nginx para que cada evento salga enseguida
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
+def metrics_view(request):
+    """Exponer métricas en formato de texto de Prometheus."""
+    content, content_type = render_latest()
+    return HttpResponse(content, content_type=content_type)
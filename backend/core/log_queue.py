@@ -0,0 +1,134 @@
+"""
+Non-blocking logging handlers.
+
+Records are put on a bounded in-memory queue by the thread that logs and
+written to the real handlers by a background ``QueueListener`` thread, so a
+slow stream (pipe, docker log driver, disk) never blocks a request.
+
+The listener thread and its queue are created on the first record a process
+emits, not while settings load: a server that forks its workers after
+importing the application (``gunicorn --preload``) would otherwise leave
+every worker with a queue nobody drains.
+"""
+import atexit
+import logging
+import os
+import queue
+import threading
+from logging.handlers import QueueHandler, QueueListener
+from typing import Sequence
+from django.utils.module_loading import import_string
+
+
+class NonBlockingQueueHandler(QueueHandler):
+    """QueueHandler que descarta registros si la cola está llena en vez de bloquear."""
+    
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+    
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        """
+        Dejar el formateo para el hilo del listener.
+        
+        QueueHandler.prepare formatea el mensaje en el hilo que loguea; acá
+        solo se resuelve el traceback, que referencia frames del request.
+        Los argumentos del mensaje se formatean después, así que no deben
+        modificarse tras loguearlos.
+        """
+        if record.exc_info:
+            if not record.exc_text:
+                record.exc_text = _exception_formatter.formatException(record.exc_info)
+            record.exc_info = None
+        return record
+    
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+_exception_formatter = logging.Formatter()
+
+
+class ListenerQueueHandler(NonBlockingQueueHandler):
+    """
+    NonBlockingQueueHandler con su QueueListener propio, iniciado por proceso.
+    
+    Los handlers destino son del propio handler (no se buscan entre los
+    configurados); los que no tienen formatter usan el de este handler,
+    asignado por dictConfig con la clave 'formatter'.
+    """
+    
+    def __init__(
+        self,
+        targets: Sequence[logging.Handler],
+        queue_size: int = 10000,
+        respect_handler_level: bool = True
+    ):
+        """
+        Inicializar ListenerQueueHandler.
+        
+        Args:
+            targets: Handlers destino
+            queue_size: Tamaño máximo de la cola (<= 0 para ilimitada)
+            respect_handler_level: Si el listener respeta el nivel de cada handler
+        """
+        super().__init__(queue.Queue(maxsize=max(queue_size, 0)))
+        self.targets = list(targets)
+        self.queue_size = queue_size
+        self.respect_handler_level = respect_handler_level
+        self.listener = None
+        self._pid = None
+        self._start_lock = threading.Lock()
+        atexit.register(self.stop_listener)
+    
+    def enqueue(self, record: logging.LogRecord) -> None:
+        if self._pid != os.getpid():
+            self._start_listener()
+        super().enqueue(record)
+    
+    def _start_listener(self) -> None:
+        with self._start_lock:
+            if self._pid == os.getpid():
+                return
+            for target in self.targets:
+                if target.formatter is None and self.formatter is not None:
+                    target.setFormatter(self.formatter)
+            # Tras un fork, la cola heredada puede tener registros del padre y su
+            # listener no existe en este proceso: se empieza con una cola nueva
+            self.queue = queue.Queue(maxsize=max(self.queue_size, 0))
+            self.listener = QueueListener(self.queue, *self.targets, respect_handler_level=self.respect_handler_level)
+            self.listener.start()
+            self._pid = os.getpid()
+    
+    def stop_listener(self) -> None:
+        """Vaciar la cola y detener el listener de este proceso (si se inició)."""
+        with self._start_lock:
+            if self._pid == os.getpid() and self.listener is not None:
+                self.listener.stop()
+                self._pid = None
+
+
+def queue_handler(
+    targets: Sequence[str] = ('logging.StreamHandler',),
+    queue_size: int = 10000,
+    respect_handler_level: bool = True
+) -> QueueHandler:
+    """
+    Factory para LOGGING (clave '()') del handler con cola.
+    
+    Args:
+        targets: Clases de los handlers destino (rutas importables, sin argumentos)
+        queue_size: Tamaño máximo de la cola (<= 0 para ilimitada)
+        respect_handler_level: Si el listener respeta el nivel de cada handler
+    
+    Returns:
+        Handler a asociar a los loggers
+    """
+    return ListenerQueueHandler(
+        [import_string(path)() for path in targets],
+        queue_size=queue_size,
+        respect_handler_level=respect_handler_level
+    )
@@ -3,11 +3,18 @@ Django settings for attendance system.
 """
 import os
 from pathlib import Path
-from decouple import config
+from decouple import Csv, config
+from corsheaders.defaults import default_headers
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
+
+def _optional(cast):
+    """Cast para config() que deja None si la variable está vacía."""
+    return lambda value: cast(value) if value else None
+
+
 # SECURITY WARNING: keep the secret key used in production secret!
 SECRET_KEY = config('SECRET_KEY', default='django-insecure-change-me-in-production')
 
@@ -24,12 +31,14 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'rest_framework',
     'corsheaders',
     'attendance',
 ]
 
 MIDDLEWARE = [
+    'attendance.middleware.RequestProfilingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
@@ -101,15 +110,63 @@ STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
 MEDIA_URL = '/media/'
 MEDIA_ROOT = config('MEDIA_ROOT', default=os.path.join(BASE_DIR, 'media'))
 
+# Cache. Con varios workers debe ser compartida (p.ej. FileBasedCache o
+# memcached): guarda la versión del padrón de empleados (ver attendance/cache.py).
+# Con LocMemCache el caché del padrón y sus ETags se desactivan, salvo con un
+# único worker (ROSTER_CACHE_SINGLE_WORKER) o con EMPLOYEE_CACHE_ENABLED.
+CACHES = {
+    'default': {
+        'BACKEND': config('CACHE_BACKEND', default='django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': config('CACHE_LOCATION', default=''),
+    }
+}
+ROSTER_CACHE_TIMEOUT = config('ROSTER_CACHE_TIMEOUT', default=3600, cast=int)
+ROSTER_CACHE_SINGLE_WORKER = config('ROSTER_CACHE_SINGLE_WORKER', default=False, cast=bool)
+
+# Stream en vivo de eventos (GET /api/attendance-events/stream/, requiere ASGI).
+# Desactivado por defecto: con PostgreSQL cada check-in hace NOTIFY, que toma
+# un lock global al confirmar y serializa los commits de todos los check-ins
+EVENT_STREAM_ENABLED = config('EVENT_STREAM_ENABLED', default=False, cast=bool)
+EVENT_STREAM_QUEUE_SIZE = config('EVENT_STREAM_QUEUE_SIZE', default=100, cast=int)
+EVENT_STREAM_MAX_SUBSCRIBERS = config('EVENT_STREAM_MAX_SUBSCRIBERS', default=200, cast=int)
+EVENT_STREAM_HEARTBEAT_SECONDS = config('EVENT_STREAM_HEARTBEAT_SECONDS', default=15, cast=int)
+EVENT_STREAM_MAX_SECONDS = config('EVENT_STREAM_MAX_SECONDS', default=300, cast=int)
+EVENT_STREAM_REPLAY_LIMIT = config('EVENT_STREAM_REPLAY_LIMIT', default=100, cast=int)
+EVENT_STREAM_RECONNECT_MAX_SECONDS = config('EVENT_STREAM_RECONNECT_MAX_SECONDS', default=30.0, cast=float)
+
+# Tablero de presencia en memoria (attendance/presence.py)
+PRESENCE_RING_SIZE = config('PRESENCE_RING_SIZE', default=5, cast=int)
+PRESENCE_WINDOW_HOURS = config('PRESENCE_WINDOW_HOURS', default=12, cast=float)
+# Con un solo proceso puede ser 0; con varios workers acota cuánto tarda en verse un check-in de otro worker
+PRESENCE_REFRESH_SECONDS = config('PRESENCE_REFRESH_SECONDS', default=5, cast=float)
+
+# Archivo frío de eventos (manage.py archive_attendance / query_archive)
+ARCHIVE_DIR = config('ARCHIVE_DIR', default=os.path.join(BASE_DIR, 'archive'))
+ARCHIVE_AFTER_DAYS = config('ARCHIVE_AFTER_DAYS', default=365, cast=int)
+
+# Baja de empleados: purga en segundo plano del historial (manage.py purge_employees)
+# 'archive' mueve los eventos a ARCHIVE_DIR; 'delete' los elimina
+EMPLOYEE_PURGE_MODE = config('EMPLOYEE_PURGE_MODE', default='archive')
+EMPLOYEE_PURGE_CHUNK_SIZE = config('EMPLOYEE_PURGE_CHUNK_SIZE', default=500, cast=int)
+EMPLOYEE_PURGE_PAUSE_SECONDS = config('EMPLOYEE_PURGE_PAUSE_SECONDS', default=0.05, cast=float)
+# Una purga en curso sin heartbeat por más de este tiempo se considera abandonada
+EMPLOYEE_PURGE_STALE_SECONDS = config('EMPLOYEE_PURGE_STALE_SECONDS', default=300, cast=float)
+
+# Sincronización incremental del padrón (GET /api/employees/sync/)
+EMPLOYEE_SYNC_LAG_SECONDS = config('EMPLOYEE_SYNC_LAG_SECONDS', default=2.0, cast=float)
+EMPLOYEE_SYNC_PAGE_SIZE = config('EMPLOYEE_SYNC_PAGE_SIZE', default=500, cast=int)
+
 # Default primary key field type
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 # REST Framework
+FAST_JSON_RENDERER = config('FAST_JSON_RENDERER', default=True, cast=bool)
 REST_FRAMEWORK = {
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 20,
     'DEFAULT_RENDERER_CLASSES': [
-        'rest_framework.renderers.JSONRenderer',
+        # Usa orjson si está instalado; si no, es el JSONRenderer de DRF
+        'attendance.renderers.FastJSONRenderer' if FAST_JSON_RENDERER else 'rest_framework.renderers.JSONRenderer',
     ],
     'DEFAULT_PARSER_CLASSES': [
         'rest_framework.parsers.JSONParser',
@@ -126,11 +183,142 @@ CORS_ALLOWED_ORIGINS = [
 
 CORS_ALLOW_CREDENTIALS = True
 
+CORS_ALLOW_HEADERS = [
+    *default_headers,
+    'x-profile-token',
+    'x-kiosk-id',
+    'x-site-id',
+    'last-event-id',
+]
+
 # Face Verification Configuration
 FACE_VERIFICATION_THRESHOLD = config('FACE_VERIFICATION_THRESHOLD', default=0.80, cast=float)
 FACE_VERIFICATION_PROVIDER = config('FACE_VERIFICATION_PROVIDER', default='dummy')
+# Proveedores adicionales por ruta, importados en el primer uso (ver attendance/providers/registry.py):
+# FACE_VERIFICATION_PROVIDER_PATHS=arcface=acme_faces.arcface:ArcFaceProvider,otro=paquete.modulo:factory
+FACE_VERIFICATION_PROVIDER_PATHS = dict(
+    entry.split('=', 1) for entry in config('FACE_VERIFICATION_PROVIDER_PATHS', default='', cast=Csv())
+)
+# Argumentos de la factory de cada proveedor, p.ej. {'arcface': {'model_dir': '/models'}}
+FACE_VERIFICATION_PROVIDER_OPTIONS = {}
+
+# Referencias adicionales por empleado (lentes, barba, casco): la captura se compara
+# con photo_ref y todas las referencias en una llamada a verify_batch y se toma el
+# mejor score (best) o el promedio de los TOP_K mejores (top_k)
+FACE_VERIFICATION_REFERENCE_POLICY = config('FACE_VERIFICATION_REFERENCE_POLICY', default='best')
+FACE_VERIFICATION_REFERENCE_TOP_K = config('FACE_VERIFICATION_REFERENCE_TOP_K', default=2, cast=int)
+EMPLOYEE_MAX_REFERENCES = config('EMPLOYEE_MAX_REFERENCES', default=5, cast=int)
+# Imágenes de referencia en memoria por proceso (0 = leer del storage en cada check-in)
+REFERENCE_CACHE_MAX_MB = config('REFERENCE_CACHE_MAX_MB', default=64, cast=float)
+
+# Modo cluster (vacío = desactivado): los códigos de empleado se reparten por hashing
+# consistente entre los nodos y cada nodo cachea solo las referencias de su shard.
+# Un check-in de otro shard se reenvía al dueño; solo se procesa localmente si no se pudo conectar.
+# CLUSTER_NODES=node1=http://10.0.0.1:8000,node2=http://10.0.0.2:8000 (igual en todos)
+CLUSTER_NODES = dict(entry.split('=', 1) for entry in config('CLUSTER_NODES', default='', cast=Csv()))
+CLUSTER_NODE_NAME = config('CLUSTER_NODE_NAME', default='')
+CLUSTER_VIRTUAL_NODES = config('CLUSTER_VIRTUAL_NODES', default=100, cast=int)
+CLUSTER_FORWARD_TIMEOUT = config('CLUSTER_FORWARD_TIMEOUT', default=5.0, cast=float)
+CLUSTER_NODE_COOLDOWN_SECONDS = config('CLUSTER_NODE_COOLDOWN_SECONDS', default=10.0, cast=float)
+
+# Empleados en memoria por proceso (solo PostgreSQL): cada worker escucha con
+# LISTEN el canal de cambios de empleados y los descarta al recibir el NOTIFY
+EMPLOYEE_CACHE_ENABLED = config('EMPLOYEE_CACHE_ENABLED', default=False, cast=bool)
+EMPLOYEE_CACHE_MAX_ENTRIES = config('EMPLOYEE_CACHE_MAX_ENTRIES', default=10000, cast=int)
+EMPLOYEE_CACHE_RECONNECT_MAX_SECONDS = config('EMPLOYEE_CACHE_RECONNECT_MAX_SECONDS', default=30.0, cast=float)
+
+# Proveedor compuesto (FACE_VERIFICATION_PROVIDER=composite): consulta en paralelo
+# los proveedores listados y decide según la política
+# (first_confident | majority | weighted_average)
+FACE_VERIFICATION_COMPOSITE_PROVIDERS = config('FACE_VERIFICATION_COMPOSITE_PROVIDERS', default='dummy', cast=Csv())
+FACE_VERIFICATION_COMPOSITE_POLICY = config('FACE_VERIFICATION_COMPOSITE_POLICY', default='first_confident')
+FACE_VERIFICATION_COMPOSITE_WEIGHTS = config('FACE_VERIFICATION_COMPOSITE_WEIGHTS', default='', cast=Csv(float))
+FACE_VERIFICATION_COMPOSITE_MARGIN = config('FACE_VERIFICATION_COMPOSITE_MARGIN', default=0.10, cast=float)
+FACE_VERIFICATION_COMPOSITE_TIMEOUT = config('FACE_VERIFICATION_COMPOSITE_TIMEOUT', default=None, cast=_optional(float))
+
+# Proveedor simulado para pruebas de capacidad (FACE_VERIFICATION_PROVIDER=simulated):
+# scoring de dummy con latencia fixed | normal | lognormal | pareto, espera por
+# sleep o cpu y fallas inyectadas. Ver attendance/providers/simulated_provider.py
+FACE_VERIFICATION_SIMULATION_DISTRIBUTION = config('FACE_VERIFICATION_SIMULATION_DISTRIBUTION', default='fixed')
+FACE_VERIFICATION_SIMULATION_LATENCY_MS = config('FACE_VERIFICATION_SIMULATION_LATENCY_MS', default=50.0, cast=float)
+FACE_VERIFICATION_SIMULATION_STDDEV_MS = config('FACE_VERIFICATION_SIMULATION_STDDEV_MS', default=10.0, cast=float)
+FACE_VERIFICATION_SIMULATION_SIGMA = config('FACE_VERIFICATION_SIMULATION_SIGMA', default=0.5, cast=float)
+FACE_VERIFICATION_SIMULATION_ALPHA = config('FACE_VERIFICATION_SIMULATION_ALPHA', default=1.5, cast=float)
+FACE_VERIFICATION_SIMULATION_MAX_LATENCY_MS = config(
+    'FACE_VERIFICATION_SIMULATION_MAX_LATENCY_MS', default=None, cast=_optional(float)
+)
+FACE_VERIFICATION_SIMULATION_MODE = config('FACE_VERIFICATION_SIMULATION_MODE', default='sleep')
+FACE_VERIFICATION_SIMULATION_BATCH_ITEM_MS = config('FACE_VERIFICATION_SIMULATION_BATCH_ITEM_MS', default=0.0, cast=float)
+FACE_VERIFICATION_SIMULATION_ERROR_RATE = config('FACE_VERIFICATION_SIMULATION_ERROR_RATE', default=0.0, cast=float)
+FACE_VERIFICATION_SIMULATION_TIMEOUT_RATE = config('FACE_VERIFICATION_SIMULATION_TIMEOUT_RATE', default=0.0, cast=float)
+FACE_VERIFICATION_SIMULATION_TIMEOUT_SECONDS = config('FACE_VERIFICATION_SIMULATION_TIMEOUT_SECONDS', default=30.0, cast=float)
+FACE_VERIFICATION_SIMULATION_SEED = config('FACE_VERIFICATION_SIMULATION_SEED', default=None, cast=_optional(int))
+
+# Micro-batching: agrupa llamadas concurrentes a verify() en lotes de hasta
+# FACE_VERIFICATION_BATCH_MAX_SIZE, esperando como máximo ..._MAX_WAIT_MS
+FACE_VERIFICATION_BATCHING = config('FACE_VERIFICATION_BATCHING', default=False, cast=bool)
+FACE_VERIFICATION_BATCH_MAX_SIZE = config('FACE_VERIFICATION_BATCH_MAX_SIZE', default=16, cast=int)
+FACE_VERIFICATION_BATCH_MAX_WAIT_MS = config('FACE_VERIFICATION_BATCH_MAX_WAIT_MS', default=5.0, cast=float)
+
+# Evaluación en sombra: proveedor candidato ejecutado en segundo plano sobre los
+# check-ins reales (vacío = desactivado). Ver attendance/shadow.py
+FACE_VERIFICATION_SHADOW_PROVIDER = config('FACE_VERIFICATION_SHADOW_PROVIDER', default='')
+SHADOW_QUEUE_SIZE = config('SHADOW_QUEUE_SIZE', default=100, cast=int)
+SHADOW_WORKERS = config('SHADOW_WORKERS', default=1, cast=int)
+SHADOW_SAMPLE_RATE = config('SHADOW_SAMPLE_RATE', default=1.0, cast=float)
+
+# Pre-filtros antes del proveedor, en orden: size, brightness, blur, face (requiere
+# opencv-python-headless), phash. Vacío = desactivado (ver attendance/services/prefilters.py)
+FACE_VERIFICATION_PREFILTERS = config('FACE_VERIFICATION_PREFILTERS', default='', cast=Csv())
+FACE_VERIFICATION_PREFILTER_OPTIONS = {
+    'size': {
+        'min_width': config('PREFILTER_MIN_WIDTH', default=160, cast=int),
+        'min_height': config('PREFILTER_MIN_HEIGHT', default=160, cast=int),
+    },
+    'brightness': {
+        'min_mean': config('PREFILTER_MIN_BRIGHTNESS', default=25.0, cast=float),
+        'max_mean': config('PREFILTER_MAX_BRIGHTNESS', default=235.0, cast=float),
+    },
+    'blur': {
+        'min_variance': config('PREFILTER_MIN_BLUR_VARIANCE', default=60.0, cast=float),
+    },
+    'phash': {
+        'reject_distance': config('PREFILTER_PHASH_REJECT_DISTANCE', default=48, cast=int),
+    },
+}
+
+# Control de admisión del check-in (ver attendance/admission.py). Tasas en
+# requests/segundo por proceso; 0 desactiva cada límite.
+CHECKIN_KIOSK_RATE = config('CHECKIN_KIOSK_RATE', default=0.0, cast=float)
+CHECKIN_KIOSK_BURST = config('CHECKIN_KIOSK_BURST', default=5, cast=int)
+CHECKIN_GLOBAL_RATE = config('CHECKIN_GLOBAL_RATE', default=0.0, cast=float)
+CHECKIN_GLOBAL_BURST = config('CHECKIN_GLOBAL_BURST', default=50, cast=int)
+CHECKIN_MAX_CONCURRENCY = config('CHECKIN_MAX_CONCURRENCY', default=0, cast=int)
+CHECKIN_MAX_QUEUE = config('CHECKIN_MAX_QUEUE', default=32, cast=int)
+CHECKIN_QUEUE_TIMEOUT_MS = config('CHECKIN_QUEUE_TIMEOUT_MS', default=2000, cast=int)
+
+# Agrupación de check-ins duplicados (mismo empleado y misma captura). El lock
+# entre workers es un advisory lock de sesión: no abre una transacción durante
+# la verificación, pero la conexión queda tomada mientras tanto.
+CHECKIN_SINGLEFLIGHT_ENABLED = config('CHECKIN_SINGLEFLIGHT_ENABLED', default=True, cast=bool)
+CHECKIN_SINGLEFLIGHT_ADVISORY_LOCK = config('CHECKIN_SINGLEFLIGHT_ADVISORY_LOCK', default=False, cast=bool)
+CHECKIN_SINGLEFLIGHT_WINDOW_SECONDS = config('CHECKIN_SINGLEFLIGHT_WINDOW_SECONDS', default=10, cast=int)
+
+# Request profiling (desactivado por defecto; ver attendance/middleware.py)
+REQUEST_PROFILING_ENABLED = config('REQUEST_PROFILING_ENABLED', default=False, cast=bool)
+REQUEST_PROFILING_TOKEN = config('REQUEST_PROFILING_TOKEN', default='')
+REQUEST_PROFILING_SAMPLE_RATE = config('REQUEST_PROFILING_SAMPLE_RATE', default=0.0, cast=float)
+REQUEST_PROFILING_MODE = config('REQUEST_PROFILING_MODE', default='cprofile')  # cprofile | sampling
+REQUEST_PROFILING_INTERVAL_MS = config('REQUEST_PROFILING_INTERVAL_MS', default=5.0, cast=float)
+REQUEST_PROFILING_PATH_PREFIX = config('REQUEST_PROFILING_PATH_PREFIX', default='/api/')
+REQUEST_PROFILING_DIR = config('REQUEST_PROFILING_DIR', default=os.path.join(BASE_DIR, 'profiles'))
 
 # Logging
+# Los loggers escriben en 'queue': el hilo del request solo encola el registro y
+# un QueueListener en segundo plano (uno por proceso, iniciado con el primer
+# registro) lo escribe en los handlers de 'targets' (ver core/log_queue.py).
+LOG_QUEUE_SIZE = config('LOG_QUEUE_SIZE', default=10000, cast=int)
+
 LOGGING = {
     'version': 1,
     'disable_existing_loggers': False,
@@ -141,24 +329,26 @@ LOGGING = {
         },
     },
     'handlers': {
-        'console': {
-            'class': 'logging.StreamHandler',
+        'queue': {
+            '()': 'core.log_queue.queue_handler',
+            'targets': ['logging.StreamHandler'],
             'formatter': 'verbose',
+            'queue_size': LOG_QUEUE_SIZE,
         },
     },
     'root': {
-        'handlers': ['console'],
+        'handlers': ['queue'],
         'level': 'INFO',
     },
     'loggers': {
         'django': {
-            'handlers': ['console'],
+            'handlers': ['queue'],
             'level': 'INFO',
             'propagate': False,
         },
         'attendance': {
-            'handlers': ['console'],
-            'level': 'DEBUG',
+            'handlers': ['queue'],
+            'level': config('ATTENDANCE_LOG_LEVEL', default='INFO'),
             'propagate': False,
         },
     },
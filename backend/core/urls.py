@@ -5,12 +5,16 @@ from django.contrib import admin
 from django.urls import path, include
 from django.conf import settings
 from django.conf.urls.static import static
+from django.contrib.staticfiles.urls import staticfiles_urlpatterns
+from attendance.views import metrics_view
 
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/', include('attendance.urls')),
+    path('metrics', metrics_view, name='metrics'),
 ]
 
-# Servir archivos media en desarrollo
+# Servir archivos media y estáticos (admin) en desarrollo; uvicorn no los sirve como runserver
 if settings.DEBUG:
     urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
+    urlpatterns += staticfiles_urlpatterns()